@@ -19,6 +19,7 @@ if include_path:
     sys.path.insert(0, os.path.abspath(include_path))
 
 import dump_utils as dump
+import profiling
 
 # COMPUTE:
 # Z[m_size, k_size] = max (( X[m_size, n_size] + W[n_size, k_size] ), Y[m_size, k_size])
@@ -33,13 +34,16 @@ parser.add_argument( '--k_size', type=int, default=3 )
 parser.add_argument( '--file_name', type=str, default='net_parameters.h')
 parser.add_argument( '--inc_dir', type=str)
 parser.add_argument( '--txt_dir', type=str)
+profiling.add_profile_args(parser)
 args = parser.parse_args()
+prof = profiling.start('FP16/addmax', args)
 
 # Network parameters
 m_size = args.m_size
 n_size = args.n_size
 k_size = args.k_size
 
+prof.mark('generate')
 f = open(args.file_name, "w")
 
 # Test Matrices
@@ -58,6 +62,7 @@ f.write('fp16 W[MID_CH*OUT_CH] = {'+dump.tensor_to_string(W)+'};\n')
 print("\nY is: ", Y, Y.shape, Y.dtype)
 f.write('fp16 Y[MID_CH*OUT_CH] = {'+dump.tensor_to_string(Y)+'};\n')
 
+prof.mark('compute')
 print("\nComputing add-max..")
 for m in range(m_size):
   for k in range(k_size):
@@ -72,6 +77,7 @@ print("\n\n")
 
 f.close()
 
+prof.mark('write_txt')
 # Matrices conversion to hexadecimal and txt files generation
 txt_path = args.txt_dir
 for f in os.listdir(txt_path):
@@ -130,6 +136,7 @@ header   = ' /* Header file generated by RedMulE Golden Model */\n'
 #                             Header files generation                                 #
 # ------------------------------------------------------------------------------------#
 
+prof.mark('write_headers')
 # Path to the genereted files
 inc_path = args.inc_dir
 for f in os.listdir(inc_path):
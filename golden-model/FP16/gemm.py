@@ -19,6 +19,7 @@ if include_path:
     sys.path.insert(0, os.path.abspath(include_path))
 
 import dump_utils as dump
+import profiling
 import redmule_fma as fma
 
 # COMPUTE:
@@ -36,13 +37,103 @@ parser.add_argument( '--inc_dir', type=str)
 parser.add_argument( '--txt_dir', type=str)
 parser.add_argument( '--deterministic', action='store_true',
                      help='Use incrementing W, X=1, Y=0 for debugging')
+parser.add_argument( '--hw-order', action='store_true',
+                     help='Accumulate in the engine order (only --array_height affects the result)')
+parser.add_argument( '--array_width', type=int, default=32 )
+parser.add_argument( '--array_height', type=int, default=32 )
+parser.add_argument( '--pipe_regs', type=int, default=1 )
+parser.add_argument( '--prefix_dims', type=str,
+                     help='M,N,K envelope: draw X/W/Y at this size and keep the top-left '
+                          'corner, so every run with the same envelope sees prefixes of the same data')
+parser.add_argument( '--sweep_dir', type=str,
+                     help='Golden cache for sweeps: reuse the Z of this point if present')
+parser.add_argument( '--sweep_m', type=str, help='Comma-separated M sizes to add to --sweep_dir')
+parser.add_argument( '--sweep_n', type=str, help='Comma-separated N sizes to add to --sweep_dir')
+parser.add_argument( '--sweep_k', type=str, help='Comma-separated K sizes to add to --sweep_dir')
+parser.add_argument( '--seed', type=int, default=42, help='Random data seed' )
+parser.add_argument( '--num_seeds', type=int, default=1,
+                     help='With --batch_dir: seeds seed..seed+num_seeds-1 in one batched GEMM' )
+parser.add_argument( '--batch_dir', type=str,
+                     help='Write one seed_<seed>.npz bundle (x, w, y, z bit patterns) per seed here')
+profiling.add_profile_args(parser)
 args = parser.parse_args()
+prof = profiling.start('FP16/gemm', args)
 
 # Network parameters
 m_size = args.m_size
 n_size = args.n_size
 k_size = args.k_size
 
+def parse_sizes(text, default):
+    return sorted({int(v) for v in text.split(',')}) if text else [default]
+
+# Sweep points: every combination of the requested sizes (this run included).
+# The data of all of them comes from one envelope, so a point's golden is a
+# slice of one checkpointed GEMM over the largest N (see
+# fma.matrix_multiply_checkpoints).
+sweep_m = sorted(set(parse_sizes(args.sweep_m, m_size)) | {m_size})
+sweep_n = sorted(set(parse_sizes(args.sweep_n, n_size)) | {n_size})
+sweep_k = sorted(set(parse_sizes(args.sweep_k, k_size)) | {k_size})
+sweeping = bool(args.sweep_m or args.sweep_n or args.sweep_k)
+if args.prefix_dims:
+    env_m, env_n, env_k = (int(v) for v in args.prefix_dims.split(','))
+    if env_m < sweep_m[-1] or env_n < sweep_n[-1] or env_k < sweep_k[-1]:
+        parser.error('--prefix_dims must cover the run size and every sweep size')
+else:
+    env_m, env_n, env_k = sweep_m[-1], sweep_n[-1], sweep_k[-1]
+if sweeping and not args.sweep_dir:
+    parser.error('--sweep_m/--sweep_n/--sweep_k need --sweep_dir')
+if args.num_seeds > 1 and not args.batch_dir:
+    parser.error('--num_seeds needs --batch_dir')
+if args.batch_dir and (args.deterministic or sweeping):
+    parser.error('--batch_dir needs random data and no --sweep_m/--sweep_n/--sweep_k')
+
+# Outputs per batched GEMM step (seeds x M x K); bounds the kernel temporaries
+BATCH_ELEMS = 1 << 22
+
+# Cached goldens are only valid for the same envelope, data (seed included)
+# and reduction order
+order_tag = 'hw%d' % args.array_height if args.hw_order else 'seq'
+data_tag = 'det' if args.deterministic else 'rand%d' % args.seed
+sweep_path = None
+if args.sweep_dir:
+    sweep_path = os.path.join(args.sweep_dir, '%dx%dx%d_%s_%s' % (env_m, env_n, env_k, data_tag, order_tag))
+    os.makedirs(sweep_path, exist_ok=True)
+    # The directory records the data it was computed from; a golden of other
+    # stimuli (renamed or hand-copied cache) must not be reused.
+    stamp = os.path.join(sweep_path, 'data.txt')
+    if not os.path.exists(stamp):
+        with open(stamp, 'w') as f_s:
+            f_s.write(data_tag + '\n')
+    with open(stamp) as f_s:
+        if f_s.read().strip() != data_tag:
+            parser.error('%s holds goldens of other data than %s' % (sweep_path, data_tag))
+
+def sweep_file(m, n, k):
+    return os.path.join(sweep_path, '%dx%dx%d.txt' % (m, n, k))
+
+def write_z_txt(path, z_bits):
+    with open(path, 'w') as f_s:
+        for row in z_bits:
+            f_s.write(''.join('%x ' % v for v in row) + '\n')
+
+def read_z_txt(path):
+    with open(path) as f_s:
+        return np.array([[int(v, 16) for v in line.split()] for line in f_s], dtype=np.uint16)
+
+def draw_inputs(seed):
+    torch.manual_seed(seed)
+    return torch.rand(env_m, env_n), torch.rand(env_n, env_k), torch.rand(env_m, env_k)
+
+def golden_gemm(X_, W_, Y_):
+    if args.hw_order:
+        return fma.matrix_multiply_hw_order(X_, W_, Y_, args.array_height)
+    return fma.matrix_multiply_with_bittrue_fma(X_, W_, Y_)
+
+def fp16_bits(matrix):
+    return np.asarray(matrix).astype(np.float16).view(np.uint16)
+
+prof.mark('generate')
 f = open(args.file_name, "w")
 
 # We want to perform a GEMM, of the kind Z = Y + X*W
@@ -51,20 +142,20 @@ if args.deterministic:
     # W[n][k] = n + 1 for all k → each column identical, easy to trace
     # Z[m][k] = sum_n(W[n][k]) = sum(1..N) = N*(N+1)/2 for all m,k
     # With MX quantization: values 1-64 fit in E4M3 range
-    W = torch.zeros(n_size, k_size, dtype=torch.float32)
-    for n in range(n_size):
-        W[n, :] = float(n + 1)
-    X = torch.ones(m_size, n_size, dtype=torch.float32)
-    Y = torch.zeros(m_size, k_size, dtype=torch.float32)
-    Z = torch.zeros(m_size, k_size, dtype=torch.float32)
+    W_env = torch.zeros(env_n, env_k, dtype=torch.float32)
+    for n in range(env_n):
+        W_env[n, :] = float(n + 1)
+    X_env = torch.ones(env_m, env_n, dtype=torch.float32)
+    Y_env = torch.zeros(env_m, env_k, dtype=torch.float32)
 else:
-    # Fixed seed for reproducible testing across designs
-    torch.manual_seed(42)
-    # Test Matrices
-    X = torch.rand(m_size, n_size)
-    W = torch.rand(n_size, k_size)
-    Y = torch.rand(m_size, k_size)
-    Z = torch.rand(m_size, k_size)
+    # Fixed seed (--seed, 42 by default) for reproducible testing across designs
+    # Test Matrices, drawn at the envelope size (the run size by default)
+    X_env, W_env, Y_env = draw_inputs(args.seed)
+if (env_m, env_n, env_k) != (m_size, n_size, k_size):
+    print("\n[PREFIX MODE] data drawn at envelope M,N,K = %d,%d,%d" % (env_m, env_n, env_k))
+X = X_env[:m_size, :n_size].contiguous()
+W = W_env[:n_size, :k_size].contiguous()
+Y = Y_env[:m_size, :k_size].contiguous()
 
 print("\nInput Data: ")
 print("\nX is: ", X, X.shape, X.dtype)
@@ -76,13 +167,52 @@ f.write('fp16 W[MID_CH*OUT_CH] = {'+dump.tensor_to_string(W)+'};\n')
 print("\nY is: ", Y, Y.shape, Y.dtype)
 f.write('fp16 Y[MID_CH*OUT_CH] = {'+dump.tensor_to_string(Y)+'};\n')
 
+prof.mark('compute')
 print("\nComputing matrix multiplication..")
 
 X_np = X.cpu().numpy()
 W_np = W.cpu().numpy()
 Y_np = Y.cpu().numpy()
-Z = fma.matrix_multiply_with_bittrue_fma(X_np, W_np, Y_np)
-Z = torch.from_numpy(Z).to(dtype=torch.float16)
+if sweeping:
+    # One pass over the largest point, checkpointing the accumulator at every N
+    checkpoints = fma.matrix_multiply_checkpoints(
+        X_env[:sweep_m[-1], :sweep_n[-1]].cpu().numpy(),
+        W_env[:sweep_n[-1], :sweep_k[-1]].cpu().numpy(),
+        Y_env[:sweep_m[-1], :sweep_k[-1]].cpu().numpy(),
+        sweep_n, args.hw_order, args.array_height)
+    for n in sweep_n:
+        z_bits = checkpoints[n].view(np.uint16)
+        for m in sweep_m:
+            for k in sweep_k:
+                write_z_txt(sweep_file(m, n, k), z_bits[:m, :k])
+    print("\nWrote %d sweep goldens to %s" % (len(sweep_m) * len(sweep_n) * len(sweep_k), sweep_path))
+    Z = checkpoints[n_size][:m_size, :k_size]
+elif args.batch_dir:
+    # Seeds stacked on a leading axis, one batched GEMM per chunk
+    os.makedirs(args.batch_dir, exist_ok=True)
+    seeds = list(range(args.seed, args.seed + args.num_seeds))
+    chunk = max(1, BATCH_ELEMS // (m_size * k_size))
+    for first in range(0, len(seeds), chunk):
+        group = seeds[first:first + chunk]
+        data = [[t[:rows, :cols].cpu().numpy() for t, rows, cols in
+                 zip(draw_inputs(seed), (m_size, n_size, m_size), (n_size, k_size, k_size))]
+                for seed in group]
+        Xb, Wb, Yb = (np.stack(op) for op in zip(*data))
+        Zb = golden_gemm(Xb, Wb, Yb)
+        if first == 0:
+            Z = Zb[0]
+        for i, seed in enumerate(group):
+            np.savez(os.path.join(args.batch_dir, 'seed_%d.npz' % seed),
+                     x=fp16_bits(Xb[i]), w=fp16_bits(Wb[i]), y=fp16_bits(Yb[i]),
+                     z=Zb[i].view(np.uint16), seed=seed, dims=(m_size, n_size, k_size),
+                     envelope=(env_m, env_n, env_k), order=order_tag)
+    print("\nWrote %d seed bundles to %s" % (len(seeds), args.batch_dir))
+elif sweep_path and os.path.exists(sweep_file(m_size, n_size, k_size)):
+    print("\nReusing sweep golden " + sweep_file(m_size, n_size, k_size))
+    Z = read_z_txt(sweep_file(m_size, n_size, k_size)).view(np.float16)
+else:
+    Z = golden_gemm(X_np, W_np, Y_np)
+Z = torch.from_numpy(np.ascontiguousarray(Z)).to(dtype=torch.float16)
 
 print("\nZ is: ", Z, Z.shape, Z.dtype)
 f.write('fp16 Z[IN_CH*OUT_CH] = {'+dump.tensor_to_string(Z)+'};\n')
@@ -91,6 +221,7 @@ print("\n\n")
 
 f.close()
 
+prof.mark('write_txt')
 # Matrices conversion to hexadecimal and txt files generation
 txt_path = args.txt_dir
 for f in os.listdir(txt_path):
@@ -150,10 +281,15 @@ header   = ' /* Header file generated by RedMulE Golden Model */\n'
 #                             Header files generation                                 #
 # ------------------------------------------------------------------------------------#
 
+prof.mark('write_headers')
 # Path to the genereted files
 inc_path = args.inc_dir
-for f in os.listdir(inc_path):
-    os.remove(os.path.join(inc_path, f))
+# Remove only the headers written below: inc_dir also holds the MX headers,
+# which must survive a golden rerun for the build driver to skip them.
+for f in ('x_input.h', 'x_2D.h', 'w_input.h', 'w_2D.h', 'y_input.h', 'y_2D.h',
+          'z_output.h', 'z_2D.h', 'tensor_dim.h', 'golden.h'):
+    if os.path.exists(os.path.join(inc_path, f)):
+        os.remove(os.path.join(inc_path, f))
 
 f_x = open(''+inc_path+'/x_input.h', "w")
 f_x.write(''+header+'')
@@ -19,6 +19,9 @@ if include_path:
     sys.path.insert(0, os.path.abspath(include_path))
 
 import dump_utils as dump
+import profiling
+import redmule_cast as cast
+import redmule_fma as fma
 
 # COMPUTE:
 # Z[m_size, k_size] = ( X[m_size, n_size] max W[n_size, k_size] ) + Y[m_size, k_size]
@@ -33,21 +36,32 @@ parser.add_argument( '--k_size', type=int, default=3 )
 parser.add_argument( '--file_name', type=str, default='net_parameters.h')
 parser.add_argument( '--inc_dir', type=str)
 parser.add_argument( '--txt_dir', type=str)
+parser.add_argument( '--hw-order', action='store_true',
+                     help='Accumulate in the engine order (only --array_height affects the result)')
+parser.add_argument( '--array_width', type=int, default=32 )
+parser.add_argument( '--array_height', type=int, default=32 )
+parser.add_argument( '--pipe_regs', type=int, default=1 )
+profiling.add_profile_args(parser)
 args = parser.parse_args()
+prof = profiling.start('FP8/gemm', args)
 
 # Network parameters
 m_size = args.m_size
 n_size = args.n_size
 k_size = args.k_size
 
+prof.mark('generate')
 f = open(args.file_name, "w")
 
 # We want to perform a GEMM, of the kind Z = Y + X*W
-# Test Matrices
-X = torch.rand(m_size, n_size).half()
-W = torch.rand(n_size, k_size).half()
-Y = torch.rand(m_size, k_size).half()
-Z = torch.rand(m_size, k_size).half()
+# Test Matrices, rounded (RNE) to FP8 and then cast in to FP16 as the
+# engine sees them (redmule_castin)
+X8 = cast.fp16_to_fp8_bits(torch.rand(m_size, n_size).half().numpy().view(np.uint16))
+W8 = cast.fp16_to_fp8_bits(torch.rand(n_size, k_size).half().numpy().view(np.uint16))
+Y8 = cast.fp16_to_fp8_bits(torch.rand(m_size, k_size).half().numpy().view(np.uint16))
+X = torch.from_numpy(cast.fp8_to_fp16_bits(X8).view(np.float16))
+W = torch.from_numpy(cast.fp8_to_fp16_bits(W8).view(np.float16))
+Y = torch.from_numpy(cast.fp8_to_fp16_bits(Y8).view(np.float16))
 
 print("\nInput Data: ")
 print("\nX is: ", X, X.shape, X.dtype)
@@ -59,8 +73,15 @@ f.write('fp16 W[MID_CH*OUT_CH] = {'+dump.tensor_to_string(W)+'};\n')
 print("\nY is: ", Y, Y.shape, Y.dtype)
 f.write('fp16 Y[MID_CH*OUT_CH] = {'+dump.tensor_to_string(Y)+'};\n')
 
+prof.mark('compute')
 print("\nComputing matrix multiplication..")
-Z = torch.add(input = Y, other = torch.mm(input = X, mat2 = W))
+# Bit-true FP16 accumulation, then RNE cast-out to FP8 (redmule_castout)
+if args.hw_order:
+    Z16 = fma.matrix_multiply_hw_order(X.numpy(), W.numpy(), Y.numpy(), args.array_height)
+else:
+    Z16 = fma.matrix_multiply_with_bittrue_fma(X.numpy(), W.numpy(), Y.numpy())
+Z8 = cast.fp16_to_fp8_bits(Z16.view(np.uint16))
+Z = torch.from_numpy(cast.fp8_to_fp16_bits(Z8).view(np.float16))
 
 print("\nZ is: ", Z, Z.shape, Z.dtype)
 f.write('fp16 Z[IN_CH*OUT_CH] = {'+dump.tensor_to_string(Z)+'};\n')
@@ -69,6 +90,7 @@ print("\n\n")
 
 f.close()
 
+prof.mark('write_txt')
 # Matrices conversion to hexadecimal and txt files generation
 txt_path = args.txt_dir
 for f in os.listdir(txt_path):
@@ -77,7 +99,7 @@ for f in os.listdir(txt_path):
 f_x = open(''+txt_path+'/x_input.txt', "w")
 for i in range(m_size):
     for j in range (n_size):
-        x_bin = bin(np.float16(X[i][j]).view('H') >> 8)[2:].zfill(8)
+        x_bin = bin(X8[i][j])[2:].zfill(8)
         x_hex = hex(int(x_bin, 2))[2:]
         f_x.write(x_hex)
         f_x.write(' ')
@@ -87,7 +109,7 @@ f_x.close()
 f_w = open(''+txt_path+'/w_input.txt', "w")
 for i in range(n_size):
     for j in range (k_size):
-        w_bin = bin(np.float16(W[i][j]).view('H') >> 8)[2:].zfill(8)
+        w_bin = bin(W8[i][j])[2:].zfill(8)
         w_hex = hex(int(w_bin, 2))[2:]
         f_w.write(w_hex)
         f_w.write(' ')
@@ -97,7 +119,7 @@ f_w.close()
 f_y = open(''+txt_path+'/y_input.txt', "w")
 for i in range(m_size):
     for j in range (k_size):
-        y_bin = bin(np.float16(Y[i][j]).view('H') >> 8)[2:].zfill(8)
+        y_bin = bin(Y8[i][j])[2:].zfill(8)
         y_hex = hex(int(y_bin, 2))[2:]
         f_y.write(y_hex)
         f_y.write(' ')
@@ -107,7 +129,7 @@ f_y.close()
 f_z = open(''+txt_path+'/z_output.txt', "w")
 for i in range(m_size):
     for j in range (k_size):
-        z_bin = bin(np.float16(Z[i][j]).view('H') >> 8)[2:].zfill(8)
+        z_bin = bin(Z8[i][j])[2:].zfill(8)
         z_hex = hex(int(z_bin, 2))[2:]
         f_z.write(z_hex)
         f_z.write(' ')
@@ -128,17 +150,22 @@ header   = ' /* Header file generated by RedMulE Golden Model */\n'
 #                             Header files generation                                 #
 # ------------------------------------------------------------------------------------#
 
+prof.mark('write_headers')
 # Path to the genereted files
 inc_path = args.inc_dir
-for f in os.listdir(inc_path):
-    os.remove(os.path.join(inc_path, f))
+# Remove only the headers written below: inc_dir also holds the MX headers,
+# which must survive a golden rerun for the build driver to skip them.
+for f in ('x_input.h', 'x_2D.h', 'w_input.h', 'w_2D.h', 'y_input.h', 'y_2D.h',
+          'z_output.h', 'z_2D.h', 'tensor_dim.h', 'golden.h'):
+    if os.path.exists(os.path.join(inc_path, f)):
+        os.remove(os.path.join(inc_path, f))
 
 f_x = open(''+inc_path+'/x_input.h', "w")
 f_x.write(''+header+'')
 f_x.write('uint8_t x_inp ['+x_dim+'] = {\n')
 for i in range(m_size):
     for j in range (n_size):
-        x_bin = bin(np.float16(X[i][j]).view('H') >> 8)[2:].zfill(8)
+        x_bin = bin(X8[i][j])[2:].zfill(8)
         x_hex = hex(int(x_bin, 2))[2:]
         if (i == m_size - 1 and j == n_size - 1):
           f_x.write('0x'+x_hex+' ')
@@ -153,7 +180,7 @@ f_x.write(''+header+'')
 f_x.write('uint8_t x_inp_2D ['+in_rows+']['+in_cols+'] = {\n')
 for i in range(m_size):
     for j in range (n_size):
-        x_bin = bin(np.float16(X[i][j]).view('H') >> 8)[2:].zfill(8)
+        x_bin = bin(X8[i][j])[2:].zfill(8)
         x_hex = hex(int(x_bin, 2))[2:]
         if (i == m_size - 1 and j == n_size - 1):
           f_x.write('0x'+x_hex+' ')
@@ -168,7 +195,7 @@ f_w.write(''+header+'')
 f_w.write('uint8_t w_inp ['+w_dim+'] = {\n')
 for i in range(n_size):
     for j in range (k_size):
-        w_bin = bin(np.float16(W[i][j]).view('H') >> 8)[2:].zfill(8)
+        w_bin = bin(W8[i][j])[2:].zfill(8)
         w_hex = hex(int(w_bin, 2))[2:]
         if (i == n_size - 1 and j == k_size - 1):
           f_w.write('0x'+w_hex+' ')
@@ -183,7 +210,7 @@ f_w.write(''+header+'')
 f_w.write('uint8_t w_inp_2D ['+in_cols+']['+out_cols+'] = {\n')
 for i in range(n_size):
     for j in range (k_size):
-        w_bin = bin(np.float16(W[i][j]).view('H') >> 8)[2:].zfill(8)
+        w_bin = bin(W8[i][j])[2:].zfill(8)
         w_hex = hex(int(w_bin, 2))[2:]
         if (i == n_size - 1 and j == k_size - 1):
           f_w.write('0x'+w_hex+' ')
@@ -198,7 +225,7 @@ f_y.write(''+header+'')
 f_y.write('uint8_t y_inp ['+y_dim+'] = {\n')
 for i in range(m_size):
     for j in range (k_size):
-        y_bin = bin(np.float16(Y[i][j]).view('H') >> 8)[2:].zfill(8)
+        y_bin = bin(Y8[i][j])[2:].zfill(8)
         y_hex = hex(int(y_bin, 2))[2:]
         if (i == m_size - 1 and j == k_size - 1):
           f_y.write('0x'+y_hex+' ')
@@ -213,7 +240,7 @@ f_y.write(''+header+'')
 f_y.write('uint8_t y_inp_2D ['+in_cols+']['+out_cols+'] = {\n')
 for i in range(m_size):
     for j in range (k_size):
-        y_bin = bin(np.float16(Y[i][j]).view('H') >> 8)[2:].zfill(8)
+        y_bin = bin(Y8[i][j])[2:].zfill(8)
         y_hex = hex(int(y_bin, 2))[2:]
         if (i == m_size - 1 and j == k_size - 1):
           f_y.write('0x'+y_hex+' ')
@@ -228,7 +255,7 @@ f_z.write(''+header+'')
 f_z.write('uint8_t z_oup ['+z_dim+'] = {\n')
 for i in range(m_size):
     for j in range (k_size):
-        z_bin = bin(np.float16(Z[i][j]).view('H') >> 8)[2:].zfill(8)
+        z_bin = bin(Z8[i][j])[2:].zfill(8)
         z_hex = hex(int(z_bin, 2))[2:]
         if (i == m_size - 1 and j == k_size - 1):
           f_z.write('0x'+z_hex+' ')
@@ -243,7 +270,7 @@ f_z.write(''+header+'')
 f_z.write('uint8_t z_oup_2D ['+in_rows+']['+out_cols+'] = {\n')
 for i in range(m_size):
     for j in range (k_size):
-        z_bin = bin(np.float16(Z[i][j]).view('H') >> 8)[2:].zfill(8)
+        z_bin = bin(Z8[i][j])[2:].zfill(8)
         z_hex = hex(int(z_bin, 2))[2:]
         if (i == m_size - 1 and j == k_size - 1):
           f_z.write('0x'+z_hex+' ')
@@ -278,10 +305,10 @@ f_c.write('uint32_t golden ['+out_int+'] = {\n')
 for i in range(m_size):
     j = 0
     while j < k_size - 1:
-        c_bin_0 = bin(np.float16(Z[i][j]).view('H') >> 8)[2:].zfill(8)
-        c_bin_1 = bin(np.float16(Z[i][j+1]).view('H') >> 8)[2:].zfill(8)
-        c_bin_2 = bin(np.float16(Z[i][j+2]).view('H') >> 8)[2:].zfill(8)
-        c_bin_3 = bin(np.float16(Z[i][j+3]).view('H') >> 8)[2:].zfill(8)
+        c_bin_0 = bin(Z8[i][j])[2:].zfill(8)
+        c_bin_1 = bin(Z8[i][j+1])[2:].zfill(8)
+        c_bin_2 = bin(Z8[i][j+2])[2:].zfill(8)
+        c_bin_3 = bin(Z8[i][j+3])[2:].zfill(8)
         c_hex_0 = hex(int(c_bin_0, 2))[2:]
         c_hex_1 = hex(int(c_bin_1, 2))[2:]
         c_hex_2 = hex(int(c_bin_2, 2))[2:]
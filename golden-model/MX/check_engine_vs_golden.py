@@ -9,6 +9,11 @@ Reads:
   Engine dumps: engine_x_inputs.txt, engine_w_inputs.txt, engine_z_outputs.txt
   MX decoder:  mx_decoder_fp16_outputs.txt, mx_decoder_targets.txt (MX only)
 
+Matrices and dumps are held as NumPy arrays of bit patterns (uint16 for FP16,
+uint8 for FP8 elements and shared exponents), 2D with one row per matrix row
+or dump line. The analyzers work on views and boolean masks of these arrays,
+so peak memory stays within a small multiple of the raw data size.
+
 Usage:
     # FP16 baseline
     python3 check_engine_vs_golden.py --mode fp16
@@ -21,106 +26,132 @@ Usage:
 """
 
 import argparse
+import contextlib
 import csv
+import io
+import itertools
+import multiprocessing
 import re
 import sys
 import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
 
-from redmule_fma import bittrue_fma
+from dump_archive import dump_exists, dump_mtime, dump_size, open_dump
+import profiling
+from redmule_fma import fma_fp16_bits, hw_accumulation_order
+from mx_fp_golden import MX_FORMAT_SPECS, encode_blocks_fp16_to_mx, mx_decode_array
 
 
 # ── Parsing helpers ──────────────────────────────────────────────
 
-def parse_c_header_array(filename):
-    """Parse a C header and return list of integer values."""
+def _uint_dtype(bits):
+    """Smallest unsigned dtype holding `bits`-bit elements."""
+    if bits <= 8:
+        return np.uint8
+    if bits <= 16:
+        return np.uint16
+    return np.uint32
+
+
+def parse_c_header_array(filename, dtype=np.uint32):
+    """Parse a C header and return its hex literals as a 1D array."""
     with open(filename, 'r') as f:
         text = f.read()
-    values = re.findall(r'0x[0-9a-fA-F]+', text)
-    return [int(x, 16) for x in values]
+    values = (int(m.group(1), 16) for m in re.finditer(r'0x([0-9a-fA-F]+)', text))
+    return np.fromiter(values, dtype=dtype)
 
 
 def unpack_fp16_from_32bit(packed_words):
     """Unpack FP16 values from 32-bit words (2 per word, little-endian)."""
-    fp16_values = []
-    for word in packed_words:
-        fp16_values.append(word & 0xFFFF)
-        fp16_values.append((word >> 16) & 0xFFFF)
-    return fp16_values
+    return np.ascontiguousarray(packed_words, dtype='<u4').view('<u2').astype(np.uint16)
 
 
 def unpack_fp8_from_16bit(packed_values):
     """Unpack FP8 values from 16-bit words (2 per word, little-endian)."""
-    fp8_values = []
-    for word in packed_values:
-        fp8_values.append(word & 0xFF)
-        fp8_values.append((word >> 8) & 0xFF)
-    return fp8_values
+    return np.ascontiguousarray(packed_values, dtype='<u2').view(np.uint8)
+
+
+def unpack_fp4_from_16bit(packed_values):
+    """Unpack FP4 nibbles from 16-bit words (4 per word, little-endian nibble order)."""
+    packed_bytes = unpack_fp8_from_16bit(packed_values)
+    return np.stack([packed_bytes & 0xF, packed_bytes >> 4], axis=-1).ravel()
+
+
+def unpack_mx_elements(packed_values, mx_fmt='e4m3'):
+    """Unpack MX elements from 16-bit words in the TCDM layout of `mx_fmt`."""
+    if mx_fmt == 'e2m1':
+        return unpack_fp4_from_16bit(packed_values)
+    return unpack_fp8_from_16bit(packed_values)
 
 
 def unpack_exponents_8bit(packed_words):
     """Unpack 8-bit exponents from 32-bit words (4 per word)."""
-    exps = []
-    for word in packed_words:
-        for i in range(4):
-            exps.append((word >> (i * 8)) & 0xFF)
-    return exps
+    return np.ascontiguousarray(packed_words, dtype='<u4').view(np.uint8)
 
 
-def parse_engine_dump(filename):
-    """Parse space-separated hex dump file. Returns list of lists of ints.
+def parse_engine_dump(filename, dtype=np.uint16):
+    """Parse space-separated hex dump file. Returns a 2D array, one row per line.
     Returns None if file doesn't exist or is empty."""
-    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+    if not dump_exists(filename) or dump_size(filename) == 0:
         return None
-    lines = []
-    with open(filename, 'r') as f:
+    with open_dump(filename, 'r') as f:
+        first = []
         for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            vals = [int(x, 16) for x in line.split()]
-            lines.append(vals)
-    return lines if lines else None
+            first = line.split()
+            if first:
+                break
+        if not first:
+            return None
+        tokens = itertools.chain(first, (tok for line in f for tok in line.split()))
+        flat = np.fromiter((int(tok, 16) for tok in tokens), dtype=dtype)
+    if flat.size % len(first) != 0:
+        raise ValueError(f"{filename}: {flat.size} values do not form lines of {len(first)}")
+    return flat.reshape(-1, len(first))
 
 
 def parse_target_dump(filename):
     """Parse mx_decoder_targets.txt (one 'X' or 'W' per line)."""
-    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+    if not dump_exists(filename) or dump_size(filename) == 0:
         return None
     targets = []
-    with open(filename, 'r') as f:
+    with open_dump(filename, 'r') as f:
         for line in f:
             line = line.strip()
             if line in ('X', 'W'):
                 targets.append(line)
-    return targets if targets else None
+    return np.array(targets) if targets else None
 
 
-def parse_hex_scalar_lines(filename):
+def parse_hex_scalar_lines(filename, dtype=np.uint8):
     """Parse one hex scalar per line."""
-    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+    if not dump_exists(filename) or dump_size(filename) == 0:
         return None
-    values = []
-    with open(filename, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#') or line.startswith('//'):
-                continue
-            values.append(int(line, 16))
-    return values if values else None
+    with open_dump(filename, 'r') as f:
+        lines = (line.strip() for line in f)
+        values = np.fromiter((int(line, 16) for line in lines
+                              if line and not line.startswith('#') and not line.startswith('//')),
+                             dtype=dtype)
+    return values if values.size else None
 
 
 def parse_packed_hex_blocks(filename, elem_bits, elems_per_line=None):
-    """Parse one packed hex word per line into little-endian element lists."""
-    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+    """Parse one packed hex word per line into a 2D array of little-endian elements."""
+    if not dump_exists(filename) or dump_size(filename) == 0:
         return None
 
-    blocks = []
+    dtype = _uint_dtype(elem_bits)
+    byte_elems = elem_bits % 8 == 0
+    raw = bytearray()
+    rows = []
+    width = None
     elem_mask = (1 << elem_bits) - 1
-    with open(filename, 'r') as f:
+    with open_dump(filename, 'r') as f:
         for line in f:
             line = line.strip()
             if not line or line.startswith('#') or line.startswith('//'):
@@ -132,67 +163,101 @@ def parse_packed_hex_blocks(filename, elem_bits, elems_per_line=None):
                 count = total_bits // elem_bits
             else:
                 count = elems_per_line
-            word = int(line, 16)
-            blocks.append([(word >> (elem_bits * i)) & elem_mask for i in range(count)])
-    return blocks if blocks else None
+            if width is None:
+                width = count
+            elif count != width:
+                raise ValueError(f"{filename}: line has {count} elements, expected {width}")
+            if byte_elems:
+                # Keep the low `count` elements, as the masking below does
+                digits = count * elem_bits // 4
+                raw += bytes.fromhex(line[-digits:].rjust(digits, '0'))[::-1]
+            else:
+                word = int(line, 16)
+                rows.append([(word >> (elem_bits * i)) & elem_mask for i in range(count)])
+    if width is None:
+        return None
+    if byte_elems:
+        return np.frombuffer(bytes(raw), dtype=f'<u{elem_bits // 8}').astype(dtype).reshape(-1, width)
+    return np.array(rows, dtype=dtype)
+
+
+FEED_TRACE_COLUMNS = ('time', 'line_idx', 'mx_enable', 'target_x', 'target_w', 'pairdup')
 
 
 def parse_engine_feed_trace(filename):
-    """Parse engine_feed_trace.csv."""
-    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+    """Parse engine_feed_trace.csv into column arrays.
+
+    Returns {'event': str array, 'lanes': (rows, lanes) uint16 array, and one
+    int64 array per FEED_TRACE_COLUMNS entry}, or None.
+    """
+    if not dump_exists(filename) or dump_size(filename) == 0:
         return None
 
-    rows = []
-    with open(filename, 'r') as f:
+    cols = {name: [] for name in FEED_TRACE_COLUMNS}
+    events = []
+    lanes = []
+    with open_dump(filename, 'r') as f:
         reader = csv.DictReader(f)
         lane_cols = [c for c in reader.fieldnames if re.fullmatch(r'l\d+', c)] if reader.fieldnames else []
         lane_cols.sort(key=lambda x: int(x[1:]))
         for row in reader:
-            rows.append({
-                'time': int(row['time']),
-                'event': row['event'],
-                'line_idx': int(row['line_idx']),
-                'mx_enable': int(row['mx_enable']),
-                'target_x': int(row['target_x']),
-                'target_w': int(row['target_w']),
-                'pairdup': int(row['pairdup']),
-                'lanes': [int(row[col], 16) for col in lane_cols],
-            })
-    return rows if rows else None
-
-
-def chunk_values(values, chunk_size, pad=False):
-    """Split a flat list into fixed-size chunks."""
-    out = []
-    for i in range(0, len(values), chunk_size):
-        chunk = list(values[i:i + chunk_size])
-        if pad and len(chunk) < chunk_size:
-            chunk.extend([0] * (chunk_size - len(chunk)))
-        out.append(chunk)
-    return out
+            for name in FEED_TRACE_COLUMNS:
+                cols[name].append(int(row[name]))
+            events.append(row['event'])
+            lanes.extend(int(row[col], 16) for col in lane_cols)
+    if not events:
+        return None
+
+    trace = {name: np.array(values, dtype=np.int64) for name, values in cols.items()}
+    trace['event'] = np.array(events)
+    trace['lanes'] = np.array(lanes, dtype=np.uint16).reshape(len(events), len(lane_cols))
+    return trace
+
+
+def chunk_values(values, chunk_size):
+    """Split a flat array into rows of chunk_size, zero-padding the last row."""
+    values = np.asarray(values)
+    rows = (len(values) + chunk_size - 1) // chunk_size
+    out = np.zeros(rows * chunk_size, dtype=values.dtype)
+    out[:len(values)] = values
+    return out.reshape(rows, chunk_size)
 
 
 def expand_exp_words(exp_words, num_blocks):
     """Normalize packed exponent words into one exponent per MX block."""
+    exp_words = np.asarray(exp_words, dtype=np.uint32)
     if len(exp_words) == num_blocks:
-        return [(w & 0xFF) for w in exp_words]
-    if len(exp_words) * 4 == num_blocks:
-        exps = []
-        for word in exp_words:
-            for shift in range(0, 32, 8):
-                exps.append((word >> shift) & 0xFF)
-        return exps[:num_blocks]
-
-    # Fallback: unpack all bytes and trim/pad.
-    exps = []
-    for word in exp_words:
-        for shift in range(0, 32, 8):
-            exps.append((word >> shift) & 0xFF)
+        return (exp_words & 0xFF).astype(np.uint8)
+
+    # Packed 4 per word: unpack all bytes and trim/pad.
+    exps = unpack_exponents_8bit(exp_words)
     if len(exps) < num_blocks:
-        exps.extend([0] * (num_blocks - len(exps)))
+        exps = np.concatenate([exps, np.zeros(num_blocks - len(exps), dtype=np.uint8)])
     return exps[:num_blocks]
 
 
+def _first_true(mask, limit):
+    """Row-major indices of the first `limit` True entries of mask.
+
+    Scans in chunks, so a mostly-True mask does not allocate one index per entry.
+    """
+    flat = mask.ravel()
+    found = []
+    step = 1 << 16
+    for start in range(0, flat.size, step):
+        if len(found) >= limit:
+            break
+        hits = np.flatnonzero(flat[start:start + step])
+        found.extend((start + hits[:limit - len(found)]).tolist())
+    return [tuple(int(i) for i in np.unravel_index(i, mask.shape)) for i in found]
+
+
+def _row_keys(rows):
+    """One opaque scalar per row, for hashing / set operations on whole rows."""
+    rows = np.ascontiguousarray(rows)
+    return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+
 def compare_stage_dump(name, cur_dump, ref_dump, max_show=10):
     """Compare two stage dumps.
 
@@ -206,28 +271,19 @@ def compare_stage_dump(name, cur_dump, ref_dump, max_show=10):
         print(f"   {name}: reference dump missing")
         return False
 
-    cur_lines = len(cur_dump)
-    ref_lines = len(ref_dump)
+    cur_lines, cur_w = cur_dump.shape
+    ref_lines, ref_w = ref_dump.shape
     if cur_lines == 0 or ref_lines == 0:
         print(f"   {name}: empty dump(s)")
         return False
 
-    cur_w = len(cur_dump[0])
-    ref_w = len(ref_dump[0])
     line_cnt = min(cur_lines, ref_lines)
     val_cnt = min(cur_w, ref_w)
 
-    mism = 0
-    shown = 0
-    for i in range(line_cnt):
-        a = cur_dump[i]
-        b = ref_dump[i]
-        for j in range(val_cnt):
-            if a[j] != b[j]:
-                mism += 1
-                if shown < max_show:
-                    print(f"     {name}[line={i},idx={j}]: got 0x{a[j]:04x} exp 0x{b[j]:04x}")
-                    shown += 1
+    diff = cur_dump[:line_cnt, :val_cnt] != ref_dump[:line_cnt, :val_cnt]
+    mism = int(np.count_nonzero(diff))
+    for i, j in _first_true(diff, max_show):
+        print(f"     {name}[line={i},idx={j}]: got 0x{int(cur_dump[i, j]):04x} exp 0x{int(ref_dump[i, j]):04x}")
 
     same_shape = (cur_lines == ref_lines) and (cur_w == ref_w)
     if mism == 0 and same_shape:
@@ -238,17 +294,18 @@ def compare_stage_dump(name, cur_dump, ref_dump, max_show=10):
         print(f"   {name}: shape differs (cur={cur_lines}x{cur_w}, ref={ref_lines}x{ref_w})")
 
     # Timing-insensitive fallback: compare unique vectors (trim to common width)
-    cur_set = {tuple(line[:val_cnt]) for line in cur_dump}
-    ref_set = {tuple(line[:val_cnt]) for line in ref_dump}
-    only_cur = cur_set - ref_set
-    only_ref = ref_set - cur_set
+    dtype = np.promote_types(cur_dump.dtype, ref_dump.dtype)
+    cur_set = np.unique(_row_keys(cur_dump[:, :val_cnt].astype(dtype)))
+    ref_set = np.unique(_row_keys(ref_dump[:, :val_cnt].astype(dtype)))
+    only_cur = np.setdiff1d(cur_set, ref_set, assume_unique=True)
+    only_ref = np.setdiff1d(ref_set, cur_set, assume_unique=True)
 
-    if not only_cur and not only_ref:
+    if not len(only_cur) and not len(only_ref):
         print(f"   {name}: PASS (same unique vectors as reference; ordering/count differ)")
         return True
 
-    inter = len(cur_set & ref_set)
-    union = len(cur_set | ref_set)
+    inter = len(cur_set) - len(only_cur)
+    union = len(cur_set) + len(only_ref)
     jacc = (100.0 * inter / union) if union else 100.0
     print(f"   {name}: FAIL (unique-vector mismatch, Jaccard={jacc:.2f}%)")
     print(f"     unique only in current: {len(only_cur)}")
@@ -264,30 +321,23 @@ def compare_ordered_blocks(name, actual, expected, elem_bits=16, max_show=8):
     if expected is None:
         print(f"   {name}: expected data missing")
         return False
-    if not actual or not expected:
+    if len(actual) == 0 or len(expected) == 0:
         print(f"   {name}: empty data")
         return False
 
-    actual_rows = len(actual)
-    expected_rows = len(expected)
-    actual_w = len(actual[0])
-    expected_w = len(expected[0])
+    actual_rows, actual_w = actual.shape
+    expected_rows, expected_w = expected.shape
     row_cnt = min(actual_rows, expected_rows)
     col_cnt = min(actual_w, expected_w)
     fmt_w = max(2, elem_bits // 4)
 
-    mismatches = 0
-    shown = 0
-    for i in range(row_cnt):
-        for j in range(col_cnt):
-            if actual[i][j] != expected[i][j]:
-                mismatches += 1
-                if shown < max_show:
-                    print(
-                        f"     {name}[row={i},idx={j}]: got 0x{actual[i][j]:0{fmt_w}x} "
-                        f"exp 0x{expected[i][j]:0{fmt_w}x}"
-                    )
-                    shown += 1
+    diff = actual[:row_cnt, :col_cnt] != expected[:row_cnt, :col_cnt]
+    mismatches = int(np.count_nonzero(diff))
+    for i, j in _first_true(diff, max_show):
+        print(
+            f"     {name}[row={i},idx={j}]: got 0x{int(actual[i, j]):0{fmt_w}x} "
+            f"exp 0x{int(expected[i, j]):0{fmt_w}x}"
+        )
 
     same_shape = (actual_rows == expected_rows) and (actual_w == expected_w)
     if mismatches == 0 and same_shape:
@@ -309,23 +359,19 @@ def compare_scalar_sequence(name, actual, expected, elem_bits=8, max_show=8):
     if expected is None:
         print(f"   {name}: expected data missing")
         return False
-    if not actual or not expected:
+    if len(actual) == 0 or len(expected) == 0:
         print(f"   {name}: empty data")
         return False
 
     count = min(len(actual), len(expected))
     fmt_w = max(2, elem_bits // 4)
-    mismatches = 0
-    shown = 0
-    for i in range(count):
-        if actual[i] != expected[i]:
-            mismatches += 1
-            if shown < max_show:
-                print(
-                    f"     {name}[{i}]: got 0x{actual[i]:0{fmt_w}x} "
-                    f"exp 0x{expected[i]:0{fmt_w}x}"
-                )
-                shown += 1
+    diff = actual[:count] != expected[:count]
+    mismatches = int(np.count_nonzero(diff))
+    for (i,) in _first_true(diff, max_show):
+        print(
+            f"     {name}[{i}]: got 0x{int(actual[i]):0{fmt_w}x} "
+            f"exp 0x{int(expected[i]):0{fmt_w}x}"
+        )
 
     same_len = len(actual) == len(expected)
     if mismatches == 0 and same_len:
@@ -341,14 +387,14 @@ def compare_scalar_sequence(name, actual, expected, elem_bits=8, max_show=8):
 
 def is_reference_stale(input_files, ref_files):
     """Return (stale, reason) if any input file is newer than any reference file."""
-    existing_inputs = [p for p in input_files if os.path.exists(p)]
-    existing_refs = [p for p in ref_files if os.path.exists(p)]
+    existing_inputs = [p for p in input_files if dump_exists(p)]
+    existing_refs = [p for p in ref_files if dump_exists(p)]
     if not existing_inputs or not existing_refs:
         return False, ""
 
-    newest_input = max(existing_inputs, key=os.path.getmtime)
-    oldest_ref = min(existing_refs, key=os.path.getmtime)
-    if os.path.getmtime(newest_input) > os.path.getmtime(oldest_ref):
+    newest_input = max(existing_inputs, key=dump_mtime)
+    oldest_ref = min(existing_refs, key=dump_mtime)
+    if dump_mtime(newest_input) > dump_mtime(oldest_ref):
         return True, f"newer inputs detected (latest input: {os.path.basename(newest_input)}, oldest ref: {os.path.basename(oldest_ref)})"
     return False, ""
 
@@ -363,8 +409,21 @@ def float_to_fp16(val):
 
 # ── Data loading ─────────────────────────────────────────────────
 
+def _as_matrix(flat, rows, cols, name, dtype=np.uint16):
+    """First rows*cols values of a flat array as a (rows, cols) matrix."""
+    if len(flat) < rows * cols:
+        raise ValueError(f"{name}: {len(flat)} values, need {rows}x{cols} = {rows * cols}")
+    return flat[:rows * cols].astype(dtype).reshape(rows, cols)
+
+
+def decode_mx(fp8_values, exps, mx_fmt='e4m3'):
+    """Decode MX element bit patterns to FP16 bits. exps broadcasts against fp8_values."""
+    fp8_values = np.asarray(fp8_values, dtype=np.uint8)
+    return mx_decode_array(fp8_values, exps, mx_fmt).astype(np.uint16)
+
+
 def load_fp16_inputs(header_dir, M, N, K):
-    """Load FP16 baseline inputs. Returns (x_fp16, w_fp16, y_fp16) as 2D lists."""
+    """Load FP16 baseline inputs. Returns (x_fp16, w_fp16, y_fp16) as uint16 arrays."""
     x_flat = parse_c_header_array(os.path.join(header_dir, 'x_input.h'))
     w_flat = parse_c_header_array(os.path.join(header_dir, 'w_input.h'))
     y_flat = parse_c_header_array(os.path.join(header_dir, 'y_input.h'))
@@ -373,9 +432,9 @@ def load_fp16_inputs(header_dir, M, N, K):
     print(f"   W: {len(w_flat)} uint16 values (need {N*K})")
     print(f"   Y: {len(y_flat)} uint16 values (need {M*K})")
 
-    x_fp16 = [x_flat[r*N:(r+1)*N] for r in range(M)]
-    w_fp16 = [w_flat[r*K:(r+1)*K] for r in range(N)]
-    y_fp16 = [y_flat[r*K:(r+1)*K] for r in range(M)]
+    x_fp16 = _as_matrix(x_flat, M, N, 'X')
+    w_fp16 = _as_matrix(w_flat, N, K, 'W')
+    y_fp16 = _as_matrix(y_flat, M, K, 'Y')
     return x_fp16, w_fp16, y_fp16
 
 
@@ -384,112 +443,127 @@ def load_fp16_golden(header_dir, M, K):
     packed = parse_c_header_array(os.path.join(header_dir, 'golden.h'))
     fp16_flat = unpack_fp16_from_32bit(packed)
     print(f"   Golden: {len(fp16_flat)} FP16 values (need {M*K})")
-    return [fp16_flat[r*K:(r+1)*K] for r in range(M)]
+    return _as_matrix(fp16_flat, M, K, 'Golden')
 
 
-def load_mx_inputs(header_dir, M, N, K, block_size):
-    """Load MX inputs, decode to FP16. Returns (x_fp16, w_fp16, y_fp16) as 2D lists."""
-    from mx_fp_golden import mxfp8_decode_bits
+def load_mx_inputs(header_dir, M, N, K, x_block_size, w_block_size=None,
+                   x_format='e4m3', w_format='e4m3'):
+    """Load MX inputs, decode to FP16. Returns (x_fp16, w_fp16, y_fp16) as uint16 arrays.
 
+    X and W are decoded with their own element format and block size.
+    """
+    if w_block_size is None:
+        w_block_size = x_block_size
     x_packed = parse_c_header_array(os.path.join(header_dir, 'x_input_mx.h'))
-    x_fp8 = unpack_fp8_from_16bit(x_packed)
+    x_fp8 = unpack_mx_elements(x_packed, x_format)
     x_exp_packed = parse_c_header_array(os.path.join(header_dir, 'x_exp_mx.h'))
     x_exp = unpack_exponents_8bit(x_exp_packed)
-    print(f"   X: {len(x_fp8)} FP8 values, {len(x_exp)} exponents")
+    print(f"   X: {len(x_fp8)} {x_format} values, {len(x_exp)} exponents")
 
     w_packed = parse_c_header_array(os.path.join(header_dir, 'w_input_mx.h'))
-    w_fp8 = unpack_fp8_from_16bit(w_packed)
+    w_fp8 = unpack_mx_elements(w_packed, w_format)
     w_exp_packed = parse_c_header_array(os.path.join(header_dir, 'w_exp_mx.h'))
     w_exp = unpack_exponents_8bit(w_exp_packed)
-    print(f"   W: {len(w_fp8)} FP8 values, {len(w_exp)} exponents")
+    print(f"   W: {len(w_fp8)} {w_format} values, {len(w_exp)} exponents")
 
     y_flat = parse_c_header_array(os.path.join(header_dir, 'y_input.h'))
     print(f"   Y: {len(y_flat)} FP16 values")
 
-    def decode_matrix(fp8_values, exponents, rows, cols):
+    def decode_matrix(fp8_values, exp_words, rows, cols, block_size, mx_fmt):
         total = rows * cols
-        fp16_flat = []
         num_blocks = (total + block_size - 1) // block_size
-        for blk in range(num_blocks):
-            exp = exponents[blk] if blk < len(exponents) else 0x7F
-            for lane in range(block_size):
-                idx = blk * block_size + lane
-                if idx < total:
-                    fp16_flat.append(mxfp8_decode_bits(fp8_values[idx], exp))
-        return [fp16_flat[r*cols:(r+1)*cols] for r in range(rows)]
+        block_exps = np.full(num_blocks, 0x7F, dtype=np.uint8)
+        # One 32-bit word per block (replicated W layout) or 4 exponents per word
+        if len(exp_words) == num_blocks:
+            exponents = (exp_words & 0xFF).astype(np.uint8)
+        else:
+            exponents = unpack_exponents_8bit(exp_words)
+        have = min(num_blocks, len(exponents))
+        block_exps[:have] = exponents[:have]
+        fp8 = _as_matrix(fp8_values, rows, cols, 'FP8', dtype=np.uint8)
+        return decode_mx(fp8, np.repeat(block_exps, block_size)[:total].reshape(rows, cols), mx_fmt)
 
     print("   Decoding MX to FP16...")
-    x_fp16 = decode_matrix(x_fp8, x_exp, M, N)
-    w_fp16 = decode_matrix(w_fp8, w_exp, N, K)
-    y_fp16 = [y_flat[r*K:(r+1)*K] for r in range(M)]
+    x_fp16 = decode_matrix(x_fp8, x_exp_packed, M, N, x_block_size, x_format)
+    w_fp16 = decode_matrix(w_fp8, w_exp_packed, N, K, w_block_size, w_format)
+    y_fp16 = _as_matrix(y_flat, M, K, 'Y')
     return x_fp16, w_fp16, y_fp16
 
 
-def load_expected_mx_blocks(header_dir, M, N, K, block_size):
-    """Load MX headers as expected block streams for decoder ingress."""
-    x_words = parse_c_header_array(os.path.join(header_dir, 'x_input_mx.h'))
-    x_fp8 = unpack_fp8_from_16bit(x_words)
-    x_blocks = chunk_values(x_fp8[:M * N], block_size, pad=True)
-    x_exp_words = parse_c_header_array(os.path.join(header_dir, 'x_exp_mx.h'))
-    x_exps = expand_exp_words(x_exp_words, len(x_blocks))
-
-    w_words = parse_c_header_array(os.path.join(header_dir, 'w_input_mx.h'))
-    w_fp8 = unpack_fp8_from_16bit(w_words)
-    w_blocks = chunk_values(w_fp8[:N * K], block_size, pad=True)
-    w_exp_words = parse_c_header_array(os.path.join(header_dir, 'w_exp_mx.h'))
-    w_exps = expand_exp_words(w_exp_words, len(w_blocks))
+def load_expected_mx_blocks(header_dir, M, N, K, x_block_size, w_block_size=None,
+                            x_format='e4m3', w_format='e4m3'):
+    """Load MX headers as expected block streams for decoder ingress.
 
-    return {
-        'X': {'blocks': x_blocks, 'exps': x_exps},
-        'W': {'blocks': w_blocks, 'exps': w_exps},
-    }
+    Each operand also carries its blocks decoded to FP16 ('fp16').
+    """
+    if w_block_size is None:
+        w_block_size = x_block_size
+    expected = {}
+    for name, prefix, count, block_size, mx_fmt in (('X', 'x', M * N, x_block_size, x_format),
+                                                     ('W', 'w', N * K, w_block_size, w_format)):
+        words = parse_c_header_array(os.path.join(header_dir, f'{prefix}_input_mx.h'))
+        blocks = chunk_values(unpack_mx_elements(words, mx_fmt)[:count], block_size)
+        exp_words = parse_c_header_array(os.path.join(header_dir, f'{prefix}_exp_mx.h'))
+        exps = expand_exp_words(exp_words, len(blocks))
+        expected[name] = {'blocks': blocks, 'exps': exps,
+                          'fp16': decode_mx(blocks, exps[:, None], mx_fmt)}
+    return expected
 
 
 def build_expected_decoder_sequence(targets, expected_inputs):
-    """Interleave X/W MX blocks to match the actual decoder target log."""
-    x_idx = 0
-    w_idx = 0
-    seq = []
-    for target in targets:
-        if target == 'X':
-            seq.append({
-                'target': 'X',
-                'fp8': expected_inputs['X']['blocks'][x_idx],
-                'exp': expected_inputs['X']['exps'][x_idx],
-            })
-            x_idx += 1
-        elif target == 'W':
-            seq.append({
-                'target': 'W',
-                'fp8': expected_inputs['W']['blocks'][w_idx],
-                'exp': expected_inputs['W']['exps'][w_idx],
-            })
-            w_idx += 1
-    return seq
+    """Interleave X/W MX blocks to match the actual decoder target log.
+
+    Returns {'target', 'fp8', 'fp16', 'exp'} arrays with one entry per X/W target.
+    """
+    targets = np.asarray(targets)
+    targets = targets[(targets == 'X') | (targets == 'W')]
+    is_x = targets == 'X'
+    x_count = int(np.count_nonzero(is_x))
+    w_count = len(targets) - x_count
+
+    # X and W blocks may differ in size; shorter rows are zero-padded
+    width = max(expected_inputs['X']['blocks'].shape[1], expected_inputs['W']['blocks'].shape[1])
+    fp8 = np.zeros((len(targets), width), dtype=np.uint8)
+    fp16 = np.zeros((len(targets), width), dtype=np.uint16)
+    exps = np.empty(len(targets), dtype=np.uint8)
+    for name, sel, count in (('X', is_x, x_count), ('W', ~is_x, w_count)):
+        op = expected_inputs[name]
+        fp8[sel, :op['blocks'].shape[1]] = op['blocks'][:count]
+        fp16[sel, :op['fp16'].shape[1]] = op['fp16'][:count]
+        exps[sel] = op['exps'][:count]
+    return {'target': targets, 'fp8': fp8, 'fp16': fp16, 'exp': exps}
 
 
 # ── Golden GEMM ──────────────────────────────────────────────────
 
-def golden_gemm_fp16(x_bits, w_bits, y_bits, M, N, K):
+# Rows per vectorized GEMM pass (progress is printed after each pass)
+GEMM_ROW_CHUNK = 64
+
+
+def golden_gemm_fp16(x_bits, w_bits, y_bits, M, N, K, array_height=None):
     """
     Compute Z = X*W + Y using bittrue FMA.
-    All inputs are 2D lists of FP16 bit patterns.
-    Returns [M][K] FP16 bit patterns.
+    All inputs are uint16 arrays of FP16 bit patterns, (M, N), (N, K), (M, K).
+    Returns an (M, K) uint16 array.
+
+    One redmule_fma.fma_fp16_bits step (single-rounding FP16 FMA on bit
+    patterns, n ascending) over the whole M x K accumulator per reduction
+    step. With array_height, follows redmule_fma.hw_accumulation_order
+    (zero-operand padding of the last ARRAY_HEIGHT group included).
+    Rows are computed in chunks of GEMM_ROW_CHUNK for progress output.
     """
-    z = []
-    for m in range(M):
-        z_row = []
-        for k in range(K):
-            acc = fp16_to_float(y_bits[m][k])
-            for n in range(N):
-                acc = bittrue_fma(
-                    fp16_to_float(x_bits[m][n]),
-                    fp16_to_float(w_bits[n][k]),
-                    acc
-                )
-            z_row.append(float_to_fp16(acc))
-        z.append(z_row)
-        if (m + 1) % 8 == 0:
+    z = y_bits[:M, :K].astype(np.uint16)
+    order = range(N) if array_height is None else hw_accumulation_order(N, array_height)
+    for m0 in range(0, M, GEMM_ROW_CHUNK):
+        m1 = min(m0 + GEMM_ROW_CHUNK, M)
+        acc = z[m0:m1]
+        for n in order:
+            if n < 0:
+                acc = fma_fp16_bits(0, 0, acc)
+            else:
+                acc = fma_fp16_bits(x_bits[m0:m1, n, None], w_bits[None, n, :K], acc)
+        z[m0:m1] = acc
+        for m in range(m0 + 7 - m0 % 8, m1, 8):
             print(f"  GEMM row {m+1}/{M} done")
     return z
 
@@ -498,8 +572,7 @@ def golden_gemm_fp16(x_bits, w_bits, y_bits, M, N, K):
 
 def compare_z_output(z_dump, z_golden, M, K, AW, max_show=30):
     """Compare Z engine dump against golden, trying both interpretations."""
-    num_lines = len(z_dump)
-    vals_per_line = len(z_dump[0])
+    num_lines, vals_per_line = z_dump.shape
     got_values = num_lines * vals_per_line
     exp_a_values = min(num_lines, K) * min(vals_per_line, M)
     exp_b_values = min(num_lines, M) * min(vals_per_line, K)
@@ -508,46 +581,38 @@ def compare_z_output(z_dump, z_golden, M, K, AW, max_show=30):
     print(f"   Stream dump values: {got_values}")
     print(f"   Comparable values: A={exp_a_values}, B={exp_b_values}")
 
-    # Check for duplicate lines
-    dup_groups = {}
-    for i, line in enumerate(z_dump):
-        key = tuple(line)
-        dup_groups.setdefault(key, []).append(i)
-    for key, indices in dup_groups.items():
-        if len(indices) > 1:
-            print(f"   WARNING: Z output lines {indices} are IDENTICAL")
+    # Check for duplicate lines (groups in order of first occurrence)
+    _, first, inverse, counts = np.unique(_row_keys(z_dump), return_index=True,
+                                          return_inverse=True, return_counts=True)
+    dup = np.flatnonzero(counts > 1)
+    if len(dup):
+        groups = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
+        for g in dup[np.argsort(first[dup])]:
+            print(f"   WARNING: Z output lines {groups[g].tolist()} are IDENTICAL")
+
+    def report(label, got, expected, to_mk):
+        diff = got != expected
+        errors = int(np.count_nonzero(diff))
+        for i, j in _first_true(diff, max_show):
+            m_idx, k_idx = to_mk(i, j)
+            z_val = int(got[i, j])
+            exp_val = int(expected[i, j])
+            print(f"     Z[m={m_idx},k={k_idx}]: got 0x{z_val:04x} ({fp16_to_float(z_val):10.4f})"
+                  f"  exp 0x{exp_val:04x} ({fp16_to_float(exp_val):10.4f})")
+        if errors > max_show:
+            print(f"     ... and {errors - max_show} more")
+        print(f"   [{label}] {'PASS' if errors == 0 else f'FAIL ({errors} mismatches)'}")
+        return errors
 
     # Interpretation A: each line = one K-column (vals_per_line M-rows)
     print(f"\n   [A] Each line = one K-column, {vals_per_line} M-rows:")
-    err_a = 0
-    for k_idx, z_line in enumerate(z_dump):
-        for m_idx, z_val in enumerate(z_line):
-            if m_idx < M and k_idx < K:
-                expected = z_golden[m_idx][k_idx]
-                if z_val != expected:
-                    err_a += 1
-                    if err_a <= max_show:
-                        print(f"     Z[m={m_idx},k={k_idx}]: got 0x{z_val:04x} ({fp16_to_float(z_val):10.4f})"
-                              f"  exp 0x{expected:04x} ({fp16_to_float(expected):10.4f})")
-    if err_a > max_show:
-        print(f"     ... and {err_a - max_show} more")
-    print(f"   [A] {'PASS' if err_a == 0 else f'FAIL ({err_a} mismatches)'}")
+    rows, cols = min(num_lines, K), min(vals_per_line, M)
+    err_a = report('A', z_dump[:rows, :cols], z_golden[:cols, :rows].T, lambda k, m: (m, k))
 
     # Interpretation B: each line = one M-row (vals_per_line K-columns)
     print(f"\n   [B] Each line = one M-row, {vals_per_line} K-columns:")
-    err_b = 0
-    for m_idx, z_line in enumerate(z_dump):
-        for k_idx, z_val in enumerate(z_line):
-            if m_idx < M and k_idx < K:
-                expected = z_golden[m_idx][k_idx]
-                if z_val != expected:
-                    err_b += 1
-                    if err_b <= max_show:
-                        print(f"     Z[m={m_idx},k={k_idx}]: got 0x{z_val:04x} ({fp16_to_float(z_val):10.4f})"
-                              f"  exp 0x{expected:04x} ({fp16_to_float(expected):10.4f})")
-    if err_b > max_show:
-        print(f"     ... and {err_b - max_show} more")
-    print(f"   [B] {'PASS' if err_b == 0 else f'FAIL ({err_b} mismatches)'}")
+    rows, cols = min(num_lines, M), min(vals_per_line, K)
+    err_b = report('B', z_dump[:rows, :cols], z_golden[:rows, :cols], lambda m, k: (m, k))
 
     return err_a, err_b, min(err_a, err_b)
 
@@ -555,7 +620,7 @@ def compare_z_output(z_dump, z_golden, M, K, AW, max_show=30):
 def analyze_x_buffer(x_dump, x_fp16, AW, AH, N):
     """Analyze X buffer dumps against golden X matrix."""
     print(f"\n6. X buffer analysis ({len(x_dump)} snapshots)")
-    vals_per_line = len(x_dump[0])
+    vals_per_line = x_dump.shape[1]
     print(f"   Values per snapshot: {vals_per_line} ({AW} rows x {AH} cols = {AW*AH})")
 
     if len(x_dump) < AH:
@@ -564,40 +629,41 @@ def analyze_x_buffer(x_dump, x_fp16, AW, AH, N):
 
     steady_idx = AH - 1
     steady_line = x_dump[steady_idx]
-    nz = sum(1 for v in steady_line if v != 0)
+    nz = int(np.count_nonzero(steady_line))
     print(f"   First steady-state at snapshot {steady_idx}: {nz}/{vals_per_line} non-zero")
 
-    x_buf = []
-    for w in range(AW):
-        row = steady_line[w * AH:(w + 1) * AH]
-        x_buf.append(row)
+    # Snapshot row w holds X_buf[w][0:AH]; only row 0 is compared
+    x_buf0 = steady_line[:AH]
 
-    print(f"   X_buf[0][0:8] = {['0x%04x' % v for v in x_buf[0][:8]]}")
-    print(f"   X golden[0][0:8] = {['0x%04x' % v for v in x_fp16[0][:8]]}")
+    print(f"   X_buf[0][0:8] = {['0x%04x' % v for v in x_buf0[:8]]}")
+    print(f"   X golden[0][0:8] = {['0x%04x' % v for v in x_fp16[0, :8]]}")
 
     # Compare forward order
-    errors = 0
-    for h in range(min(AH, N)):
-        if x_buf[0][h] != x_fp16[0][h]:
-            errors += 1
-    if errors == 0:
+    count = min(AH, N)
+    mism = np.flatnonzero(x_buf0[:count] != x_fp16[0, :count])
+    if len(mism) == 0:
         print(f"   X buffer row 0 vs golden X[0][0:{AH}]: PASS")
     else:
-        print(f"   X buffer row 0 vs golden X[0][0:{AH}]: {errors}/{min(AH,N)} mismatches")
-        for h in range(min(AH, N)):
-            buf_val = x_buf[0][h]
-            golden_val = x_fp16[0][h]
-            if buf_val != golden_val:
-                print(f"     h={h:2d}: buf=0x{buf_val:04x} golden=0x{golden_val:04x}")
-                if h > 10:
-                    print(f"     ...")
-                    break
+        print(f"   X buffer row 0 vs golden X[0][0:{AH}]: {len(mism)}/{count} mismatches")
+        for h in mism.tolist():
+            print(f"     h={h:2d}: buf=0x{int(x_buf0[h]):04x} golden=0x{int(x_fp16[0, h]):04x}")
+            if h > 10:
+                print(f"     ...")
+                break
+
+
+def _padded(values, length):
+    """First `length` entries of values, zero-padded."""
+    out = np.zeros(length, dtype=values.dtype)
+    count = min(length, len(values))
+    out[:count] = values[:count]
+    return out
 
 
 def analyze_w_buffer(w_dump, w_fp16, AH, N, K):
     """Analyze W buffer dumps against golden W matrix."""
     print(f"\n7. W buffer analysis ({len(w_dump)} snapshots)")
-    vals_per_line = len(w_dump[0])
+    vals_per_line = w_dump.shape[1]
     print(f"   Values per snapshot: {vals_per_line}")
 
     if len(w_dump) < AH:
@@ -606,30 +672,29 @@ def analyze_w_buffer(w_dump, w_fp16, AH, N, K):
 
     steady_idx = AH - 1
     w_buf = w_dump[steady_idx]
-    nz = sum(1 for v in w_buf if v != 0)
+    nz = int(np.count_nonzero(w_buf))
     print(f"   First steady-state at snapshot {steady_idx}: {nz}/{vals_per_line} non-zero")
     print(f"   W_buf[0:8] = {['0x%04x' % v for v in w_buf[:8]]}")
 
     # Try W column 0: W[n][0] for n=0..AH-1
-    w_col0 = [w_fp16[n][0] for n in range(min(AH, N))]
-    col_errors = sum(1 for h in range(min(AH, len(w_buf))) if w_buf[h] != (w_col0[h] if h < len(w_col0) else 0))
+    width = min(AH, len(w_buf))
+    w_col0 = w_fp16[:min(AH, N), 0]
+    col_errors = int(np.count_nonzero(w_buf[:width] != _padded(w_col0, width)))
     print(f"   W buf vs golden W[:,0] (column 0): {col_errors} mismatches")
 
     # Try W row 0: W[0][k] for k=0..AH-1
-    row_errors = sum(1 for h in range(min(AH, K)) if w_buf[h] != (w_fp16[0][h] if h < len(w_fp16[0]) else 0))
+    count = min(AH, K, len(w_buf))
+    row_errors = int(np.count_nonzero(w_buf[:count] != w_fp16[0, :count]))
     print(f"   W buf vs golden W[0,:] (row 0): {row_errors} mismatches")
 
     # Show best match details
     best = min(col_errors, row_errors)
     if best > 0:
-        label, ref = ("W[:,0]", w_col0) if col_errors <= row_errors else ("W[0,:]", w_fp16[0][:AH])
+        label, ref = ("W[:,0]", w_col0) if col_errors <= row_errors else ("W[0,:]", w_fp16[0, :AH])
         print(f"\n   Detailed W buf vs {label}:")
-        shown = 0
-        for h in range(min(AH, len(w_buf))):
-            golden_val = ref[h] if h < len(ref) else 0
-            if w_buf[h] != golden_val and shown < 10:
-                print(f"     h={h:2d}: buf=0x{w_buf[h]:04x} golden=0x{golden_val:04x}")
-                shown += 1
+        ref = _padded(ref, width)
+        for h in np.flatnonzero(w_buf[:width] != ref)[:10].tolist():
+            print(f"     h={h:2d}: buf=0x{int(w_buf[h]):04x} golden=0x{int(ref[h]):04x}")
 
 
 def analyze_w_sequence_mapping(w_dump, w_fp16, AH, N, K, max_show=12):
@@ -646,49 +711,40 @@ def analyze_w_sequence_mapping(w_dump, w_fp16, AH, N, K, max_show=12):
     if not row_bases:
         row_bases = [0]
 
-    def expected_vec(mode, row_base, k):
-        out = []
-        for h in range(AH):
-            if mode == 'col':
-                r = row_base + h
-                c = k
-            elif mode == 'col_rev':
-                r = row_base + (AH - 1 - h)
-                c = k
-            elif mode == 'row':
-                r = k
-                c = row_base + h
-            else:  # row_rev
-                r = k
-                c = row_base + (AH - 1 - h)
-
-            if 0 <= r < N and 0 <= c < K:
-                out.append(w_fp16[r][c])
-            else:
-                out.append(0)
-        return out
-
     modes = ['col', 'col_rev', 'row', 'row_rev']
+
+    # Every (mode, row_base, k) hypothesis as one row of a candidate matrix,
+    # in search order; out-of-range coordinates read the zero at W_ext[N, K].
+    w_ext = np.zeros((N + 1, K + 1), dtype=w_fp16.dtype)
+    w_ext[:N, :K] = w_fp16[:N, :K]
+    h = np.arange(AH)
+    bases = np.array(row_bases)[:, None, None]
+    cands = []
+    meta = []
+    for mode_idx, mode in enumerate(modes):
+        k_max = K if mode.startswith('col') else min(N, K)
+        k = np.arange(k_max)[None, :, None]
+        offs = (AH - 1 - h) if mode.endswith('_rev') else h
+        if mode.startswith('col'):
+            r, c = np.broadcast_arrays(bases + offs, k)
+        else:
+            r, c = np.broadcast_arrays(k, bases + offs)
+        valid = (r < N) & (c < K)
+        cands.append(w_ext[np.where(valid, r, N), np.where(valid, c, K)].reshape(-1, AH))
+        meta.append(np.stack(np.broadcast_arrays(mode_idx, bases[:, :, 0], k[:, :, 0]), -1).reshape(-1, 3))
+    cands = np.concatenate(cands)
+    meta = np.concatenate(meta)
+
     best = []
     mode_hist = {m: 0 for m in modes}
     perfect = 0
 
-    for s_idx, vec in enumerate(w_dump):
-        best_item = None
-        for mode in modes:
-            k_max = K if mode.startswith('col') else min(N, K)
-            for row_base in row_bases:
-                for k in range(k_max):
-                    exp = expected_vec(mode, row_base, k)
-                    mism = sum(1 for a, b in zip(vec, exp) if a != b)
-                    if best_item is None or mism < best_item[0]:
-                        best_item = (mism, mode, row_base, k)
-                        if mism == 0:
-                            break
-                if best_item[0] == 0:
-                    break
-            if best_item[0] == 0:
-                break
+    width = min(w_dump.shape[1], AH)
+    for vec in w_dump:
+        mism = np.count_nonzero(cands[:, :width] != vec[:width], axis=1)
+        idx = int(np.argmin(mism))
+        mode_idx, row_base, k = meta[idx].tolist()
+        best_item = (int(mism[idx]), modes[mode_idx], row_base, k)
 
         best.append(best_item)
         mode_hist[best_item[1]] += 1
@@ -723,79 +779,74 @@ def analyze_w_sequence_mapping(w_dump, w_fp16, AH, N, K, max_show=12):
         print(f"   Dominant mode '{dom_mode}' progression: repeats={non_inc}, non-seq-jumps={jumps}, samples={len(dom)}")
 
 
-def analyze_mx_decoder(dec_fp16, dec_targets, x_fp16, w_fp16, M=None, N=None, K=None, block_size=32):
+def analyze_mx_decoder(dec_fp16, dec_targets, x_fp16, w_fp16, M=None, N=None, K=None, block_size=32,
+                       w_block_size=None):
     """Analyze MX decoder output against golden decoded values."""
     print(f"\n8. MX Decoder analysis ({len(dec_fp16)} lines, {len(dec_targets)} targets)")
 
-    x_dec_lines = [(i, fp16) for i, (fp16, t) in enumerate(zip(dec_fp16, dec_targets)) if t == 'X']
-    w_dec_lines = [(i, fp16) for i, (fp16, t) in enumerate(zip(dec_fp16, dec_targets)) if t == 'W']
-    print(f"   X decoder outputs: {len(x_dec_lines)} lines")
-    print(f"   W decoder outputs: {len(w_dec_lines)} lines")
+    count = min(len(dec_fp16), len(dec_targets))
+    targets = np.asarray(dec_targets[:count])
+    x_dec = dec_fp16[:count][targets == 'X']
+    w_dec = dec_fp16[:count][targets == 'W']
+    print(f"   X decoder outputs: {len(x_dec)} lines")
+    print(f"   W decoder outputs: {len(w_dec)} lines")
 
     if M is not None and N is not None and K is not None:
+        w_block_size = w_block_size or block_size
         exp_x_blocks = (M * N + block_size - 1) // block_size
-        exp_w_blocks = (N * K + block_size - 1) // block_size
-        x_ok = len(x_dec_lines) == exp_x_blocks
-        w_ok = len(w_dec_lines) == exp_w_blocks
-        print(f"   X decoder blocks: got {len(x_dec_lines)}, expected {exp_x_blocks} -> {'PASS' if x_ok else 'FAIL'}")
-        print(f"   W decoder blocks: got {len(w_dec_lines)}, expected {exp_w_blocks} -> {'PASS' if w_ok else 'FAIL'}")
+        exp_w_blocks = (N * K + w_block_size - 1) // w_block_size
+        x_ok = len(x_dec) == exp_x_blocks
+        w_ok = len(w_dec) == exp_w_blocks
+        print(f"   X decoder blocks: got {len(x_dec)}, expected {exp_x_blocks} -> {'PASS' if x_ok else 'FAIL'}")
+        print(f"   W decoder blocks: got {len(w_dec)}, expected {exp_w_blocks} -> {'PASS' if w_ok else 'FAIL'}")
 
-    if not x_dec_lines:
+    if not len(x_dec):
         return
 
-    num_lanes = len(x_dec_lines[0][1])
+    num_lanes = x_dec.shape[1]
     print(f"   Decoder lanes per output: {num_lanes}")
 
+    # Block b, lane l of a target's decoder output is element b*num_lanes + l
+    def count_errors(dec, golden):
+        dec = dec.ravel()
+        golden = golden.ravel()
+        n = min(len(dec), len(golden))
+        return int(np.count_nonzero(dec[:n] != golden[:n]))
+
     # Check X decoder
-    x_fp16_flat = [v for row in x_fp16 for v in row]
-    x_errors = 0
-    for blk_idx, (line_num, dec_vals) in enumerate(x_dec_lines):
-        for lane, dec_val in enumerate(dec_vals):
-            golden_idx = blk_idx * num_lanes + lane
-            if golden_idx < len(x_fp16_flat) and dec_val != x_fp16_flat[golden_idx]:
-                x_errors += 1
+    x_errors = count_errors(x_dec, x_fp16)
     print(f"   X decoder vs golden: {'PASS' if x_errors == 0 else f'{x_errors} mismatches'}")
 
     # Check W decoder
-    w_fp16_flat = [v for row in w_fp16 for v in row]
-    w_errors = 0
-    for blk_idx, (line_num, dec_vals) in enumerate(w_dec_lines):
-        for lane, dec_val in enumerate(dec_vals):
-            golden_idx = blk_idx * num_lanes + lane
-            if golden_idx < len(w_fp16_flat) and dec_val != w_fp16_flat[golden_idx]:
-                w_errors += 1
+    w_errors = count_errors(w_dec, w_fp16)
     print(f"   W decoder vs golden: {'PASS' if w_errors == 0 else f'{w_errors} mismatches'}")
 
 
 def analyze_mx_decoder_stages(dec_fp16, dec_targets, dec_exps, header_dir, M, N, K,
-                              block_size=32, max_show=8):
+                              block_size=32, max_show=8, w_block_size=None,
+                              x_format='e4m3', w_format='e4m3'):
     """Stage-level MX decoder ingress and egress checks."""
-    from mx_fp_golden import mxfp8_decode_bits
-
     print(f"\n9. MX Decoder stage-by-stage")
     if dec_targets is None:
         print("   Decoder targets missing")
         return
 
-    expected_inputs = load_expected_mx_blocks(header_dir, M, N, K, block_size)
+    expected_inputs = load_expected_mx_blocks(header_dir, M, N, K, block_size, w_block_size,
+                                              x_format, w_format)
     expected_target_count = len(expected_inputs['X']['blocks']) + len(expected_inputs['W']['blocks'])
     if len(dec_targets) != expected_target_count:
         print(f"   DECODER_TARGETS: FAIL (got {len(dec_targets)}, expected {expected_target_count})")
         return
 
-    x_count = sum(1 for t in dec_targets if t == 'X')
-    w_count = sum(1 for t in dec_targets if t == 'W')
+    x_count = int(np.count_nonzero(dec_targets == 'X'))
+    w_count = int(np.count_nonzero(dec_targets == 'W'))
     print(f"   DECODER_TARGETS: X={x_count} (exp {len(expected_inputs['X']['blocks'])}), "
           f"W={w_count} (exp {len(expected_inputs['W']['blocks'])})")
 
     expected_seq = build_expected_decoder_sequence(dec_targets, expected_inputs)
-    expected_exps = [item['exp'] for item in expected_seq]
-    compare_scalar_sequence("DECODER_EXPS", dec_exps, expected_exps, elem_bits=8, max_show=max_show)
+    compare_scalar_sequence("DECODER_EXPS", dec_exps, expected_seq['exp'], elem_bits=8, max_show=max_show)
 
-    expected_decoded = []
-    for item in expected_seq:
-        expected_decoded.append([mxfp8_decode_bits(fp8, item['exp']) for fp8 in item['fp8']])
-    compare_ordered_blocks("DECODER_FP16", dec_fp16, expected_decoded, elem_bits=16, max_show=max_show)
+    compare_ordered_blocks("DECODER_FP16", dec_fp16, expected_seq['fp16'], elem_bits=16, max_show=max_show)
 
 
 def analyze_z_encoder_boundary(z_dump, enc_in_rows, z_golden, max_show=8):
@@ -803,40 +854,36 @@ def analyze_z_encoder_boundary(z_dump, enc_in_rows, z_golden, max_show=8):
     print(f"\n10. Z / Encoder boundary")
 
     if z_dump is not None:
-        expected_z = [row[:len(z_dump[0])] for row in z_golden[:len(z_dump)]]
+        expected_z = z_golden[:len(z_dump), :z_dump.shape[1]]
         compare_ordered_blocks("ENGINE_Z_LOW", z_dump, expected_z, elem_bits=16, max_show=max_show)
     else:
         print("   ENGINE_Z_LOW: current dump missing")
 
     if enc_in_rows is not None:
-        expected_rows = [row[:len(enc_in_rows[0])] for row in z_golden[:len(enc_in_rows)]]
+        expected_rows = z_golden[:len(enc_in_rows), :enc_in_rows.shape[1]]
         compare_ordered_blocks("ENCODER_IN_FP16", enc_in_rows, expected_rows, elem_bits=16, max_show=max_show)
     else:
         print("   ENCODER_IN_FP16: current dump missing")
 
     if z_dump is not None and enc_in_rows is not None:
-        enc_low = [row[:len(z_dump[0])] for row in enc_in_rows[:len(z_dump)]]
+        enc_low = enc_in_rows[:len(z_dump), :z_dump.shape[1]]
         compare_ordered_blocks("Z_TO_ENCODER_LOW", z_dump, enc_low, elem_bits=16, max_show=max_show)
 
 
 def _build_transposed_square_tiles(rows, tile_dim):
-    """Build complete tile_dim x tile_dim tiles and their column-major transposes."""
-    if rows is None:
+    """Complete tile_dim x tile_dim tiles of rows, transposed (column-major).
+
+    Returns a (tiles, tile_dim, tile_dim) view; tile t covers rows
+    t*tile_dim:(t+1)*tile_dim.
+    """
+    if rows is None or rows.shape[1] < tile_dim:
         return None
 
-    out = []
-    for base in range(0, len(rows), tile_dim):
-        tile = rows[base:base + tile_dim]
-        if len(tile) < tile_dim:
-            break
-        if any(len(row) < tile_dim for row in tile):
-            break
-        out.append({
-            'base': base,
-            'rows': tile,
-            'cols': [[tile[row][col] for row in range(tile_dim)] for col in range(tile_dim)],
-        })
-    return out if out else None
+    count = len(rows) // tile_dim
+    if count == 0:
+        return None
+    tiles = rows[:count * tile_dim, :tile_dim].reshape(count, tile_dim, tile_dim)
+    return tiles.transpose(0, 2, 1)
 
 
 def analyze_z_source_to_buffer(z_src_rows, z_q_rows, array_width, max_show=8):
@@ -855,12 +902,11 @@ def analyze_z_source_to_buffer(z_src_rows, z_q_rows, array_width, max_show=8):
         print("   Z_ENGINE_TO_Z_BUFFER: unable to build complete transposed tiles")
         return
 
-    zq_tiles = [z_q_rows[base:base + array_width]
-                for base in range(0, len(z_q_rows), array_width)
-                if len(z_q_rows[base:base + array_width]) == array_width]
-    if not zq_tiles:
+    zq_count = len(z_q_rows) // array_width
+    if zq_count == 0:
         print("   Z_ENGINE_TO_Z_BUFFER: incomplete Z-buffer tiles")
         return
+    zq_tiles = z_q_rows[:zq_count * array_width].reshape(zq_count, array_width, -1)
 
     next_src_tile = 0
     tile_matches = []
@@ -868,7 +914,7 @@ def analyze_z_source_to_buffer(z_src_rows, z_q_rows, array_width, max_show=8):
     for zq_tile_idx, zq_tile in enumerate(zq_tiles):
         matched_src_tile = None
         for src_tile_idx in range(next_src_tile, len(src_tiles)):
-            if zq_tile == src_tiles[src_tile_idx]['cols']:
+            if np.array_equal(zq_tile, src_tiles[src_tile_idx]):
                 matched_src_tile = src_tile_idx
                 tile_matches.append((zq_tile_idx, src_tile_idx))
                 next_src_tile = src_tile_idx + 1
@@ -880,36 +926,25 @@ def analyze_z_source_to_buffer(z_src_rows, z_q_rows, array_width, max_show=8):
     if mismatch is None:
         print(f"   Z_ENGINE_TO_Z_BUFFER: PASS ({len(zq_tiles)} tiles matched by exact transpose)")
         for zq_tile_idx, src_tile_idx in tile_matches:
-            src_base = src_tiles[src_tile_idx]['base']
+            src_base = src_tile_idx * array_width
             print(f"     z_buffer_q tile {zq_tile_idx} <- z_engine_source rows "
                   f"{src_base}:{src_base + array_width} (source tile {src_tile_idx})")
     else:
         print(f"   Z_ENGINE_TO_Z_BUFFER: FAIL (z_buffer_q tile {mismatch} has no exact source-tile match)")
         zq_tile = zq_tiles[mismatch]
         if next_src_tile < len(src_tiles):
-            exp_tile = src_tiles[next_src_tile]['cols']
-            shown = 0
-            for row_idx, (got_row, exp_row) in enumerate(zip(zq_tile, exp_tile)):
-                for col_idx, (got_val, exp_val) in enumerate(zip(got_row, exp_row)):
-                    if got_val != exp_val:
-                        print(f"     Z_ENGINE_TO_Z_BUFFER[tile={mismatch},row={row_idx},idx={col_idx}]: "
-                              f"got 0x{got_val:04x} exp 0x{exp_val:04x}")
-                        shown += 1
-                        if shown >= max_show:
-                            break
-                if shown >= max_show:
-                    break
-
-    first_dup_pair = None
-    for idx in range(len(z_src_rows) - 1):
-        if z_src_rows[idx] == z_src_rows[idx + 1]:
-            first_dup_pair = idx
-            break
-
-    if first_dup_pair is None:
+            exp_tile = src_tiles[next_src_tile]
+            cols = min(zq_tile.shape[1], exp_tile.shape[1])
+            for row_idx, col_idx in _first_true(zq_tile[:, :cols] != exp_tile[:, :cols], max_show):
+                print(f"     Z_ENGINE_TO_Z_BUFFER[tile={mismatch},row={row_idx},idx={col_idx}]: "
+                      f"got 0x{int(zq_tile[row_idx, col_idx]):04x} exp 0x{int(exp_tile[row_idx, col_idx]):04x}")
+
+    dup_rows = np.flatnonzero((z_src_rows[1:] == z_src_rows[:-1]).all(axis=1))
+    if len(dup_rows) == 0:
         print("   Z_ENGINE_ROW_DUP: no identical adjacent source rows")
         return
 
+    first_dup_pair = int(dup_rows[0])
     tile_idx = first_dup_pair // array_width
     row_in_tile = first_dup_pair % array_width
     zq_base = tile_idx * array_width
@@ -917,40 +952,37 @@ def analyze_z_source_to_buffer(z_src_rows, z_q_rows, array_width, max_show=8):
     print(f"     rows {first_dup_pair}/{first_dup_pair + 1} "
           f"(tile {tile_idx}, row {row_in_tile}/{row_in_tile + 1})")
     print(f"     z_engine_source[{first_dup_pair}][0:8] = "
-          f"{[f'0x{v:04x}' for v in z_src_rows[first_dup_pair][:8]]}")
+          f"{[f'0x{v:04x}' for v in z_src_rows[first_dup_pair, :8]]}")
     if zq_base < len(z_q_rows):
         print(f"     z_buffer_q_stream[{zq_base}][0:8] = "
-              f"{[f'0x{v:04x}' for v in z_q_rows[zq_base][:8]]}")
+              f"{[f'0x{v:04x}' for v in z_q_rows[zq_base, :8]]}")
 
 
-def _encode_rows_to_blocks(rows, block_size):
-    """Convert FP16 rows into block_size chunks for MX encoder checks."""
-    from mx_fp_golden import encode_block_fp16_to_mx
+def _encode_rows_to_blocks(rows, block_size, mx_fmt='e4m3'):
+    """Convert FP16 rows into block_size chunks for MX encoder checks.
 
-    exp_out = []
-    fp8_out = []
-    for row in rows:
-        for start in range(0, len(row), block_size):
-            block = list(row[start:start + block_size])
-            if len(block) < block_size:
-                block.extend([0] * (block_size - len(block)))
-            exp_val, fp8_vals = encode_block_fp16_to_mx(block)
-            exp_out.append(exp_val)
-            fp8_out.append(fp8_vals)
-    return exp_out, fp8_out
+    Returns (exponents, fp8 blocks) as uint8 arrays.
+    """
+    blocks_per_row = (rows.shape[1] + block_size - 1) // block_size
+    padded = np.zeros((len(rows), blocks_per_row * block_size), dtype=rows.dtype)
+    padded[:, :rows.shape[1]] = rows
+    blocks = padded.reshape(-1, block_size)
+
+    exp_out, fp8_out = encode_blocks_fp16_to_mx(blocks, mx_fmt)
+    return exp_out, fp8_out.astype(np.uint8)
 
 
 def analyze_mx_encoder_stages(enc_in_rows, enc_fp8_blocks, enc_exps, z_golden,
-                              block_size=32, max_show=8):
+                              block_size=32, max_show=8, mx_fmt='e4m3'):
     """Stage-level MX encoder checks using golden rows and actual encoder inputs."""
     print(f"\n12. MX Encoder stage-by-stage")
     if enc_in_rows is None:
         print("   Encoder input dump missing")
         return
 
-    golden_rows = [row[:len(enc_in_rows[0])] for row in z_golden[:len(enc_in_rows)]]
-    golden_exp, golden_fp8 = _encode_rows_to_blocks(golden_rows, block_size)
-    self_exp, self_fp8 = _encode_rows_to_blocks(enc_in_rows, block_size)
+    golden_rows = z_golden[:len(enc_in_rows), :enc_in_rows.shape[1]]
+    golden_exp, golden_fp8 = _encode_rows_to_blocks(golden_rows, block_size, mx_fmt)
+    self_exp, self_fp8 = _encode_rows_to_blocks(enc_in_rows, block_size, mx_fmt)
 
     compare_scalar_sequence("ENCODER_EXP_GOLDEN", enc_exps, golden_exp, elem_bits=8, max_show=max_show)
     compare_ordered_blocks("ENCODER_FP8_GOLDEN", enc_fp8_blocks, golden_fp8, elem_bits=8, max_show=max_show)
@@ -958,89 +990,193 @@ def analyze_mx_encoder_stages(enc_in_rows, enc_fp8_blocks, enc_exps, z_golden,
     compare_ordered_blocks("ENCODER_FP8_SELFCHK", enc_fp8_blocks, self_fp8, elem_bits=8, max_show=max_show)
 
 
-def analyze_engine_feed_trace(trace_rows, x_dump, w_dump, z_dump, enc_in_rows,
+def _first_dup_lane_pair(lanes):
+    """Index of the first lane of the first equal (2i, 2i+1) pair, or None."""
+    pairs = lanes[:len(lanes) // 2 * 2].reshape(-1, 2)
+    hits = np.flatnonzero(pairs[:, 0] == pairs[:, 1])
+    return int(hits[0]) * 2 if len(hits) else None
+
+
+def analyze_engine_feed_trace(trace, x_dump, w_dump, z_dump, enc_in_rows,
                               z_golden, array_width, max_show=8):
     """Correlate engine_feed_trace.csv with the heavier text dumps."""
     print(f"\n13. Engine feed trace correlation")
-    if trace_rows is None:
+    if trace is None:
         print("   Engine feed trace missing")
         return
 
-    trace_x = [row['lanes'] for row in trace_rows if row['event'] == 'XBUFQ']
-    trace_w = [row['lanes'] for row in trace_rows if row['event'] == 'WBUFQ']
-    trace_z = [row['lanes'] for row in trace_rows if row['event'] == 'ZPOP']
+    events = trace['event']
+    trace_x = trace['lanes'][events == 'XBUFQ']
+    trace_w = trace['lanes'][events == 'WBUFQ']
+    trace_z = trace['lanes'][events == 'ZPOP']
 
     if x_dump is not None:
-        x_summary = [[line[i * array_width] for i in range(min(8, len(line) // max(1, array_width)))]
-                     for line in x_dump]
+        count = min(8, x_dump.shape[1] // max(1, array_width))
+        x_summary = x_dump[:, np.arange(count) * array_width]
         compare_ordered_blocks("TRACE_XBUFQ", trace_x, x_summary, elem_bits=16, max_show=max_show)
     else:
         print("   TRACE_XBUFQ: current dump missing")
 
     if w_dump is not None:
-        w_summary = [line[:8] for line in w_dump]
-        compare_ordered_blocks("TRACE_WBUFQ", trace_w, w_summary, elem_bits=16, max_show=max_show)
+        compare_ordered_blocks("TRACE_WBUFQ", trace_w, w_dump[:, :8], elem_bits=16, max_show=max_show)
     else:
         print("   TRACE_WBUFQ: current dump missing")
 
     if z_dump is not None:
-        z_summary = [line[:8] for line in z_dump]
-        compare_ordered_blocks("TRACE_ZPOP", trace_z, z_summary, elem_bits=16, max_show=max_show)
+        compare_ordered_blocks("TRACE_ZPOP", trace_z, z_dump[:, :8], elem_bits=16, max_show=max_show)
     else:
         print("   TRACE_ZPOP: current dump missing")
 
-    first_pairdup = None
-    for row in trace_rows:
-        if row['event'] == 'ZPOP' and row['pairdup'] == 1:
-            first_pairdup = row
-            break
-
-    if first_pairdup is None:
+    pairdup_rows = np.flatnonzero((events == 'ZPOP') & (trace['pairdup'] == 1))
+    if len(pairdup_rows) == 0:
         print("   ZPOP_DUPLICATION: no pairdup-marked ZPOP rows")
         return
 
+    first = int(pairdup_rows[0])
+    lanes = trace['lanes'][first]
+    row_idx = int(trace['line_idx'][first])
     print("   ZPOP_DUPLICATION: first pairdup-marked ZPOP row")
-    print(f"     time={first_pairdup['time']} line_idx={first_pairdup['line_idx']} "
-          f"mx_enable={first_pairdup['mx_enable']} pairdup={first_pairdup['pairdup']}")
-    print(f"     trace lanes[0:8] = {[f'0x{v:04x}' for v in first_pairdup['lanes'][:8]]}")
-
-    dup_pair = None
-    lanes = first_pairdup['lanes']
-    for i in range(0, len(lanes) - 1, 2):
-        if lanes[i] == lanes[i + 1]:
-            dup_pair = i
-            break
+    print(f"     time={trace['time'][first]} line_idx={row_idx} "
+          f"mx_enable={trace['mx_enable'][first]} pairdup={trace['pairdup'][first]}")
+    print(f"     trace lanes[0:8] = {[f'0x{v:04x}' for v in lanes[:8]]}")
 
+    dup_pair = _first_dup_lane_pair(lanes)
     if dup_pair is not None:
         print(f"     first duplicated lane pair in trace: "
-              f"lane{dup_pair}/lane{dup_pair + 1} = 0x{lanes[dup_pair]:04x}")
+              f"lane{dup_pair}/lane{dup_pair + 1} = 0x{int(lanes[dup_pair]):04x}")
     else:
         print("     no duplicated adjacent pair found in the 8-lane trace summary")
 
-    row_idx = first_pairdup['line_idx']
     if z_dump is not None and row_idx < len(z_dump):
         print(f"     engine_z_outputs[{row_idx}][0:8] = "
-              f"{[f'0x{v:04x}' for v in z_dump[row_idx][:8]]}")
-        dup_pair_dump = None
-        for i in range(0, min(len(z_dump[row_idx]), 8) - 1, 2):
-            if z_dump[row_idx][i] == z_dump[row_idx][i + 1]:
-                dup_pair_dump = i
-                break
+              f"{[f'0x{v:04x}' for v in z_dump[row_idx, :8]]}")
+        dup_pair_dump = _first_dup_lane_pair(z_dump[row_idx, :8])
         if dup_pair_dump is not None:
             print(f"     first duplicated lane pair in engine_z_outputs[0:8]: "
-                  f"lane{dup_pair_dump}/lane{dup_pair_dump + 1} = 0x{z_dump[row_idx][dup_pair_dump]:04x}")
+                  f"lane{dup_pair_dump}/lane{dup_pair_dump + 1} = 0x{int(z_dump[row_idx, dup_pair_dump]):04x}")
 
     if enc_in_rows is not None and row_idx < len(enc_in_rows):
         print(f"     mx_encoder_fp16_inputs[{row_idx}][0:8] = "
-              f"{[f'0x{v:04x}' for v in enc_in_rows[row_idx][:8]]}")
+              f"{[f'0x{v:04x}' for v in enc_in_rows[row_idx, :8]]}")
         print(f"     mx_encoder_fp16_inputs[{row_idx}][32:40] = "
-              f"{[f'0x{v:04x}' for v in enc_in_rows[row_idx][32:40]]}")
+              f"{[f'0x{v:04x}' for v in enc_in_rows[row_idx, 32:40]]}")
 
     if z_golden is not None and row_idx < len(z_golden):
         print(f"     golden_z[{row_idx}][0:8] = "
-              f"{[f'0x{v:04x}' for v in z_golden[row_idx][:8]]}")
+              f"{[f'0x{v:04x}' for v in z_golden[row_idx, :8]]}")
         print(f"     golden_z[{row_idx}][32:40] = "
-              f"{[f'0x{v:04x}' for v in z_golden[row_idx][32:40]]}")
+              f"{[f'0x{v:04x}' for v in z_golden[row_idx, 32:40]]}")
+
+
+def check_stage_references(x_dump, w_dump, dump_dir, header_dir, ref_dir=None):
+    """Compare X/W stage dumps against reference (baseline) dumps."""
+    print("\n5. Stage checks (X/W)")
+    if ref_dir is None:
+        ref_x_path = os.path.join(dump_dir, 'engine_x_inputs_baseline.txt')
+        ref_w_path = os.path.join(dump_dir, 'engine_w_inputs_baseline.txt')
+    else:
+        ref_x_path = os.path.join(ref_dir, 'engine_x_inputs.txt')
+        ref_w_path = os.path.join(ref_dir, 'engine_w_inputs.txt')
+
+    ref_x_dump = parse_engine_dump(ref_x_path)
+    ref_w_dump = parse_engine_dump(ref_w_path)
+
+    input_files = [
+        os.path.join(header_dir, 'x_input.h'),
+        os.path.join(header_dir, 'w_input.h'),
+        os.path.join(header_dir, 'y_input.h'),
+        os.path.join(header_dir, 'x_input_mx.h'),
+        os.path.join(header_dir, 'w_input_mx.h'),
+        os.path.join(header_dir, 'x_exp_mx.h'),
+        os.path.join(header_dir, 'w_exp_mx.h'),
+    ]
+    stale_ref, stale_reason = is_reference_stale(input_files, [ref_x_path, ref_w_path])
+
+    if ref_x_dump is not None or ref_w_dump is not None:
+        print(f"   Using reference dumps:")
+        print(f"     X ref: {ref_x_path}")
+        print(f"     W ref: {ref_w_path}")
+        if stale_ref:
+            print(f"   Stage reference appears stale: {stale_reason}")
+            print("   X_STAGE: INCONCLUSIVE (refresh baseline reference dumps)")
+            print("   W_STAGE: INCONCLUSIVE (refresh baseline reference dumps)")
+        else:
+            compare_stage_dump("X_STAGE", x_dump, ref_x_dump)
+            compare_stage_dump("W_STAGE", w_dump, ref_w_dump)
+    else:
+        print("   No reference stage dumps found; falling back to structural checks only.")
+
+
+# ── Stage scheduling ─────────────────────────────────────────────
+
+# Stages of the current run_stages() call. Forked workers inherit them, so
+# the (read-only) arrays they reference are shared, not pickled.
+_FORK_STAGES = None
+
+
+def _run_stage(stage):
+    """Run one (name, func, args, kwargs) stage with stdout captured.
+
+    Returns (report text, traceback text or None, wall s, cpu s).
+    """
+    _, func, args, kwargs = stage
+    out = io.StringIO()
+    error = None
+    t0, c0 = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(out):
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            error = traceback.format_exc()
+    return out.getvalue(), error, time.perf_counter() - t0, time.process_time() - c0
+
+
+def _run_forked_stage(index):
+    return _run_stage(_FORK_STAGES[index])
+
+
+def run_stages(stages, jobs, prof=None):
+    """Run independent (name, func, args, kwargs) stages on up to `jobs` processes.
+
+    Stages only read their arguments. Each report is printed as a whole, in
+    list order, as soon as it and all stages before it are done. With
+    jobs <= 1 the stages run in this process and print directly.
+    """
+    global _FORK_STAGES
+    if jobs <= 1 or len(stages) <= 1:
+        for name, func, args, kwargs in stages:
+            if prof is not None:
+                with prof.stage(name):
+                    func(*args, **kwargs)
+            else:
+                func(*args, **kwargs)
+        return
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+        _FORK_STAGES = stages
+        tasks = [(_run_forked_stage, i) for i in range(len(stages))]
+    else:
+        ctx = multiprocessing.get_context()
+        tasks = [(_run_stage, stage) for stage in stages]
+
+    sys.stdout.flush()
+    try:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(stages)), mp_context=ctx) as pool:
+            futures = [pool.submit(fn, arg) for fn, arg in tasks]
+            for (name, _, _, _), future in zip(stages, futures):
+                text, error, wall, cpu = future.result()
+                sys.stdout.write(text)
+                sys.stdout.flush()
+                if prof is not None:
+                    prof.add(name, wall, cpu)
+                if error is not None:
+                    for other in futures:
+                        other.cancel()
+                    sys.stderr.write(error)
+                    raise RuntimeError(f"stage '{name}' failed")
+    finally:
+        _FORK_STAGES = None
 
 
 # ── Main ─────────────────────────────────────────────────────────
@@ -1050,15 +1186,24 @@ def main():
     parser.add_argument('--mode', choices=['fp16', 'mx'], default='fp16',
                         help='fp16 = baseline FP16, mx = MX FP8+exponent path')
     parser.add_argument('--dump-dir', default='../../target/sim/vsim',
-                        help='Directory with engine dump files')
+                        help='Directory with engine dump files, or a run bundle (*.dumps.zip)')
     parser.add_argument('--header-dir', default='../../sw/inc',
                         help='Directory with C header files')
     parser.add_argument('-M', type=int, default=64)
     parser.add_argument('-N', type=int, default=64)
     parser.add_argument('-K', type=int, default=64)
     parser.add_argument('--block-size', type=int, default=32, help='MX block size (MX mode only)')
+    parser.add_argument('--mx-format', choices=list(MX_FORMAT_SPECS.keys()), default='e4m3',
+                        help='MX element format (MX mode only, default: e4m3)')
+    for op in ('x', 'w', 'z'):
+        parser.add_argument(f'--{op}-format', choices=list(MX_FORMAT_SPECS.keys()), default=None,
+                            help=f'{op.upper()} element format (default: --mx-format)')
+        parser.add_argument(f'--{op}-block-size', type=int, default=None,
+                            help=f'{op.upper()} MX block size (default: --block-size)')
     parser.add_argument('--array-width', type=int, default=32, help='ARRAY_WIDTH (M tile)')
     parser.add_argument('--array-height', type=int, default=32, help='ARRAY_HEIGHT (shift depth)')
+    parser.add_argument('--hw-order', action='store_true',
+                        help='Golden GEMM in engine accumulation order for ARRAY_HEIGHT')
     parser.add_argument('--skip-gemm', action='store_true',
                         help='Skip GEMM computation, use pre-computed golden.h (FP16 mode only)')
     parser.add_argument('--analyze-internals', action='store_true',
@@ -1070,19 +1215,33 @@ def main():
                         help='Also run legacy matrix-mapping checks for X/W internals (may report false mismatches for W ordering).')
     parser.add_argument('--max-stage-errors', type=int, default=8,
                         help='Maximum mismatches to print per detailed stage check')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes for the --analyze-internals stages (default: all CPUs, 1 = serial)')
+    profiling.add_profile_args(parser)
     args = parser.parse_args()
+    for op in ('x', 'w', 'z'):
+        if getattr(args, f'{op}_format') is None:
+            setattr(args, f'{op}_format', args.mx_format)
+        if getattr(args, f'{op}_block_size') is None:
+            setattr(args, f'{op}_block_size', args.block_size)
+    prof = profiling.start('check_engine_vs_golden', args)
 
     M, N, K = args.M, args.N, args.K
     AW, AH = args.array_width, args.array_height
 
     print(f"=== Engine vs Golden Check: {M}x{N} @ {N}x{K} GEMM ({args.mode.upper()} mode) ===")
     print(f"    ARRAY_WIDTH={AW}, ARRAY_HEIGHT={AH}")
+    if args.mode == 'mx':
+        print(f"    X {args.x_format}/{args.x_block_size}, W {args.w_format}/{args.w_block_size}, "
+              f"Z {args.z_format}/{args.z_block_size}")
     print()
 
     # ── 1. Load inputs ──
+    prof.mark('load_inputs')
     print(f"1. Loading {args.mode.upper()} input data...")
     if args.mode == 'mx':
-        x_fp16, w_fp16, y_fp16 = load_mx_inputs(args.header_dir, M, N, K, args.block_size)
+        x_fp16, w_fp16, y_fp16 = load_mx_inputs(args.header_dir, M, N, K, args.x_block_size,
+                                                args.w_block_size, args.x_format, args.w_format)
     else:
         x_fp16, w_fp16, y_fp16 = load_fp16_inputs(args.header_dir, M, N, K)
 
@@ -1091,17 +1250,21 @@ def main():
     print(f"   Y[0][0:4] = {['0x%04x' % v for v in y_fp16[0][:4]]}")
 
     # ── 2. Get golden Z ──
+    prof.mark('golden')
     z_golden = None
     if args.mode == 'fp16' and args.skip_gemm:
         print(f"\n2. Loading pre-computed golden from golden.h...")
         z_golden = load_fp16_golden(args.header_dir, M, K)
     else:
-        print(f"\n2. Computing golden GEMM ({M}x{N} @ {N}x{K})...")
-        z_golden = golden_gemm_fp16(x_fp16, w_fp16, y_fp16, M, N, K)
+        print(f"\n2. Computing golden GEMM ({M}x{N} @ {N}x{K})"
+              f"{' in engine order' if args.hw_order else ''}...")
+        z_golden = golden_gemm_fp16(x_fp16, w_fp16, y_fp16, M, N, K,
+                                    AH if args.hw_order else None)
 
     print(f"   Z[0][0:4] = {['0x%04x' % v for v in z_golden[0][:4]]}")
 
     # ── 3. Load engine dumps ──
+    prof.mark('load_dumps')
     print(f"\n3. Loading engine dump files from {args.dump_dir}...")
     z_dump = parse_engine_dump(os.path.join(args.dump_dir, 'engine_z_outputs.txt'))
     x_dump = parse_engine_dump(os.path.join(args.dump_dir, 'engine_x_inputs.txt'))
@@ -1109,13 +1272,14 @@ def main():
 
     found = []
     for name, data in [('engine_z_outputs', z_dump), ('engine_x_inputs', x_dump), ('engine_w_inputs', w_dump)]:
-        status = f"{len(data)} lines" if data else "EMPTY/MISSING"
+        status = f"{len(data)} lines" if data is not None else "EMPTY/MISSING"
         found.append(f"{name}: {status}")
     print(f"   {', '.join(found)}")
 
     # ── 4. Compare Z ──
+    prof.mark('compare_z')
     z_best_err = None
-    if z_dump:
+    if z_dump is not None:
         err_a, err_b, z_best_err = compare_z_output(z_dump, z_golden, M, K, AW)
         if z_best_err == 0:
             print("\n4. Z RESULT: PASS (at least one stream interpretation matches golden exactly)")
@@ -1124,87 +1288,61 @@ def main():
     else:
         print(f"\n4. No Z output data to compare (file empty or missing)")
 
-    # ── 5. X buffer ──
+    # ── 5.-13. Internal stage checks ──
+    prof.end()
     if args.analyze_internals:
-        print("\n5. Stage checks (X/W)")
-        ref_dir = args.stage_reference_dir
-        if ref_dir is None:
-            ref_x_path = os.path.join(args.dump_dir, 'engine_x_inputs_baseline.txt')
-            ref_w_path = os.path.join(args.dump_dir, 'engine_w_inputs_baseline.txt')
-        else:
-            ref_x_path = os.path.join(ref_dir, 'engine_x_inputs.txt')
-            ref_w_path = os.path.join(ref_dir, 'engine_w_inputs.txt')
-
-        ref_x_dump = parse_engine_dump(ref_x_path)
-        ref_w_dump = parse_engine_dump(ref_w_path)
-
-        input_files = [
-            os.path.join(args.header_dir, 'x_input.h'),
-            os.path.join(args.header_dir, 'w_input.h'),
-            os.path.join(args.header_dir, 'y_input.h'),
-            os.path.join(args.header_dir, 'x_input_mx.h'),
-            os.path.join(args.header_dir, 'w_input_mx.h'),
-            os.path.join(args.header_dir, 'x_exp_mx.h'),
-            os.path.join(args.header_dir, 'w_exp_mx.h'),
-        ]
-        stale_ref, stale_reason = is_reference_stale(input_files, [ref_x_path, ref_w_path])
-
-        if ref_x_dump is not None or ref_w_dump is not None:
-            print(f"   Using reference dumps:")
-            print(f"     X ref: {ref_x_path}")
-            print(f"     W ref: {ref_w_path}")
-            if stale_ref:
-                print(f"   Stage reference appears stale: {stale_reason}")
-                print("   X_STAGE: INCONCLUSIVE (refresh baseline reference dumps)")
-                print("   W_STAGE: INCONCLUSIVE (refresh baseline reference dumps)")
-            else:
-                compare_stage_dump("X_STAGE", x_dump, ref_x_dump)
-                compare_stage_dump("W_STAGE", w_dump, ref_w_dump)
-        else:
-            print("   No reference stage dumps found; falling back to structural checks only.")
+        stages = [('stage_ref', check_stage_references,
+                   (x_dump, w_dump, args.dump_dir, args.header_dir, args.stage_reference_dir), {})]
 
         if args.legacy_stage_mapping_check:
-            if x_dump:
-                analyze_x_buffer(x_dump, x_fp16, AW, AH, N)
+            if x_dump is not None:
+                stages.append(('x_buffer', analyze_x_buffer, (x_dump, x_fp16, AW, AH, N), {}))
             else:
-                print(f"\n5. No X buffer data to compare")
-
-    # ── 6. W buffer ──
-    if args.analyze_internals and args.legacy_stage_mapping_check:
-        if w_dump:
-            analyze_w_buffer(w_dump, w_fp16, AH, N, K)
-            analyze_w_sequence_mapping(w_dump, w_fp16, AH, N, K)
-        else:
-            print(f"\n6. No W buffer data to compare")
-
-    # ── 7. MX decoder (MX mode only) ──
-    if args.mode == 'mx' and args.analyze_internals:
-        dec_fp16 = parse_engine_dump(os.path.join(args.dump_dir, 'mx_decoder_fp16_outputs.txt'))
-        dec_targets = parse_target_dump(os.path.join(args.dump_dir, 'mx_decoder_targets.txt'))
-        dec_exps = parse_hex_scalar_lines(os.path.join(args.dump_dir, 'mx_decoder_exponents.txt'))
-        z_src_rows = parse_engine_dump(os.path.join(args.dump_dir, 'z_engine_source.txt'))
-        z_q_rows = parse_engine_dump(os.path.join(args.dump_dir, 'z_buffer_q_stream.txt'))
-        enc_in_rows = parse_packed_hex_blocks(os.path.join(args.dump_dir, 'mx_encoder_fp16_inputs.txt'), 16)
-        enc_fp8_blocks = parse_packed_hex_blocks(os.path.join(args.dump_dir, 'mx_encoder_fp8_outputs.txt'), 8)
-        enc_exps = parse_hex_scalar_lines(os.path.join(args.dump_dir, 'mx_encoder_exponents.txt'))
-        feed_trace = parse_engine_feed_trace(os.path.join(args.dump_dir, 'engine_feed_trace.csv'))
-
-        if dec_fp16 and dec_targets:
-            analyze_mx_decoder(dec_fp16, dec_targets, x_fp16, w_fp16,
-                              M=M, N=N, K=K, block_size=args.block_size)
-            analyze_mx_decoder_stages(dec_fp16, dec_targets, dec_exps, args.header_dir,
-                                      M, N, K, block_size=args.block_size,
-                                      max_show=args.max_stage_errors)
-        else:
-            print(f"\n7. No MX decoder data to compare")
-
-        analyze_z_encoder_boundary(z_dump, enc_in_rows, z_golden, max_show=args.max_stage_errors)
-        analyze_z_source_to_buffer(z_src_rows, z_q_rows, AW, max_show=args.max_stage_errors)
-        analyze_mx_encoder_stages(enc_in_rows, enc_fp8_blocks, enc_exps, z_golden,
-                                  block_size=args.block_size, max_show=args.max_stage_errors)
-        analyze_engine_feed_trace(feed_trace, x_dump, w_dump, z_dump, enc_in_rows, z_golden, AW,
-                                  max_show=args.max_stage_errors)
-
+                stages.append(('x_buffer', print, (f"\n5. No X buffer data to compare",), {}))
+            if w_dump is not None:
+                stages.append(('w_buffer', analyze_w_buffer, (w_dump, w_fp16, AH, N, K), {}))
+                stages.append(('w_sequence', analyze_w_sequence_mapping, (w_dump, w_fp16, AH, N, K), {}))
+            else:
+                stages.append(('w_buffer', print, (f"\n6. No W buffer data to compare",), {}))
+
+        if args.mode == 'mx':
+            prof.mark('load_mx_dumps')
+            dec_fp16 = parse_engine_dump(os.path.join(args.dump_dir, 'mx_decoder_fp16_outputs.txt'))
+            dec_targets = parse_target_dump(os.path.join(args.dump_dir, 'mx_decoder_targets.txt'))
+            dec_exps = parse_hex_scalar_lines(os.path.join(args.dump_dir, 'mx_decoder_exponents.txt'))
+            z_src_rows = parse_engine_dump(os.path.join(args.dump_dir, 'z_engine_source.txt'))
+            z_q_rows = parse_engine_dump(os.path.join(args.dump_dir, 'z_buffer_q_stream.txt'))
+            enc_in_rows = parse_packed_hex_blocks(os.path.join(args.dump_dir, 'mx_encoder_fp16_inputs.txt'), 16)
+            enc_fp8_blocks = parse_packed_hex_blocks(os.path.join(args.dump_dir, 'mx_encoder_fp8_outputs.txt'), 8)
+            enc_exps = parse_hex_scalar_lines(os.path.join(args.dump_dir, 'mx_encoder_exponents.txt'))
+            feed_trace = parse_engine_feed_trace(os.path.join(args.dump_dir, 'engine_feed_trace.csv'))
+            show = {'max_show': args.max_stage_errors}
+
+            if dec_fp16 is not None and dec_targets is not None:
+                stages.append(('mx_decoder', analyze_mx_decoder, (dec_fp16, dec_targets, x_fp16, w_fp16),
+                               {'M': M, 'N': N, 'K': K, 'block_size': args.x_block_size,
+                                'w_block_size': args.w_block_size}))
+                stages.append(('mx_decoder_stages', analyze_mx_decoder_stages,
+                               (dec_fp16, dec_targets, dec_exps, args.header_dir, M, N, K),
+                               {'block_size': args.x_block_size, 'w_block_size': args.w_block_size,
+                                'x_format': args.x_format, 'w_format': args.w_format, **show}))
+            else:
+                stages.append(('mx_decoder', print, (f"\n7. No MX decoder data to compare",), {}))
+
+            stages.append(('z_encoder_boundary', analyze_z_encoder_boundary,
+                           (z_dump, enc_in_rows, z_golden), show))
+            stages.append(('z_source_to_buffer', analyze_z_source_to_buffer,
+                           (z_src_rows, z_q_rows, AW), show))
+            stages.append(('mx_encoder_stages', analyze_mx_encoder_stages,
+                           (enc_in_rows, enc_fp8_blocks, enc_exps, z_golden),
+                           {'block_size': args.z_block_size, 'mx_fmt': args.z_format, **show}))
+            stages.append(('feed_trace', analyze_engine_feed_trace,
+                           (feed_trace, x_dump, w_dump, z_dump, enc_in_rows, z_golden, AW), show))
+
+        prof.mark('internals')
+        run_stages(stages, args.jobs, prof)
+
+    prof.end()
     if not args.analyze_internals:
         print("\n   Note: internal X/W/decoder checks are skipped by default.")
         print("         Use --analyze-internals for deep diagnostics.")
@@ -33,8 +33,10 @@ import numpy as np
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
 
-from mx_fp_golden import (mxfp8_decode_bits, encode_block_fp16_to_mx,
-                          mx_decode_bits, MX_FORMAT_SPECS)
+from mx_fp_golden import (mxfp8_decode_bits, encode_blocks_fp16_to_mx,
+                          mx_decode_array, mx_operand_bytes, MX_FORMAT_SPECS)
+from mx_tile_order import from_tile_major, to_tile_major
+import profiling
 
 
 def parse_c_header_array(filename, expected_type='uint16_t'):
@@ -82,6 +84,13 @@ def unpack_fp6_from_16bit(packed_values):
     return fp6_values
 
 
+def unpack_mx_elements(packed_values, mx_fmt='e4m3'):
+    """Unpack MX elements from 16-bit words in the TCDM layout of `mx_fmt`."""
+    if mx_fmt == 'e2m1':
+        return unpack_fp4_from_16bit(packed_values)
+    return unpack_fp8_from_16bit(packed_values)
+
+
 def pack_fp6_to_32bit_words(fp6_values):
     """Pack FP6 6-bit values tightly into 32-bit words."""
     bits = 0
@@ -133,21 +142,16 @@ def decode_mx_to_fp16(fp8_values, exponents, block_size=32, mx_fmt='e4m3'):
     Returns:
         List of FP16 bit patterns (16-bit integers)
     """
-    exp_bits, mant_bits, bias = MX_FORMAT_SPECS[mx_fmt]
-    fp16_values = []
+    fp8_values = np.asarray(fp8_values, dtype=np.int64)
     num_blocks = (len(fp8_values) + block_size - 1) // block_size
 
-    for block_idx in range(num_blocks):
-        exp = exponents[block_idx] if block_idx < len(exponents) else 0x7F
+    # One shared exponent per element; missing exponents decode as 2^0
+    block_exps = np.full(num_blocks, 0x7F, dtype=np.int64)
+    have = min(num_blocks, len(exponents))
+    block_exps[:have] = np.asarray(exponents[:have], dtype=np.int64)
+    elem_exps = np.repeat(block_exps, block_size)[:len(fp8_values)]
 
-        for lane in range(block_size):
-            idx = block_idx * block_size + lane
-            if idx < len(fp8_values):
-                elem = fp8_values[idx]
-                fp16 = mx_decode_bits(elem, exp, exp_bits, mant_bits, bias)
-                fp16_values.append(fp16)
-
-    return fp16_values
+    return mx_decode_array(fp8_values, elem_exps, mx_fmt).tolist()
 
 
 def fp16_bits_to_float(bits):
@@ -162,7 +166,7 @@ def float_to_fp16_bits(val):
     return int(arr.view(np.uint16)[0])
 
 
-def perform_gemm_fp16(x_bits, w_bits, y_bits, M, N, K):
+def perform_gemm_fp16(x_bits, w_bits, y_bits, M, N, K, hw_array_height=None):
     """
     Perform GEMM using bit-true FMA: Z = X @ W + Y
 
@@ -171,31 +175,27 @@ def perform_gemm_fp16(x_bits, w_bits, y_bits, M, N, K):
         w_bits: List of FP16 bit patterns for W (N x K matrix, row-major)
         y_bits: List of FP16 bit patterns for Y (M x K matrix, row-major)
         M, N, K: Matrix dimensions
+        hw_array_height: Optional ARRAY_HEIGHT; when given, accumulate in
+            the engine's order (see redmule_fma.matrix_multiply_hw_order)
 
     Returns:
         List of FP16 bit patterns for Z (M x K matrix)
     """
     # Import the bit-true FMA
-    from redmule_fma import bittrue_fma
-
-    # Convert to numpy arrays
-    X = np.array([fp16_bits_to_float(b) for b in x_bits[:M*N]], dtype=np.float16).reshape(M, N)
-    W = np.array([fp16_bits_to_float(b) for b in w_bits[:N*K]], dtype=np.float16).reshape(N, K)
-    Y = np.array([fp16_bits_to_float(b) for b in y_bits[:M*K]], dtype=np.float16).reshape(M, K)
+    from redmule_fma import matrix_multiply_with_bittrue_fma, matrix_multiply_hw_order
 
-    # Perform GEMM with bit-true FMA
-    Z = np.zeros((M, K), dtype=np.float64)
-    for m in range(M):
-        for k in range(K):
-            acc = float(Y[m, k])
-            for n in range(N):
-                acc = bittrue_fma(X[m, n], W[n, k], acc)
-            Z[m, k] = acc
+    # Keep the raw FP16 bit patterns (the FMA works on bits)
+    X = np.array(x_bits[:M*N], dtype=np.uint16).view(np.float16).reshape(M, N)
+    W = np.array(w_bits[:N*K], dtype=np.uint16).view(np.float16).reshape(N, K)
+    Y = np.array(y_bits[:M*K], dtype=np.uint16).view(np.float16).reshape(M, K)
 
-    Z = Z.astype(np.float16)
+    if hw_array_height is not None:
+        Z = matrix_multiply_hw_order(X, W, Y, hw_array_height)
+    else:
+        Z = matrix_multiply_with_bittrue_fma(X, W, Y)
 
     # Convert back to bit patterns
-    z_bits = [float_to_fp16_bits(float(z)) for z in Z.flatten()]
+    z_bits = [int(b) for b in Z.view(np.uint16).flatten()]
     return z_bits
 
 
@@ -211,20 +211,12 @@ def encode_fp16_to_mx(fp16_values, block_size=32, mx_fmt='e4m3'):
     Returns:
         (mx_values, exponents) - lists of MX element values and shared exponents
     """
-    mx_values = []
-    exponents = []
+    num_blocks = (len(fp16_values) + block_size - 1) // block_size
+    blocks = np.zeros(num_blocks * block_size, dtype=np.int64)
+    blocks[:len(fp16_values)] = fp16_values
+    exponents, mx_values = encode_blocks_fp16_to_mx(blocks.reshape(num_blocks, block_size), mx_fmt)
 
-    for i in range(0, len(fp16_values), block_size):
-        block = fp16_values[i:i+block_size]
-        # Pad if needed
-        while len(block) < block_size:
-            block.append(0)
-
-        exp, mx_block = encode_block_fp16_to_mx(block, fmt=mx_fmt)
-        mx_values.extend(mx_block)
-        exponents.append(exp)
-
-    return mx_values, exponents
+    return mx_values.ravel().tolist(), exponents.tolist()
 
 
 def pack_fp8_to_32bit_words(fp8_values):
@@ -289,6 +281,31 @@ def write_c_header(filename, array_name, values, elem_type='uint32_t', guard_nam
         f.write(f"#endif // {guard_name}\n")
 
 
+def print_traffic_report(args):
+    """Print the bytes each operand moves through TCDM, against an all-FP16 GEMM."""
+    M, N, K = args.M, args.N, args.K
+    exp_bytes = {'8bit': 1, '32bit': 4}
+    rows = [
+        ('X', M * N) + mx_operand_bytes(M * N, args.x_format, args.x_block_size,
+                                        exp_bytes[args.x_exp_format]),
+        ('W', N * K) + mx_operand_bytes(N * K, args.w_format, args.w_block_size,
+                                        exp_bytes[args.w_exp_format]),
+        ('Y', M * K, M * K * 2, 0),
+        ('Z', M * K) + mx_operand_bytes(M * K, args.z_format, args.z_block_size),
+    ]
+    fmts = {'X': f'{args.x_format}/{args.x_block_size}', 'W': f'{args.w_format}/{args.w_block_size}',
+            'Y': 'fp16', 'Z': f'{args.z_format}/{args.z_block_size}'}
+
+    print(f"\nBytes moved (X {fmts['X']}, W {fmts['W']}, Z {fmts['Z']}):")
+    print(f"   {'op':<3}{'format':<12}{'elements':>10}{'data':>10}{'exps':>8}{'fp16':>10}")
+    total = total_fp16 = 0
+    for name, elems, data, exps in rows:
+        print(f"   {name:<3}{fmts[name]:<12}{elems:>10}{data:>10}{exps:>8}{elems * 2:>10}")
+        total += data + exps
+        total_fp16 += elems * 2
+    print(f"   total {total} bytes vs {total_fp16} in FP16 ({total / total_fp16:.3f}x)")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate MX golden from MX inputs")
 
@@ -312,6 +329,11 @@ def main():
     parser.add_argument('--mx-format', choices=list(MX_FORMAT_SPECS.keys()), default='e4m3',
                         help='MX element format (default: e4m3)')
     parser.add_argument('--block-size', type=int, default=32, help='MX block size (default: 32)')
+    for op in ('x', 'w', 'z'):
+        parser.add_argument(f'--{op}-format', choices=list(MX_FORMAT_SPECS.keys()), default=None,
+                            help=f'{op.upper()} element format (default: --mx-format)')
+        parser.add_argument(f'--{op}-block-size', type=int, default=None,
+                            help=f'{op.upper()} MX block size (default: --block-size)')
     parser.add_argument('--x-exp-format', choices=['8bit', '32bit'], default='8bit',
                         help='X exponent format (default: 8bit)')
     parser.add_argument('--w-exp-format', choices=['8bit', '32bit'], default='32bit',
@@ -327,26 +349,37 @@ def main():
     # Hardware tiling parameters for Z output reordering
     parser.add_argument('--array-width', type=int, default=32,
                         help='Systolic array width (M-tile height, default: 32)')
+    parser.add_argument('--array-height', type=int, default=32,
+                        help='Systolic array height (FMA units per row, default: 32); '
+                             'sets the --hw-order padding')
+    parser.add_argument('--hw-order', action='store_true',
+                        help='Accumulate in the engine order for --array-height')
 
     # Output array names
     parser.add_argument('--mx-array-name', default='golden_mx', help='Array name for MX data')
     parser.add_argument('--exp-array-name', default='golden_mx_exp', help='Array name for exponents')
+    profiling.add_profile_args(parser)
 
     args = parser.parse_args()
+    for op in ('x', 'w', 'z'):
+        if getattr(args, f'{op}_format') is None:
+            setattr(args, f'{op}_format', args.mx_format)
+        if getattr(args, f'{op}_block_size') is None:
+            setattr(args, f'{op}_block_size', args.block_size)
+    prof = profiling.start('gen_mx_golden', args)
 
-    print(f"Generating MX golden for {args.M}x{args.N} @ {args.N}x{args.K} GEMM (format: {args.mx_format})")
+    print(f"Generating MX golden for {args.M}x{args.N} @ {args.N}x{args.K} GEMM "
+          f"(X: {args.x_format}/{args.x_block_size}, W: {args.w_format}/{args.w_block_size}, "
+          f"Z: {args.z_format}/{args.z_block_size})")
 
     # 1. Load MX inputs
+    prof.mark('load')
     print(f"\n1. Loading MX inputs...")
 
     # X matrix
     x_packed = parse_c_header_array(args.x_mx_header)
-    if args.mx_format == 'e2m1':
-        x_fp8 = unpack_fp4_from_16bit(x_packed)
-        print(f"   X data: {len(x_packed)} packed words -> {len(x_fp8)} FP4 values")
-    else:
-        x_fp8 = unpack_fp8_from_16bit(x_packed)
-        print(f"   X data: {len(x_packed)} packed words -> {len(x_fp8)} FP8 values")
+    x_fp8 = unpack_mx_elements(x_packed, args.x_format)
+    print(f"   X data: {len(x_packed)} packed words -> {len(x_fp8)} {args.x_format} values")
 
     x_exp_packed = parse_c_header_array(args.x_exp_header)
     if args.x_exp_format == '8bit':
@@ -357,12 +390,8 @@ def main():
 
     # W matrix
     w_packed = parse_c_header_array(args.w_mx_header)
-    if args.mx_format == 'e2m1':
-        w_fp8 = unpack_fp4_from_16bit(w_packed)
-        print(f"   W data: {len(w_packed)} packed words -> {len(w_fp8)} FP4 values")
-    else:
-        w_fp8 = unpack_fp8_from_16bit(w_packed)
-        print(f"   W data: {len(w_packed)} packed words -> {len(w_fp8)} FP8 values")
+    w_fp8 = unpack_mx_elements(w_packed, args.w_format)
+    print(f"   W data: {len(w_packed)} packed words -> {len(w_fp8)} {args.w_format} values")
 
     w_exp_packed = parse_c_header_array(args.w_exp_header)
     if args.w_exp_format == '8bit':
@@ -376,10 +405,11 @@ def main():
     print(f"   Y init: {len(y_fp16)} FP16 values")
 
     # 2. Decode MX to FP16
+    prof.mark('decode')
     print(f"\n2. Decoding MX to FP16...")
 
-    x_fp16 = decode_mx_to_fp16(x_fp8, x_exp, args.block_size, mx_fmt=args.mx_format)
-    w_fp16 = decode_mx_to_fp16(w_fp8, w_exp, args.block_size, mx_fmt=args.mx_format)
+    x_fp16 = decode_mx_to_fp16(x_fp8, x_exp, args.x_block_size, mx_fmt=args.x_format)
+    w_fp16 = decode_mx_to_fp16(w_fp8, w_exp, args.w_block_size, mx_fmt=args.w_format)
 
     print(f"   X FP16: {len(x_fp16)} values (need {args.M * args.N})")
     print(f"   W FP16: {len(w_fp16)} values (need {args.N * args.K})")
@@ -393,34 +423,21 @@ def main():
     if args.x_tile_cols > 0 and args.x_tile_cols < args.N:
         m_tile = args.array_width  # TRUE M-tile height
         print(f"   Reversing M-tile(N-tile) X ordering (m_tile={m_tile}, n_tile={args.x_tile_cols})")
-        x_row_major = [0] * (args.M * args.N)
-        idx = 0
-        for m_start in range(0, args.M, m_tile):
-            m_end = min(m_start + m_tile, args.M)
-            for n_start in range(0, args.N, args.x_tile_cols):
-                n_end = min(n_start + args.x_tile_cols, args.N)
-                for r in range(m_start, m_end):
-                    for c in range(n_start, n_end):
-                        x_row_major[r * args.N + c] = x_fp16[idx]
-                        idx += 1
-        x_fp16 = x_row_major
+        x_fp16 = from_tile_major(x_fp16, args.M, args.N, m_tile, args.x_tile_cols)
 
     # If W data was encoded in K-tile-major order, reverse it to row-major for GEMM
     if args.tile_cols > 0 and args.tile_cols < args.K:
         print(f"   Reversing K-tile-major W ordering (tile_cols={args.tile_cols})")
-        w_row_major = [0] * (args.N * args.K)
-        idx = 0
-        for k_start in range(0, args.K, args.tile_cols):
-            k_end = min(k_start + args.tile_cols, args.K)
-            for r in range(args.N):
-                for c in range(k_start, k_end):
-                    w_row_major[r * args.K + c] = w_fp16[idx]
-                    idx += 1
-        w_fp16 = w_row_major
+        w_fp16 = from_tile_major(w_fp16, args.N, args.K, args.N, args.tile_cols)
 
     # 3. Perform GEMM
-    print(f"\n3. Performing bit-true GEMM...")
-    z_fp16 = perform_gemm_fp16(x_fp16, w_fp16, y_fp16, args.M, args.N, args.K)
+    prof.mark('gemm')
+    hw_array_height = args.array_height if args.hw_order else None
+    if hw_array_height:
+        print(f"\n3. Performing bit-true GEMM in engine order (ARRAY_HEIGHT={hw_array_height})...")
+    else:
+        print(f"\n3. Performing bit-true GEMM...")
+    z_fp16 = perform_gemm_fp16(x_fp16, w_fp16, y_fp16, args.M, args.N, args.K, hw_array_height)
     print(f"   Z FP16: {len(z_fp16)} values")
 
     # Show some sample values for debugging
@@ -436,18 +453,12 @@ def main():
     #       for row in 0..array_width-1:
     #         emit Z[m_tile*array_width+row, k_tile*tile_cols : (k_tile+1)*tile_cols]
     # The MX encoder then encodes this stream sequentially into blocks of block_size.
+    prof.mark('reorder')
     if args.tile_cols > 0 and args.tile_cols < args.K:
         aw = args.array_width
         tc = args.tile_cols
         print(f"\n3b. Reordering Z to hardware tile order (array_width={aw}, tile_cols={tc})...")
-        z_tiled = []
-        for m_start in range(0, args.M, aw):
-            m_end = min(m_start + aw, args.M)
-            for k_start in range(0, args.K, tc):
-                k_end = min(k_start + tc, args.K)
-                for r in range(m_start, m_end):
-                    for c in range(k_start, k_end):
-                        z_tiled.append(z_fp16[r * args.K + c])
+        z_tiled = to_tile_major(z_fp16, args.M, args.K, aw, tc).tolist()
         assert len(z_tiled) == len(z_fp16), \
             f"Tile reorder size mismatch: {len(z_tiled)} vs {len(z_fp16)}"
         z_fp16 = z_tiled
@@ -464,18 +475,20 @@ def main():
     print(f"   Dumped {len(z_fp16)} tiled FP16 values to {z_fp16_dump}")
 
     # 4. Encode result to MX
+    prof.mark('encode')
     print(f"\n4. Encoding result to MX...")
-    z_mx, z_exp = encode_fp16_to_mx(z_fp16, args.block_size, mx_fmt=args.mx_format)
+    z_mx, z_exp = encode_fp16_to_mx(z_fp16, args.z_block_size, mx_fmt=args.z_format)
     print(f"   Z MX: {len(z_mx)} element values, {len(z_exp)} exponents")
 
     # Show sample encoded values
     print(f"   Sample Z exponents: {[f'0x{e:02x}' for e in z_exp[:4]]}")
 
     # 5. Pack and write output
+    prof.mark('write')
     print(f"\n5. Writing output headers...")
 
     # Pack MX elements to 32-bit words (format-dependent)
-    if args.mx_format == 'e2m1':
+    if args.z_format == 'e2m1':
         z_packed = pack_fp4_to_32bit_words(z_mx)
     else:
         z_packed = pack_fp8_to_32bit_words(z_mx)
@@ -489,6 +502,9 @@ def main():
                    elem_type='uint32_t', guard_name='__GOLDEN_MX_EXP_H__')
     print(f"   Wrote {len(z_exp_packed)} uint32_t values to {args.output_exp_header}")
 
+    print_traffic_report(args)
+
+    prof.end()
     print(f"\nDone! Golden MX output generated successfully.")
     return 0
 
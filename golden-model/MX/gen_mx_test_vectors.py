@@ -13,8 +13,12 @@ import argparse
 import re
 import sys
 import os
+import numpy as np
 sys.path.insert(0, os.path.dirname(__file__))
-from mx_fp_golden import encode_block_fp16_to_mx, MX_FORMAT_SPECS
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from mx_fp_golden import encode_blocks_fp16_to_mx, mx_operand_bytes, MX_FORMAT_SPECS
+from mx_tile_order import to_tile_major
+import profiling
 
 def parse_fp16_header(filename):
     """Parse a C header file with uint16_t array and return a list of FP16 ints."""
@@ -207,13 +211,7 @@ def reorder_ktile_major(vals, rows, cols, tile_cols):
     """
     assert len(vals) >= rows * cols, \
         f"reorder_ktile_major: need {rows*cols} vals, got {len(vals)}"
-    result = []
-    for k_start in range(0, cols, tile_cols):
-        k_end = min(k_start + tile_cols, cols)
-        for r in range(rows):
-            for c in range(k_start, k_end):
-                result.append(vals[r * cols + c])
-    return result
+    return to_tile_major(vals, rows, cols, rows, tile_cols).tolist()
 
 
 def reorder_mn_tile_major(vals, rows, cols, m_tile_rows, n_tile_cols):
@@ -227,30 +225,19 @@ def reorder_mn_tile_major(vals, rows, cols, m_tile_rows, n_tile_cols):
     """
     assert len(vals) >= rows * cols, \
         f"reorder_mn_tile_major: need {rows*cols} vals, got {len(vals)}"
-    result = []
-    for m_start in range(0, rows, m_tile_rows):
-        m_end = min(m_start + m_tile_rows, rows)
-        for n_start in range(0, cols, n_tile_cols):
-            n_end = min(n_start + n_tile_cols, cols)
-            for r in range(m_start, m_end):
-                for c in range(n_start, n_end):
-                    result.append(vals[r * cols + c])
-    return result
+    return to_tile_major(vals, rows, cols, m_tile_rows, n_tile_cols).tolist()
 
 
 def encode_fp16_blocks_to_mx(fp16_vals, block_size, mx_fmt='e4m3'):
     """Encode FP16 values into MX blocks and return (mx_blocks, exp_blocks)."""
     num_blocks = (len(fp16_vals) + block_size - 1) // block_size
-    mx_per_block = []
-    exp_blocks = []
-    for b in range(num_blocks):
-        block = fp16_vals[b*block_size:(b+1)*block_size]
-        if len(block) < block_size:
-            block += [0] * (block_size - len(block))
-        exp, mx = encode_block_fp16_to_mx(block, fmt=mx_fmt)
-        mx_per_block.append(mx)
-        exp_blocks.append(exp)
-    return mx_per_block, exp_blocks
+    blocks = np.zeros(num_blocks * block_size, dtype=np.int64)
+    blocks[:len(fp16_vals)] = fp16_vals
+    exp_blocks, mx_per_block = encode_blocks_fp16_to_mx(blocks.reshape(num_blocks, block_size), mx_fmt)
+    return mx_per_block.tolist(), exp_blocks.tolist()
+
+# Bytes per shared exponent in memory for each --exp-format
+EXP_FORMAT_BYTES = {'padded': 32, 'compact-8bit': 1, 'compact-32bit': 4}
 
 def main():
     parser = argparse.ArgumentParser(description='Generate MX test vectors from FP16 input header')
@@ -267,6 +254,10 @@ def main():
     parser.add_argument('--golden-input', help='Optional FP16 golden result header to encode to MX')
     parser.add_argument('--golden-output-header', help='Output C header for MX golden result (requires --golden-input)')
     parser.add_argument('--golden-array-name', default='golden_mx', help='Array name for MX golden header')
+    parser.add_argument('--golden-mx-format', choices=list(MX_FORMAT_SPECS.keys()), default=None,
+                        help='MX element format of the golden result (default: --mx-format)')
+    parser.add_argument('--golden-block-size', type=int, default=None,
+                        help='MX block size of the golden result (default: --block-size)')
     parser.add_argument('--exp-format', choices=['padded', 'compact-8bit', 'compact-32bit'], default='padded',
                         help='Exponent output format: padded (old 2/beat), compact-8bit (64/beat for X), compact-32bit (16/beat for W)')
     parser.add_argument('--total-blocks', type=int,
@@ -283,6 +274,7 @@ def main():
                              'When >0 with --tile-cols, uses M-tile-major(N-tile-major) reordering.')
     parser.add_argument('--mx-format', choices=list(MX_FORMAT_SPECS.keys()), default='e4m3',
                         help='MX element format (default: e4m3)')
+    profiling.add_profile_args(parser)
     args = parser.parse_args()
 
     # Validate: need at least one output format
@@ -291,11 +283,14 @@ def main():
     if not (args.output_exp or args.output_exp_header):
         parser.error('Must specify at least one of --output-exp or --output-exp-header')
 
+    prof = profiling.start('gen_mx_test_vectors', args)
+    prof.mark('parse')
     fp16_vals = parse_fp16_header(args.input)
 
     # Tile-major reordering: when matrix dimensions and tile size are provided,
     # reorder from row-major so the MX-encoded data streams to the accelerator
     # in the order the memory scheduler expects.
+    prof.mark('reorder')
     if args.matrix_rows > 0 and args.matrix_cols > 0 and args.tile_cols > 0:
         if args.m_tile_rows > 0:
             # M-tile-major(N-tile-major): group by M-tile first, then N-tile within.
@@ -311,6 +306,7 @@ def main():
             print(f'Reordered {args.matrix_rows}x{args.matrix_cols} matrix to K-tile-major '
                   f'(tile_cols={args.tile_cols})')
 
+    prof.mark('encode')
     mx_per_block, exp_blocks = encode_fp16_blocks_to_mx(fp16_vals, args.block_size, mx_fmt=args.mx_format)
     num_blocks = len(exp_blocks)
 
@@ -325,6 +321,7 @@ def main():
         num_blocks = len(exp_blocks)
 
     # Output MX data
+    prof.mark('write')
     if args.pack_fp8:
         all_fp8_values = [val for block in mx_per_block for val in block]
 
@@ -363,6 +360,11 @@ def main():
             # For unpacked, we'd need to decide on representation - not commonly used
             print('Warning: C header output for unpacked format not implemented')
 
+    elem_bytes, exp_bytes = mx_operand_bytes(len(fp16_vals), args.mx_format, args.block_size,
+                                             EXP_FORMAT_BYTES[args.exp_format])
+    print(f'Bytes moved ({args.mx_format}, block {args.block_size}): {elem_bytes} data + '
+          f'{exp_bytes} exponent = {elem_bytes + exp_bytes} (FP16: {2 * len(fp16_vals)})')
+
     # Output exponents in selected format
     if args.exp_format == 'compact-8bit':
         # Compact format: 4 exponents per 32-bit word (for X stream)
@@ -398,13 +400,20 @@ def main():
             parser.error('--golden-input and --golden-output-header must be provided together')
         if not args.pack_fp8:
             parser.error('Golden MX output requires --pack-fp8 to be enabled')
+        prof.mark('golden')
+        golden_fmt = args.golden_mx_format or args.mx_format
+        golden_block_size = args.golden_block_size or args.block_size
         golden_vals = parse_fp16_header(args.golden_input)
-        golden_mx_blocks, _ = encode_fp16_blocks_to_mx(golden_vals, args.block_size, mx_fmt=args.mx_format)
+        golden_mx_blocks, _ = encode_fp16_blocks_to_mx(golden_vals, golden_block_size, mx_fmt=golden_fmt)
         golden_fp8 = [val for block in golden_mx_blocks for val in block]
-        golden_packed = pack_fp8_to_32bit_words(golden_fp8)
+        if golden_fmt == 'e2m1':
+            golden_packed = pack_fp4_to_32bit_words(golden_fp8)
+        else:
+            golden_packed = pack_fp8_to_32bit_words(golden_fp8)
         write_c_header(args.golden_output_header, args.golden_array_name,
                        golden_packed, elem_type='uint32_t')
         print(f'Wrote MX golden header with {len(golden_packed)} uint32_t values to {args.golden_output_header}')
+    prof.end()
 
 if __name__ == '__main__':
     main()
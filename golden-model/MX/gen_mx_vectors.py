@@ -1,13 +1,22 @@
 # Unified MX vector generator: decoder + encoder.
 # Uses mx_fp_golden.py as the golden model.
 # Supports multiple MX formats: MXFP8, MXFP6, MXFP4
+#
+# Default: random + special blocks per format (mx_*_vectors_<fmt>.txt).
+# --full:  full-coverage vectors per format (mx_*_vectors_<fmt>_full.txt),
+#          every decoder input and every encoder equivalence class.
 
+import argparse
 import random
 import numpy as np
 
 from mx_fp_golden import (
     mxfp8_decode_bits,
-    encode_block_fp16_to_mx
+    encode_block_fp16_to_mx,
+    encode_blocks_fp16_to_mx,
+    mx_decode_array,
+    mx_max_unbiased_exp,
+    MX_FORMAT_SPECS,
 )
 
 NUM_BLOCKS = 50
@@ -229,10 +238,121 @@ def gen_encoder_vectors(fmt_name, filename=None):
     print(f"Generated encoder vectors -> {filename}")
 
 
+# ------------------------------------------------------------
+# Full-coverage vectors (same line formats as above)
+# ------------------------------------------------------------
+def _golden_fmt(fmt_name):
+    """'mxfp8_e4m3' -> 'e4m3' (key into MX_FORMAT_SPECS)."""
+    return fmt_name.split('_', 1)[1]
+
+
+def _write_decoder_lines(f, shared_exps, vals, fp16_vals):
+    for se, row_vals, row_fp16 in zip(shared_exps.tolist(), vals.tolist(), fp16_vals.tolist()):
+        f.write(f"{se:02x} " + " ".join(f"{v:02x}" for v in row_vals)
+                + " " + " ".join(f"{x:04x}" for x in row_fp16) + "\n")
+
+
+def _write_encoder_lines(f, fp16_vals, shared_exps, mx_vals):
+    for row_fp16, se, row_vals in zip(fp16_vals.tolist(), shared_exps.tolist(), mx_vals.tolist()):
+        f.write(" ".join(f"{b:04x}" for b in row_fp16) + f" {se:02x} "
+                + " ".join(f"{v:02x}" for v in row_vals) + "\n")
+
+
+def gen_decoder_vectors_full(fmt_name, filename=None):
+    """
+    Every element code under every shared exponent: 256 x 2^bitwidth
+    decodes, NUM_ELEMS codes per line. Formats with fewer codes than
+    NUM_ELEMS repeat them in reverse order to fill the line.
+    """
+    fmt = _golden_fmt(fmt_name)
+    if filename is None:
+        filename = f"mx_decoder_vectors_{fmt_name}_full.txt"
+
+    codes = np.arange(1 << MX_FORMATS[fmt_name]['bitwidth'])
+    if codes.size < NUM_ELEMS:
+        codes = np.resize(np.concatenate([codes, codes[::-1]]), NUM_ELEMS)
+    per_exp = codes.reshape(-1, NUM_ELEMS)
+
+    shared_exps = np.repeat(np.arange(256), per_exp.shape[0])
+    vals = np.tile(per_exp, (256, 1))
+    fp16_vals = mx_decode_array(vals, shared_exps[:, None], fmt)
+
+    with open(filename, "w") as f:
+        _write_decoder_lines(f, shared_exps, vals, fp16_vals)
+
+    print(f"Generated {len(vals)} full-coverage decoder blocks -> {filename}")
+
+
+def gen_encoder_vectors_full(fmt_name, filename=None):
+    """
+    Every encoder equivalence class, NUM_ELEMS FP16 values per line.
+
+    The shared exponent only depends on the largest normal exponent of the
+    block, and an element's code only on its sign, mantissa and exponent
+    distance to that maximum. So:
+      - element sweep: lane 0 anchors the block maximum at FP16 exponent 30,
+        the other lanes walk every sign x mantissa for every exponent
+        distance that does not flush to zero, plus the first one that does;
+      - scale sweep: one block per possible maximum exponent 1..30;
+      - specials: zeros, subnormals, Inf and NaN, with and without normals.
+    """
+    fmt = _golden_fmt(fmt_name)
+    exp_bits, mant_bits, bias = MX_FORMAT_SPECS[fmt]
+    if filename is None:
+        filename = f"mx_encoder_vectors_{fmt_name}_full.txt"
+
+    max_finite_biased = mx_max_unbiased_exp(fmt) + bias
+    lanes = NUM_ELEMS - 1
+
+    # Element sweep at the top of the FP16 range.
+    e16 = np.arange(max(1, 30 - max_finite_biased), 31)
+    sweep = ((np.arange(2)[:, None, None] << 15)
+             | (e16[None, :, None] << 10)
+             | np.arange(1 << 10)[None, None, :]).ravel()
+    sweep = np.resize(sweep, -(-sweep.size // lanes) * lanes).reshape(-1, lanes)
+    blocks = [np.hstack([np.full((len(sweep), 1), 30 << 10), sweep])]
+
+    # Scale sweep: every block maximum, lanes spread over the exponents
+    # and mantissas just below it.
+    lane = np.arange(lanes)
+    for e_max in range(1, 31):
+        e_lane = np.maximum(e_max - lane % (max_finite_biased + 1), 0)
+        vals = ((lane & 1) << 15) | (e_lane << 10) | ((lane * 0x155 + e_max) & 0x3FF)
+        blocks.append(np.concatenate([[(e_max << 10) | 0x3FF], vals])[None, :])
+
+    # Specials, with and without a normal value setting the scale.
+    specials = np.resize(
+        [0x0000, 0x8000, 0x7C00, 0xFC00, 0x7E00, 0xFE00, 0x7C01, 0xFFFF,
+         0x0001, 0x8001, 0x0200, 0x8200, 0x03FF, 0x83FF], NUM_ELEMS
+    )
+    blocks.append(specials[None, :])
+    blocks.append(np.concatenate([[0x3C00], specials[:lanes]])[None, :])
+    blocks.append(np.concatenate([[0x7BFF], specials[:lanes]])[None, :])
+
+    fp16_vals = np.vstack(blocks).astype(np.int64)
+    shared_exps, mx_vals = encode_blocks_fp16_to_mx(fp16_vals, fmt)
+
+    with open(filename, "w") as f:
+        _write_encoder_lines(f, fp16_vals, shared_exps, mx_vals)
+
+    print(f"Generated {len(fp16_vals)} full-coverage encoder blocks -> {filename}")
+
+
 # ------------------------------------------------------------
 # Run for all formats
 # ------------------------------------------------------------
 if __name__ == "__main__":
-    for fmt_name in MX_FORMATS:
-        gen_encoder_vectors(fmt_name)
-        gen_decoder_vectors(fmt_name)
+    parser = argparse.ArgumentParser(description="Generate MX decoder/encoder TB vectors")
+    parser.add_argument("--formats", nargs="+", choices=list(MX_FORMATS), default=list(MX_FORMATS),
+                        help="MX formats to generate vectors for")
+    parser.add_argument("--full", action="store_true",
+                        help="Emit full-coverage vectors (*_full.txt) instead of random blocks")
+    args = parser.parse_args()
+
+    for fmt_name in args.formats:
+        if args.full:
+            gen_encoder_vectors_full(fmt_name)
+            gen_decoder_vectors_full(fmt_name)
+        else:
+            gen_encoder_vectors(fmt_name)
+            gen_decoder_vectors(fmt_name)
@@ -1,6 +1,8 @@
 # Minimal golden model for MX <-> FP16 encode/decode.
 # Supports multiple MX formats: E4M3, E5M2, E3M2, E2M3, E2M1.
 
+from functools import lru_cache
+
 import numpy as np
 
 # FP16 bias
@@ -218,6 +220,18 @@ def compute_shared_exp_from_block(fp16_block_bits, max_unbiased_exp=7):
     return e8m0 & 0xFF
 
 
+def mx_max_unbiased_exp(fmt='e4m3'):
+    """
+    Max unbiased exponent of a finite element in format `fmt`.
+    Formats with Inf/NaN: max_finite_biased = 2^exp_bits - 2 (all-ones is special)
+    Formats without (E2M1, E2M3): max_finite_biased = 2^exp_bits - 1 (all normal)
+    """
+    exp_bits, mant_bits, bias = MX_FORMAT_SPECS[fmt]
+    has_inf_nan = (exp_bits, mant_bits) not in ((2, 3), (2, 1))
+    max_finite_biased = ((1 << exp_bits) - 2) if has_inf_nan else ((1 << exp_bits) - 1)
+    return max_finite_biased - bias
+
+
 def encode_block_fp16_to_mx(fp16_block_bits, fmt='e4m3'):
     """
     Given a block of FP16 values, compute shared_exp and encode to MX format.
@@ -225,11 +239,7 @@ def encode_block_fp16_to_mx(fp16_block_bits, fmt='e4m3'):
     Returns (shared_exp, mx_vals)
     """
     exp_bits, mant_bits, bias = MX_FORMAT_SPECS[fmt]
-    # Formats with Inf/NaN: max_finite_biased = 2^exp_bits - 2 (all-ones is special)
-    # Formats without (E2M1, E2M3): max_finite_biased = 2^exp_bits - 1 (all normal)
-    has_inf_nan = (exp_bits, mant_bits) not in ((2, 3), (2, 1))
-    max_finite_biased = ((1 << exp_bits) - 2) if has_inf_nan else ((1 << exp_bits) - 1)
-    max_ub = max_finite_biased - bias
+    max_ub = mx_max_unbiased_exp(fmt)
 
     fp16_block_bits = [int(x) & 0xFFFF for x in fp16_block_bits]
     shared_exp = compute_shared_exp_from_block(fp16_block_bits, max_unbiased_exp=max_ub)
@@ -241,6 +251,116 @@ def encode_block_fp16_to_mx(fp16_block_bits, fmt='e4m3'):
     return shared_exp & 0xFF, mx_vals
 
 
+# -------------------------------------------------------------------
+# Memory footprint of an MX operand
+# -------------------------------------------------------------------
+
+def mx_storage_bits(fmt='e4m3'):
+    """Bits per element in TCDM: E2M1 is nibble-packed, FP6/FP8 use byte containers."""
+    return 4 if fmt == 'e2m1' else 8
+
+
+def mx_operand_bytes(num_elems, fmt='e4m3', block_size=32, exp_bytes=1):
+    """
+    Bytes moved for one MX operand of `num_elems` elements.
+    exp_bytes: bytes per shared exponent in memory (1 for compact 8-bit,
+    4 for the replicated 32-bit W layout)
+    Returns (element_bytes, exponent_bytes)
+    """
+    num_blocks = (num_elems + block_size - 1) // block_size
+    elem_bytes = (num_blocks * block_size * mx_storage_bits(fmt) + 7) // 8
+    return elem_bytes, num_blocks * exp_bytes
+
+
+# -------------------------------------------------------------------
+# Vectorized (NumPy) forms of the functions above
+#
+# The element spaces are small (2^bitwidth codes x 256 shared exponents
+# for decode, 65536 FP16 patterns for the unscaled encode), so the scalar
+# golden is tabulated once per format and the array forms are lookups.
+# They are bit-identical to the scalar functions by construction.
+# -------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def mx_decode_table(fmt='e4m3'):
+    """
+    Exhaustive decode table for `fmt`: uint16 array of shape
+    (256, 2^bitwidth), indexed [shared_exp, element_code].
+    """
+    exp_bits, mant_bits, bias = MX_FORMAT_SPECS[fmt]
+    n_codes = 1 << (1 + exp_bits + mant_bits)
+    table = np.array(
+        [[mx_decode_bits(v, se, exp_bits, mant_bits, bias) for v in range(n_codes)]
+         for se in range(256)],
+        dtype=np.uint16,
+    )
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=None)
+def mx_encode_table(fmt='e4m3'):
+    """Unscaled FP16 -> MX element table for `fmt`: uint8 array indexed by FP16 bits."""
+    exp_bits, mant_bits, bias = MX_FORMAT_SPECS[fmt]
+    elem_mask = (1 << (1 + exp_bits + mant_bits)) - 1
+    table = np.array(
+        [fp16_to_mx_elem_unscaled(x, exp_bits, mant_bits, bias) & elem_mask
+         for x in range(1 << 16)],
+        dtype=np.uint8,
+    )
+    table.flags.writeable = False
+    return table
+
+
+def mx_decode_array(mx_vals, shared_exp, fmt='e4m3'):
+    """Array form of mx_decode_bits; `shared_exp` broadcasts against `mx_vals`."""
+    exp_bits, mant_bits, _ = MX_FORMAT_SPECS[fmt]
+    elem_mask = (1 << (1 + exp_bits + mant_bits)) - 1
+    vals = np.asarray(mx_vals, dtype=np.int64) & elem_mask
+    exps = np.asarray(shared_exp, dtype=np.int64) & 0xFF
+    return mx_decode_table(fmt)[exps, vals]
+
+
+def mx_encode_array(fp16_bits, shared_exp, fmt='e4m3'):
+    """Array form of mx_encode_bits (masked to the element width)."""
+    v = np.asarray(fp16_bits, dtype=np.int64) & 0xFFFF
+    shared_exp = np.asarray(shared_exp, dtype=np.int64) & 0xFF
+
+    s = v >> 15
+    e16 = (v >> 10) & 0x1F
+    m16 = v & 0x3FF
+
+    e16_unscaled = e16 - (shared_exp - 127)
+    tmp = np.where(
+        e16_unscaled <= 0,
+        s << 15,
+        np.where(e16_unscaled >= 0x1F,
+                 (s << 15) | (0x1E << 10) | 0x3FF,
+                 (s << 15) | ((e16_unscaled & 0x1F) << 10) | m16),
+    )
+    tmp = np.where((e16 == 0) | (e16 == 0x1F), v, tmp)
+    return mx_encode_table(fmt)[tmp]
+
+
+def compute_shared_exp_array(fp16_blocks, max_unbiased_exp=7):
+    """Array form of compute_shared_exp_from_block over the last axis."""
+    e16 = (np.asarray(fp16_blocks, dtype=np.int64) >> 10) & 0x1F
+    max_e16 = np.where((e16 != 0) & (e16 != 0x1F), e16, 0).max(axis=-1)
+    e8m0 = np.clip(max_e16 - BIAS_FP16 - max_unbiased_exp + 127, 0, 255)
+    return np.where(max_e16 == 0, 127, e8m0).astype(np.uint8)
+
+
+def encode_blocks_fp16_to_mx(fp16_blocks, fmt='e4m3'):
+    """
+    Array form of encode_block_fp16_to_mx for a (num_blocks, block_size)
+    array. Returns (shared_exps[num_blocks], mx_vals[num_blocks, block_size]).
+    """
+    fp16_blocks = np.asarray(fp16_blocks, dtype=np.int64) & 0xFFFF
+    shared_exps = compute_shared_exp_array(fp16_blocks, mx_max_unbiased_exp(fmt))
+    mx_vals = mx_encode_array(fp16_blocks, shared_exps[..., None], fmt)
+    return shared_exps, mx_vals
+
+
 # -------------------------------------------------------------------
 # Backward-compatible wrappers (E4M3 default)
 # -------------------------------------------------------------------
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tile-major element orderings of the RedMulE MX flow.
+
+Every hardware ordering used by the generator and the golden is the same
+family: split a row-major (rows x cols) matrix into row tiles of row_tile
+rows, split each of those into column tiles of col_tile columns, and emit
+each tile's rows in order:
+
+  * W, K-tile-major (gen_mx_test_vectors --tile-cols):
+        row_tile = rows,        col_tile = tile_cols
+  * X, M-tile-major(N-tile-major) (--tile-cols + --m-tile-rows):
+        row_tile = m_tile_rows, col_tile = tile_cols
+  * Z drain order (m_tile -> k_tile -> rows of ARRAY_WIDTH):
+        row_tile = array_width, col_tile = tile_cols
+
+The permutations are built with NumPy and memoized, so repeated calls for
+the same shape are a dictionary lookup plus one gather.
+"""
+
+import functools
+
+import numpy as np
+
+
+@functools.lru_cache(maxsize=64)
+def tile_major_perm(rows, cols, row_tile, col_tile):
+    """
+    Row-major index of the element at each position of the tile-major stream.
+
+    A row_tile or col_tile <= 0 means one tile spanning all rows/columns.
+    Returns (perm, inverse) as read-only int64 arrays: stream = flat[perm]
+    and flat = stream[inverse].
+    """
+    row_tile = row_tile if row_tile > 0 else max(rows, 1)
+    col_tile = col_tile if col_tile > 0 else max(cols, 1)
+    r, c = np.divmod(np.arange(rows * cols), max(cols, 1))
+    # np.lexsort sorts by the last key first
+    perm = np.lexsort((c, r, c // col_tile, r // row_tile))
+    inverse = np.empty_like(perm)
+    inverse[perm] = np.arange(len(perm))
+    perm.setflags(write=False)
+    inverse.setflags(write=False)
+    return perm, inverse
+
+
+def to_tile_major(vals, rows, cols, row_tile, col_tile):
+    """Gather the first rows*cols row-major values into tile-major order."""
+    perm, _ = tile_major_perm(rows, cols, row_tile, col_tile)
+    return np.asarray(vals)[:rows * cols][perm]
+
+
+def from_tile_major(vals, rows, cols, row_tile, col_tile):
+    """Inverse of to_tile_major: tile-major stream back to row-major order."""
+    _, inverse = tile_major_perm(rows, cols, row_tile, col_tile)
+    return np.asarray(vals)[:rows * cols][inverse]
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Plan the MX memory layout (tile ordering) of X and W for a given GEMM.
+
+gen_mx_test_vectors.py can emit X and W in row-major, K-tile-major
+(--tile-cols) or M-tile-major(N-tile-major) (--tile-cols + --m-tile-rows)
+order, and gen_mx_golden.py must be told the same choice (--x-tile-cols,
+--tile-cols, --array-width) to undo it. This script enumerates the
+orderings the generator can produce, checks which ones are legal and scores
+each one. It then prints the matching generator and golden arguments.
+
+An ordering is legal when:
+  * gen_mx_golden.py can reverse it (X: row-major or M-tile(N-tile) with
+    m_tile = array_width; W: row-major or K-tile-major);
+  * the Z reorder implied by the golden --tile-cols matches the hardware
+    drain order (m-tile -> k-tile of TILE columns -> rows);
+  * every generator tile is a whole number of TCDM beats, so each one
+    starts on a beat boundary and a reader can address it directly;
+  * every row of a hardware tile (ARRAY_WIDTH rows x TILE columns for X,
+    N rows x TILE columns for W) is contiguous in the stream. The input mux
+    packs consecutive decoder chunks into one buffer row, so a stream tile
+    narrower than TILE, or not a multiple of it, splits buffer rows;
+  * no MX block holds elements of two hardware tiles.
+
+The MX streamer reads each operand linearly, so only a candidate whose
+stream equals the consumption order ("linear") runs on the current RTL
+as-is. The other legal ones need a strided reader.
+
+Each candidate is scored per hardware consumption unit (X: one M-tile x
+N-tile slice, re-read for every K-tile; W: one K-tile slice, re-read for
+every M-tile), assuming a reader that fetches the beat-aligned span holding
+the unit's elements:
+  * words   - TCDM beats moved (beats spanned, summed over reads)
+  * exps    - shared exponents fetched (MX blocks spanned per read)
+  * straddle- MX blocks holding elements of more than one unit
+  * pad     - decoder lanes wasted on elements of other units or padding
+
+Usage:
+    python3 plan_mx_tiling.py -M 96 -N 128 -K 128 --mx-format e4m3
+    python3 plan_mx_tiling.py -M 64 -N 96 -K 160 --block-size 32 --all
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mx_fp_golden import MX_FORMAT_SPECS
+from mx_tile_order import tile_major_perm
+
+# TCDM beat width in bits (redmule_pkg::DATAW)
+DATAW = 1024
+
+
+def elems_per_word(mx_fmt):
+    """Elements per 16-bit memory word, as packed by gen_mx_test_vectors.py."""
+    return 4 if mx_fmt == 'e2m1' else 2
+
+
+def stream_order(rows, cols, tile_cols, m_tile_rows):
+    """Element index (row-major) at every position of the generated stream."""
+    if tile_cols <= 0:
+        return list(range(rows * cols))
+    row_tile = m_tile_rows if m_tile_rows > 0 else rows
+    return tile_major_perm(rows, cols, row_tile, tile_cols)[0].tolist()
+
+
+def hw_x_units(M, N, array_width, tile):
+    """X consumption units: each (M-tile, N-tile) slice as a list of row segments, in order."""
+    units = []
+    for m0 in range(0, M, array_width):
+        for n0 in range(0, N, tile):
+            units.append([[r * N + c for c in range(n0, min(n0 + tile, N))]
+                          for r in range(m0, min(m0 + array_width, M))])
+    return units
+
+
+def hw_w_units(N, K, tile):
+    """W consumption units: each K-tile slice as a list of row segments, in order."""
+    units = []
+    for k0 in range(0, K, tile):
+        units.append([[r * K + c for c in range(k0, min(k0 + tile, K))] for r in range(N)])
+    return units
+
+
+def positions(order):
+    """Stream position of every (row-major) element."""
+    pos = [0] * len(order)
+    for p, e in enumerate(order):
+        pos[e] = p
+    return pos
+
+
+def score_layout(pos, units, repeats, block_size, elems_per_beat):
+    """Score a stream layout against the hardware consumption units."""
+    unit_of_block = {}
+    words = exps = pad = 0
+    for u, rows in enumerate(units):
+        ps = [pos[e] for row in rows for e in row]
+        lo, hi = min(ps), max(ps)
+        words += hi // elems_per_beat - lo // elems_per_beat + 1
+        spanned = hi // block_size - lo // block_size + 1
+        exps += spanned
+        pad += spanned * block_size - len(ps)
+        for b in {p // block_size for p in ps}:
+            unit_of_block.setdefault(b, set()).add(u)
+    straddle = sum(1 for us in unit_of_block.values() if len(us) > 1)
+    return {
+        'words': words * repeats,
+        'exps': exps * repeats,
+        'straddle': straddle,
+        'pad': pad * repeats,
+    }
+
+
+def hw_legality(pos, units, stream_tile, elems_per_beat, straddle):
+    """Why the operand buffers cannot be fed from this stream, or ''."""
+    if stream_tile % elems_per_beat:
+        return 'tiles not beat-aligned'
+    for rows in units:
+        for row in rows:
+            if any(pos[b] != pos[a] + 1 for a, b in zip(row, row[1:])):
+                return 'buffer rows not contiguous'
+    if straddle:
+        return 'MX blocks straddle hardware tiles'
+    return ''
+
+
+def x_candidates(N, block_size, array_width, tile):
+    """(label, tile_cols, m_tile_rows) generator settings for X."""
+    cands = [('row-major', 0, 0)]
+    widths = sorted({w for w in range(block_size, N + block_size, block_size)} | {tile})
+    for w in widths:
+        if w >= N:
+            continue
+        cands.append((f'ktile-major/{w}', w, 0))
+        cands.append((f'mn-tile/{array_width}x{w}', w, array_width))
+    return cands
+
+
+def w_candidates(K, block_size, tile):
+    cands = [('row-major', 0)]
+    widths = sorted({w for w in range(block_size, K + block_size, block_size)} | {tile})
+    for w in widths:
+        if w < K:
+            cands.append((f'ktile-major/{w}', w))
+    return cands
+
+
+def x_legality(N, tile_cols, m_tile_rows, array_width):
+    if tile_cols > 0 and tile_cols < N and m_tile_rows != array_width:
+        return 'golden cannot reverse this X order'
+    return ''
+
+
+def w_legality(K, tile_cols, tile):
+    golden_z_tile = tile_cols if 0 < tile_cols < K else 0
+    if K > tile and golden_z_tile != tile:
+        return 'golden Z reorder would not match hardware drain order'
+    return ''
+
+
+def plan(M, N, K, mx_fmt, block_size, array_width, tile):
+    elems_per_beat = (DATAW // 16) * elems_per_word(mx_fmt)
+    mt = -(-M // array_width)
+    kt = -(-K // tile)
+
+    x_units = hw_x_units(M, N, array_width, tile)
+    w_units = hw_w_units(N, K, tile)
+    x_hw = [e for u in x_units for row in u for e in row]
+    w_hw = [e for u in w_units for row in u for e in row]
+
+    x_rows = []
+    for label, tc, mr in x_candidates(N, block_size, array_width, tile):
+        order = stream_order(M, N, tc, mr)
+        pos = positions(order)
+        s = score_layout(pos, x_units, kt, block_size, elems_per_beat)
+        stream_tile = (mr or M) * tc if 0 < tc < N else M * N
+        reason = (x_legality(N, tc, mr, array_width)
+                  or hw_legality(pos, x_units, stream_tile, elems_per_beat, s['straddle']))
+        s.update(label=label, tile_cols=tc, m_tile_rows=mr, reason=reason, linear=order == x_hw)
+        x_rows.append(s)
+
+    w_rows = []
+    for label, tc in w_candidates(K, block_size, tile):
+        order = stream_order(N, K, tc, 0)
+        pos = positions(order)
+        s = score_layout(pos, w_units, mt, block_size, elems_per_beat)
+        stream_tile = N * tc if 0 < tc < K else N * K
+        reason = (w_legality(K, tc, tile)
+                  or hw_legality(pos, w_units, stream_tile, elems_per_beat, s['straddle']))
+        s.update(label=label, tile_cols=tc, m_tile_rows=0, reason=reason, linear=order == w_hw)
+        w_rows.append(s)
+
+    combos = []
+    for x in x_rows:
+        for w in w_rows:
+            cost = (x['words'] + w['words'], x['exps'] + w['exps'],
+                    x['straddle'] + w['straddle'] + x['pad'] + w['pad'])
+            combos.append((bool(x['reason'] or w['reason']), cost, x, w))
+    # On equal cost, prefer what the linear MX streamer can read today
+    combos.sort(key=lambda c: (c[0], c[1], not (c[2]['linear'] and c[3]['linear']),
+                               c[2]['label'], c[3]['label']))
+    return combos
+
+
+def make_tile_cols(x, w, args):
+    """MX_TILE_COLS that reproduces this layout through make, or None.
+
+    The Makefile passes one MX_TILE_COLS to both generators and the golden,
+    with --m-tile-rows MX_ARRAY_WIDTH for X. A value >= the matrix width
+    leaves that operand row-major.
+    """
+    if x['tile_cols'] and x['m_tile_rows'] != args.array_width:
+        return None
+    for t in (x['tile_cols'], w['tile_cols'], max(args.N, args.K)):
+        if (t and (t == x['tile_cols'] if x['tile_cols'] else t >= args.N)
+                and (t == w['tile_cols'] if w['tile_cols'] else t >= args.K)):
+            return t
+    return None
+
+
+def emit_args(x, w, args):
+    gen_x = (f"--matrix-rows {args.M} --matrix-cols {args.N}"
+             + (f" --tile-cols {x['tile_cols']}" if x['tile_cols'] else '')
+             + (f" --m-tile-rows {x['m_tile_rows']}" if x['m_tile_rows'] else '')
+             + f" --block-size {args.block_size} --mx-format {args.mx_format}")
+    gen_w = (f"--matrix-rows {args.N} --matrix-cols {args.K}"
+             + (f" --tile-cols {w['tile_cols']}" if w['tile_cols'] else '')
+             + f" --block-size {args.block_size} --mx-format {args.mx_format}")
+    golden = (f"-M {args.M} -N {args.N} -K {args.K}"
+              f" --tile-cols {w['tile_cols']} --x-tile-cols {x['tile_cols']}"
+              f" --array-width {args.array_width}"
+              f" --block-size {args.block_size} --mx-format {args.mx_format}")
+    return gen_x, gen_w, golden
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan MX tile ordering for X and W')
+    parser.add_argument('-M', type=int, required=True, help='Matrix M dimension')
+    parser.add_argument('-N', type=int, required=True, help='Matrix N (reduction) dimension')
+    parser.add_argument('-K', type=int, required=True, help='Matrix K (output columns) dimension')
+    parser.add_argument('--mx-format', choices=list(MX_FORMAT_SPECS.keys()), default='e4m3',
+                        help='MX element format (default: e4m3)')
+    parser.add_argument('--block-size', type=int, default=32, help='MX block size (default: 32)')
+    parser.add_argument('--array-width', type=int, default=32,
+                        help='Systolic array width = M-tile height (default: 32)')
+    parser.add_argument('--array-height', type=int, default=32, help='Systolic array height (default: 32)')
+    parser.add_argument('--pipe-regs', type=int, default=1, help='Pipeline registers per CE (default: 1)')
+    parser.add_argument('--all', action='store_true', help='List every candidate, including illegal ones')
+    parser.add_argument('--top', type=int, default=5, help='Legal candidates to list (default: 5)')
+    args = parser.parse_args()
+
+    tile = args.array_height * (args.pipe_regs + 1)
+    print(f"MX layout plan for {args.M}x{args.N} @ {args.N}x{args.K} ({args.mx_format}, "
+          f"block {args.block_size}, array {args.array_width}x{args.array_height}, "
+          f"PIPE_REGS={args.pipe_regs}, TILE={tile})\n")
+
+    combos = plan(args.M, args.N, args.K, args.mx_format, args.block_size, args.array_width, tile)
+    legal = [c for c in combos if not c[0]]
+    shown = combos if args.all else legal[:args.top]
+
+    print(f"  {'X order':<20} {'W order':<16} {'beats':>7} {'exps':>6} {'straddle':>8} {'pad':>7}  status")
+    for illegal, cost, x, w in shown:
+        if illegal:
+            status = '; '.join(r for r in (x['reason'], w['reason']) if r)
+        else:
+            status = 'ok' if x['linear'] and w['linear'] else 'ok, strided read'
+        print(f"  {x['label']:<20} {w['label']:<16} {cost[0]:>7} {cost[1]:>6} "
+              f"{x['straddle'] + w['straddle']:>8} {x['pad'] + w['pad']:>7}  {status}")
+
+    if not legal:
+        print("\nNo legal layout for this geometry.")
+        return 1
+
+    _, _, x, w = legal[0]
+    gen_x, gen_w, golden = emit_args(x, w, args)
+    print("\nCheapest legal layout:")
+    print(f"  gen_mx_test_vectors.py (X): {gen_x} --exp-format compact-8bit --pack-fp8")
+    print(f"  gen_mx_test_vectors.py (W): {gen_w} --exp-format compact-32bit --pack-fp8")
+    print(f"  gen_mx_golden.py          : {golden}")
+    tile_cols = make_tile_cols(x, w, args)
+    if tile_cols is not None:
+        print(f"  make variables            : MX_TILE_COLS={tile_cols} "
+              f"MX_ARRAY_WIDTH={args.array_width}")
+    else:
+        print("  make variables            : none (needs different X/W tile widths; "
+              "run the generators directly)")
+    if not (x['linear'] and w['linear']):
+        print("  note: the MX streamer reads operands linearly; this layout needs a strided reader")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Content-addressed store for run artifacts.
+
+Sweep points often produce byte-identical files (x_input.h, stim_instr.txt,
+the baseline engine_x_inputs.txt, ...). The store keeps each distinct file
+content once and describes a run with a small JSON manifest:
+
+    <store>/objects/ab/abcdef...   file contents, named by SHA-256
+    <store>/runs/<suffix>.json     {"suffix": ..., "files": {name: {sha256,
+                                    size, mtime, source}}, ...}
+
+`name` is the canonical (unsuffixed) file name and `source` is the original
+one, e.g. engine_x_inputs.txt / engine_x_inputs_mx96.txt. Blobs are plain
+files, so readers can seek in them. Blobs that no run manifest references
+are only deleted by gc().
+
+The default store of a dump directory is <dir>/.dump_store. dump_archive
+resolves suffixed dump names through it, so code that opens
+target/sim/vsim/engine_x_inputs_mx96.txt with open_dump() keeps working
+after the run was moved into the store.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+STORE_DIRNAME = '.dump_store'
+MANIFEST_VERSION = 1
+
+_run_cache = {}
+
+
+def default_store(directory):
+    return os.path.join(directory, STORE_DIRNAME)
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.objects = os.path.join(self.root, 'objects')
+        self.runs_dir = os.path.join(self.root, 'runs')
+
+    def exists(self):
+        return os.path.isdir(self.runs_dir)
+
+    # ---------------------------------------------------------------- blobs
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest)
+
+    def put(self, path):
+        """Copy a file into the store. Returns (digest, newly stored)."""
+        os.makedirs(self.objects, exist_ok=True)
+        h = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.objects, prefix='.put-')
+        try:
+            with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                for chunk in iter(lambda: src.read(1 << 20), b''):
+                    h.update(chunk)
+                    dst.write(chunk)
+            digest = h.hexdigest()
+            target = self.blob_path(digest)
+            if os.path.exists(target):
+                os.remove(tmp)
+                return digest, False
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.chmod(tmp, 0o444)
+            os.replace(tmp, target)
+            return digest, True
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def blobs(self):
+        if not os.path.isdir(self.objects):
+            return
+        for sub in sorted(os.listdir(self.objects)):
+            d = os.path.join(self.objects, sub)
+            if len(sub) != 2 or not os.path.isdir(d):
+                continue
+            for name in sorted(os.listdir(d)):
+                yield name, os.path.join(d, name)
+
+    # ----------------------------------------------------------------- runs
+
+    def run_path(self, suffix):
+        return os.path.join(self.runs_dir, (suffix or 'latest') + '.json')
+
+    def runs(self):
+        if not os.path.isdir(self.runs_dir):
+            return []
+        return sorted(n[:-len('.json')] for n in os.listdir(self.runs_dir) if n.endswith('.json'))
+
+    def read_run(self, suffix):
+        """Run manifest for a suffix (cached per path and mtime), or None."""
+        path = self.run_path(suffix)
+        try:
+            key = (path, os.path.getmtime(path))
+        except OSError:
+            return None
+        if key not in _run_cache:
+            with open(path) as f:
+                _run_cache[key] = json.load(f)
+        return _run_cache[key]
+
+    def add_run(self, suffix, files, meta=None):
+        """Store {canonical name: path} as run `suffix`.
+
+        `meta` holds extra manifest fields. Returns (manifest, bytes of new
+        blobs). An existing manifest for the suffix is replaced.
+        """
+        entries = {}
+        added = 0
+        for name, path in sorted(files.items()):
+            st = os.stat(path)
+            digest, new = self.put(path)
+            if new:
+                added += st.st_size
+            entries[name] = {
+                'sha256': digest,
+                'size': st.st_size,
+                'mtime': st.st_mtime,
+                'source': os.path.basename(path),
+            }
+        manifest = dict(meta or {})
+        manifest.update({
+            'version': MANIFEST_VERSION,
+            'suffix': suffix,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'files': entries,
+        })
+        os.makedirs(self.runs_dir, exist_ok=True)
+        tmp = self.run_path(suffix) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.run_path(suffix))
+        return manifest, added
+
+    def remove_run(self, suffix):
+        """Drop a run manifest. Its blobs stay until gc()."""
+        path = self.run_path(suffix)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        return True
+
+    def checkout(self, suffix, dest, canonical=False, link=True):
+        """Materialize a run's files in `dest`. Returns the written paths.
+
+        Files are hard-linked to their blobs when possible. Blobs are
+        read-only, so a linked file cannot be modified by accident.
+        """
+        manifest = self.read_run(suffix)
+        if manifest is None:
+            raise KeyError(suffix)
+        os.makedirs(dest, exist_ok=True)
+        written = []
+        for name, info in sorted(manifest['files'].items()):
+            out = os.path.join(dest, name if canonical else info['source'])
+            if os.path.exists(out):
+                os.remove(out)
+            blob = self.blob_path(info['sha256'])
+            try:
+                if not link:
+                    raise OSError
+                os.link(blob, out)
+            except OSError:
+                shutil.copyfile(blob, out)
+                os.utime(out, (info['mtime'], info['mtime']))
+            written.append(out)
+        return written
+
+    def find(self, name):
+        """(blob path, entry) for a canonical or original file name, or None.
+
+        A source (suffixed) name is looked up in every run, a canonical name
+        in the unsuffixed 'latest' run.
+        """
+        for suffix in self.runs():
+            files = self.read_run(suffix).get('files', {})
+            for member, info in files.items():
+                if info.get('source') == name or (suffix == 'latest' and member == name):
+                    return self.blob_path(info['sha256']), info
+        return None
+
+    # ------------------------------------------------------------ upkeep
+
+    def referenced(self):
+        refs = set()
+        for suffix in self.runs():
+            for info in self.read_run(suffix).get('files', {}).values():
+                refs.add(info['sha256'])
+        return refs
+
+    def gc(self, dry_run=False):
+        """Delete blobs no run references. Returns (count, bytes)."""
+        refs = self.referenced()
+        count = freed = 0
+        for digest, path in list(self.blobs()):
+            if digest in refs:
+                continue
+            count += 1
+            freed += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        if not dry_run and os.path.isdir(self.objects):
+            for sub in os.listdir(self.objects):
+                d = os.path.join(self.objects, sub)
+                if os.path.isdir(d) and not os.listdir(d):
+                    os.rmdir(d)
+        return count, freed
+
+    def stats(self):
+        """Logical size of all runs vs bytes actually stored."""
+        logical = 0
+        for suffix in self.runs():
+            logical += sum(i['size'] for i in self.read_run(suffix).get('files', {}).values())
+        blobs = list(self.blobs())
+        stored = sum(os.path.getsize(p) for _, p in blobs)
+        return {
+            'runs': len(self.runs()),
+            'blobs': len(blobs),
+            'logical_bytes': logical,
+            'stored_bytes': stored,
+        }
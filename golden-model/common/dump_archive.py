@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Compressed run bundles for simulation dumps, with transparent readers.
+
+A bundle is a zip file (<name>.dumps.zip) holding one run's dumps, each
+compressed on its own with LZMA. Any one dump can be read without inflating
+the others. A manifest.json member records the run configuration (M, N, K,
+format), the RTL hash, metrics parsed from the transcript, and for every
+dump its original file name, size, mtime and SHA-256. scripts/archive_run.py
+writes bundles.
+
+Readers use open_dump()/dump_exists()/dump_size()/dump_mtime() in place of
+open()/os.path.*. A path resolves to, in order:
+
+  1. the plain file, if it exists;
+  2. a member of a bundle named like a directory, e.g.
+     runs/mx96.dumps.zip/engine_x_inputs.txt (so --dump-dir can point at a
+     bundle);
+  3. a member of a bundle next to the path whose manifest lists the file
+     as its original (suffixed) name, e.g.
+     target/sim/vsim/engine_x_inputs_mx96.txt after the run was archived
+     and its renamed dumps removed. Canonical (unsuffixed) names are only
+     taken from the 'latest' bundle, never from an archived run;
+  4. a blob of the content-addressed store next to the path
+     (<dir>/.dump_store, see blob_store.py), with the same matching rules.
+
+A canonical name missing from the latest run does not resolve at all.
+"""
+
+import glob
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+
+from blob_store import BlobStore, default_store
+
+BUNDLE_SUFFIX = ".dumps.zip"
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+_manifest_cache = {}
+
+
+def read_manifest(bundle):
+    """Return the manifest dict of a bundle (cached per path and mtime)."""
+    bundle = os.path.abspath(bundle)
+    key = (bundle, os.path.getmtime(bundle))
+    if key not in _manifest_cache:
+        with zipfile.ZipFile(bundle) as zf:
+            _manifest_cache[key] = json.loads(zf.read(MANIFEST).decode())
+    return _manifest_cache[key]
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_bundle(bundle, files, manifest=None):
+    """Pack {member name: source path} into a bundle and verify it.
+
+    `manifest` holds extra top-level fields (config, rtl_hash, metrics, ...).
+    Returns the manifest written.
+    """
+    manifest = dict(manifest or {})
+    manifest['version'] = MANIFEST_VERSION
+    manifest['created'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    entries = {}
+    tmp = bundle + '.tmp'
+    with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_LZMA) as zf:
+        for member, src in sorted(files.items()):
+            st = os.stat(src)
+            zf.write(src, member)
+            entries[member] = {
+                'source': os.path.basename(src),
+                'size': st.st_size,
+                'mtime': st.st_mtime,
+                'sha256': _sha256(src),
+            }
+        manifest['files'] = entries
+        zf.writestr(MANIFEST, json.dumps(manifest, indent=2, sort_keys=True))
+    with zipfile.ZipFile(tmp) as zf:
+        bad = zf.testzip()
+        if bad is not None:
+            os.remove(tmp)
+            raise IOError(f"{bundle}: CRC check failed for {bad}")
+    os.replace(tmp, bundle)
+    return manifest
+
+
+def _member_in(bundle, name, canonical=True):
+    """Member of `bundle` for an original (suffixed) file name.
+
+    With `canonical`, an unsuffixed member name matches as well.
+    """
+    files = read_manifest(bundle).get('files', {})
+    if canonical and name in files:
+        return name
+    for member, info in files.items():
+        if info.get('source') == name:
+            return member
+    return None
+
+
+def resolve_dump(path):
+    """Return ('file', path), ('bundle', (bundle, member, info)),
+    ('blob', (blob path, info)) or None."""
+    path = str(path)
+    if os.path.isfile(path):
+        return 'file', path
+    parent, name = os.path.split(path)
+    if parent.endswith('.zip') and os.path.isfile(parent):
+        member = _member_in(parent, name)
+        if member is not None:
+            return 'bundle', (parent, member, read_manifest(parent)['files'][member])
+        return None
+    for bundle in sorted(glob.glob(os.path.join(parent or '.', '*' + BUNDLE_SUFFIX))):
+        try:
+            latest = not read_manifest(bundle).get('suffix')
+            member = _member_in(bundle, name, canonical=latest)
+        except (zipfile.BadZipFile, KeyError, ValueError):
+            continue
+        if member is not None:
+            return 'bundle', (bundle, member, read_manifest(bundle)['files'][member])
+    store = BlobStore(default_store(parent or '.'))
+    if store.exists():
+        found = store.find(name)
+        if found is not None:
+            return 'blob', found
+    return None
+
+
+def dump_exists(path):
+    return resolve_dump(path) is not None
+
+
+def dump_size(path):
+    found = resolve_dump(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    kind, target = found
+    return os.path.getsize(target) if kind == 'file' else target[-1]['size']
+
+
+def dump_mtime(path):
+    """Modification time of the dump (the original file's, for bundle members and blobs)."""
+    found = resolve_dump(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    kind, target = found
+    return os.path.getmtime(target) if kind == 'file' else target[-1]['mtime']
+
+
+def open_dump(path, mode='r', newline=None):
+    """open() for dumps that may live in a bundle. Only read modes are supported."""
+    if 'r' not in mode or any(c in mode for c in 'wax+'):
+        return open(path, mode)
+    found = resolve_dump(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    kind, target = found
+    if kind == 'file':
+        return open(target, mode, newline=newline)
+    if kind == 'blob':
+        return open(target[0], mode, newline=newline)
+    bundle, member, _ = target
+    # The member stream holds its own reference to the archive file, which
+    # is closed together with the stream.
+    with zipfile.ZipFile(bundle) as zf:
+        raw = zf.open(member)
+    if 'b' in mode:
+        return raw
+    return io.TextIOWrapper(raw, newline=newline)
+
+
+def list_bundles(directory):
+    return sorted(glob.glob(os.path.join(directory, '*' + BUNDLE_SUFFIX)))
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Stage timing and profiling shared by the golden, vector and checker tools.
+
+A tool calls start() once, after parsing its arguments, and then marks its
+stages:
+
+    prof = profiling.start('gen_mx_golden', args)
+    prof.mark('load')            # closes the previous stage, opens 'load'
+    ...
+    with prof.stage('gemm'):     # or as a context manager
+        ...
+
+Every finished stage appends one JSON line to the stage log:
+
+    {"tool": ..., "stage": ..., "wall_s": ..., "cpu_s": ...,
+     "peak_rss_mb": ..., "tag": ..., "pid": ..., "time": ...}
+
+peak_rss_mb is the process high-water mark when the stage ended. A stage
+that raised it is the one that allocated the memory. A final "total" record
+also carries argv. The log is only written when enabled, either by
+--stage-log FILE or by the environment:
+
+    REDMULE_PROFILE=<file.jsonl>    stage log (set by `make ... PROFILE=...`)
+    REDMULE_PROFILE_TAG=<label>     copied into every record (sweep point)
+    REDMULE_PROFILE_PSTATS=<dir>    also run cProfile, write <dir>/<tool>.pstats
+
+--profile [FILE] runs the tool under cProfile, writes the pstats file
+(default <tool>.pstats) and prints the top functions by cumulative time to
+stderr. `python3 profiling.py summary <file.jsonl>` totals a log per tool and
+stage, and per tag with --by-tag.
+"""
+
+import argparse
+import atexit
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ENV_LOG = 'REDMULE_PROFILE'
+ENV_TAG = 'REDMULE_PROFILE_TAG'
+ENV_PSTATS = 'REDMULE_PROFILE_PSTATS'
+
+PSTATS_TOP = 25
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def add_profile_args(parser):
+    """Add --profile and --stage-log to an argparse parser."""
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', nargs='?', const='', default=None, metavar='PSTATS',
+                       help='Run under cProfile and write pstats to PSTATS (default: <tool>.pstats)')
+    group.add_argument('--stage-log', default=None, metavar='JSONL',
+                       help=f'Append per-stage wall time / peak RSS records (default: ${ENV_LOG})')
+    return group
+
+
+class Profiler:
+    def __init__(self, tool, stage_log=None, pstats_path=None, tag=None):
+        self.tool = tool
+        self.stage_log = stage_log
+        self.pstats_path = pstats_path
+        self.tag = tag
+        self.records = []
+        self._open = None
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+        self._cprofile = None
+        self._finished = False
+        if pstats_path is not None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _record(self, stage, wall, cpu, **extra):
+        rec = {
+            'tool': self.tool,
+            'stage': stage,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_mb': peak_rss_mb(),
+            'tag': self.tag,
+            'pid': os.getpid(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        rec.update(extra)
+        self.records.append(rec)
+        if self.stage_log:
+            with open(self.stage_log, 'a') as f:
+                f.write(json.dumps(rec, sort_keys=True) + '\n')
+        return rec
+
+    def mark(self, name):
+        """End the stage opened by the previous mark() (if any) and open `name`."""
+        self.end()
+        self._open = (name, time.perf_counter(), time.process_time())
+
+    def end(self):
+        """End the stage opened by mark() without opening a new one."""
+        if self._open is not None:
+            name, t0, c0 = self._open
+            self._open = None
+            self._record(name, time.perf_counter() - t0, time.process_time() - c0)
+
+    def add(self, name, wall, cpu):
+        """Record a stage timed elsewhere, e.g. in a worker process.
+
+        peak_rss_mb is still this process's high-water mark.
+        """
+        self._record(name, wall, cpu)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - t0, time.process_time() - c0)
+
+    def finish(self):
+        """Close the open stage, write the total record and the pstats file.
+
+        Registered with atexit by start(), so tools need not call it.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        self.end()
+        self._record('total', time.perf_counter() - self._t0, time.process_time() - self._c0,
+                     argv=sys.argv[1:])
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.pstats_path)
+            stats = pstats.Stats(self._cprofile, stream=sys.stderr)
+            print(f"\n[profile] {self.tool}: wrote {self.pstats_path}", file=sys.stderr)
+            stats.sort_stats('cumulative').print_stats(PSTATS_TOP)
+
+
+def start(tool, args=None):
+    """Create the tool's Profiler from its parsed args and the environment."""
+    stage_log = getattr(args, 'stage_log', None) or os.environ.get(ENV_LOG) or None
+    pstats_path = getattr(args, 'profile', None)
+    if pstats_path == '':
+        pstats_path = f'{tool}.pstats'
+    elif pstats_path is None and os.environ.get(ENV_PSTATS):
+        pstats_dir = os.environ[ENV_PSTATS]
+        os.makedirs(pstats_dir, exist_ok=True)
+        pstats_path = os.path.join(pstats_dir, f'{tool.replace("/", "_")}.pstats')
+    prof = Profiler(tool, stage_log, pstats_path, os.environ.get(ENV_TAG) or None)
+    atexit.register(prof.finish)
+    return prof
+
+
+def read_log(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def summarize(records, by_tag=False):
+    """{(tag or None, tool, stage): {'runs', 'wall_s', 'cpu_s', 'peak_rss_mb'}}"""
+    out = {}
+    for r in records:
+        key = (r.get('tag') if by_tag else None, r['tool'], r['stage'])
+        s = out.setdefault(key, {'runs': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_mb': 0.0})
+        s['runs'] += 1
+        s['wall_s'] += r['wall_s']
+        s['cpu_s'] += r['cpu_s']
+        s['peak_rss_mb'] = max(s['peak_rss_mb'], r.get('peak_rss_mb') or 0.0)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize stage logs written by the profiling layer.")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p_sum = sub.add_parser('summary', help='Total wall/CPU time and peak RSS per tool and stage')
+    p_sum.add_argument('logs', nargs='+', help='Stage log files (JSON lines)')
+    p_sum.add_argument('--by-tag', action='store_true', help='Break down per REDMULE_PROFILE_TAG')
+    args = parser.parse_args()
+
+    records = [r for path in args.logs for r in read_log(path)]
+    if not records:
+        print("No records.")
+        return 1
+    summary = summarize(records, args.by_tag)
+    print(f"{'tag':<12} {'tool':<28} {'stage':<20} {'runs':>5} {'wall_s':>10} {'cpu_s':>10} {'rss_mb':>8}")
+    for (tag, tool, stage), s in sorted(summary.items(), key=lambda kv: (str(kv[0][0]), kv[0][1],
+                                                                         kv[0][2] == 'total')):
+        print(f"{str(tag or '-'):<12} {tool:<28} {stage:<20} {s['runs']:>5} "
+              f"{s['wall_s']:>10.3f} {s['cpu_s']:>10.3f} {s['peak_rss_mb']:>8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
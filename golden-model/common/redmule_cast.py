@@ -0,0 +1,44 @@
+# Copyright 2023 ETH Zurich and University of Bologna.
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import numpy as np
+
+# fpnew FP8 is 1-5-2 (E5M2): same exponent width and bias as FP16, so the
+# casts only move the top byte and round away the 8 low mantissa bits.
+FP8_QNAN = 0x7E
+FP16_QNAN = 0x7E00
+
+
+def _is_nan_fp16(bits):
+    return ((bits & 0x7C00) == 0x7C00) & ((bits & 0x03FF) != 0)
+
+
+def fp8_to_fp16_bits(bits):
+    """
+    Cast-in (redmule_castin.sv): FP8 bit patterns to FP16 bit patterns.
+
+    Exact for every finite value and Inf; NaNs become the canonical FP16
+    qNaN, as fpnew's cast unit emits. Returns a uint16 array.
+    """
+    wide = np.asarray(bits).astype(np.uint16) << 8
+    return np.where(_is_nan_fp16(wide), FP16_QNAN, wide).astype(np.uint16)
+
+
+def fp16_to_fp8_bits(bits):
+    """
+    Cast-out (redmule_castout.sv): FP16 bit patterns to FP8 with RNE.
+
+    Rounds the 8 dropped mantissa bits to nearest even; a carry moves into
+    the exponent, overflow rounds to Inf and FP16 subnormals map onto FP8
+    subnormals. NaNs become the canonical FP8 qNaN. Returns a uint8 array.
+    """
+    bits = np.asarray(bits).astype(np.uint16)
+    sign = (bits >> 8) & 0x80
+    mag = bits & 0x7FFF
+    q = mag >> 8
+    rem = mag & 0xFF
+    q = q + ((rem > 0x80) | ((rem == 0x80) & ((q & 1) == 1)))
+    q = np.minimum(q, 0x7C)
+    return np.where(_is_nan_fp16(bits), FP8_QNAN, sign | q).astype(np.uint8)
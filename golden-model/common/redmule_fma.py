@@ -5,27 +5,227 @@
 
 import numpy as np
 
+FP16_QNAN = 0x7E00
+FP16_INF = 0x7C00
+
+# Working precision of the aligned add: the larger operand's 23-bit
+# significand is shifted up by ADD_GUARD_BITS, which leaves enough room
+# below any rounding position for a single sticky bit.
+ADD_GUARD_BITS = 26
+
+
+def _unpack_fp16(bits):
+    """Split FP16 bit patterns into (sign, significand, exponent, exp_field).
+
+    value = (-1)^sign * significand * 2^exponent, with the implicit bit set
+    for normal numbers and subnormals kept as they are.
+    """
+    bits = np.asarray(bits, dtype=np.int64) & 0xFFFF
+    sign = bits >> 15
+    exp_field = (bits >> 10) & 0x1F
+    mant = bits & 0x3FF
+    sig = np.where(exp_field != 0, mant | 0x400, mant)
+    exponent = np.maximum(exp_field, 1) - 15 - 10
+    return sign, sig, exponent, exp_field
+
+
+def _msb(x):
+    """Index of the leading one of non-negative integers below 2^53 (-1023 for 0)."""
+    return (x.astype(np.float64).view(np.int64) >> 52) - 1023
+
+
+def _normalize(sig, exponent):
+    """Shift non-zero significands to [2^22, 2^23); zeros get a tiny exponent."""
+    msb = _msb(sig)
+    shift = np.where(sig != 0, 22 - msb, 0)
+    return sig << shift, np.where(sig != 0, exponent - shift, -(1 << 20))
+
+
+def _round_to_fp16(mag, exponent):
+    """RNE-round mag * 2^exponent (mag > 0, < 2^53) to FP16 magnitude bits."""
+    msb = _msb(mag)
+    lead = msb + exponent
+    normal = lead >= -14
+    # Bit position (relative to mag's LSB) of the FP16 result's LSB.
+    shift = np.where(normal, msb - 10, -24 - exponent)
+    rshift = np.clip(shift, 0, 62)
+    q = mag >> rshift
+    one = np.int64(1) << rshift
+    rem2 = (mag - (q << rshift)) << 1
+    q += (rem2 > one) | ((rem2 == one) & ((q & 1) == 1))
+    if (shift < 0).any():
+        q = np.where(shift < 0, mag << np.clip(-shift, 0, 62), q)
+    # A carry out of the significand lands in the exponent field by itself.
+    bits = np.where(normal, ((lead + 15 - 1) << 10) + q, q)
+    return np.minimum(bits, FP16_INF)
+
+
+def fma_fp16_bits(a, b, c):
+    """
+    Bit-true FP16 fused multiply-add a*b + c on bit patterns (vectorized).
+
+    Integer-domain model of redmule_fma.sv (cvfpu FMA) with RNE: the
+    product is exact, the addend is aligned with a sticky bit and the sum
+    is rounded once, subnormals included. Specials follow the RTL:
+    canonical qNaN (0x7E00) for NaN inputs, inf*0 and inf-inf; overflow
+    rounds to Inf; an exact zero sum is +0 unless both terms are -0.
+    Inputs broadcast; returns a uint16 array.
+    """
+    sa, siga, ea, fa = _unpack_fp16(a)
+    sb, sigb, eb, fb = _unpack_fp16(b)
+    sc, sigc, ec, fc = _unpack_fp16(c)
+
+    # Exact product and normalized operands.
+    sp = sa ^ sb
+    sigp, ep = _normalize(siga * sigb, ea + eb)
+    sigc, ec = _normalize(sigc, ec)
+
+    # Align the smaller-exponent operand to the larger one.
+    p_big = ep >= ec
+    e_big = np.where(p_big, ep, ec)
+    sig_big = np.where(p_big, sigp, sigc) << ADD_GUARD_BITS
+    sig_small = np.where(p_big, sigc, sigp) << ADD_GUARD_BITS
+    dist = np.minimum(e_big - np.where(p_big, ec, ep), 62)
+    sticky = (sig_small & ((np.int64(1) << dist) - 1)) != 0
+    sig_small = (sig_small >> dist) | sticky
+
+    s_big = np.where(p_big, sp, sc)
+    s_small = np.where(p_big, sc, sp)
+    total = np.where(s_big == 1, -sig_big, sig_big) + np.where(s_small == 1, -sig_small, sig_small)
+
+    mag = np.abs(total)
+    result = _round_to_fp16(np.maximum(mag, 1), e_big - ADD_GUARD_BITS)
+    result |= np.where(total < 0, 0x8000, 0)
+
+    # Exact zeros: -0 only for (-0) + (-0).
+    zero_sign = np.where((sigp == 0) & (sigc == 0), sp & sc, 0)
+    result = np.where(mag == 0, zero_sign << 15, result)
+
+    # Specials (same priority as the RTL); skipped when there are none.
+    a_inf, b_inf, c_inf = fa == 0x1F, fb == 0x1F, fc == 0x1F
+    if not (a_inf.any() or b_inf.any() or c_inf.any()):
+        return result.astype(np.uint16)
+    a_nan = a_inf & (siga != 0x400)
+    b_nan = b_inf & (sigb != 0x400)
+    c_nan = c_inf & (sigc != 1 << 22)
+    a_inf &= ~a_nan
+    b_inf &= ~b_nan
+    c_inf &= ~c_nan
+    a_zero, b_zero = (fa == 0) & (siga == 0), (fb == 0) & (sigb == 0)
+    p_inf = a_inf | b_inf
+    nan = ((a_inf & b_zero) | (a_zero & b_inf) | a_nan | b_nan | c_nan
+           | (p_inf & c_inf & (sp != sc)))
+    result = np.where(c_inf, (sc << 15) | FP16_INF, result)
+    result = np.where(p_inf, (sp << 15) | FP16_INF, result)
+    result = np.where(nan, FP16_QNAN, result)
+    return result.astype(np.uint16)
+
+
 def bittrue_fma(a, x, b):
-    # Simulate FP16 FMA with intermediate rounding
-    a_fp32 = np.float16(a).astype(np.float64)
-    x_fp32 = np.float16(x).astype(np.float64)
-    b_fp32 = np.float16(b).astype(np.float64)
-    result = a_fp32 * x_fp32 + b_fp32
-    return np.float16(result).astype(np.float64)
+    # FP16 FMA a*x + b with a single rounding (see fma_fp16_bits)
+    bits = [np.float16(v).view(np.uint16) for v in (a, x, b)]
+    return float(fma_fp16_bits(*bits).view(np.float16))
+
+
+def _as_fp16_bits(matrix):
+    return np.asarray(matrix).astype(np.float16).view(np.uint16)
+
 
 def matrix_multiply_with_bittrue_fma(X, W, Y):
-    M, K = X.shape
-    K2, N = W.shape
+    M, K = X.shape[-2:]
+    K2, N = W.shape[-2:]
     assert K == K2, "Inner dimensions must match"
 
-    Z = np.zeros((M, N), dtype=np.float64)
+    # One fma_fp16_bits step per reduction index over the whole accumulator;
+    # leading (batch) axes broadcast.
+    x_bits, w_bits = _as_fp16_bits(X), _as_fp16_bits(W)
+    acc = _as_fp16_bits(Y)
+    for k in range(K):
+        acc = fma_fp16_bits(x_bits[..., :, k, None], w_bits[..., None, k, :], acc)
+
+    return acc.view(np.float16)
+
+
+def hw_accumulation_order(n_size, array_height=32):
+    """
+    Reduction order of one output element in the RedMulE engine.
+
+    Each row of the array is a chain of ARRAY_HEIGHT FMA units: unit h adds
+    x[n]*w[n] for the h-th element of an ARRAY_HEIGHT-wide group of the
+    reduction dimension, and the last unit feeds the partial sum back into
+    the first for the next group (Y is injected only for the first group).
+    The feedback is an FP16 register, so the order is sequential in n, but
+    the last group is padded to ARRAY_HEIGHT with zero operands.
+
+    Returns an int array of length ceil(n_size/array_height)*array_height
+    holding the n index of each FMA step, -1 for padded steps.
+    """
+    groups = -(-n_size // array_height)
+    order = np.arange(groups * array_height)
+    order[order >= n_size] = -1
+    return order
+
+
+def matrix_multiply_hw_order(X, W, Y, array_height=32):
+    """
+    Bit-true Z = X*W + Y in the engine's accumulation order, vectorized over
+    all outputs.
+
+    This is the strict n-order of matrix_multiply_with_bittrue_fma plus the
+    zero-operand padding of the last ARRAY_HEIGHT group (see
+    hw_accumulation_order()). The padding steps are real FMAs and turn a -0
+    partial sum into +0. ARRAY_WIDTH and PIPE_REGS only decide which outputs
+    are in flight together, not how any one of them is reduced, so they are
+    not parameters. Leading (batch) axes of X, W and Y broadcast.
+    """
+    M, N = X.shape[-2:]
+    N2, K = W.shape[-2:]
+    assert N == N2, "Inner dimensions must match"
+    assert array_height > 0, "Invalid array geometry"
+
+    x_bits, w_bits = _as_fp16_bits(X), _as_fp16_bits(W)
+    acc = _as_fp16_bits(Y)
+    for n in hw_accumulation_order(N, array_height):
+        if n < 0:
+            acc = fma_fp16_bits(0, 0, acc)
+        else:
+            acc = fma_fp16_bits(x_bits[..., :, n, None], w_bits[..., None, n, :], acc)
+
+    return acc.view(np.float16)
+
+
+def matrix_multiply_checkpoints(X, W, Y, n_sizes, hw_order=False, array_height=32):
+    """
+    Bit-true Z = X[:, :n]*W[:n, :] + Y for every reduction length n in
+    n_sizes, in a single pass over max(n_sizes).
+
+    The accumulator after n sequential steps is exactly the result for a
+    reduction dimension of n, so it is snapshotted on the way. With
+    hw_order, a snapshot that does not end on an ARRAY_HEIGHT boundary
+    gets the zero-operand padding step of matrix_multiply_hw_order (one
+    step is enough: further fma(0, 0, acc) steps leave acc unchanged).
+    Rows and columns are independent, so results for smaller M or K are
+    plain slices of the returned matrices.
+
+    Returns {n: (M, K) float16 array}.
+    """
+    M, N = X.shape[-2:]
+    N2, K = W.shape[-2:]
+    assert N == N2, "Inner dimensions must match"
+    n_sizes = sorted(set(n_sizes))
+    assert n_sizes and 0 < n_sizes[0] and n_sizes[-1] <= N, "Checkpoints must lie in 1..N"
+    if hw_order:
+        assert array_height > 0, "Invalid array geometry"
 
-    for m in range(M):
-        for n in range(N):
-            acc = Y[m, n].astype(np.float64)  # Start with Y as accumulator
-            for k in range(K):
-                acc = bittrue_fma(X[m, k], W[k, n], acc)
-            Z[m, n] = acc
-    Z = Z.astype(np.float16)
+    x_bits, w_bits = _as_fp16_bits(X), _as_fp16_bits(W)
+    acc = _as_fp16_bits(Y)
+    checkpoints = {}
+    for n in range(n_sizes[-1]):
+        acc = fma_fp16_bits(x_bits[..., :, n, None], w_bits[..., None, n, :], acc)
+        if n + 1 in n_sizes:
+            z = acc
+            if hw_order and (n + 1) % array_height:
+                z = fma_fp16_bits(0, 0, acc)
+            checkpoints[n + 1] = z.view(np.float16)
 
-    return Z
+    return checkpoints
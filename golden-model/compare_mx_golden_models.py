@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
-"""Cross-check the in-tree MX golden model against Gamze's FP9 model."""
+"""Cross-check the in-tree MX golden model against Gamze's FP9 model.
+
+The default mode samples random blocks. ``--exhaustive`` instead enumerates
+the whole input space of every MX format (all element codes x all 256 shared
+exponents for decode, all 65536 FP16 patterns x all 256 shared exponents for
+encode) against a vectorized reference, plus the FP9 model for E4M3 when it
+is available. The reference takes its special values from the OCP MX v1.0
+element tables; where the golden departs from them on purpose the mismatches
+are reported as known deviations (KNOWN_DEVIATIONS) and do not fail the run.
+Subnormals flush to zero in both, so this is not a full conformance check.
+"""
 
 from __future__ import annotations
 
 import argparse
 import math
 import sys
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Sequence, Tuple
 
@@ -16,8 +26,12 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(SCRIPT_DIR / "mxfp-main-golden-Gamze"))
 
 from MX import mx_fp_golden as legacy_mx
-from golden.fp9 import FP9
-from golden.utils import format_fp9_cvfpu
+
+try:
+    from golden.fp9 import FP9
+    from golden.utils import format_fp9_cvfpu
+except ImportError:  # only needed for the FP9 cross-check
+    FP9 = None
 
 
 BIAS_FP16 = 15
@@ -49,13 +63,18 @@ def encode_with_gamze(fp16_bits: int, shared_exp: int) -> int:
 
     base_value = np.float32(fp16_bits_to_float(fp16_bits))
     unscaled_value = np.float32(math.ldexp(float(base_value), 127 - shared_exp))
+    return fp9_encode_unscaled(float(unscaled_value))
+
 
-    fp9_obj = FP9.float_to_mx(value=float(unscaled_value), data_type="FP8ALT")
+def fp9_encode_unscaled(value: float) -> int:
+    """Quantize an already unscaled value to E4M3 with the FP9 model."""
+    fp9_obj = FP9.float_to_mx(value=value, data_type="FP8ALT")
     return int(format_fp9_cvfpu(fp9_obj), 2)
 
 
 def decode_reference(mx_val: int, shared_exp: int) -> int:
-    """Reference decode derived from the MX specification."""
+    """Reference E4M3 decode with the golden's all-ones exponent Inf/NaN
+    (see KNOWN_DEVIATIONS), for the FP9 block comparison."""
     sign = (mx_val >> 7) & 0x1
     exponent = (mx_val >> 3) & 0xF
     mantissa = mx_val & 0x7
@@ -82,6 +101,310 @@ def decode_reference(mx_val: int, shared_exp: int) -> int:
     return (sign << 15) | ((new_e16 & 0x1F) << 10) | m16
 
 
+# ---------------------------------------------------------------------------
+# Vectorized OCP reference (all formats)
+#
+# Special values come from the OCP MX v1.0 element tables below, not from the
+# golden. The rest is the golden's documented policy, shared with
+# decode_reference above: element subnormals and FP16 results below the
+# normal range flush to signed zero, overflow saturates to the largest finite
+# value, and the E8M0 scale is 2^(se-127) for every code (0xFF is not treated
+# as NaN). Encode rounds to nearest-even. With the flushing this is not a full
+# conformance check.
+# ---------------------------------------------------------------------------
+
+# Per format: (Inf magnitude code or None, NaN magnitude codes). E4M3 has no
+# Inf and a single NaN (S.1111.111), so 0x78-0x7E are finite up to 448; the
+# FP6/FP4 formats have neither, so their top binade is finite.
+OCP_SPECIALS = {
+    "e5m2": (0x7C, (0x7D, 0x7E, 0x7F)),
+    "e4m3": (None, (0x7F,)),
+    "e3m2": (None, ()),
+    "e2m3": (None, ()),
+    "e2m1": (None, ()),
+}
+
+# Formats where the golden knowingly departs from OCP_SPECIALS: it gives E4M3
+# and E3M2 an IEEE-style all-ones exponent (Inf/NaN), as the hardware does,
+# so their top binade is never produced and decodes to Inf/NaN. Mismatches
+# confined to that binade, or to Inf/NaN inputs, are reported as known.
+KNOWN_DEVIATIONS = ("e4m3", "e3m2")
+
+
+def _format_fields(fmt: str):
+    exp_bits, mant_bits, bias = legacy_mx.MX_FORMAT_SPECS[fmt]
+    inf_code, nan_codes = OCP_SPECIALS[fmt]
+    mag_mask = (1 << (exp_bits + mant_bits)) - 1
+    max_code = max(code for code in range(mag_mask + 1)
+                   if code != inf_code and code not in nan_codes)
+    return exp_bits, mant_bits, bias, inf_code, nan_codes, mag_mask, max_code
+
+
+def decode_reference_array(mx_vals, shared_exp, fmt: str) -> np.ndarray:
+    """Value-domain decode: element value times 2^(se-127), rounded to FP16."""
+    exp_bits, mant_bits, bias, inf_code, nan_codes, mag_mask, _ = _format_fields(fmt)
+    vals = np.asarray(mx_vals, dtype=np.int64)
+    shared_exp = np.asarray(shared_exp, dtype=np.int64)
+
+    sign = ((vals >> (exp_bits + mant_bits)) & 0x1) << 15
+    mag = vals & mag_mask
+    exponent = mag >> mant_bits
+    mantissa = mag & ((1 << mant_bits) - 1)
+
+    value = np.ldexp(1.0 + mantissa / (1 << mant_bits), exponent - bias + shared_exp - 127)
+    in_range = (value >= 2.0 ** -14) & (value <= 65504.0)
+    fp16 = np.where(in_range, value, 0.0).astype(np.float16).view(np.uint16)
+
+    out = np.where(value > 65504.0, FP16_MAX_FINITE, np.where(in_range, fp16, 0))
+    out = np.where(exponent == 0, 0, out)
+    if inf_code is not None:
+        out = np.where(mag == inf_code, 0x7C00, out)
+    out = np.where(np.isin(mag, nan_codes), 0x7E00, out)
+    return (sign | out).astype(np.uint16)
+
+
+def encode_reference_array(fp16_bits, shared_exp, fmt: str):
+    """Value-domain encode: RNE of value / 2^(se-127) into the element format.
+
+    Returns ``(codes, defined)``. ``defined`` is False where the OCP MX spec
+    leaves the result implementation-defined (Inf into a format without Inf,
+    NaN into a format without NaN); those entries are not compared. NaN
+    results are the first NaN code of the format; compare with _same_code.
+    """
+    exp_bits, mant_bits, bias, inf_code, nan_codes, _, max_code = _format_fields(fmt)
+    bits = np.asarray(fp16_bits, dtype=np.uint16)
+    shared_exp = np.asarray(shared_exp, dtype=np.int64)
+
+    sign = (bits.astype(np.int64) >> 15) << (exp_bits + mant_bits)
+    e16 = (bits.astype(np.int64) >> 10) & 0x1F
+    m16 = bits.astype(np.int64) & 0x3FF
+    normal = (e16 != 0) & (e16 != 0x1F)
+    is_inf = (e16 == 0x1F) & (m16 == 0)
+    is_nan = (e16 == 0x1F) & (m16 != 0)
+
+    magnitude = np.abs(bits.view(np.float16).astype(np.float64))
+    x = np.ldexp(np.where(normal, magnitude, 1.0), 127 - shared_exp)
+    exponent = np.frexp(x)[1] - 1
+    q = np.rint(np.ldexp(x, mant_bits - exponent)).astype(np.int64)
+    carry = q >> (mant_bits + 1)
+    exponent = exponent + carry
+    q = np.where(carry != 0, 1 << mant_bits, q)
+    e_biased = exponent + bias
+
+    # Codes order like magnitudes, so saturation is a clamp to max_code.
+    codes = np.minimum((np.maximum(e_biased, 0) << mant_bits) | (q - (1 << mant_bits)), max_code)
+    codes = np.where(x < 2.0 ** (1 - bias), 0, codes)
+    codes = np.where(normal, codes, 0)
+    if inf_code is not None:
+        codes = np.where(is_inf, inf_code, codes)
+    if nan_codes:
+        codes = np.where(is_nan, nan_codes[0], codes)
+
+    defined = ~((is_inf & (inf_code is None)) | (is_nan & (not nan_codes)))
+    return (sign | codes).astype(np.uint8), np.broadcast_to(defined, codes.shape)
+
+
+def _same_code(expected, actual, fmt: str) -> np.ndarray:
+    """Code equality where any two NaN codes of the format count as equal."""
+    exp_bits, mant_bits, _, _, nan_codes, mag_mask, _ = _format_fields(fmt)
+    sign_bit = 1 << (exp_bits + mant_bits)
+    expected = np.asarray(expected, dtype=np.int64)
+    actual = np.asarray(actual, dtype=np.int64)
+    both_nan = np.isin(expected & mag_mask, nan_codes) & np.isin(actual & mag_mask, nan_codes)
+    return (expected == actual) | (both_nan & ((expected & sign_bit) == (actual & sign_bit)))
+
+
+def _top_binade(codes, fmt: str) -> np.ndarray:
+    exp_bits, mant_bits = legacy_mx.MX_FORMAT_SPECS[fmt][:2]
+    exp_mask = (1 << exp_bits) - 1
+    return ((np.asarray(codes, dtype=np.int64) >> mant_bits) & exp_mask) == exp_mask
+
+
+def _known_decode(codes, actual, fmt: str) -> np.ndarray:
+    """Decode mismatches covered by KNOWN_DEVIATIONS: an all-ones exponent
+    code the golden decodes to Inf/NaN."""
+    golden_special = (np.asarray(actual, dtype=np.int64) & 0x7C00) == 0x7C00
+    return (fmt in KNOWN_DEVIATIONS) & _top_binade(codes, fmt) & golden_special
+
+
+def _known_encode(fp16_bits, expected, actual, fmt: str) -> np.ndarray:
+    """Encode mismatches covered by KNOWN_DEVIATIONS: Inf/NaN inputs, and
+    results in the all-ones exponent binade that the golden saturates to its
+    own largest finite code instead."""
+    exp_bits, mant_bits = legacy_mx.MX_FORMAT_SPECS[fmt][:2]
+    mag_mask = (1 << (exp_bits + mant_bits)) - 1
+    golden_max = (((1 << exp_bits) - 2) << mant_bits) | ((1 << mant_bits) - 1)
+    special_in = ((np.asarray(fp16_bits, dtype=np.int64) >> 10) & 0x1F) == 0x1F
+    saturated = (np.asarray(actual, dtype=np.int64) & mag_mask) == golden_max
+    return (fmt in KNOWN_DEVIATIONS) & (special_in | (_top_binade(expected, fmt) & saturated))
+
+
+@dataclass
+class FormatResult:
+    fmt: str
+    decode_checked: int = 0
+    decode_errors: int = 0
+    decode_known: int = 0
+    encode_checked: int = 0
+    encode_skipped: int = 0
+    encode_errors: int = 0
+    encode_known: int = 0
+    scalar_checked: int = 0
+    scalar_errors: int = 0
+    fp9_checked: int = 0
+    fp9_errors: int = 0
+    # (input, shared_exp, expected, actual), capped at --max-report each
+    decode_mismatches: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    encode_mismatches: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    fp9_mismatches: List[Tuple[int, int, int, int]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.decode_errors or self.encode_errors
+                    or self.scalar_errors or self.fp9_errors)
+
+
+def _collect(mismatch: np.ndarray, columns, limit: int) -> List[Tuple[int, int, int, int]]:
+    idx = np.flatnonzero(mismatch)
+    if limit:
+        idx = idx[:limit]
+    cols = [np.broadcast_to(col, mismatch.shape).ravel()[idx] for col in columns]
+    return [tuple(int(v) for v in row) for row in zip(*cols)]
+
+
+def _check_fp9(res: FormatResult, exps_per_chunk: int, limit: int) -> None:
+    """Exhaustive E4M3 encode against the FP9 model on reachable (value, se) pairs.
+
+    A value can only be encoded with shared exponents from its own block
+    exponent up to the one of the largest FP16 value; FP9 is called once per
+    distinct unscaled value.
+    """
+    all_bits = np.arange(1 << 16, dtype=np.uint16)
+    e16 = (all_bits >> 10) & 0x1F
+    normal_bits = all_bits[(e16 != 0) & (e16 != 0x1F)]
+    max_ub = legacy_mx.mx_max_unbiased_exp("e4m3")
+    lo = legacy_mx.compute_shared_exp_array(normal_bits[:, None], max_ub).astype(np.int64)
+    hi = int(legacy_mx.compute_shared_exp_array(np.array([FP16_MAX_FINITE]), max_ub))
+
+    values = normal_bits.view(np.float16).astype(np.float64)
+    memo = {}
+    for se0 in range(0, 256, exps_per_chunk):
+        se = np.arange(se0, min(se0 + exps_per_chunk, 256))[:, None]
+        reachable = (se >= lo) & (se <= hi)
+        if not reachable.any():
+            continue
+        unscaled = np.ldexp(values, 127 - se).astype(np.float32)[reachable]
+        uniq, inverse = np.unique(unscaled, return_inverse=True)
+        for value in uniq.tolist():
+            if value not in memo:
+                memo[value] = fp9_encode_unscaled(value)
+        expected = np.array([memo[v] for v in uniq.tolist()], dtype=np.uint8)[inverse]
+        se_r = np.broadcast_to(se, reachable.shape)[reachable]
+        bits_r = np.broadcast_to(normal_bits, reachable.shape)[reachable]
+        actual = legacy_mx.mx_encode_array(bits_r, se_r, "e4m3")
+        mismatch = expected != actual
+        res.fp9_checked += bits_r.size
+        res.fp9_errors += int(mismatch.sum())
+        res.fp9_mismatches += _collect(mismatch, (bits_r, se_r, expected, actual), limit)
+
+
+def run_exhaustive(formats: Sequence[str], scalar_samples: int, seed: int,
+                   limit: int, exps_per_chunk: int = 16) -> List[FormatResult]:
+    rng = np.random.default_rng(seed)
+    all_bits = np.arange(1 << 16, dtype=np.uint16)[None, :]
+    results: List[FormatResult] = []
+
+    for fmt in formats:
+        exp_bits, mant_bits, bias = legacy_mx.MX_FORMAT_SPECS[fmt]
+        elem_mask = (1 << (1 + exp_bits + mant_bits)) - 1
+        res = FormatResult(fmt)
+
+        # Decode: every (code, shared_exp) pair.
+        se = np.arange(256)[:, None]
+        codes = np.arange(elem_mask + 1)[None, :]
+        actual = legacy_mx.mx_decode_table(fmt)
+        expected = decode_reference_array(codes, se, fmt)
+        differ = np.broadcast_to(expected != actual, actual.shape)
+        known = differ & _known_decode(codes, actual, fmt)
+        mismatch = differ & ~known
+        res.decode_checked = mismatch.size
+        res.decode_known = int(known.sum())
+        res.decode_errors = int(mismatch.sum())
+        res.decode_mismatches = _collect(mismatch, (codes, se, expected, actual), limit)
+
+        # Encode: every (fp16, shared_exp) pair, a chunk of exponents at a time.
+        for se0 in range(0, 256, exps_per_chunk):
+            se = np.arange(se0, min(se0 + exps_per_chunk, 256))[:, None]
+            actual = legacy_mx.mx_encode_array(all_bits, se, fmt)
+            expected, defined = encode_reference_array(all_bits, se, fmt)
+            differ = defined & ~_same_code(expected, actual, fmt)
+            known = differ & _known_encode(all_bits, expected, actual, fmt)
+            mismatch = differ & ~known
+            res.encode_checked += int(defined.sum())
+            res.encode_skipped += int(defined.size - defined.sum())
+            res.encode_known += int(known.sum())
+            res.encode_errors += int(mismatch.sum())
+            res.encode_mismatches += _collect(mismatch, (all_bits, se, expected, actual), limit)
+
+        # The array forms are tables of the scalar golden; spot-check that.
+        vals = rng.integers(0, 1 << 16, scalar_samples)
+        exps = rng.integers(0, 256, scalar_samples)
+        codes = rng.integers(0, elem_mask + 1, scalar_samples)
+        enc = legacy_mx.mx_encode_array(vals, exps, fmt)
+        dec = legacy_mx.mx_decode_array(codes, exps, fmt)
+        for v, e, c, got_enc, got_dec in zip(vals.tolist(), exps.tolist(), codes.tolist(),
+                                            enc.tolist(), dec.tolist()):
+            if legacy_mx.mx_encode_bits(v, e, exp_bits, mant_bits, bias) & elem_mask != got_enc:
+                res.scalar_errors += 1
+            if legacy_mx.mx_decode_bits(c, e, exp_bits, mant_bits, bias) != got_dec:
+                res.scalar_errors += 1
+        res.scalar_checked = 2 * scalar_samples
+
+        if fmt == "e4m3" and FP9 is not None:
+            _check_fp9(res, exps_per_chunk, limit)
+
+        if limit:
+            res.encode_mismatches = res.encode_mismatches[:limit]
+            res.fp9_mismatches = res.fp9_mismatches[:limit]
+        results.append(res)
+
+    return results
+
+
+def known_note(count: int) -> str:
+    return f" + {count} known deviations" if count else ""
+
+
+def report_exhaustive(results: Sequence[FormatResult], verbose: bool) -> int:
+    for res in results:
+        fp9 = (f"fp9 {res.fp9_checked} checked, {res.fp9_errors} mismatches"
+               if res.fp9_checked else "fp9 n/a")
+        print(
+            f"{'✅' if res.ok else '❌'} {res.fmt}: "
+            f"decode {res.decode_checked} checked, {res.decode_errors} mismatches"
+            f"{known_note(res.decode_known)} | "
+            f"encode {res.encode_checked} checked, {res.encode_errors} mismatches"
+            f"{known_note(res.encode_known)} "
+            f"({res.encode_skipped} implementation-defined skipped) | "
+            f"scalar {res.scalar_checked} sampled, {res.scalar_errors} mismatches | {fp9}"
+        )
+        if verbose:
+            for code, se, expected, actual in res.decode_mismatches:
+                print(f"  decode 0x{code:02x} se=0x{se:02x}: expected FP16 0x{expected:04x} from spec, got 0x{actual:04x}")
+            for bits, se, expected, actual in res.encode_mismatches:
+                print(f"  encode 0x{bits:04x} se=0x{se:02x}: expected 0x{expected:02x} from spec, got 0x{actual:02x}")
+            for bits, se, expected, actual in res.fp9_mismatches:
+                print(f"  encode 0x{bits:04x} se=0x{se:02x}: expected 0x{expected:02x} from FP9 model, got 0x{actual:02x}")
+
+    if any(res.decode_known or res.encode_known for res in results):
+        print("Known deviations: the golden treats the all-ones exponent of "
+              f"{'/'.join(f.upper() for f in KNOWN_DEVIATIONS)} as Inf/NaN, "
+              "OCP MX v1.0 does not (see KNOWN_DEVIATIONS).")
+    if FP9 is None:
+        print("FP9 model not found; E4M3 FP9 cross-check skipped.")
+    return 0 if all(res.ok for res in results) else 1
+
+
 @dataclass
 class BlockResult:
     block_id: str
@@ -156,8 +479,25 @@ def main() -> int:
     parser.add_argument("--block-size", type=int, default=32, help="Number of FP16 values per MX block")
     parser.add_argument("--seed", type=int, default=1, help="Seed for the RNG")
     parser.add_argument("--verbose", action="store_true", help="Print every mismatch instead of summaries")
+    parser.add_argument("--exhaustive", action="store_true",
+                        help="Enumerate the full decode/encode input space instead of random blocks")
+    parser.add_argument("--formats", nargs="+", choices=sorted(legacy_mx.MX_FORMAT_SPECS),
+                        default=list(legacy_mx.MX_FORMAT_SPECS),
+                        help="MX formats to check in --exhaustive mode")
+    parser.add_argument("--scalar-samples", type=int, default=4096,
+                        help="Random pairs checked against the scalar golden in --exhaustive mode")
+    parser.add_argument("--max-report", type=int, default=16,
+                        help="Mismatches kept per check with --verbose (0 = all)")
     args = parser.parse_args()
 
+    if args.exhaustive:
+        results = run_exhaustive(args.formats, args.scalar_samples, args.seed, args.max_report)
+        return report_exhaustive(results, args.verbose)
+
+    if FP9 is None:
+        parser.error("FP9 model not found under mxfp-main-golden-Gamze/; "
+                     "only --exhaustive can run without it")
+
     results = run(args.blocks, args.block_size, args.seed)
 
     encode_errors = sum(len(res.encode_mismatches) for res in results)
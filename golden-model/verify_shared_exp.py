@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
-"""Cross-check MX shared-exponent computation against the spec formula."""
+"""Cross-check MX shared-exponent computation against the spec formula.
+
+``--exhaustive`` checks every FP16 value as a block maximum for all MX
+formats, against both the scalar and the vectorized golden.
+"""
 
 from __future__ import annotations
 
@@ -17,7 +21,8 @@ MX_MANTISSA_MAX_EXP = 7  # max unbiased exponent in FP8(E4M3)
 BIAS_E8M0 = 127
 
 
-def spec_shared_exp(fp16_block_bits: Iterable[int]) -> int:
+def spec_shared_exp(fp16_block_bits: Iterable[int],
+                    max_unbiased_exp: int = MX_MANTISSA_MAX_EXP) -> int:
     max_e16 = 0
     for value in fp16_block_bits:
         e16 = (int(value) >> 10) & 0x1F
@@ -30,7 +35,7 @@ def spec_shared_exp(fp16_block_bits: Iterable[int]) -> int:
         return 127  # neutral scale when block has no normals
 
     eM_unbiased = max_e16 - BIAS_FP16
-    e_scale_unbiased = eM_unbiased - MX_MANTISSA_MAX_EXP
+    e_scale_unbiased = eM_unbiased - max_unbiased_exp
     e8m0 = e_scale_unbiased + BIAS_E8M0
     return max(0, min(255, e8m0)) & 0xFF
 
@@ -95,14 +100,67 @@ def run(blocks: int, block_size: int, seed: int) -> int:
     return mismatches
 
 
+def run_exhaustive(blocks: int, block_size: int, seed: int) -> int:
+    """Every FP16 value as a block maximum, for every format's exponent range.
+
+    The shared exponent only depends on the largest normal exponent of the
+    block, so one block per FP16 value (the value plus zeros) covers the
+    whole input space; random blocks then check the max reduction itself.
+    """
+    rng = np.random.default_rng(seed)
+    all_bits = np.arange(1 << 16, dtype=np.int64)
+    single = np.zeros((all_bits.size, block_size), dtype=np.int64)
+    single[:, 0] = all_bits
+    rand_blocks = np.asarray(
+        [_fp16_samples(block_size, rng) for _ in range(blocks)], dtype=np.int64
+    ).reshape(blocks, block_size)
+    mismatches = 0
+
+    for fmt in mx_fp_golden.MX_FORMAT_SPECS:
+        max_ub = mx_fp_golden.mx_max_unbiased_exp(fmt)
+        ref = np.array([spec_shared_exp([v], max_ub) for v in all_bits.tolist()])
+        scalar = np.array([
+            mx_fp_golden.compute_shared_exp_from_block([v], max_unbiased_exp=max_ub)
+            for v in all_bits.tolist()
+        ])
+        vector = mx_fp_golden.compute_shared_exp_array(single, max_ub)
+        bad = (ref != scalar) | (ref != vector)
+
+        rand_ref = np.array([spec_shared_exp(b, max_ub) for b in rand_blocks.tolist()])
+        rand_bad = rand_ref != mx_fp_golden.compute_shared_exp_array(rand_blocks, max_ub)
+
+        for v in all_bits[bad][:8].tolist():
+            print(
+                f"{fmt} value 0x{v:04x}: spec=0x{ref[v]:02x} scalar=0x{scalar[v]:02x} "
+                f"vector=0x{vector[v]:02x}"
+            )
+        for idx in np.flatnonzero(rand_bad)[:8].tolist():
+            print(f"{fmt} random block {idx}: spec=0x{rand_ref[idx]:02x} | vals={rand_blocks[idx].tolist()}")
+
+        fmt_mismatches = int(bad.sum()) + int(rand_bad.sum())
+        mismatches += fmt_mismatches
+        print(
+            f"{'✅' if fmt_mismatches == 0 else '❌'} {fmt} (max exp {max_ub}): "
+            f"{all_bits.size} block maxima + {blocks} random blocks, "
+            f"{fmt_mismatches} mismatches"
+        )
+
+    return mismatches
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Verify MX shared exponent computation")
     parser.add_argument("--blocks", type=int, default=1000, help="Random blocks to test")
     parser.add_argument("--block-size", type=int, default=32, help="Elements per block")
     parser.add_argument("--seed", type=int, default=1, help="RNG seed")
+    parser.add_argument("--exhaustive", action="store_true",
+                        help="Check every FP16 block maximum for all MX formats")
     args = parser.parse_args()
 
-    mismatches = run(args.blocks, args.block_size, args.seed)
+    if args.exhaustive:
+        mismatches = run_exhaustive(args.blocks, args.block_size, args.seed)
+    else:
+        mismatches = run(args.blocks, args.block_size, args.seed)
     return 0 if mismatches == 0 else 1
 
 
@@ -147,7 +147,10 @@ module tb_redmule_mx_decoder;
     // ---------------------- TESTS FROM PYTHON GOLDEN MODEL ----------------------
     // File format, one block per line (all hex):
     //   <shared_exp> <32×fp8_vals> <32×fp16_expected>
+    // Override with +VECTOR_FILE=<path>, e.g. the *_full.txt vectors from
+    // `gen_mx_vectors.py --full`.
 
+    void'($value$plusargs("VECTOR_FILE=%s", VECTOR_FILE));
     fd = $fopen(VECTOR_FILE, "r");
     if (fd == 0) begin
       $fatal(1, "ERROR: could not open vector file: %s", VECTOR_FILE);
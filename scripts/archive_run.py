@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Pack a run's dumps into one compressed bundle with a manifest.
+
+rename_dump.py keeps every run as ~20 full-size text dumps. This script packs
+them (same file list, same suffix convention) into <out-dir>/<suffix>.dumps.zip.
+Each member is LZMA-compressed on its own and stored under its canonical
+(unsuffixed) name. A manifest.json records M/N/K/format, the RTL content hash,
+the [PERF]/[TB] metrics from the transcript and per-file checksums. The
+readers in golden-model/common/dump_archive.py (used by
+check_engine_vs_golden.py and the scripts/ parsers) read bundle members
+transparently. Pass a bundle as --dump-dir, or keep it next to the removed
+dumps.
+
+Usage:
+    # Archive run mx96 from target/sim/vsim and delete the originals
+    python3 scripts/archive_run.py pack --suffix mx96 -M 96 -N 96 -K 96 --format e4m3 --remove
+
+    # Show manifests / extract
+    python3 scripts/archive_run.py list target/sim/vsim
+    python3 scripts/archive_run.py extract target/sim/vsim/mx96.dumps.zip --to /tmp/mx96
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "golden-model", "common"))
+
+from dump_archive import BUNDLE_SUFFIX, list_bundles, read_manifest, write_bundle
+from rename_dump import DEFAULT_GLOBS
+from rtl_params import rtl_hash
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# transcript line -> manifest metric name
+METRIC_PATTERNS = [
+    (re.compile(r"\[PERF\] total cycles\s+:\s+(\d+)"), "Total_Cyc"),
+    (re.compile(r"\[PERF\] busy cycles\s+:\s+(\d+)"), "Busy_Cyc"),
+    (re.compile(r"\[PERF\] engine cycles\s+:\s+(\d+)"), "Engine_Cyc"),
+    (re.compile(r"\[PERF\] load->store cycles\s+:\s+(\d+)"), "Load_Store_Cyc"),
+    (re.compile(r"\[PERF\] ideal cycles\s+:\s+(\d+)"), "Ideal_Cyc"),
+    (re.compile(r"\[PERF\] W load cycles\s+:\s+(\d+)"), "W_Load_Cyc"),
+    (re.compile(r"\[PERF\] W shift cycles\s+:\s+(\d+)"), "W_Shift_Cyc"),
+    (re.compile(r"\[TB\]\[STALL\] events\s+:\s+(\d+)"), "Stall_Ev"),
+    (re.compile(r"\[TB\]\[STALL\] cycles\s+:\s+(\d+)"), "Stall_Cyc"),
+    (re.compile(r"\[TB\] - cnt_rd=\s*(\d+)"), "cnt_rd"),
+    (re.compile(r"\[TB\] - cnt_wr=\s*(\d+)"), "cnt_wr"),
+    (re.compile(r"errors=([0-9a-fA-F]+)"), "errors"),
+]
+
+
+def suffixed(name, suffix):
+    if not suffix:
+        return name
+    p = Path(name)
+    return p.stem + "_" + suffix + p.suffix if p.suffix else name + "_" + suffix
+
+
+def run_files(root, suffix):
+    """{canonical member name: path} of the run's dumps present in root."""
+    files = {}
+    for name in DEFAULT_GLOBS:
+        path = root / suffixed(name, suffix)
+        if path.is_file():
+            files[name] = path
+    return files
+
+
+def parse_metrics(transcript):
+    metrics = {}
+    if transcript is None or not transcript.exists():
+        return metrics
+    with open(transcript, errors="replace") as f:
+        for line in f:
+            for pattern, name in METRIC_PATTERNS:
+                m = pattern.search(line)
+                if m:
+                    metrics[name] = m.group(1)
+            if "[TB] - Success!" in line:
+                metrics["Result"] = "Pass"
+            elif "[TB] - Fail!" in line:
+                metrics["Result"] = "Fail"
+    for name, value in metrics.items():
+        if name not in ("errors", "Result"):
+            metrics[name] = int(value)
+    return metrics
+
+
+def read_tensor_dims(header):
+    dims = {}
+    if header.exists():
+        for line in header.read_text().splitlines():
+            m = re.match(r"\s*#define\s+([MNK])_SIZE\s+(\d+)", line)
+            if m:
+                dims[m.group(1)] = int(m.group(2))
+    return dims
+
+
+def cmd_pack(args):
+    root = Path(args.dir)
+    out_dir = Path(args.out_dir) if args.out_dir else root
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dims = read_tensor_dims(REPO_ROOT / "sw" / "inc" / "tensor_dim.h")
+    status = 0
+    for suffix in args.suffix:
+        files = run_files(root, suffix)
+        if not files:
+            print("Error: no dumps for run {!r} in {}".format(suffix, root), file=sys.stderr)
+            status = 1
+            continue
+        config = {
+            "M": args.M if args.M is not None else dims.get("M"),
+            "N": args.N if args.N is not None else dims.get("N"),
+            "K": args.K if args.K is not None else dims.get("K"),
+            "format": args.format,
+        }
+        manifest = {
+            "suffix": suffix,
+            "config": config,
+            "rtl_hash": rtl_hash(),
+            "metrics": parse_metrics(files.get("transcript")),
+        }
+        bundle = out_dir / ((suffix or "latest") + BUNDLE_SUFFIX)
+        if bundle.exists() and not args.overwrite:
+            print("SKIP (exists): {}".format(bundle))
+            continue
+        write_bundle(str(bundle), {k: str(v) for k, v in files.items()}, manifest)
+        raw = sum(p.stat().st_size for p in files.values())
+        packed = bundle.stat().st_size
+        print("PACKED: {} files, {:.1f} MB -> {:.1f} MB ({}x) in {}".format(
+            len(files), raw / 1e6, packed / 1e6,
+            round(raw / packed, 1) if packed else 0, bundle))
+        if args.remove:
+            for path in files.values():
+                path.unlink()
+            print("  removed {} original files".format(len(files)))
+    return status
+
+
+def cmd_list(args):
+    bundles = []
+    for target in args.paths:
+        p = Path(target)
+        bundles.extend(list_bundles(str(p)) if p.is_dir() else [str(p)])
+    if not bundles:
+        print("No bundles found.")
+        return 1
+    for bundle in bundles:
+        m = read_manifest(bundle)
+        if args.json:
+            print(json.dumps({"bundle": bundle, **m}, sort_keys=True))
+            continue
+        cfg = m.get("config", {})
+        metrics = m.get("metrics", {})
+        print("{}: suffix={} {}x{}x{} {} rtl={} Total_Cyc={} {} ({} files)".format(
+            bundle, m.get("suffix"), cfg.get("M"), cfg.get("N"), cfg.get("K"),
+            cfg.get("format"), m.get("rtl_hash"), metrics.get("Total_Cyc"),
+            metrics.get("Result", ""), len(m.get("files", {}))))
+    return 0
+
+
+def cmd_extract(args):
+    bundle = args.bundle
+    m = read_manifest(bundle)
+    dest = Path(args.to) if args.to else Path(bundle).parent
+    dest.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(bundle) as zf:
+        for member, info in m["files"].items():
+            name = member if args.canonical else info["source"]
+            with zf.open(member) as src, open(dest / name, "wb") as dst:
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            os.utime(dest / name, (info["mtime"], info["mtime"]))
+            print("EXTRACTED: {}".format(dest / name))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive simulation dumps into compressed run bundles.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_pack = sub.add_parser("pack", help="Pack one or more runs")
+    p_pack.add_argument(
+        "--dir",
+        default="target/sim/vsim",
+        help="Directory containing run dump files (default: target/sim/vsim).",
+    )
+    p_pack.add_argument(
+        "--suffix",
+        nargs="+",
+        default=[""],
+        help="Run suffix(es) as given to rename_dump.py (default: unsuffixed latest run).",
+    )
+    p_pack.add_argument("--out-dir", help="Where to write bundles (default: --dir)")
+    p_pack.add_argument("-M", type=int, help="M recorded in the manifest (default: sw/inc/tensor_dim.h)")
+    p_pack.add_argument("-N", type=int, help="N recorded in the manifest (default: sw/inc/tensor_dim.h)")
+    p_pack.add_argument("-K", type=int, help="K recorded in the manifest (default: sw/inc/tensor_dim.h)")
+    p_pack.add_argument("--format", default=None, help="Format recorded in the manifest (fp16, e4m3, ...)")
+    p_pack.add_argument("--remove", action="store_true", help="Delete the original dumps after packing")
+    p_pack.add_argument("--overwrite", action="store_true", help="Replace existing bundles")
+
+    p_list = sub.add_parser("list", help="Print bundle manifests")
+    p_list.add_argument("paths", nargs="+", help="Bundles or directories containing bundles")
+    p_list.add_argument("--json", action="store_true", help="One JSON manifest per line")
+
+    p_ext = sub.add_parser("extract", help="Unpack a bundle")
+    p_ext.add_argument("bundle", help="Bundle file")
+    p_ext.add_argument("--to", help="Destination directory (default: next to the bundle)")
+    p_ext.add_argument("--canonical", action="store_true",
+                       help="Use unsuffixed names instead of the original file names")
+
+    args = parser.parse_args()
+    if args.cmd == "pack":
+        return cmd_pack(args)
+    if args.cmd == "list":
+        return cmd_list(args)
+    return cmd_extract(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Content-hash build driver for the golden, MX and stimulus artifacts.
+
+make decides staleness by timestamps, which breaks down for generated data:
+the FP16 golden rewrites its headers in sw/inc on every run, M/N/K and the MX
+formats are not files at all, and a rebuilt header with the same bytes
+still invalidates everything downstream. The Makefile keeps the graph
+edges, but every generator recipe runs through `run`, which records for
+one node the command, its --param values and the SHA-256 of every --in
+file, plus the hash of every --out file it produced, in
+<state-dir>/<node>.json. The next `run` of that node is skipped when the
+command, the parameters and the input contents are the same and every
+output still exists with the recorded contents; otherwise the reason is
+printed and the command runs again. Generators that rewrite a file with
+the same bytes leave the node's downstream nodes skipped.
+
+One state file per node keeps parallel make (-j) safe. `ls` shows the
+recorded nodes, `--force` (FORCE=1 in the Makefile) reruns regardless.
+
+Usage:
+    python3 scripts/artifact_build.py run fp16-golden --state-dir sw/.artifacts \\
+        --in golden-model/FP16/gemm.py --in 'golden-model/common/*.py' \\
+        --out sw/inc/x_input.h --out sw/inc/golden.h --param M=64 \\
+        -- make -C golden-model gemm SW=sw/inc M=64 N=64 K=64
+    python3 scripts/artifact_build.py ls --state-dir sw/.artifacts
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+STATE_VERSION = 1
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def expand_inputs(patterns):
+    """Expand --in paths and globs into a sorted list of files."""
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern)
+        if not matches and not glob.has_magic(pattern):
+            raise FileNotFoundError(pattern)
+        paths.update(m for m in matches if os.path.isfile(m))
+    return sorted(paths)
+
+
+def state_path(state_dir, node):
+    return os.path.join(state_dir, node + '.json')
+
+
+def load_state(state_dir, node):
+    try:
+        with open(state_path(state_dir, node)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(state_dir, node, state):
+    os.makedirs(state_dir, exist_ok=True)
+    path = state_path(state_dir, node)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def stale_reasons(state, command, params, input_hashes, outputs):
+    """Why the node must run, or [] when the recorded outputs are current."""
+    if state is None:
+        return ['no previous build']
+    reasons = []
+    if state['command'] != command:
+        reasons.append('command changed')
+    changed = sorted(k for k in set(params) | set(state['params'])
+                     if params.get(k) != state['params'].get(k))
+    if changed:
+        reasons.append('parameters changed: ' + ', '.join(changed))
+    changed = sorted(p for p in set(input_hashes) | set(state['inputs'])
+                     if input_hashes.get(p) != state['inputs'].get(p))
+    if changed:
+        reasons.append('inputs changed: ' + ', '.join(os.path.relpath(p) for p in changed))
+    for out in outputs:
+        if not os.path.isfile(out):
+            reasons.append(f'output missing: {os.path.relpath(out)}')
+        elif state['outputs'].get(out) != file_hash(out):
+            reasons.append(f'output modified: {os.path.relpath(out)}')
+    return reasons
+
+
+def cmd_run(args):
+    command = ' '.join(args.command)
+    if not command:
+        sys.exit('error: no command given after --')
+    params = {}
+    for item in args.param:
+        name, sep, value = item.partition('=')
+        if not sep:
+            sys.exit(f'error: --param expects NAME=VALUE, got {item!r}')
+        params[name] = value
+    try:
+        inputs = expand_inputs(args.inputs)
+    except FileNotFoundError as e:
+        sys.exit(f'[{args.node}] error: input {e} does not exist')
+    input_hashes = {os.path.abspath(p): file_hash(p) for p in inputs}
+    outputs = [os.path.abspath(p) for p in args.outputs]
+
+    state = load_state(args.state_dir, args.node)
+    reasons = ['forced'] if args.force else stale_reasons(
+        state, command, params, input_hashes, outputs)
+    if not reasons:
+        print(f'[{args.node}] up to date')
+        return 0
+
+    print(f'[{args.node}] rebuilding ({"; ".join(reasons)})')
+    sys.stdout.flush()
+    start = time.time()
+    ret = subprocess.call(command, shell=True, executable='/bin/bash')
+    if ret != 0:
+        print(f'[{args.node}] command failed with exit code {ret}', file=sys.stderr)
+        return ret
+    missing = [p for p in outputs if not os.path.isfile(p)]
+    if missing:
+        print(f'[{args.node}] command did not produce: '
+              + ', '.join(os.path.relpath(p) for p in missing), file=sys.stderr)
+        return 1
+
+    # Hash the inputs again: a command may rewrite one of its own inputs,
+    # and the recorded state must describe the tree after the command.
+    input_hashes = {p: file_hash(p) for p in input_hashes if os.path.isfile(p)}
+    save_state(args.state_dir, args.node, {
+        'version': STATE_VERSION,
+        'command': command,
+        'params': params,
+        'inputs': input_hashes,
+        'outputs': {p: file_hash(p) for p in outputs},
+        'seconds': round(time.time() - start, 3),
+        'built': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    })
+    return 0
+
+
+def cmd_ls(args):
+    if not os.path.isdir(args.state_dir):
+        print(f'No build state in {args.state_dir}')
+        return 0
+    for name in sorted(os.listdir(args.state_dir)):
+        if not name.endswith('.json'):
+            continue
+        node = name[:-len('.json')]
+        state = load_state(args.state_dir, node)
+        if state is None:
+            print(f'{node:<16} (unreadable or outdated state)')
+            continue
+        params = ' '.join(f'{k}={v}' for k, v in sorted(state['params'].items()))
+        print(f"{node:<16} {state['built']}  {state['seconds']:8.2f}s  "
+              f"{len(state['inputs'])} in / {len(state['outputs'])} out  {params}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Content-hash build driver for generated artifacts',
+                                     usage='%(prog)s {run,ls} ... [-- COMMAND]')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    p = sub.add_parser('run', help='Run a node if its command, parameters, inputs or outputs changed')
+    p.add_argument('node', help='Node name (state file <state-dir>/<node>.json)')
+    p.add_argument('--state-dir', required=True, help='Directory holding the per-node state')
+    p.add_argument('--in', dest='inputs', action='append', default=[],
+                   help='Input file or glob whose contents the outputs depend on (repeatable)')
+    p.add_argument('--out', dest='outputs', action='append', default=[],
+                   help='File the command produces (repeatable)')
+    p.add_argument('--param', action='append', default=[],
+                   help='NAME=VALUE build parameter recorded with the node (repeatable)')
+    p.add_argument('--force', action='store_true', help='Run even if the node is up to date')
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser('ls', help='List the recorded nodes')
+    p.add_argument('--state-dir', required=True, help='Directory holding the per-node state')
+    p.set_defaults(func=cmd_ls)
+
+    # Everything after the first -- is the command; argparse would otherwise
+    # try to match its options.
+    argv = sys.argv[1:]
+    command = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, command = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    args.command = command
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()
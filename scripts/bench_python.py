@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Benchmarks for the Python golden/verification flow.
+
+At larger sizes the Python side (vector generation, bit-true golden GEMM,
+checkers, trace parsing) takes longer than a short simulation. This harness
+times the hot paths on synthetic data, so that speedups can be measured and
+slowdowns caught:
+
+    mx_encode_<fmt> / mx_decode_<fmt>   gen_mx_golden encode/decode, 1024 blocks
+    gemm_<n>                            redmule_fma bit-true GEMM, n x n x n
+    header_parse / header_emit          C header read/write, 256K values
+    trace_load                          stall_breakdown.load_trace, 200K rows
+    dump_index_build                    dump_index.build_index, 100K x 32 values
+    check_engine_e2e_<n>                check_engine_vs_golden.py FP16 mode on
+                                        synthetic headers and a passing Z dump
+
+Each benchmark runs --warmup untimed times, then --repeat timed times. It
+stops early once it has used --max-time seconds, but always runs at least
+once. Results are saved with machine metadata (host, CPU, Python/NumPy
+versions, git commit). `compare` fails when any benchmark present in both
+files got slower than --threshold percent (median by default, see --metric).
+Compare results from the same host only.
+
+GEMM sizes default to 32, 64, 128 and 256. The vectorized bit-true GEMM
+takes about 2.5 s per run at 256^3 and 25 s at 512^3, so 512 is only run
+with --full (32 to 512).
+
+Usage:
+    python3 scripts/bench_python.py run -o bench_base.json
+    python3 scripts/bench_python.py run --full --filter gemm -o gemm.json
+    python3 scripts/bench_python.py compare bench_base.json bench_new.json --threshold 10
+
+Exit status (compare): 0 = no slowdown, 1 = slowdown(s) found, 2 = usage error.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "golden-model" / "MX"))
+sys.path.insert(0, str(REPO_ROOT / "golden-model" / "common"))
+
+import check_engine_vs_golden
+import gen_mx_golden
+import redmule_fma
+from mx_fp_golden import MX_FORMAT_SPECS
+
+from dump_index import build_index
+from stall_breakdown import load_trace
+
+SCHEMA_VERSION = 1
+DEFAULT_GEMM_SIZES = [32, 64, 128, 256]
+FULL_GEMM_SIZES = [32, 64, 128, 256, 512]
+DEFAULT_E2E_SIZES = [32]
+MX_BLOCKS = 1024
+BLOCK_SIZE = 32
+HEADER_VALUES = 1 << 18
+TRACE_ROWS = 200000
+INDEX_ROWS = 100000
+
+
+def random_fp16_bits(rng, n, scale=1.0):
+    """Random finite FP16 bit patterns."""
+    return (rng.standard_normal(n) * scale).astype(np.float16).view(np.uint16)
+
+
+def write_fp16_header(path, name, bits):
+    with open(path, "w") as f:
+        f.write("uint16_t {}[{}] = {{\n".format(name, len(bits)))
+        f.write(", ".join("0x{:04x}".format(int(v)) for v in bits))
+        f.write("\n};\n")
+
+
+# ----------------------------------------------------------------------
+# Benchmarks: each factory does its setup and returns the timed callable
+# ----------------------------------------------------------------------
+
+def bench_mx_encode(ctx, fmt):
+    values = [int(v) for v in random_fp16_bits(ctx.rng, MX_BLOCKS * BLOCK_SIZE)]
+    return lambda: gen_mx_golden.encode_fp16_to_mx(values, BLOCK_SIZE, mx_fmt=fmt)
+
+
+def bench_mx_decode(ctx, fmt):
+    values = [int(v) for v in random_fp16_bits(ctx.rng, MX_BLOCKS * BLOCK_SIZE)]
+    elems, exps = gen_mx_golden.encode_fp16_to_mx(values, BLOCK_SIZE, mx_fmt=fmt)
+    return lambda: gen_mx_golden.decode_mx_to_fp16(elems, exps, BLOCK_SIZE, mx_fmt=fmt)
+
+
+def bench_gemm(ctx, n):
+    x = ctx.rng.random((n, n)).astype(np.float16)
+    w = ctx.rng.random((n, n)).astype(np.float16)
+    y = ctx.rng.random((n, n)).astype(np.float16)
+    return lambda: redmule_fma.matrix_multiply_with_bittrue_fma(x, w, y)
+
+
+def bench_header_parse(ctx):
+    path = ctx.tmp / "parse.h"
+    write_fp16_header(path, "x_inp", random_fp16_bits(ctx.rng, HEADER_VALUES))
+    return lambda: gen_mx_golden.parse_c_header_array(str(path))
+
+
+def bench_header_emit(ctx):
+    values = [int(v) for v in random_fp16_bits(ctx.rng, HEADER_VALUES // 2).view(np.uint32)]
+    path = ctx.tmp / "emit.h"
+    return lambda: gen_mx_golden.write_c_header(str(path), "golden_mx", values,
+                                                elem_type="uint32_t", guard_name="__BENCH_H__")
+
+
+def bench_trace_load(ctx):
+    columns = ["time", "state"] + ["{}_{}".format(s, h) for s in
+                                   ("x_packed", "x_mux", "x_fifo", "w_packed", "w_mux", "w_fifo")
+                                   for h in ("valid", "ready")]
+    path = ctx.tmp / "engine_ingress_ctrl_trace.csv"
+    data = ctx.rng.integers(0, 2, size=(TRACE_ROWS, len(columns)))
+    data[:, 0] = np.arange(TRACE_ROWS) * 1000
+    data[:, 1] = ctx.rng.integers(0, 4, size=TRACE_ROWS)
+    np.savetxt(path, data, fmt="%d", delimiter=",", header=",".join(columns), comments="")
+    return lambda: load_trace(path, columns)
+
+
+def bench_dump_index_build(ctx):
+    path = ctx.tmp / "engine_x_inputs.txt"
+    rows = ctx.rng.integers(0, 1 << 16, size=(INDEX_ROWS, 32))
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(" ".join("{:04x}".format(int(v)) for v in row) + "\n")
+    return lambda: build_index(path)
+
+
+def bench_check_engine_e2e(ctx, n):
+    d = ctx.tmp / "e2e_{}".format(n)
+    d.mkdir(exist_ok=True)
+    x = random_fp16_bits(ctx.rng, n * n, 0.5)
+    w = random_fp16_bits(ctx.rng, n * n, 0.5)
+    y = random_fp16_bits(ctx.rng, n * n, 0.5)
+    write_fp16_header(d / "x_input.h", "x_inp", x)
+    write_fp16_header(d / "w_input.h", "w_inp", w)
+    write_fp16_header(d / "y_input.h", "y_inp", y)
+    z = redmule_fma.matrix_multiply_with_bittrue_fma(
+        x.view(np.float16).reshape(n, n), w.view(np.float16).reshape(n, n),
+        y.view(np.float16).reshape(n, n)).view(np.uint16)
+    with open(d / "engine_z_outputs.txt", "w") as f:
+        for row in z:
+            f.write(" ".join("{:04x}".format(int(v)) for v in row) + "\n")
+    argv = ["check_engine_vs_golden.py", "--mode", "fp16", "--header-dir", str(d),
+            "--dump-dir", str(d), "-M", str(n), "-N", str(n), "-K", str(n)]
+
+    def run():
+        saved = sys.argv
+        sys.argv = argv
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                rc = check_engine_vs_golden.main()
+        finally:
+            sys.argv = saved
+        if rc != 0:
+            raise RuntimeError("check_engine_vs_golden failed on synthetic data (rc={})".format(rc))
+
+    return run
+
+
+def registry(args):
+    """[(name, factory, params)] in run order."""
+    benches = []
+    for fmt in MX_FORMAT_SPECS:
+        benches.append(("mx_encode_" + fmt, lambda ctx, f=fmt: bench_mx_encode(ctx, f),
+                        {"format": fmt, "blocks": MX_BLOCKS}))
+        benches.append(("mx_decode_" + fmt, lambda ctx, f=fmt: bench_mx_decode(ctx, f),
+                        {"format": fmt, "blocks": MX_BLOCKS}))
+    for n in args.gemm_sizes:
+        benches.append(("gemm_{}".format(n), lambda ctx, n=n: bench_gemm(ctx, n), {"M": n, "N": n, "K": n}))
+    benches.append(("header_parse", bench_header_parse, {"values": HEADER_VALUES}))
+    benches.append(("header_emit", bench_header_emit, {"values": HEADER_VALUES}))
+    benches.append(("trace_load", bench_trace_load, {"rows": TRACE_ROWS}))
+    benches.append(("dump_index_build", bench_dump_index_build, {"rows": INDEX_ROWS}))
+    for n in args.e2e_sizes:
+        benches.append(("check_engine_e2e_{}".format(n), lambda ctx, n=n: bench_check_engine_e2e(ctx, n),
+                        {"M": n, "N": n, "K": n}))
+    if args.filter:
+        pattern = re.compile(args.filter)
+        benches = [b for b in benches if pattern.search(b[0])]
+    return benches
+
+
+# ----------------------------------------------------------------------
+# Harness
+# ----------------------------------------------------------------------
+
+class Context:
+    def __init__(self, tmp, seed):
+        self.tmp = Path(tmp)
+        self.rng = np.random.default_rng(seed)
+
+
+def machine_metadata():
+    meta = {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    meta["cpu_model"] = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    try:
+        meta["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(REPO_ROOT),
+            capture_output=True, text=True, check=True).stdout.strip()
+        meta["git_dirty"] = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=str(REPO_ROOT),
+            capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return meta
+
+
+def time_bench(fn, repeat, max_time, warmup=0):
+    for _ in range(warmup):
+        fn()
+    times = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        if time.perf_counter() - start >= max_time:
+            break
+    return times
+
+
+def cmd_run(args):
+    benches = registry(args)
+    if args.list:
+        for name, _, params in benches:
+            print("{:<24} {}".format(name, params))
+        return 0
+    if not benches:
+        print("Error: no benchmark matches --filter", file=sys.stderr)
+        return 2
+
+    tmp = tempfile.mkdtemp(prefix="redmule_bench_")
+    results = {}
+    try:
+        ctx = Context(tmp, args.seed)
+        print("{:<24} {:>5} {:>11} {:>11}".format("benchmark", "runs", "min_s", "median_s"))
+        for name, factory, params in benches:
+            fn = factory(ctx)
+            times = time_bench(fn, args.repeat, args.max_time, args.warmup)
+            results[name] = {
+                "params": params,
+                "runs": len(times),
+                "min_s": min(times),
+                "median_s": statistics.median(times),
+                "mean_s": statistics.fmean(times),
+                "times_s": times,
+            }
+            print("{:<24} {:>5} {:>11.5f} {:>11.5f}".format(
+                name, len(times), min(times), statistics.median(times)), flush=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    doc = {"version": SCHEMA_VERSION, "meta": machine_metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(doc, f, indent=2, sort_keys=True)
+        print("Wrote {}".format(args.output))
+    return 0
+
+
+def load_results(path):
+    with open(path) as f:
+        doc = json.load(f)
+    if "results" not in doc:
+        raise ValueError("{}: not a bench_python.py result file".format(path))
+    return doc
+
+
+def cmd_compare(args):
+    try:
+        base = load_results(args.baseline)
+        cand = load_results(args.candidate)
+    except (OSError, ValueError) as exc:
+        print("Error:", exc, file=sys.stderr)
+        return 2
+    for label, doc in (("baseline", base), ("candidate", cand)):
+        m = doc.get("meta", {})
+        print("{:<9}: {} {} python {} numpy {} commit {}{}".format(
+            label, m.get("host"), m.get("cpu_model", m.get("processor", "")), m.get("python"),
+            m.get("numpy"), m.get("git_commit", "?"), "+dirty" if m.get("git_dirty") else ""))
+    if base.get("meta", {}).get("host") != cand.get("meta", {}).get("host"):
+        print("Warning: results come from different hosts", file=sys.stderr)
+
+    names = [n for n in base["results"] if n in cand["results"]]
+    if not names:
+        print("Error: no common benchmarks", file=sys.stderr)
+        return 2
+    key = args.metric + "_s"
+    print("\n{:<24} {:>11} {:>11} {:>9}".format("benchmark", "base_s", "cand_s", "delta%"))
+    slower = []
+    for name in names:
+        b = base["results"][name][key]
+        c = cand["results"][name][key]
+        delta = 100.0 * (c - b) / b if b else 0.0
+        flag = ""
+        if delta > args.threshold:
+            flag = "  SLOWER"
+            slower.append((name, delta))
+        elif delta < -args.threshold:
+            flag = "  faster"
+        print("{:<24} {:>11.5f} {:>11.5f} {:>+9.1f}{}".format(name, b, c, delta, flag))
+    only = sorted(set(base["results"]) ^ set(cand["results"]))
+    if only:
+        print("\nNot compared (only in one file): {}".format(", ".join(only)))
+
+    if slower:
+        print("\n{} benchmark(s) slower by more than {}%:".format(len(slower), args.threshold))
+        for name, delta in sorted(slower, key=lambda s: -s[1]):
+            print("  {:<24} {:+.1f}%".format(name, delta))
+        return 1
+    print("\nNo benchmark slower by more than {}%.".format(args.threshold))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python golden/verification flow.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="Run benchmarks and optionally save JSON results")
+    p_run.add_argument("-o", "--output", help="JSON result file")
+    p_run.add_argument("--filter", help="Only run benchmarks whose name matches this regex")
+    p_run.add_argument("--repeat", type=int, default=5, help="Runs per benchmark (default: 5)")
+    p_run.add_argument("--warmup", type=int, default=1, help="Untimed runs first (default: 1)")
+    p_run.add_argument("--max-time", type=float, default=20.0,
+                       help="Stop repeating a benchmark after this many seconds (default: 20)")
+    p_run.add_argument("--gemm-sizes", type=int, nargs="+", default=DEFAULT_GEMM_SIZES,
+                       help="Bit-true GEMM sizes n (n x n x n) (default: 32 64 128 256)")
+    p_run.add_argument("--full", action="store_true",
+                       help="Bit-true GEMM at 32 to 512 (overrides --gemm-sizes)")
+    p_run.add_argument("--e2e-sizes", type=int, nargs="+", default=DEFAULT_E2E_SIZES,
+                       help="check_engine_vs_golden end-to-end sizes (default: 32)")
+    p_run.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data (default: 0)")
+    p_run.add_argument("--list", action="store_true", help="List the selected benchmarks and exit")
+
+    p_cmp = sub.add_parser("compare", help="Compare two result files")
+    p_cmp.add_argument("baseline", help="Baseline result JSON")
+    p_cmp.add_argument("candidate", help="Candidate result JSON")
+    p_cmp.add_argument("--threshold", type=float, default=10.0,
+                       help="Fail if a benchmark is slower by more than this percentage (default: 10)")
+    p_cmp.add_argument("--metric", choices=["median", "min", "mean"], default="median",
+                       help="Statistic to compare (default: median)")
+
+    args = parser.parse_args()
+    if args.cmd == "run" and args.full:
+        args.gemm_sizes = FULL_GEMM_SIZES
+    if args.cmd == "run":
+        return cmd_run(args)
+    return cmd_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'MX'))
 from mx_fp_golden import mxfp8_decode_bits, encode_block_fp16_to_mx
+from dump_index import IndexedLines
 
 def parse_c_header_array(fn):
     with open(fn) as f:
@@ -34,12 +35,9 @@ x_q = encode_decode_mx(x_fp16, MX_BLOCK)
 
 # X_q[m][n] = x_q[m*N + n] for m=0..95, n=0..95
 
-# Read engine X inputs
-x_lines = []
-with open('target/sim/vsim/engine_x_inputs.txt') as f:
-    for line in f:
-        vals = [int(x, 16) for x in line.strip().split()]
-        x_lines.append(vals)
+# Read engine X inputs (only the lines used below are read, via the sidecar index)
+x_lines = IndexedLines('target/sim/vsim/engine_x_inputs.txt',
+                       parse=lambda line: [int(x, 16) for x in line.split()])
 
 # x_lines[i][w*32+h] = x_buffer_q[w][h] = engine x_input_i[w][h]
 
@@ -3,6 +3,9 @@
 import sys, re, os, struct
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'common'))
+from dump_archive import open_dump
+
 def parse_c_header_array(filename):
     with open(filename, 'r') as f:
         text = f.read()
@@ -14,7 +17,7 @@ def fp16_to_float(bits):
 def read_encoder_fp16_inputs(filename):
     """Read the RTL encoder FP16 input dump (hex string per line, 4 hex chars per FP16)."""
     values = []
-    with open(filename, 'r') as f:
+    with open_dump(filename, 'r') as f:
         for line in f:
             line = line.strip()
             if not line:
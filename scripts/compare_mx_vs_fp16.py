@@ -7,7 +7,9 @@ import sys
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 MX_PY = os.path.normpath(os.path.join(SCRIPT_DIR, "..", "golden-model", "MX"))
 sys.path.insert(0, MX_PY)
+sys.path.insert(0, os.path.normpath(os.path.join(SCRIPT_DIR, "..", "golden-model", "common")))
 
+from dump_archive import open_dump
 from mx_fp_golden import mxfp8_decode_bits
 
 
@@ -32,7 +34,7 @@ def load_fp16_golden(path):
 
 def load_hex_words(path):
     words = []
-    with open(path) as f:
+    with open_dump(path) as f:
         for line in f:
             line = line.strip()
             if line:
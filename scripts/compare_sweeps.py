@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Flag cycle-count regressions between a baseline and a candidate sweep.
+
+Joins the two sweeps on (Format, M, N, K) and reports per-point deltas for
+Total_Cyc, Stall_Cyc, W_Shift_Cyc and Utilization_Pct. A point regresses on
+a metric when it moves in the wrong direction by more than both the relative
+threshold (percent of the baseline value) and the absolute tolerance for
+that metric. Points that passed in the baseline but report errors in the
+candidate are always flagged.
+
+Example:
+    python3 scripts/compare_sweeps.py \\
+        --baseline sweep_dual_thorough_20260423_202310.csv \\
+                   sweep_dual_thorough_big_retry_20260424_044102.csv \\
+        --candidate sweep_pipelined_20260502_154401.csv \\
+        --threshold Total_Cyc=1 --report regress.md
+
+Exit status: 0 = no regression, 1 = regression(s) found, 2 = usage error.
+"""
+
+import argparse
+import html
+import sys
+from pathlib import Path
+
+from sweep_csv import format_key, load_sweeps
+
+
+# metric -> True if a larger value is worse
+METRICS = {
+    "Total_Cyc": True,
+    "Stall_Cyc": True,
+    "W_Shift_Cyc": True,
+    "Utilization_Pct": False,
+}
+
+DEFAULT_THRESHOLD_PCT = 1.0
+DEFAULT_ABS_TOL = {
+    "Total_Cyc": 0,
+    "Stall_Cyc": 8,
+    "W_Shift_Cyc": 0,
+    "Utilization_Pct": 0.1,
+}
+
+
+def parse_metric_values(items, option):
+    values = {}
+    for item in items or []:
+        if "=" not in item:
+            raise ValueError("{} expects METRIC=VALUE, got '{}'".format(option, item))
+        name, raw = item.split("=", 1)
+        if name not in METRICS:
+            raise ValueError("{}: unknown metric '{}' (choose from {})".format(
+                option, name, ", ".join(METRICS)))
+        values[name] = float(raw)
+    return values
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare a candidate sweep CSV against a baseline and flag regressions."
+    )
+    parser.add_argument("--baseline", nargs="+", required=True,
+                        help="Baseline sweep CSV(s); later files override earlier ones.")
+    parser.add_argument("--candidate", nargs="+", required=True,
+                        help="Candidate sweep CSV(s); later files override earlier ones.")
+    parser.add_argument("--threshold", action="append", metavar="METRIC=PCT",
+                        help="Relative regression threshold in percent for one metric "
+                             "(default: {} for all). Can be repeated.".format(DEFAULT_THRESHOLD_PCT))
+    parser.add_argument("--default-threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                        help="Relative threshold in percent for metrics without --threshold.")
+    parser.add_argument("--abs-tol", action="append", metavar="METRIC=VALUE",
+                        help="Absolute tolerance for one metric; deltas at or below it are "
+                             "never flagged. Defaults: " +
+                             ", ".join("{}={}".format(k, v) for k, v in DEFAULT_ABS_TOL.items()))
+    parser.add_argument("--formats", nargs="+",
+                        help="Restrict the comparison to these formats (e.g. FP16 E4M3).")
+    parser.add_argument("--report", help="Write a summary report (.md or .html).")
+    parser.add_argument("--report-format", choices=["md", "html"],
+                        help="Report format (default: from --report extension, else md).")
+    parser.add_argument("--show-all", action="store_true",
+                        help="List every joined point in the report, not only regressions.")
+    return parser.parse_args()
+
+
+def compare_point(base, cand, thresholds, abs_tols):
+    """Return {metric: result dict} for one joined point."""
+    results = {}
+    for metric, higher_is_worse in METRICS.items():
+        b = base.get(metric)
+        c = cand.get(metric)
+        if b is None or c is None:
+            results[metric] = {"base": b, "cand": c, "delta": None, "pct": None, "regressed": False}
+            continue
+        delta = c - b
+        pct = (100.0 * delta / b) if b else None
+        worse = delta if higher_is_worse else -delta
+        limit = max(abs_tols[metric], abs(b) * thresholds[metric] / 100.0)
+        results[metric] = {
+            "base": b,
+            "cand": c,
+            "delta": delta,
+            "pct": pct,
+            "regressed": worse > limit,
+        }
+    return results
+
+
+def new_failure(base, cand):
+    b_err = base.get("Errors")
+    c_err = cand.get("Errors")
+    return (b_err == 0) and (c_err is not None and c_err != 0)
+
+
+def fmt_value(v):
+    if v is None:
+        return "n/a"
+    if isinstance(v, float):
+        return "{:.2f}".format(v)
+    return str(v)
+
+
+def fmt_delta(res):
+    if res["delta"] is None:
+        return "n/a"
+    delta = res["delta"]
+    text = "{:+.2f}".format(delta) if isinstance(delta, float) else "{:+d}".format(delta)
+    if res["pct"] is not None:
+        text += " ({:+.1f}%)".format(res["pct"])
+    return text
+
+
+def summarize(joined):
+    """Per-metric aggregate: sums of base/cand over points where both exist."""
+    summary = {}
+    for metric in METRICS:
+        pairs = [(r[metric]["base"], r[metric]["cand"]) for _, r, _ in joined
+                 if r[metric]["delta"] is not None]
+        if not pairs:
+            summary[metric] = None
+            continue
+        base_sum = sum(b for b, _ in pairs)
+        cand_sum = sum(c for _, c in pairs)
+        if METRICS[metric]:
+            agg_b, agg_c = base_sum, cand_sum
+        else:
+            agg_b, agg_c = base_sum / len(pairs), cand_sum / len(pairs)
+        summary[metric] = {
+            "points": len(pairs),
+            "base": agg_b,
+            "cand": agg_c,
+            "pct": (100.0 * (agg_c - agg_b) / agg_b) if agg_b else None,
+            "regressed": sum(1 for _, r, _ in joined if r[metric]["regressed"]),
+        }
+    return summary
+
+
+def build_tables(joined, summary, only_base, only_cand, show_all):
+    """Return (headline, summary_rows, point_rows) shared by md and html writers."""
+    regressions = [j for j in joined if j[2] or any(r["regressed"] for r in j[1].values())]
+    headline = "{} joined points, {} regressed, {} only in baseline, {} only in candidate".format(
+        len(joined), len(regressions), len(only_base), len(only_cand))
+
+    summary_rows = []
+    for metric, s in summary.items():
+        if s is None:
+            summary_rows.append([metric, "0", "n/a", "n/a", "n/a", "0"])
+            continue
+        label = "sum" if METRICS[metric] else "mean"
+        summary_rows.append([
+            "{} ({})".format(metric, label), str(s["points"]), fmt_value(s["base"]),
+            fmt_value(s["cand"]),
+            "n/a" if s["pct"] is None else "{:+.2f}%".format(s["pct"]),
+            str(s["regressed"]),
+        ])
+
+    point_rows = []
+    for key, res, failed in (joined if show_all else regressions):
+        status = []
+        if failed:
+            status.append("NEW ERRORS")
+        status.extend(m for m, r in res.items() if r["regressed"])
+        row = [format_key(key)]
+        for metric in METRICS:
+            r = res[metric]
+            row.append("{} -> {} [{}]".format(fmt_value(r["base"]), fmt_value(r["cand"]), fmt_delta(r)))
+        row.append(", ".join(status) if status else "ok")
+        point_rows.append(row)
+    return headline, summary_rows, point_rows
+
+
+SUMMARY_HEADER = ["Metric", "Points", "Baseline", "Candidate", "Change", "Regressed"]
+POINT_HEADER = ["Point"] + list(METRICS) + ["Status"]
+
+
+def render_markdown(title, headline, summary_rows, point_rows):
+    def table(header, rows):
+        lines = ["| " + " | ".join(header) + " |",
+                 "|" + "|".join("---" for _ in header) + "|"]
+        lines += ["| " + " | ".join(r) + " |" for r in rows]
+        return lines
+
+    out = ["# " + title, "", headline, ""]
+    out += table(SUMMARY_HEADER, summary_rows)
+    out.append("")
+    if point_rows:
+        out += table(POINT_HEADER, point_rows)
+    else:
+        out.append("No regressions.")
+    return "\n".join(out) + "\n"
+
+
+def render_html(title, headline, summary_rows, point_rows):
+    def table(header, rows):
+        cells = ["<table>", "<tr>" + "".join("<th>{}</th>".format(html.escape(h)) for h in header) + "</tr>"]
+        for r in rows:
+            cls = ' class="bad"' if r[-1] not in ("ok", "0") else ""
+            cells.append("<tr{}>".format(cls) + "".join("<td>{}</td>".format(html.escape(c)) for c in r) + "</tr>")
+        cells.append("</table>")
+        return cells
+
+    out = [
+        "<!DOCTYPE html>", "<html><head><meta charset=\"utf-8\">",
+        "<title>{}</title>".format(html.escape(title)),
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin:1em 0}"
+        "td,th{border:1px solid #ccc;padding:2px 6px;font-size:90%}tr.bad{background:#fdd}</style>",
+        "</head><body>",
+        "<h1>{}</h1>".format(html.escape(title)),
+        "<p>{}</p>".format(html.escape(headline)),
+    ]
+    out += table(SUMMARY_HEADER, summary_rows)
+    out += table(POINT_HEADER, point_rows) if point_rows else ["<p>No regressions.</p>"]
+    out.append("</body></html>")
+    return "\n".join(out) + "\n"
+
+
+def main():
+    args = parse_args()
+
+    try:
+        thresholds = {m: args.default_threshold for m in METRICS}
+        thresholds.update(parse_metric_values(args.threshold, "--threshold"))
+        abs_tols = dict(DEFAULT_ABS_TOL)
+        abs_tols.update(parse_metric_values(args.abs_tol, "--abs-tol"))
+    except ValueError as exc:
+        print("Error:", exc, file=sys.stderr)
+        return 2
+
+    for path in args.baseline + args.candidate:
+        if not Path(path).is_file():
+            print("Error: sweep CSV not found:", path, file=sys.stderr)
+            return 2
+
+    base = load_sweeps(args.baseline)
+    cand = load_sweeps(args.candidate)
+    if args.formats:
+        keep = {f.upper() for f in args.formats}
+        base = {k: v for k, v in base.items() if k[0] in keep}
+        cand = {k: v for k, v in cand.items() if k[0] in keep}
+
+    joined = []
+    for key in sorted(set(base) & set(cand)):
+        res = compare_point(base[key], cand[key], thresholds, abs_tols)
+        joined.append((key, res, new_failure(base[key], cand[key])))
+    only_base = sorted(set(base) - set(cand))
+    only_cand = sorted(set(cand) - set(base))
+
+    if not joined:
+        print("Error: no (Format, M, N, K) points in common.", file=sys.stderr)
+        return 2
+
+    summary = summarize(joined)
+    headline, summary_rows, point_rows = build_tables(joined, summary, only_base, only_cand, args.show_all)
+
+    print(headline)
+    for row in summary_rows:
+        print("  {:<24} points={:<4} base={:<10} cand={:<10} change={:<9} regressed={}".format(*row))
+    for row in point_rows:
+        if row[-1] != "ok":
+            print("  REGRESSION {}: {}".format(row[0], row[-1]))
+
+    if args.report:
+        report_format = args.report_format
+        if report_format is None:
+            report_format = "html" if args.report.lower().endswith((".html", ".htm")) else "md"
+        title = "Sweep comparison: {} vs {}".format(
+            ", ".join(Path(p).name for p in args.candidate),
+            ", ".join(Path(p).name for p in args.baseline))
+        render = render_html if report_format == "html" else render_markdown
+        Path(args.report).write_text(render(title, headline, summary_rows, point_rows))
+        print("Report written to", args.report)
+
+    regressed = any(j[2] or any(r["regressed"] for r in j[1].values()) for j in joined)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 """Compare hardware Z store output (muxed stream) against golden_mx."""
-import re, sys
+import os, re, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'common'))
+from dump_archive import open_dump
 
 def read_fp8_outputs(path):
     """Read mx_encoder_fp8_outputs.txt — each line is 32 FP8 bytes as hex string."""
     all_bytes = []
-    with open(path) as f:
+    with open_dump(path) as f:
         for line in f:
             hex_str = line.strip()
             for i in range(0, len(hex_str), 2):
@@ -4,7 +4,10 @@ import sys, re, os
 import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'MX'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'common'))
 from mx_fp_golden import mxfp8_decode_bits, encode_block_fp16_to_mx
+from dump_archive import open_dump
+from redmule_fma import matrix_multiply_hw_order
 
 def parse_c_header_array(fn):
     with open(fn) as f:
@@ -30,6 +33,7 @@ def encode_decode_mx(fp16_vals, bs=32):
 M, N, K = 96, 96, 96
 MX_BLOCK = 32
 ARRAY_WIDTH = 32
+ARRAY_HEIGHT = 32
 TILE = 64
 
 # Load and quantize
@@ -45,20 +49,14 @@ W = np.array([fp16_to_float(b) for b in w_q[:N*K]], dtype=np.float16).reshape(N,
 Y = np.array([fp16_to_float(b) for b in y_fp16[:M*K]], dtype=np.float16).reshape(M, K)
 
 def gemm_fp16_range(X, W, Y, n_start, n_end, accumulate_y=True):
-    """Compute GEMM over N-range [n_start, n_end) with FP16 accumulation."""
-    Z = np.zeros((M, K), dtype=np.float64)
-    for m in range(M):
-        for k in range(K):
-            acc = float(np.float16(Y[m, k])) if accumulate_y else 0.0
-            for n in range(n_start, n_end):
-                acc = float(np.float16(float(np.float16(X[m, n]) * np.float16(W[n, k])) + np.float16(acc)))
-            Z[m, k] = acc
-    return Z.astype(np.float16)
+    """Compute GEMM over N-range [n_start, n_end) in engine accumulation order."""
+    Y0 = Y if accumulate_y else np.zeros_like(Y)
+    return matrix_multiply_hw_order(X[:, n_start:n_end], W[n_start:n_end, :], Y0, ARRAY_HEIGHT)
 
 # Read RTL encoder FP16 data
 def read_encoder_fp16(fn):
     values = []
-    with open(fn) as f:
+    with open_dump(fn) as f:
         for line in f:
             line = line.strip()
             if not line: continue
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""Sidecar byte-offset index for simulation dumps and trace CSVs.
+
+The testbench dumps (engine_*_inputs.txt, *_trace.csv, ...) grow to hundreds
+of MB for large runs. Debug scripts usually need a small window of them, for
+example the X line at the end of each pass or cycles 10_000..10_500. Reading
+the whole file from the start for that is slow.
+
+An index is stored next to the dump as <dump>.idx.npz. It is built in one
+streaming pass and holds, for every STRIDE-th row, the byte offset of the row
+and its key values:
+
+    row        data row number (0-based, header excluded); for the .txt
+               dumps this is the line_idx the testbench counts
+    time       $time column of trace CSVs
+    line_idx   line_idx column (z_src_line_idx in engine_boundary_trace.csv)
+    cycle_idx  cycle_idx column (engine_compute_trace.csv)
+
+Trace CSVs with an `event` column (z_path_trace, engine_ingress_ctrl_trace,
+engine_feed_trace) interleave several counters. Their keys are also indexed
+per event, e.g. key "line_idx" with event "XBUFQ". A lookup is a binary search
+over the sampled keys (np.searchsorted) followed by a scan of at most STRIDE
+rows, so it costs O(log n + STRIDE). Only keys that never decrease (per event)
+can be searched. Indexes whose dump changed size or mtime are rebuilt on load.
+
+Library use:
+    from dump_index import IndexedLines, load_index
+    idx = load_index("target/sim/vsim/engine_compute_trace.csv")
+    for line in idx.window("cycle_idx", 10_000, 10_500):
+        ...
+    x_lines = IndexedLines("target/sim/vsim/engine_x_inputs.txt",
+                           parse=lambda s: [int(v, 16) for v in s.split()])
+    x_lines[4095]    # seeks instead of reading lines 0..4094
+
+CLI:
+    python3 scripts/dump_index.py build --suffix mx96
+    python3 scripts/dump_index.py show target/sim/vsim/z_path_trace.csv \\
+        --key line_idx --event ZSRC --from 100 --to 120
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections.abc import Sequence
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "golden-model", "common"))
+
+from dump_archive import open_dump
+from rename_dump import DEFAULT_GLOBS
+
+
+INDEX_SUFFIX = ".idx.npz"
+INDEX_VERSION = 1
+DEFAULT_STRIDE = 64
+
+# Header names indexed under each key
+KEY_COLUMNS = {
+    "time": ["time"],
+    "line_idx": ["line_idx", "z_src_line_idx"],
+    "cycle_idx": ["cycle_idx"],
+}
+ALL_GROUPS = ""
+
+
+def index_path(path):
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _stamp(path):
+    st = Path(path).stat()
+    return st.st_size, st.st_mtime_ns
+
+
+class _Sampler:
+    """Collects every stride-th row of one group and tracks key monotonicity."""
+
+    def __init__(self, keys, stride):
+        self.keys = keys
+        self.stride = stride
+        self.count = 0
+        self.offsets = []
+        self.samples = {k: [] for k in keys}
+        self.last = {}
+        self.monotone = {k: True for k in keys}
+
+    def add(self, offset, values):
+        for k, v in values.items():
+            if v is None:
+                continue
+            prev = self.last.get(k)
+            if prev is not None and v < prev:
+                self.monotone[k] = False
+            self.last[k] = v
+        if self.count % self.stride == 0:
+            self.offsets.append(offset)
+            # Rows with an unparsable key reuse the previous value so the
+            # samples stay sorted.
+            for k in self.keys:
+                self.samples[k].append(self.last.get(k, -1))
+        self.count += 1
+
+
+def _parse_int(text):
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def build_index(path, stride=DEFAULT_STRIDE):
+    """Scan a dump once and write its sidecar index. Returns the DumpIndex."""
+    path = Path(path)
+    size, mtime = _stamp(path)
+    is_csv = path.suffix == ".csv"
+
+    header = []
+    key_cols = {}
+    event_col = None
+    groups = {}
+
+    with open(path, "rb") as f:
+        offset = 0
+        if is_csv:
+            first = f.readline()
+            offset += len(first)
+            header = first.decode(errors="replace").strip().split(",")
+            for key, names in KEY_COLUMNS.items():
+                for name in names:
+                    if name in header:
+                        key_cols[key] = header.index(name)
+                        break
+            if "event" in header:
+                event_col = header.index("event")
+        keys = ["row"] + list(key_cols)
+        groups[ALL_GROUPS] = _Sampler(keys, stride)
+
+        row = 0
+        for raw in f:
+            values = {"row": row}
+            if key_cols:
+                fields = raw.decode(errors="replace").rstrip("\r\n").split(",")
+                for key, col in key_cols.items():
+                    values[key] = _parse_int(fields[col]) if col < len(fields) else None
+                if event_col is not None and event_col < len(fields):
+                    event = fields[event_col]
+                    if event not in groups:
+                        groups[event] = _Sampler(keys, stride)
+                    groups[event].add(offset, values)
+            groups[ALL_GROUPS].add(offset, values)
+            offset += len(raw)
+            row += 1
+
+    arrays = {}
+    meta = {
+        "version": INDEX_VERSION,
+        "size": size,
+        "mtime_ns": mtime,
+        "stride": stride,
+        "rows": row,
+        "header": header,
+        "groups": {},
+    }
+    for g, (name, sampler) in enumerate(groups.items()):
+        arrays["g{}_offset".format(g)] = np.asarray(sampler.offsets, dtype=np.int64)
+        for k in sampler.keys:
+            arrays["g{}_{}".format(g, k)] = np.asarray(sampler.samples[k], dtype=np.int64)
+        meta["groups"][name] = {
+            "id": g,
+            "rows": sampler.count,
+            "monotone": [k for k in sampler.keys if sampler.monotone[k]],
+        }
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+
+    out = index_path(path)
+    with open(out, "wb") as f:
+        np.savez(f, **arrays)
+    return DumpIndex(path, meta, arrays)
+
+
+def load_index(path, rebuild=True, stride=DEFAULT_STRIDE):
+    """Load the index of a dump, (re)building it if missing or stale."""
+    path = Path(path)
+    idx_file = index_path(path)
+    if idx_file.exists():
+        with np.load(idx_file) as data:
+            arrays = {k: data[k] for k in data.files}
+        meta = json.loads(arrays["meta"].tobytes().decode())
+        if (meta.get("version") == INDEX_VERSION
+                and (meta["size"], meta["mtime_ns"]) == _stamp(path)):
+            return DumpIndex(path, meta, arrays)
+        if not rebuild:
+            raise ValueError("{} is stale".format(idx_file))
+    elif not rebuild:
+        raise ValueError("{} not found".format(idx_file))
+    return build_index(path, stride)
+
+
+class DumpIndex:
+    """Random access into one dump through its sidecar index."""
+
+    def __init__(self, path, meta, arrays):
+        self.path = Path(path)
+        self.meta = meta
+        self.arrays = arrays
+        self.header = meta["header"]
+        self.rows = meta["rows"]
+        self.stride = meta["stride"]
+        cols = {}
+        for key, names in KEY_COLUMNS.items():
+            for name in names:
+                if name in self.header:
+                    cols[key] = self.header.index(name)
+                    break
+        self.key_cols = cols
+        self.event_col = self.header.index("event") if "event" in self.header else None
+
+    def _group(self, event):
+        name = ALL_GROUPS if event is None else event
+        if name not in self.meta["groups"]:
+            raise ValueError("{}: no event {!r}".format(self.path.name, event))
+        return self.meta["groups"][name]
+
+    def events(self):
+        return [g for g in self.meta["groups"] if g != ALL_GROUPS]
+
+    def seek(self, key, value, event=None):
+        """(byte offset, row) of a sampled row at or before the first row with key >= value."""
+        group = self._group(event)
+        if key not in group["monotone"]:
+            raise ValueError("{}: key {!r} is not monotone{}".format(
+                self.path.name, key, "" if event is None else " for event " + event))
+        g = group["id"]
+        samples = self.arrays["g{}_{}".format(g, key)]
+        offsets = self.arrays["g{}_offset".format(g)]
+        if not len(offsets):
+            return None, None
+        pos = max(int(np.searchsorted(samples, value, side="left")) - 1, 0)
+        rows = self.arrays["g{}_row".format(g)]
+        return int(offsets[pos]), int(rows[pos])
+
+    def window(self, key, lo, hi, event=None):
+        """Yield the text rows (without newline) whose key lies in [lo, hi]."""
+        offset, row = self.seek(key, lo, event)
+        if offset is None:
+            return
+        col = self.key_cols.get(key)
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                line = raw.decode(errors="replace").rstrip("\r\n")
+                fields = line.split(",") if (col is not None or event is not None) else None
+                current_row = row
+                row += 1
+                if event is not None and (self.event_col >= len(fields)
+                                          or fields[self.event_col] != event):
+                    continue
+                if key == "row":
+                    value = current_row
+                else:
+                    value = _parse_int(fields[col]) if col < len(fields) else None
+                    if value is None:
+                        continue
+                if value < lo:
+                    continue
+                if value > hi:
+                    break
+                yield line
+
+    def line(self, row):
+        """Text of data row `row`."""
+        for line in self.window("row", row, row):
+            return line
+        raise IndexError(row)
+
+
+class IndexedLines(Sequence):
+    """Read-only list view of a dump's data rows, backed by its index.
+
+    Dumps that only exist inside a run bundle (scripts/archive_run.py) cannot
+    be seeked by byte offset; they are read once into memory instead.
+    """
+
+    def __init__(self, path, parse=None, cache_size=256):
+        self.parse = parse if parse is not None else (lambda s: s)
+        if Path(path).is_file():
+            self.index = load_index(path)
+            self.lines = None
+        else:
+            self.index = None
+            with open_dump(path) as f:
+                self.lines = [line.rstrip("\r\n") for line in f]
+        self._get = lru_cache(maxsize=cache_size)(self._load)
+
+    def _load(self, i):
+        if self.lines is not None:
+            return self.parse(self.lines[i])
+        return self.parse(self.index.line(i))
+
+    def __len__(self):
+        return len(self.lines) if self.lines is not None else self.index.rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._get(i)
+
+
+def run_dumps(root, suffix):
+    """Dump files of one run (rename_dump.py naming)."""
+    out = []
+    for name in DEFAULT_GLOBS:
+        p = Path(name)
+        if suffix:
+            name = (p.stem + "_" + suffix + p.suffix) if p.suffix else name + "_" + suffix
+        path = root / name
+        if path.exists() and p.name != "transcript":
+            out.append(path)
+    return out
+
+
+def cmd_build(args):
+    root = Path(args.dir)
+    paths = [Path(p) for p in args.files] if args.files else []
+    for suffix in args.suffix:
+        if not args.files:
+            paths.extend(run_dumps(root, suffix))
+    if not paths:
+        print("Error: no dumps found", file=sys.stderr)
+        return 1
+    for path in paths:
+        idx = build_index(path, args.stride)
+        groups = idx.events()
+        print("{}: {} rows{}".format(path.name, idx.rows,
+                                     ", events " + " ".join(groups) if groups else ""))
+    return 0
+
+
+def cmd_show(args):
+    idx = load_index(args.file, stride=args.stride)
+    hi = args.to if args.to is not None else args.from_
+    try:
+        lines = idx.window(args.key, args.from_, hi, args.event)
+        if idx.header:
+            print(",".join(idx.header))
+        for line in lines:
+            print(line)
+    except ValueError as exc:
+        print("Error:", exc, file=sys.stderr)
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query sidecar indexes of simulation dumps.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_build = sub.add_parser("build", help="Index every dump of a run (or the given files)")
+    p_build.add_argument("files", nargs="*", help="Dump files to index (default: all dumps of --suffix)")
+    p_build.add_argument(
+        "--dir",
+        default="target/sim/vsim",
+        help="Directory containing run dump files (default: target/sim/vsim).",
+    )
+    p_build.add_argument(
+        "--suffix",
+        nargs="+",
+        default=[""],
+        help="Run suffix(es) as given to rename_dump.py (default: unsuffixed latest run).",
+    )
+    p_build.add_argument("--stride", type=int, default=DEFAULT_STRIDE,
+                         help="Rows between index samples (default: {}).".format(DEFAULT_STRIDE))
+
+    p_show = sub.add_parser("show", help="Print the rows of a dump whose key lies in a window")
+    p_show.add_argument("file", help="Dump file")
+    p_show.add_argument("--key", default="row", choices=["row"] + list(KEY_COLUMNS),
+                        help="Key to search on (default: row)")
+    p_show.add_argument("--event", help="Restrict to one event type (trace CSVs with an event column)")
+    p_show.add_argument("--from", dest="from_", type=int, required=True, help="First key value")
+    p_show.add_argument("--to", type=int, help="Last key value (default: --from)")
+    p_show.add_argument("--stride", type=int, default=DEFAULT_STRIDE,
+                        help="Stride used if the index has to be built (default: {}).".format(DEFAULT_STRIDE))
+
+    args = parser.parse_args()
+    if args.cmd == "build":
+        return cmd_build(args)
+    return cmd_show(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
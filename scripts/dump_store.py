@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""Deduplicate run artifacts in a content-addressed store.
+
+Each sweep point leaves its own suffixed copy of every dump, although many
+are byte-identical across runs and formats (the baseline engine_x_inputs.txt,
+x_input.h, stim_instr.txt, ...). `add` moves a run's dumps (rename_dump.py
+naming, plus any --include files) into <dir>/.dump_store. Every distinct
+content is stored once, under its SHA-256, and the run gets a manifest that
+maps file names to hashes. The manifest also records M/N/K, format, the RTL
+hash and the transcript metrics, as archive_run.py does.
+
+Suffixed names keep working: dump_archive.open_dump() (used by
+check_engine_vs_golden.py and the scripts/ dump readers) falls back to the
+store when e.g. target/sim/vsim/engine_x_inputs_mx96.txt is gone, and the
+--all-suffixes discovery of the trace analyzers lists stored runs.
+`checkout` puts real files back (hard links to the read-only blobs when the
+filesystem allows). `rm` drops a manifest, and `gc` deletes the blobs no
+manifest references any more.
+
+Usage:
+    python3 scripts/dump_store.py add --suffix mx96 base96 --include sw/inc/*.h sw/build/stim_instr.txt
+    python3 scripts/dump_store.py ls
+    python3 scripts/dump_store.py checkout mx96 --to /tmp/mx96
+    python3 scripts/dump_store.py rm base96 && python3 scripts/dump_store.py gc
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "golden-model", "common"))
+
+from archive_run import REPO_ROOT, parse_metrics, read_tensor_dims, run_files
+from blob_store import BlobStore, default_store
+from rtl_params import rtl_hash
+
+
+def open_store(args):
+    return BlobStore(args.store or default_store(args.dir))
+
+
+def fmt_mb(n):
+    return "{:.1f} MB".format(n / 1e6)
+
+
+def store_run(store, root, suffix, config=None, extras=None, keep=False):
+    """Add the dumps of run `suffix` in root (plus {name: path} extras) to the
+    store and delete the dumps unless `keep`. Returns False if there were none."""
+    files = run_files(Path(root), suffix)
+    if not files:
+        return False
+    extras = {name: Path(p) for name, p in (extras or {}).items()}
+    dims = read_tensor_dims(REPO_ROOT / "sw" / "inc" / "tensor_dim.h")
+    config = dict(config or {})
+    for dim in "MNK":
+        if config.get(dim) is None:
+            config[dim] = dims.get(dim)
+    meta = {
+        "config": config,
+        "rtl_hash": rtl_hash(),
+        "metrics": parse_metrics(files.get("transcript")),
+    }
+    _, added = store.add_run(suffix, {**extras, **files}, meta)
+    logical = sum(p.stat().st_size for p in list(files.values()) + list(extras.values()))
+    print("STORED: run {} ({} files, {}, {} new)".format(
+        suffix or "(latest)", len(files) + len(extras), fmt_mb(logical), fmt_mb(added)))
+    if not keep:
+        for path in files.values():
+            path.unlink()
+    return True
+
+
+def cmd_add(args):
+    store = open_store(args)
+    extras = {}
+    for path in args.include or []:
+        p = Path(path)
+        if not p.is_file():
+            print("Error: --include file not found: {}".format(p), file=sys.stderr)
+            return 2
+        extras[p.name] = p
+    config = {"M": args.M, "N": args.N, "K": args.K, "format": args.format}
+    status = 0
+    for suffix in args.suffix:
+        if store.read_run(suffix) is not None and not args.overwrite:
+            print("SKIP (exists): run {}".format(suffix or "(latest)"))
+            continue
+        if not store_run(store, args.dir, suffix, config, extras, args.keep):
+            print("Error: no dumps for run {!r} in {}".format(suffix, args.dir), file=sys.stderr)
+            status = 1
+    s = store.stats()
+    print("Store {}: {} runs, {} blobs, {} stored for {} of artifacts".format(
+        store.root, s["runs"], s["blobs"], fmt_mb(s["stored_bytes"]), fmt_mb(s["logical_bytes"])))
+    return status
+
+
+def cmd_ls(args):
+    store = open_store(args)
+    runs = store.runs()
+    if not runs:
+        print("No runs in {}".format(store.root))
+        return 1
+    for suffix in runs:
+        m = store.read_run(suffix)
+        if args.json:
+            print(json.dumps(m, sort_keys=True))
+            continue
+        cfg = m.get("config", {})
+        print("{}: {}x{}x{} {} rtl={} Total_Cyc={} {} ({} files)".format(
+            suffix, cfg.get("M"), cfg.get("N"), cfg.get("K"), cfg.get("format"),
+            m.get("rtl_hash"), m.get("metrics", {}).get("Total_Cyc"),
+            m.get("metrics", {}).get("Result", ""), len(m.get("files", {}))))
+    if not args.json:
+        s = store.stats()
+        saved = s["logical_bytes"] - s["stored_bytes"]
+        print("{} blobs, {} stored for {} of artifacts ({} deduplicated)".format(
+            s["blobs"], fmt_mb(s["stored_bytes"]), fmt_mb(s["logical_bytes"]), fmt_mb(saved)))
+    return 0
+
+
+def cmd_checkout(args):
+    store = open_store(args)
+    status = 0
+    for suffix in args.suffix:
+        try:
+            written = store.checkout(suffix, args.to or args.dir, canonical=args.canonical,
+                                     link=not args.copy)
+        except KeyError:
+            print("Error: no run {!r} in {}".format(suffix, store.root), file=sys.stderr)
+            status = 1
+            continue
+        for path in written:
+            print("CHECKED OUT: {}".format(path))
+    return status
+
+
+def cmd_rm(args):
+    store = open_store(args)
+    status = 0
+    for suffix in args.suffix:
+        if store.remove_run(suffix):
+            print("REMOVED: run {}".format(suffix))
+        else:
+            print("Error: no run {!r} in {}".format(suffix, store.root), file=sys.stderr)
+            status = 1
+    return status
+
+
+def cmd_gc(args):
+    store = open_store(args)
+    count, freed = store.gc(dry_run=args.dry_run)
+    print("{}{} unreferenced blobs, {}".format(
+        "DRY-RUN: " if args.dry_run else "Deleted ", count, fmt_mb(freed)))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed dedup store for simulation run artifacts.")
+    parser.add_argument(
+        "--dir",
+        default="target/sim/vsim",
+        help="Directory containing run dump files (default: target/sim/vsim).",
+    )
+    parser.add_argument("--store", help="Store directory (default: <dir>/.dump_store)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_add = sub.add_parser("add", help="Move one or more runs into the store")
+    p_add.add_argument(
+        "--suffix",
+        nargs="+",
+        default=[""],
+        help="Run suffix(es) as given to rename_dump.py (default: unsuffixed latest run).",
+    )
+    p_add.add_argument("--include", nargs="+",
+                       help="Extra files stored with every run under their base name "
+                            "(headers, stim_instr.txt, ...). They are never deleted.")
+    p_add.add_argument("-M", type=int, help="M recorded in the manifest (default: sw/inc/tensor_dim.h)")
+    p_add.add_argument("-N", type=int, help="N recorded in the manifest (default: sw/inc/tensor_dim.h)")
+    p_add.add_argument("-K", type=int, help="K recorded in the manifest (default: sw/inc/tensor_dim.h)")
+    p_add.add_argument("--format", default=None, help="Format recorded in the manifest (fp16, e4m3, ...)")
+    p_add.add_argument("--keep", action="store_true", help="Keep the original dumps")
+    p_add.add_argument("--overwrite", action="store_true", help="Replace existing run manifests")
+
+    p_ls = sub.add_parser("ls", help="List stored runs and dedup statistics")
+    p_ls.add_argument("--json", action="store_true", help="One JSON manifest per line")
+
+    p_co = sub.add_parser("checkout", help="Write a run's files back out")
+    p_co.add_argument("suffix", nargs="+", help="Run suffix(es)")
+    p_co.add_argument("--to", help="Destination directory (default: --dir)")
+    p_co.add_argument("--canonical", action="store_true",
+                      help="Use unsuffixed names instead of the original file names")
+    p_co.add_argument("--copy", action="store_true", help="Copy instead of hard-linking")
+
+    p_rm = sub.add_parser("rm", help="Drop run manifests (blobs are freed by gc)")
+    p_rm.add_argument("suffix", nargs="+", help="Run suffix(es)")
+
+    p_gc = sub.add_parser("gc", help="Delete blobs no run references")
+    p_gc.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+
+    args = parser.parse_args()
+    return {
+        "add": cmd_add,
+        "ls": cmd_ls,
+        "checkout": cmd_checkout,
+        "rm": cmd_rm,
+        "gc": cmd_gc,
+    }[args.cmd](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,9 @@ import sys, re, os
 import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'MX'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'common'))
 from mx_fp_golden import mxfp8_decode_bits, encode_block_fp16_to_mx
+from dump_archive import open_dump
 
 def parse_c_header_array(filename):
     with open(filename, 'r') as f:
@@ -69,7 +71,7 @@ print(f"Z reference: {len(z_bits)} FP16 values")
 # Now read RTL encoder inputs
 def read_encoder_fp16_inputs(filename):
     values = []
-    with open(filename, 'r') as f:
+    with open_dump(filename, 'r') as f:
         for line in f:
             line = line.strip()
             if not line: continue
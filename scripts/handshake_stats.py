@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Throughput and backpressure of the MX ingress valid/ready stages.
+
+Analyses the six handshakes of the MX input path, per operand chain
+
+    streamer -> {x,w}_packed -> {x,w}_mux -> {x,w}_fifo -> engine
+
+The W chain is read from w_path_cycle_trace.csv (redmule_tb.sv), which has
+one row per clock while MX is enabled, so its statistics are cycle-exact.
+There is no per-cycle trace of the X chain: it is read from
+engine_ingress_ctrl_trace.csv, which is only sampled on every X/W buffer
+read (XBUFQ/WBUFQ rows). Each sample is held until the next distinct
+timestamp, so a sample weighs (t_next - t) / clock period cycles and the X
+figures are approximate. Runs without a W-path trace fall back to the
+sampled ingress trace for W as well. Per stage this gives:
+
+    throughput    transfer cycles (valid & ready) / window cycles
+    occupancy     valid cycles / window cycles
+    backpressure  cycles with valid & !ready, and the longest such run
+    starved       cycles with ready & !valid
+
+The bottleneck of a chain is the consumer of the most downstream stage that
+is backpressured at least as often as it is starved. If every stage is
+mostly starved, the streamer is the bottleneck.
+
+`diff` compares two sets of runs (e.g. the fifo-swap and pipelined sweep
+dumps) and flags every stage whose throughput dropped by more than
+--threshold percent. It exits with 1 if any stage got slower, like
+compare_sweeps.py.
+
+Usage:
+    python3 scripts/handshake_stats.py run --suffix mx96 mx128
+    python3 scripts/handshake_stats.py diff --baseline-dir dumps/fifo_swap \\
+        --candidate-dir dumps/pipelined --all-suffixes --threshold 2
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from stall_breakdown import discover_suffixes, load_trace, trace_path
+
+
+INGRESS_TRACE = "engine_ingress_ctrl_trace"
+W_PATH_TRACE = "w_path_cycle_trace"
+
+CHAINS = {
+    "x": ["x_packed", "x_mux", "x_fifo"],
+    "w": ["w_packed", "w_mux", "w_fifo"],
+}
+STAGES = CHAINS["x"] + CHAINS["w"]
+
+
+def longest_run(mask, weights):
+    """Largest weighted sum over a run of consecutive True samples."""
+    if not mask.any():
+        return 0
+    m = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(m))
+    starts, ends = edges[0::2], edges[1::2]
+    csum = np.concatenate(([0], np.cumsum(weights)))
+    return int((csum[ends] - csum[starts]).max())
+
+
+def handshake_stats(signals, weights):
+    """Metrics of one stage from per-sample valid/ready and cycle weights."""
+    valid, ready = signals
+    window = int(weights.sum())
+    fire = valid & ready
+    bp = valid & ~ready
+    return {
+        "throughput": float(weights[fire].sum()) / window,
+        "occupancy": float(weights[valid].sum()) / window,
+        "backpressure": int(weights[bp].sum()),
+        "max_bp_run": longest_run(bp, weights),
+        "starved": int(weights[ready & ~valid].sum()),
+    }
+
+
+def sampled_stats(trace, stages, clock_period):
+    """Per-stage metrics from the event-sampled ingress trace (sample-and-hold)."""
+    t = trace["time"]
+    if not len(t):
+        raise ValueError("ingress trace is empty")
+    # XBUFQ and WBUFQ rows can share a timestamp: keep the last sample.
+    last = np.concatenate((t[1:] != t[:-1], [True]))
+    weights = np.append(np.diff(t[last]) // clock_period, 1)
+    stats = {}
+    for stage in stages:
+        signals = (trace[stage + "_valid"][last].astype(bool),
+                   trace[stage + "_ready"][last].astype(bool))
+        stats[stage] = handshake_stats(signals, weights)
+    return stats, int(weights.sum())
+
+
+def cycle_stats(trace, stages):
+    """Per-stage metrics from the per-cycle W-path trace (one row per clock)."""
+    if not len(trace["time"]):
+        raise ValueError("W-path trace is empty")
+    weights = np.ones(len(trace["time"]), dtype=np.int64)
+    stats = {}
+    for stage in stages:
+        # w_path_cycle_trace.csv names the handshakes <stage>_v / <stage>_r
+        signals = (trace[stage + "_v"].astype(bool), trace[stage + "_r"].astype(bool))
+        stats[stage] = handshake_stats(signals, weights)
+    return stats, int(weights.sum())
+
+
+def bottleneck(stats, chain):
+    consumers = CHAINS[chain][1:] + ["engine"]
+    for stage, consumer in reversed(list(zip(CHAINS[chain], consumers))):
+        s = stats[stage]
+        if s["backpressure"] and s["backpressure"] >= s["starved"]:
+            return consumer
+    return "streamer"
+
+
+def load_run(root, suffix, clock_period):
+    """Stage metrics of one run and {chain: (window cycles, source)}."""
+    path = trace_path(root, INGRESS_TRACE, suffix)
+    columns = ["time"] + [s + sfx for s in STAGES for sfx in ("_valid", "_ready")]
+    ingress = load_trace(path, columns)
+    if ingress is None:
+        raise ValueError("{} not found".format(path))
+    stats, window = sampled_stats(ingress, CHAINS["x"], clock_period)
+    windows = {"x": (window, "sampled")}
+
+    w_path = load_trace(trace_path(root, W_PATH_TRACE, suffix),
+                        ["time"] + [s + sfx for s in CHAINS["w"] for sfx in ("_v", "_r")])
+    if w_path is not None:
+        w_stats, window = cycle_stats(w_path, CHAINS["w"])
+        windows["w"] = (window, "per-cycle trace")
+    else:
+        w_stats, window = sampled_stats(ingress, CHAINS["w"], clock_period)
+        windows["w"] = (window, "sampled")
+    stats.update(w_stats)
+    return stats, windows
+
+
+def print_run(label, stats, windows):
+    print("Run {}: X {} cycles ({}), W {} cycles ({})".format(
+        label, windows["x"][0], windows["x"][1], windows["w"][0], windows["w"][1]))
+    print("  {:<10} {:>10} {:>10} {:>12} {:>10} {:>10}".format(
+        "stage", "thruput", "occupancy", "backpressure", "max_bp", "starved"))
+    for stage in STAGES:
+        s = stats[stage]
+        print("  {:<10} {:>10.3f} {:>10.3f} {:>12} {:>10} {:>10}".format(
+            stage, s["throughput"], s["occupancy"], s["backpressure"],
+            s["max_bp_run"], s["starved"]))
+    print("  bottleneck: X -> {}, W -> {}".format(bottleneck(stats, "x"), bottleneck(stats, "w")))
+    print()
+
+
+def cmd_run(args):
+    root = Path(args.dir)
+    suffixes = discover_suffixes(root, [INGRESS_TRACE]) if args.all_suffixes else args.suffix
+    failed = 0
+    for suffix in suffixes:
+        try:
+            stats, windows = load_run(root, suffix, args.clock_period)
+        except ValueError as exc:
+            print("Error: run {}: {}".format(suffix or "(latest)", exc), file=sys.stderr)
+            failed += 1
+            continue
+        print_run(suffix or "(latest)", stats, windows)
+    return 1 if failed or not suffixes else 0
+
+
+def cmd_diff(args):
+    base_root = Path(args.baseline_dir)
+    cand_root = Path(args.candidate_dir)
+    if args.all_suffixes:
+        suffixes = sorted(set(discover_suffixes(base_root, [INGRESS_TRACE]))
+                          & set(discover_suffixes(cand_root, [INGRESS_TRACE])))
+    else:
+        suffixes = args.suffix
+    if not suffixes:
+        print("Error: no common runs", file=sys.stderr)
+        return 2
+
+    slower = []
+    for suffix in suffixes:
+        label = suffix or "(latest)"
+        try:
+            base, _ = load_run(base_root, suffix, args.clock_period)
+            cand, _ = load_run(cand_root, suffix, args.clock_period)
+        except ValueError as exc:
+            print("Error: run {}: {}".format(label, exc), file=sys.stderr)
+            return 2
+        print("Run {}: bottleneck X {} -> {}, W {} -> {}".format(
+            label, bottleneck(base, "x"), bottleneck(cand, "x"),
+            bottleneck(base, "w"), bottleneck(cand, "w")))
+        print("  {:<10} {:>10} {:>10} {:>9} {:>12} {:>12}".format(
+            "stage", "base", "cand", "delta%", "bp base", "bp cand"))
+        for stage in STAGES:
+            b, c = base[stage], cand[stage]
+            delta = (100.0 * (c["throughput"] - b["throughput"]) / b["throughput"]
+                     if b["throughput"] else 0.0)
+            flag = ""
+            if delta < -args.threshold:
+                flag = "  SLOWER"
+                slower.append((label, stage, delta))
+            print("  {:<10} {:>10.3f} {:>10.3f} {:>+9.2f} {:>12} {:>12}{}".format(
+                stage, b["throughput"], c["throughput"], delta,
+                b["backpressure"], c["backpressure"], flag))
+        print()
+
+    if slower:
+        print("{} stage(s) slower by more than {}%:".format(len(slower), args.threshold))
+        for label, stage, delta in sorted(slower, key=lambda s: s[2]):
+            print("  {:<16} {:<10} {:+.2f}%".format(label, stage, delta))
+        return 1
+    print("No stage slower by more than {}%.".format(args.threshold))
+    return 0
+
+
+def add_common(parser):
+    parser.add_argument(
+        "--suffix",
+        nargs="+",
+        default=[""],
+        help="Run suffix(es) as given to rename_dump.py (default: unsuffixed latest run).",
+    )
+    parser.add_argument(
+        "--all-suffixes",
+        action="store_true",
+        help="Analyze every renamed run found (diff: found in both directories).",
+    )
+    parser.add_argument(
+        "--clock-period",
+        type=int,
+        default=1000,
+        help="Clock period in trace time units (default: 1000, TCP=1ns at 1ps).",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Valid/ready throughput analysis of the MX ingress pipeline."
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="Per-stage statistics for one or more runs")
+    p_run.add_argument(
+        "--dir",
+        default="target/sim/vsim",
+        help="Directory containing run dump files (default: target/sim/vsim).",
+    )
+    add_common(p_run)
+
+    p_diff = sub.add_parser("diff", help="Compare stage throughput between two sets of runs")
+    p_diff.add_argument("--baseline-dir", required=True, help="Dump directory of the baseline RTL")
+    p_diff.add_argument("--candidate-dir", required=True, help="Dump directory of the candidate RTL")
+    p_diff.add_argument(
+        "--threshold",
+        type=float,
+        default=1.0,
+        help="Flag stages whose throughput drops by more than this percentage (default: 1.0).",
+    )
+    add_common(p_diff)
+
+    args = parser.parse_args()
+    if args.cmd == "run":
+        return cmd_run(args)
+    return cmd_diff(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Analytical RedMulE cycle model calibrated on sweep CSVs.
+
+Predicts Total_Cyc, W_Load_Cyc, W_Shift_Cyc, Ideal_Cyc and Stall_Cyc for a
+(Format, M, N, K) point without running vsim.
+
+The model has two parts:
+
+1. A first-principles tile-count model. The tiler walks ceil(M/tile_m)
+   M-tiles, ceil(N/tile_n) N-tiles (reduction) and ceil(K/tile_k) K-tiles,
+   with tile_m = ARRAY_WIDTH and tile_n = tile_k = ARRAY_HEIGHT*(PIPE_REGS+1)
+   taken from rtl/redmule_pkg.sv. Every (M-tile, K-tile) pair loads all N
+   W rows once (W_Load_Cyc), and every tile shifts its W rows through the
+   array and then its K columns out (W_Shift_Cyc ~ rows + cols per tile).
+   Total_Cyc is bounded below by the shift cycles.
+
+2. Linear correction terms fitted per format on the residual of the base
+   model, over tile-level features (constant, tiles, W rows streamed,
+   K columns streamed, X rows streamed). The corrections absorb control
+   overheads, exponent prefetch and stall behaviour that the base model
+   does not capture. They are calibrated at the geometry of the sweep, so
+   predictions for a different ARRAY_HEIGHT/PIPE_REGS only rescale the
+   tile counts.
+
+Usage:
+    # Fit on sweeps, report held-out error, save coefficients
+    python3 scripts/perf_model.py fit --sweep sweep_dual_thorough_*.csv \\
+        sweep_fp16_thorough_*.csv --holdout 0.25 --save perf_model.json
+
+    # Predict from saved coefficients
+    python3 scripts/perf_model.py predict --model perf_model.json \\
+        --format E4M3 -M 256 -N 128 -K 128
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from rtl_params import DEFAULT_PKG, array_geometry
+from sweep_csv import MX_FORMATS, format_key, load_sweeps
+
+
+METRICS = ["Total_Cyc", "W_Load_Cyc", "W_Shift_Cyc", "Ideal_Cyc", "Stall_Cyc"]
+FEATURES = ["const", "tiles", "w_rows", "k_cols", "x_rows"]
+
+# Pooled fallback groups used when a format has too few sweep points.
+POOLED_MX = "MX"
+POOLED_ALL = "ALL"
+
+RIDGE = 1e-6
+
+
+def tile_counts(M, N, K, geom):
+    """Tile-level quantities for one GEMM on the given geometry."""
+    mt = math.ceil(M / geom["tile_m"])
+    nt = math.ceil(N / geom["tile_n"])
+    kt = math.ceil(K / geom["tile_k"])
+    return {
+        "m_tiles": mt,
+        "n_tiles": nt,
+        "k_tiles": kt,
+        "tiles": mt * nt * kt,
+        # W rows streamed: all N rows once per (M-tile, K-tile) pair
+        "w_rows": mt * kt * N,
+        # K columns streamed: all K columns once per (M-tile, N-tile) pair
+        "k_cols": mt * nt * K,
+        # X rows streamed: all M rows once per (N-tile, K-tile) pair
+        "x_rows": nt * kt * M,
+    }
+
+
+def base_prediction(t):
+    """First-principles estimate for every metric."""
+    w_load = t["w_rows"]
+    w_shift = t["w_rows"] + t["k_cols"]
+    return {
+        "Total_Cyc": w_shift,
+        "W_Load_Cyc": w_load,
+        "W_Shift_Cyc": w_shift,
+        "Ideal_Cyc": 0,
+        "Stall_Cyc": 0,
+    }
+
+
+def feature_vector(t):
+    return [1.0] + [float(t[name]) for name in FEATURES[1:]]
+
+
+def group_for(fmt):
+    return POOLED_MX if fmt in MX_FORMATS else fmt
+
+
+def fit_coefficients(X, r):
+    """Ridge least squares on column-scaled features."""
+    scale = np.abs(X).max(axis=0)
+    scale[scale == 0] = 1.0
+    Xs = X / scale
+    A = Xs.T @ Xs + RIDGE * np.eye(Xs.shape[1])
+    b = np.linalg.solve(A, Xs.T @ r)
+    return (b / scale).tolist()
+
+
+class CycleModel:
+    """Base tile model plus per-format fitted corrections."""
+
+    def __init__(self, geom, coeffs=None):
+        self.geom = dict(geom)
+        # {group: {metric: [coef per feature]}}
+        self.coeffs = coeffs or {}
+
+    def fit(self, points):
+        """points: list of ((Format, M, N, K), row)."""
+        groups = {}
+        for key, row in points:
+            for g in {key[0], group_for(key[0]), POOLED_ALL}:
+                groups.setdefault(g, []).append((key, row))
+
+        self.coeffs = {}
+        for g, members in groups.items():
+            per_metric = {}
+            for metric in METRICS:
+                usable = [(k, r) for k, r in members if r.get(metric) is not None]
+                if len(usable) < len(FEATURES) + 2:
+                    continue
+                X = np.empty((len(usable), len(FEATURES)))
+                resid = np.empty(len(usable))
+                for i, (k, r) in enumerate(usable):
+                    t = tile_counts(k[1], k[2], k[3], self.geom)
+                    X[i] = feature_vector(t)
+                    resid[i] = r[metric] - base_prediction(t)[metric]
+                per_metric[metric] = fit_coefficients(X, resid)
+            if per_metric:
+                self.coeffs[g] = per_metric
+        return self
+
+    def _coeffs_for(self, fmt, metric):
+        for g in (fmt, group_for(fmt), POOLED_ALL):
+            if metric in self.coeffs.get(g, {}):
+                return self.coeffs[g][metric]
+        return None
+
+    def predict(self, fmt, M, N, K, geom=None, base_only=False):
+        t = tile_counts(M, N, K, geom or self.geom)
+        pred = base_prediction(t)
+        if base_only:
+            return pred
+        x = feature_vector(t)
+        for metric in METRICS:
+            c = self._coeffs_for(fmt, metric)
+            if c is not None:
+                pred[metric] += sum(ci * xi for ci, xi in zip(c, x))
+            pred[metric] = max(0.0, pred[metric])
+        return pred
+
+    def to_json(self):
+        return {"geometry": self.geom, "features": FEATURES, "coefficients": self.coeffs}
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get("features") != FEATURES:
+            raise ValueError("model file was saved with a different feature set")
+        return cls(data["geometry"], data["coefficients"])
+
+
+def split_holdout(points, fraction, seed):
+    """Hold out a fraction of the points of every format."""
+    rng = random.Random(seed)
+    by_fmt = {}
+    for p in points:
+        by_fmt.setdefault(p[0][0], []).append(p)
+    train, test = [], []
+    for fmt in sorted(by_fmt):
+        members = sorted(by_fmt[fmt], key=lambda p: p[0])
+        rng.shuffle(members)
+        n_test = int(round(len(members) * fraction))
+        test.extend(members[:n_test])
+        train.extend(members[n_test:])
+    return train, test
+
+
+def error_table(model, points, base_only=False):
+    """{fmt: {metric: (count, mae, mape, max_abs)}} over the given points."""
+    errs = {}
+    for key, row in points:
+        pred = model.predict(key[0], key[1], key[2], key[3], base_only=base_only)
+        for metric in METRICS:
+            if row.get(metric) is None:
+                continue
+            actual = row[metric]
+            diff = pred[metric] - actual
+            errs.setdefault(key[0], {}).setdefault(metric, []).append((diff, actual))
+    table = {}
+    for fmt, per_metric in errs.items():
+        table[fmt] = {}
+        for metric, vals in per_metric.items():
+            abs_err = [abs(d) for d, _ in vals]
+            pct_err = [100.0 * abs(d) / a for d, a in vals if a]
+            table[fmt][metric] = (
+                len(vals),
+                sum(abs_err) / len(abs_err),
+                (sum(pct_err) / len(pct_err)) if pct_err else None,
+                max(abs_err),
+            )
+    return table
+
+
+def print_error_table(title, table):
+    print(title)
+    print("  {:<6} {:<12} {:>5} {:>9} {:>8} {:>9}".format("Format", "Metric", "N", "MAE", "MAPE", "MaxAbs"))
+    for fmt in sorted(table):
+        for metric in METRICS:
+            if metric not in table[fmt]:
+                continue
+            n, mae, mape, mx = table[fmt][metric]
+            mape_s = "n/a" if mape is None else "{:.1f}%".format(mape)
+            print("  {:<6} {:<12} {:>5} {:>9.1f} {:>8} {:>9.1f}".format(fmt, metric, n, mae, mape_s, mx))
+
+
+def load_points(paths):
+    merged = load_sweeps(paths)
+    return [(k, r) for k, r in sorted(merged.items())
+            if r.get("Total_Cyc") is not None and (r.get("Errors") in (0, None))]
+
+
+def geometry_from_args(args):
+    return array_geometry(args.pkg, array_height=args.array_height,
+                          pipe_regs=args.pipe_regs, array_width=args.array_width)
+
+
+def cmd_fit(args):
+    points = load_points(args.sweep)
+    if not points:
+        print("Error: no usable sweep points in", ", ".join(args.sweep), file=sys.stderr)
+        return 2
+    geom = geometry_from_args(args)
+    print("Geometry: " + ", ".join("{}={}".format(k, v) for k, v in geom.items()))
+    print("Sweep points: {}".format(len(points)))
+
+    if args.holdout > 0:
+        train, test = split_holdout(points, args.holdout, args.seed)
+        model = CycleModel(geom).fit(train)
+        print("Held out {} of {} points (seed {})\n".format(len(test), len(points), args.seed))
+        print_error_table("Base tile model only (held-out points):", error_table(model, test, base_only=True))
+        print()
+        print_error_table("Base + fitted corrections (held-out points):", error_table(model, test))
+        if args.verbose:
+            print("\nHeld-out predictions:")
+            for key, row in test:
+                pred = model.predict(*key)
+                print("  {:<20} Total_Cyc pred={:8.0f} actual={}".format(
+                    format_key(key), pred["Total_Cyc"], row["Total_Cyc"]))
+        print()
+
+    model = CycleModel(geom).fit(points)
+    print_error_table("Base + fitted corrections (all points, in-sample):", error_table(model, points))
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(model.to_json(), indent=2) + "\n")
+        print("\nModel saved to", args.save)
+    return 0
+
+
+def cmd_predict(args):
+    if args.model:
+        model = CycleModel.from_json(json.loads(Path(args.model).read_text()))
+    elif args.sweep:
+        model = CycleModel(geometry_from_args(args)).fit(load_points(args.sweep))
+    else:
+        print("Error: predict needs --model or --sweep", file=sys.stderr)
+        return 2
+
+    geom = model.geom
+    if args.array_height is not None or args.pipe_regs is not None or args.array_width is not None:
+        geom = geometry_from_args(args)
+
+    fmt = args.format.upper()
+    for m in args.M:
+        for n in args.N:
+            for k in args.K:
+                pred = model.predict(fmt, m, n, k, geom=geom)
+                t = tile_counts(m, n, k, geom)
+                print("{:<20} tiles={:<4} ".format(format_key((fmt, m, n, k)), t["tiles"]) +
+                      " ".join("{}={:.0f}".format(metric, pred[metric]) for metric in METRICS))
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Analytical RedMulE cycle model fitted to sweep CSVs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_geometry(p):
+        p.add_argument("--pkg", default=str(DEFAULT_PKG), help="Path to redmule_pkg.sv")
+        p.add_argument("--array-height", type=int, help="Override ARRAY_HEIGHT")
+        p.add_argument("--pipe-regs", type=int, help="Override PIPE_REGS")
+        p.add_argument("--array-width", type=int, help="Override ARRAY_WIDTH (default: ARRAY_HEIGHT*PIPE_REGS)")
+
+    p_fit = sub.add_parser("fit", help="Fit corrections and report held-out prediction error")
+    p_fit.add_argument("--sweep", nargs="+", required=True, help="Sweep CSV(s) to calibrate on")
+    p_fit.add_argument("--holdout", type=float, default=0.25,
+                       help="Fraction of points per format held out for error reporting (default: 0.25)")
+    p_fit.add_argument("--seed", type=int, default=1, help="Holdout split seed (default: 1)")
+    p_fit.add_argument("--save", help="Write fitted model to this JSON file")
+    p_fit.add_argument("--verbose", action="store_true", help="List every held-out prediction")
+    add_geometry(p_fit)
+
+    p_pred = sub.add_parser("predict", help="Predict cycle counts for given dimensions")
+    p_pred.add_argument("--model", help="Model JSON written by 'fit --save'")
+    p_pred.add_argument("--sweep", nargs="+", help="Fit on these sweeps instead of loading --model")
+    p_pred.add_argument("--format", default="FP16", help="FP16 or an MX format (E4M3, E5M2, ...)")
+    p_pred.add_argument("-M", type=int, nargs="+", required=True)
+    p_pred.add_argument("-N", type=int, nargs="+", required=True)
+    p_pred.add_argument("-K", type=int, nargs="+", required=True)
+    add_geometry(p_pred)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "fit":
+        return cmd_fit(args)
+    return cmd_predict(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,61 +24,10 @@ fi
 
 if [[ "$Start" -eq 1 ]]; then
 
-  BASE_TIMEOUT=500
-
-  PARAMS=(
-      96 96 96
-      128 128 128
-      48 48 48
-      12 16 16
-      24 16 16
-      48 32 32
-      30 32 17
-      24 32 1
-      31 32 16
-      17 32 16
-      31 32 31
-      17 32 3
-      5  32 17
-      5  32 3
-      36 31 32
-      12 31 16
-      23 31 31
-      24 17 32
-      24 20 32
-      23 17 33
-      23 20 33
-      3  11 32
-      17 13 16
-      17 13 17
-  )
-
-  i=0
-  error=0
-
-  make hw-clean hw-build target=$Target 1>/dev/null 2>&1
-
-  while [[ $i -lt ${#PARAMS[@]} ]]
-  do
-      M=${PARAMS[$i]}
-      N=${PARAMS[$(( $i + 1 ))]}
-      K=${PARAMS[$(( $i + 2 ))]}
-
-      i=$(( $i + 3 ))
-
-      make golden M=$M N=$N K=$K 1>/dev/null 2>&1
-      make sw-clean sw-build 1>/dev/null 2>&1
-      timeout $BASE_TIMEOUT make hw-run target=$Target > $PWD/target/sim/$Target/transcript_${M}_${N}_${K}
-      if grep -rn "\[TB\] - Success!" "$PWD/target/sim/$Target/transcript_${M}_${N}_${K}" 1>/dev/null 2>&1; then
-          echo -e "${Green}OK  ${EndColor}: M=$M N=$N K=$K"
-      else
-          echo -e "${Red}ERROR ${EndColor}: M=$M N=$N K=$K"
-          ((error++))
-      fi
-  done
-
-  if [ "$error" -gt 0 ]; then
-    exit 1
-  fi
+  # The test points live in scripts/regression_list.txt; scripts/regression.py
+  # orders them longest-first from the runtime history, derives per-test
+  # timeouts from the expected cycle counts and writes JUnit XML plus the
+  # sweep CSV. Pass extra options through, e.g. --junit regress.xml --csv regress.csv.
+  exec python3 "$(dirname "$0")/regression.py" run --target "$Target" "$@"
 
 fi
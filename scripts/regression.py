@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+"""Sharded RedMulE regression runner.
+
+Reads (format, M, N, K) points from test list files (regression_list.txt
+format), puts them into a queue directory and lets any number of workers
+drain it. A worker is one repository checkout: it builds the RTL once, then
+claims jobs by renaming queue/pending/<job> to queue/running/ (atomic, so
+workers on several hosts can share the queue over a common filesystem) and
+runs golden, sw-build and hw-run for each. Checkouts never share sw/ or
+target/sim/, so run one worker per checkout (git worktree works).
+
+Jobs are queued longest-predicted-first (LPT, see sweep_schedule.py): the
+prediction comes from the runtime history (runtime_history.py, keyed by
+point and RTL hash, with per-format M*N*K fits for unseen sizes), or, with
+no history at all, from the cycle model's Total_Cyc (perf_model.py) at the
+default simulation rate plus a build overhead. `submit --workers N` shows
+the resulting plan and makespan. The hw-run timeout of each job is derived
+from the expected cycle count instead of one fixed value.
+
+A job whose worker died stays in running/ until a worker requeues it: before
+each claim, workers move back jobs whose worker process is gone (same host)
+or that overran their timeout by STALE_MARGIN_S (any host). `status` marks
+such jobs STALE and `--watch` stops once they are all that is left.
+
+Every result lands in queue/done/<job>.json and the worker appends it to
+the runtime history. Workers print a live ETA after every job, `status`
+shows it for the whole queue, and `report` collects the results into JUnit
+XML and the standard sweep CSV (sweep_csv.SWEEP_FIELDS) and prints the
+efficiency of the run (worker idle time, critical path).
+
+Usage:
+    # Everything in this checkout
+    python3 scripts/regression.py run --target vsim --junit regress.xml --csv regress.csv
+
+    # Shared queue: submit once, start workers in several checkouts/hosts
+    python3 scripts/regression.py submit --queue /shared/regress --list scripts/regression_list.txt
+    python3 scripts/regression.py worker --queue /shared/regress --target vsim
+    python3 scripts/regression.py status --queue /shared/regress --watch 60
+    python3 scripts/regression.py report --queue /shared/regress --junit regress.xml --csv regress.csv
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from perf_model import CycleModel
+from rtl_params import DEFAULT_RTL_DIR, array_geometry, rtl_hash
+from runtime_history import DEFAULT_HISTORY, RuntimeHistory, append_history
+from sweep_csv import ALL_FORMATS, SWEEP_FIELDS, normalize_format, parse_transcript, write_sweep
+from sweep_schedule import (estimate_finish, efficiency, format_duration, lpt_schedule,
+                            makespan_lower_bound, print_efficiency)
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_LIST = REPO_ROOT / "scripts" / "regression_list.txt"
+
+# Used until the history has runs to measure them from: a typical vsim rate
+# for the default array, so first-run timeouts stay in the right range.
+DEFAULT_CYCLES_PER_SECOND = 2000.0
+DEFAULT_OVERHEAD_S = 60.0
+# Time allowed on top of the hw-run timeout for golden and sw-build, before
+# a running job whose worker cannot be checked is taken as abandoned.
+STALE_MARGIN_S = 1800.0
+# A job that took down this many workers is recorded as lost, not requeued.
+MAX_REQUEUES = 2
+
+QUEUE_DIRS = ("pending", "running", "done", "logs")
+
+
+def read_test_list(path):
+    """[(FORMAT, M, N, K)] from one test list file."""
+    points = []
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) != 4:
+                raise ValueError("{}:{}: expected '<format> M N K'".format(path, lineno))
+            fmt = normalize_format(fields[0])
+            if fmt not in ALL_FORMATS:
+                raise ValueError("{}:{}: unknown format {}".format(path, lineno, fields[0]))
+            points.append((fmt, int(fields[1]), int(fields[2]), int(fields[3])))
+    return points
+
+
+def job_id(point):
+    fmt, m, n, k = point
+    return "{}_{}x{}x{}".format(fmt.lower(), m, n, k)
+
+
+def plan_jobs(points, history, model, args):
+    """Job records in longest-predicted-first order."""
+    rate = history.cycle_rate() or args.cycles_per_second
+    overhead = history.overhead()
+    overhead = DEFAULT_OVERHEAD_S if overhead is None else overhead
+    jobs = []
+    for point in dict.fromkeys(points):
+        cycles = model.predict(*point)["Total_Cyc"]
+        sim_s = cycles / rate
+        predicted, source = history.estimate(*point)
+        jobs.append({
+            "id": job_id(point),
+            "format": point[0], "M": point[1], "N": point[2], "K": point[3],
+            "expected_cycles": int(round(cycles)),
+            "predicted_s": round(predicted if predicted is not None else overhead + sim_s, 1),
+            "prediction": source or "cycle model",
+            "timeout_s": int(args.timeout_min + args.timeout_factor * sim_s),
+        })
+    jobs.sort(key=lambda j: (-j["predicted_s"], j["id"]))
+    return jobs
+
+
+def load_model(args):
+    if args.model:
+        return CycleModel.from_json(json.loads(Path(args.model).read_text()))
+    # Uncalibrated tile model: only the relative cost matters for a timeout
+    # with a generous factor.
+    return CycleModel(array_geometry())
+
+
+def queue_paths(queue):
+    queue = Path(queue)
+    return {name: queue / name for name in QUEUE_DIRS}
+
+
+def write_json(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=1, sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def cmd_submit(args):
+    points = []
+    for path in args.list:
+        points.extend(read_test_list(path))
+    if not points:
+        print("Error: no tests in", ", ".join(map(str, args.list)), file=sys.stderr)
+        return 2
+
+    paths = queue_paths(args.queue)
+    busy = [p for name in ("pending", "running", "done") if paths[name].is_dir()
+            for p in paths[name].iterdir()]
+    if busy and not args.reset:
+        print("Error: queue {} is not empty (use --reset to clear it)".format(args.queue), file=sys.stderr)
+        return 2
+    for path in paths.values():
+        if args.reset:
+            shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True, exist_ok=True)
+
+    history = RuntimeHistory.load(args.history, rtl_hash(DEFAULT_RTL_DIR))
+    jobs = plan_jobs(points, history, load_model(args), args)
+    # The rank prefix makes a plain sort of pending/ the LPT order.
+    for rank, job in enumerate(jobs):
+        write_json(paths["pending"] / "{:04d}_{}.json".format(rank, job["id"]), job)
+
+    durations = {j["id"]: j["predicted_s"] for j in jobs}
+    makespan, lanes = lpt_schedule(durations, args.workers)
+    lane_of = {job: w for w, lane in enumerate(lanes) for job, _, _ in lane}
+    print("Queued {} jobs in {} (longest predicted first, RTL {}):".format(
+        len(jobs), args.queue, history.rtl_hash))
+    for job in jobs:
+        print("  {:<18} predicted {:>9} ({:<11})  timeout {:5d}s  ~{} cycles  worker {}".format(
+            job["id"], format_duration(job["predicted_s"]), job["prediction"],
+            job["timeout_s"], job["expected_cycles"], lane_of[job["id"]]))
+    print("Predicted makespan on {} worker(s): {} (lower bound {}, serial {})".format(
+        args.workers, format_duration(makespan),
+        format_duration(makespan_lower_bound(durations, args.workers)),
+        format_duration(sum(durations.values()))))
+    return 0
+
+
+def worker_alive(worker):
+    """False when worker ("host.pid") is known to be gone, None when it cannot be checked."""
+    host, _, pid = worker.rpartition(".")
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def stale_jobs(paths, now):
+    """[(path, job)] of running jobs whose worker is gone or that overran
+    their hw-run timeout by more than STALE_MARGIN_S."""
+    stale = []
+    for path in sorted(paths["running"].glob("*.json.*")):
+        if path.name.endswith(".tmp"):
+            continue
+        try:
+            job = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # claimed or rewritten under us
+        if "started" not in job:
+            continue
+        alive = worker_alive(job["worker"])
+        if alive is False or (alive is None and now > job["started"] + job["timeout_s"] + STALE_MARGIN_S):
+            stale.append((path, job))
+    return stale
+
+
+def requeue_stale(paths, worker):
+    """Put abandoned running jobs back into pending/; returns the jobs moved.
+
+    A job already requeued MAX_REQUEUES times goes to done/ as "lost".
+    """
+    moved = []
+    for path, job in stale_jobs(paths, time.time()):
+        name = path.name[:-len(job["worker"]) - 1]
+        # Take it over first (atomic), so two workers never requeue it twice.
+        own = paths["pending"] / "{}.requeue.{}".format(name, worker)
+        try:
+            os.rename(path, own)
+        except FileNotFoundError:
+            continue
+        lost_by = job.pop("worker")
+        started = job.pop("started")
+        job["requeued"] = job.get("requeued", 0) + 1
+        if job["requeued"] > MAX_REQUEUES:
+            result = {key: job[key] for key in ("id", "format", "M", "N", "K", "timeout_s", "predicted_s")}
+            # No started/finished: the dead worker's time is not run efficiency.
+            result.update(status="lost", worker=lost_by, seconds=round(time.time() - started, 1),
+                          message="worker {} gone, requeued {} times".format(lost_by, MAX_REQUEUES))
+            write_json(paths["done"] / "{}.json".format(job["id"]), result)
+            own.unlink()
+        else:
+            write_json(own, job)
+            os.rename(own, paths["pending"] / name)
+        job["worker"] = lost_by
+        moved.append(job)
+    return moved
+
+
+def claim_next(paths, worker):
+    """Move the first pending job to running/; (path, job) or None when the queue is empty."""
+    for entry in sorted(paths["pending"].glob("*.json")):
+        target = paths["running"] / "{}.{}".format(entry.name, worker)
+        try:
+            os.rename(entry, target)
+        except FileNotFoundError:
+            continue  # another worker got it first
+        job = json.loads(target.read_text())
+        job.update(worker=worker, started=time.time())
+        write_json(target, job)
+        return target, job
+    return None
+
+
+def run_logged(cmd, cwd, log, timeout=None):
+    """Run cmd appending its output to log; returns (exit code or None on timeout, seconds)."""
+    with open(log, "a") as f:
+        f.write("$ {}\n".format(" ".join(cmd)))
+        f.flush()
+        start = time.time()
+        # Own process group, so a timeout also kills the simulator below make.
+        proc = subprocess.Popen(cmd, cwd=str(cwd), stdout=f, stderr=subprocess.STDOUT,
+                                start_new_session=True)
+        try:
+            ret = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            ret = None
+    return ret, time.time() - start
+
+
+def run_job(job, args, log):
+    """Build and simulate one point; returns the result record."""
+    repo = Path(args.repo)
+    dims = ["M={}".format(job["M"]), "N={}".format(job["N"]), "K={}".format(job["K"])]
+    mx = ["MX_ENABLE=0"] if job["format"] == "FP16" else \
+         ["MX_ENABLE=1", "MX_FORMAT={}".format(job["format"].lower())]
+    target = "target={}".format(args.target)
+
+    result = {key: job[key] for key in ("id", "format", "M", "N", "K", "timeout_s", "predicted_s")}
+    start = time.time()
+    for cmd in (["make", "golden", "OP=gemm"] + dims,
+                ["make", "sw-build"] + dims + mx + [target]):
+        ret, _ = run_logged(cmd, repo, log)
+        if ret != 0:
+            result.update(status="build_error", message="'{}' failed".format(" ".join(cmd[:2])),
+                          seconds=round(time.time() - start, 1))
+            return result
+
+    # Only the hw-run output is a transcript; build messages must not match.
+    hw_start = log.stat().st_size
+    ret, sim_s = run_logged(["make", "hw-run", target], repo, log, timeout=job["timeout_s"])
+    row = parse_transcript(log, hw_start)
+    result.update(seconds=round(time.time() - start, 1), sim_seconds=round(sim_s, 1), row=row)
+    if ret is None:
+        result.update(status="timeout", message="hw-run exceeded {}s".format(job["timeout_s"]))
+    elif row.get("Result") == "Pass" and int(row.get("Errors", "1"), 16) == 0:
+        result.update(status="pass")
+    else:
+        result.update(status="fail", message="errors={}".format(row.get("Errors", "?")))
+    return result
+
+
+def cmd_worker(args):
+    paths = queue_paths(args.queue)
+    if not paths["pending"].is_dir():
+        print("Error: {} is not a regression queue".format(args.queue), file=sys.stderr)
+        return 2
+    worker = "{}.{}".format(socket.gethostname(), os.getpid())
+    rtl = rtl_hash(Path(args.repo) / "rtl")
+
+    if not args.skip_hw_build:
+        log = paths["logs"] / "hw-build.{}.log".format(worker)
+        print("[{}] building RTL ({})".format(worker, log))
+        ret, _ = run_logged(["make", "hw-clean", "hw-build", "target={}".format(args.target)],
+                            args.repo, log)
+        if ret != 0:
+            print("[{}] hw-build failed, see {}".format(worker, log), file=sys.stderr)
+            return 1
+
+    ran = 0
+    while True:
+        for job in requeue_stale(paths, worker):
+            print("[{}] {} abandoned by {}, {}".format(
+                worker, job["id"], job["worker"],
+                "lost" if job["requeued"] > MAX_REQUEUES else "requeued"), flush=True)
+        claimed = claim_next(paths, worker)
+        if claimed is None:
+            break
+        claimed, job = claimed
+        log = paths["logs"] / "{}.log".format(job["id"])
+        log.write_text("")
+        print("[{}] {} (predicted {}, timeout {}s)".format(
+            worker, job["id"], format_duration(job["predicted_s"]), job["timeout_s"]), flush=True)
+        result = run_job(job, args, log)
+        result.update(worker=worker, log=str(log), rtl_hash=rtl,
+                      started=job["started"], finished=time.time())
+        write_json(paths["done"] / "{}.json".format(job["id"]), result)
+        claimed.unlink()
+        total_cyc = result.get("row", {}).get("Total_Cyc")
+        append_history(args.history, {
+            "format": job["format"], "M": job["M"], "N": job["N"], "K": job["K"],
+            "rtl_hash": rtl, "result": result["status"], "seconds": result["seconds"],
+            "sim_seconds": result.get("sim_seconds"),
+            "total_cyc": None if total_cyc is None else int(total_cyc),
+            "source": "regression",
+        })
+        print("[{}] {} {} in {} | {}".format(worker, job["id"], result["status"].upper(),
+                                            format_duration(result["seconds"]),
+                                            progress_line(paths)), flush=True)
+        ran += 1
+    print("[{}] queue empty after {} jobs".format(worker, ran))
+    return 0
+
+
+def read_jobs(directory, pattern):
+    jobs = []
+    for path in sorted(directory.glob(pattern)):
+        if path.name.endswith(".tmp"):
+            continue
+        try:
+            jobs.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # claimed or rewritten under us
+    return jobs
+
+
+def collect(paths):
+    """(results, running jobs, pending jobs) of a queue."""
+    return (read_jobs(paths["done"], "*.json"),
+            read_jobs(paths["running"], "*.json.*"),
+            read_jobs(paths["pending"], "*.json"))
+
+
+def progress_line(paths, workers=None):
+    """"done/total, ETA ..." for the queue as it is now.
+
+    workers defaults to the workers seen in the queue (running or done jobs):
+    one that is between two jobs has nothing in running/.
+    """
+    results, running, pending = collect(paths)
+    total = len(results) + len(running) + len(pending)
+    if not running and not pending:
+        return "{}/{} done".format(len(results), total)
+    if not workers:
+        workers = len({j["worker"] for j in running + results if "worker" in j})
+    eta, ratio = estimate_finish(results, [j for j in running if "started" in j], pending,
+                                 time.time(), workers)
+    return "{}/{} done, {} running, ETA {} (at {}, predictions x{:.2f})".format(
+        len(results), total, len(running), format_duration(eta),
+        time.strftime("%H:%M", time.localtime(time.time() + eta)), ratio)
+
+
+def write_junit(path, results, unfinished):
+    suite = ET.Element("testsuite", name="redmule.regression")
+    counts = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    total = 0.0
+    for r in sorted(results, key=lambda r: r["id"]):
+        case = ET.SubElement(suite, "testcase", classname="redmule." + r["format"],
+                             name="{}x{}x{}".format(r["M"], r["N"], r["K"]),
+                             time="{:.1f}".format(r.get("seconds", 0.0)))
+        counts["tests"] += 1
+        total += r.get("seconds", 0.0)
+        if r["status"] == "fail":
+            counts["failures"] += 1
+            ET.SubElement(case, "failure", message=r.get("message", "")).text = r.get("log", "")
+        elif r["status"] != "pass":
+            counts["errors"] += 1
+            ET.SubElement(case, "error", type=r["status"], message=r.get("message", "")).text = r.get("log", "")
+    for job in unfinished:
+        case = ET.SubElement(suite, "testcase", classname="redmule." + job["format"],
+                             name="{}x{}x{}".format(job["M"], job["N"], job["K"]))
+        ET.SubElement(case, "skipped", message="not run")
+        counts["tests"] += 1
+        counts["skipped"] += 1
+    for name, value in counts.items():
+        suite.set(name, str(value))
+    suite.set("time", "{:.1f}".format(total))
+    root = ET.Element("testsuites")
+    root.append(suite)
+    ET.indent(root)
+    ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def cmd_status(args):
+    paths = queue_paths(args.queue)
+    if not paths["pending"].is_dir():
+        print("Error: {} is not a regression queue".format(args.queue), file=sys.stderr)
+        return 2
+    while True:
+        _, running, _ = collect(paths)
+        stale = {job["id"] for _, job in stale_jobs(paths, time.time())}
+        print(time.strftime("%H:%M:%S"), progress_line(paths, args.workers), flush=True)
+        for job in running:
+            if "started" in job:
+                print("  {:<18} {:<24} {} of ~{}{}".format(
+                    job["id"], job["worker"], format_duration(time.time() - job["started"]),
+                    format_duration(job["predicted_s"]), "  STALE" if job["id"] in stale else ""))
+        pending = any(paths["pending"].glob("*.json"))
+        if stale and not pending and len(stale) == len(running):
+            # Nothing left that can make progress: only a new worker helps.
+            print("{} stale job(s); start a worker to requeue them".format(len(stale)))
+            return 1
+        if not args.watch or not running and not pending:
+            return 0
+        time.sleep(args.watch)
+
+
+def cmd_report(args):
+    paths = queue_paths(args.queue)
+    results, running, pending = collect(paths)
+    unfinished = running + pending
+    if args.junit:
+        write_junit(args.junit, results, unfinished)
+    if args.csv:
+        rows = [dict(r.get("row", {}), Format=r["format"], M=r["M"], N=r["N"], K=r["K"])
+                for r in sorted(results, key=lambda r: (r["format"], r["M"], r["N"], r["K"]))]
+        write_sweep(args.csv, rows, SWEEP_FIELDS)
+
+    by_status = {}
+    for r in results:
+        by_status.setdefault(r["status"], []).append(r)
+    for r in sorted(results, key=lambda r: r["id"]):
+        if r["status"] != "pass":
+            print("{:<12}: {} ({}) {}".format(r["status"].upper(), r["id"], r.get("message", ""), r.get("log", "")))
+    print("PASS={} FAIL={} TIMEOUT={} BUILD_ERROR={} LOST={} NOT_RUN={}".format(
+        *(len(by_status.get(s, [])) for s in ("pass", "fail", "timeout", "build_error", "lost")),
+        len(unfinished)))
+    report = efficiency(results)
+    if report:
+        print()
+        print_efficiency(report)
+    if args.junit:
+        print("JUnit XML:", args.junit)
+    if args.csv:
+        print("Sweep CSV:", args.csv)
+    return 0 if len(by_status.get("pass", [])) == len(results) and not unfinished else 1
+
+
+def cmd_run(args):
+    args.reset = True
+    ret = cmd_submit(args)
+    if ret:
+        return ret
+    ret = cmd_worker(args)
+    if ret:
+        return ret
+    return cmd_report(args)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sharded RedMulE regression runner")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_queue(p, default=None):
+        p.add_argument("--queue", required=default is None, default=default,
+                       help="Queue directory shared by the workers" +
+                            (" (default: {})".format(default) if default else ""))
+
+    def add_submit(p):
+        p.add_argument("--list", nargs="+", default=[str(DEFAULT_LIST)],
+                       help="Test list file(s) (default: scripts/regression_list.txt)")
+        p.add_argument("--reset", action="store_true", help="Clear a non-empty queue first (implied by run)")
+        p.add_argument("--model", help="Cycle model JSON from 'perf_model.py fit --save' "
+                                       "(default: uncalibrated tile model)")
+        p.add_argument("--timeout-min", type=float, default=300.0,
+                       help="hw-run timeout floor in seconds, covers simulator start-up (default: 300)")
+        p.add_argument("--timeout-factor", type=float, default=4.0,
+                       help="Multiple of the expected simulation time added to the floor (default: 4)")
+        p.add_argument("--cycles-per-second", type=float, default=DEFAULT_CYCLES_PER_SECOND,
+                       help="Simulation rate used while the history has none "
+                            "(default: {:.0f})".format(DEFAULT_CYCLES_PER_SECOND))
+        p.add_argument("--workers", type=int, default=1,
+                       help="Number of workers to plan the schedule for (default: 1)")
+
+    def add_worker(p):
+        p.add_argument("--target", default="vsim", help="Simulation target (default: vsim)")
+        p.add_argument("--repo", default=str(REPO_ROOT), help="Checkout to build and simulate in "
+                                                              "(default: this one)")
+        p.add_argument("--skip-hw-build", action="store_true", help="Reuse the checkout's RTL build")
+
+    def add_report(p):
+        p.add_argument("--junit", help="Write JUnit XML here")
+        p.add_argument("--csv", help="Write the sweep CSV here")
+
+    def add_history(p):
+        p.add_argument("--history", default=str(DEFAULT_HISTORY),
+                       help="Runtime history file (default: target/sim/runtime_history.jsonl)")
+
+    p = sub.add_parser("submit", help="Queue the tests of one or more lists")
+    add_queue(p)
+    add_submit(p)
+    add_history(p)
+    p.set_defaults(func=cmd_submit)
+
+    p = sub.add_parser("worker", help="Run queued jobs in one checkout until the queue is empty")
+    add_queue(p)
+    add_worker(p)
+    add_history(p)
+    p.set_defaults(func=cmd_worker)
+
+    p = sub.add_parser("status", help="Show progress and the ETA of a queue")
+    add_queue(p)
+    p.add_argument("--workers", type=int, help="Assume this many workers (default: those seen in the queue)")
+    p.add_argument("--watch", type=float, metavar="SECONDS", help="Refresh until the queue is drained")
+    p.set_defaults(func=cmd_status)
+
+    p = sub.add_parser("report", help="Write JUnit XML / sweep CSV, summarize a queue and its efficiency")
+    add_queue(p)
+    add_report(p)
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("run", help="submit + worker + report in this checkout")
+    add_queue(p, default="target/sim/regression_queue")
+    add_submit(p)
+    add_worker(p)
+    add_report(p)
+    add_history(p)
+    p.set_defaults(func=cmd_run)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,10 @@ import os
 import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "golden-model", "common"))
+
+from blob_store import BlobStore, default_store
+
 
 DEFAULT_GLOBS = [
     "transcript",
@@ -74,6 +78,18 @@ def parse_args():
         default="skip",
         help="What to do if destination exists (default: skip).",
     )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Move the renamed files into the content-addressed store <dir>/.dump_store "
+             "(see dump_store.py); suffixed names stay readable through dump_archive.",
+    )
+    parser.add_argument(
+        "--store-include",
+        nargs="+",
+        default=[],
+        help="With --store: extra files kept with the run (e.g. sw/inc/*.h sw/build/stim_instr.txt).",
+    )
     parser.add_argument(
         "--glob",
         action="append",
@@ -190,6 +206,13 @@ def main():
     else:
         print("Done. Renamed: {}, skipped: {}".format(renamed, skipped))
 
+    if args.store and not args.dry_run:
+        # Not at the top: dump_store imports this module (through archive_run).
+        from dump_store import store_run
+
+        extras = {Path(p).name: p for p in args.store_include if Path(p).is_file()}
+        store_run(BlobStore(default_store(str(root))), root, suffix, extras=extras)
+
     return 0
 
 
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Read integer geometry parameters from rtl/redmule_pkg.sv.
+
+Only plain `parameter int unsigned NAME = <expr>;` lines are evaluated.
+Expressions may use integer literals, + - * / ( ) and previously parsed
+parameters. Anything else (package function calls, enum values) is left
+unresolved unless a fallback is given in KNOWN_FALLBACKS.
+"""
+
+import ast
+import hashlib
+import re
+from pathlib import Path
+
+
+DEFAULT_PKG = Path(__file__).resolve().parents[1] / "rtl" / "redmule_pkg.sv"
+DEFAULT_RTL_DIR = DEFAULT_PKG.parent
+
+# fpnew_pkg::fp_width(FP16) and friends cannot be evaluated from the package text.
+KNOWN_FALLBACKS = {
+    "BITW": 16,
+}
+
+_PARAM_RE = re.compile(
+    r"^\s*parameter\s+int\s+unsigned\s+(\w+)\s*=\s*([^;]+);"
+)
+
+
+def _eval_expr(expr, env):
+    tree = ast.parse(expr, mode="eval")
+
+    def ev(node):
+        if isinstance(node, ast.Expression):
+            return ev(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id not in env:
+                raise KeyError(node.id)
+            return env[node.id]
+        if isinstance(node, ast.BinOp):
+            a, b = ev(node.left), ev(node.right)
+            if isinstance(node.op, ast.Add):
+                return a + b
+            if isinstance(node.op, ast.Sub):
+                return a - b
+            if isinstance(node.op, ast.Mult):
+                return a * b
+            if isinstance(node.op, (ast.Div, ast.FloorDiv)):
+                return a // b
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -ev(node.operand)
+        raise ValueError("unsupported expression: " + expr)
+
+    return ev(tree)
+
+
+def load_pkg_params(path=DEFAULT_PKG):
+    """Return {name: int} for every resolvable integer parameter."""
+    env = {}
+    with open(path) as f:
+        for line in f:
+            line = line.split("//", 1)[0]
+            m = _PARAM_RE.match(line)
+            if not m:
+                continue
+            name, expr = m.group(1), m.group(2).strip()
+            try:
+                env[name] = _eval_expr(expr, env)
+            except (KeyError, ValueError, SyntaxError, ZeroDivisionError):
+                if name in KNOWN_FALLBACKS:
+                    env[name] = KNOWN_FALLBACKS[name]
+    return env
+
+
+def array_geometry(path=DEFAULT_PKG, array_height=None, pipe_regs=None, array_width=None):
+    """Return the datapath geometry, optionally overriding package values.
+
+    ARRAY_WIDTH follows the package definition (ARRAY_HEIGHT * PIPE_REGS)
+    unless given explicitly. tile_m/tile_n/tile_k are the M, N (reduction)
+    and K (output column) tile sizes the tiler uses.
+    """
+    params = load_pkg_params(path)
+    height = array_height if array_height is not None else params["ARRAY_HEIGHT"]
+    pipe = pipe_regs if pipe_regs is not None else params["PIPE_REGS"]
+    if array_width is None:
+        array_width = height * pipe if (array_height is not None or pipe_regs is not None) \
+            else params["ARRAY_WIDTH"]
+    depth = height * (pipe + 1)
+    return {
+        "ARRAY_WIDTH": array_width,
+        "ARRAY_HEIGHT": height,
+        "PIPE_REGS": pipe,
+        "tile_m": array_width,
+        "tile_n": depth,
+        "tile_k": depth,
+    }
+
+
+def rtl_hash(rtl_dir=DEFAULT_RTL_DIR, length=16):
+    """Content hash of every .sv/.svh file under rtl_dir (path + bytes).
+
+    Identifies the RTL revision a result was produced with, independently of
+    git state (uncommitted edits change the hash too).
+    """
+    rtl_dir = Path(rtl_dir)
+    h = hashlib.sha256()
+    for path in sorted(p for p in rtl_dir.rglob("*") if p.suffix in (".sv", ".svh")):
+        h.update(str(path.relative_to(rtl_dir)).encode())
+        h.update(b"\0")
+        h.update(path.read_bytes())
+    return h.hexdigest()[:length]
@@ -8,13 +8,23 @@ For each (mode, dim):
 4) make hw-build target=vsim
 5) make hw-run target=vsim
 6) rename fresh transcript/csv/txt with scripts/rename_dump.py
+
+With --history, every point's wall time is appended to the runtime history
+(runtime_history.py) and the sweep prints an ETA from its estimates.
 """
 
 import argparse
+import os
 import subprocess
 import sys
+import time
 from pathlib import Path
 
+from rtl_params import rtl_hash
+from runtime_history import RuntimeHistory, append_history
+from sweep_csv import parse_transcript
+from sweep_schedule import format_duration
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -56,6 +66,22 @@ def parse_args():
         default="skip",
         help="rename_dump.py conflict behavior. Default: skip",
     )
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Move each run's dumps, headers and stim_instr.txt into the dedup store "
+             "<vsim-dir>/.dump_store (rename_dump.py --store).",
+    )
+    parser.add_argument(
+        "--profile-log",
+        help="Append per-stage timing of the Python tools to this JSON-lines file, "
+             "tagged with the run suffix, and print a per-point summary at the end.",
+    )
+    parser.add_argument(
+        "--history",
+        help="Runtime history file (e.g. target/sim/runtime_history.jsonl): record each "
+             "point's wall time there and print an ETA from the recorded runs.",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -64,12 +90,30 @@ def parse_args():
     return parser.parse_args()
 
 
-def run_cmd(cmd, cwd, dry_run):
+def run_cmd(cmd, cwd, dry_run, env=None):
     cmd_str = " ".join(cmd)
     print("$", cmd_str)
     if dry_run:
         return
-    subprocess.run(cmd, cwd=str(cwd), check=True)
+    subprocess.run(cmd, cwd=str(cwd), check=True, env=env)
+
+
+def point_format(mode):
+    # make inherits our environment, so mx mode runs MX_FORMAT from it
+    # (Makefile default: e4m3)
+    return os.environ.get("MX_FORMAT", "e4m3").upper() if mode == "mx" else "FP16"
+
+
+def print_eta(history, remaining, elapsed_points):
+    """ETA of the remaining (mode, dim) points from the history estimates."""
+    estimates = [history.predict(point_format(mode), dim, dim, dim) for mode, dim in remaining]
+    known = [e for e in estimates if e is not None]
+    if not known:
+        return
+    # Points without history are assumed to take as long as the known ones on average.
+    eta = sum(known) + (len(estimates) - len(known)) * sum(known) / len(known)
+    print("[ETA] {} points left, about {} (done {})".format(
+        len(remaining), format_duration(eta), elapsed_points))
 
 
 def mode_to_mx_enable_and_suffix_tag(mode):
@@ -98,8 +142,26 @@ def main():
         print("Error: VSIM directory not found:", vsim_dir, file=sys.stderr)
         return 2
 
+    store_args = []
+    if args.store:
+        store_args = ["--store", "--store-include"] + [
+            str(p) for p in sorted(sw_inc.glob("*.h")) + [repo_root / "sw" / "build" / "stim_instr.txt"]
+        ]
+
+    history = None
+    rtl = None
+    if args.history:
+        rtl = rtl_hash()
+        history = RuntimeHistory.load(args.history, rtl)
+    points = [(mode, dim) for dim in args.dims for mode in args.modes]
+
+    index = 0
     for dim in args.dims:
         for mode in args.modes:
+            if history is not None:
+                print_eta(history, points[index:], "{}/{}".format(index, len(points)))
+            index += 1
+            start = time.time()
             mx_enable, suffix_tag = mode_to_mx_enable_and_suffix_tag(mode)
             suffix = "{}{}".format(suffix_tag, dim)
 
@@ -108,6 +170,10 @@ def main():
                     suffix_tag, dim, suffix
                 )
             )
+            env = None
+            if args.profile_log:
+                env = dict(os.environ, REDMULE_PROFILE=str(Path(args.profile_log).resolve()),
+                           REDMULE_PROFILE_TAG=suffix)
 
             run_cmd(
                 [
@@ -120,6 +186,7 @@ def main():
                 ],
                 cwd=repo_root,
                 dry_run=args.dry_run,
+                env=env,
             )
             run_cmd(
                 [
@@ -130,17 +197,24 @@ def main():
                 ],
                 cwd=repo_root,
                 dry_run=args.dry_run,
+                env=env,
             )
             run_cmd(
                 ["make", "hw-build", "target={}".format(args.target)],
                 cwd=repo_root,
                 dry_run=args.dry_run,
+                env=env,
             )
+            sim_start = time.time()
             run_cmd(
                 ["make", "hw-run", "target={}".format(args.target)],
                 cwd=repo_root,
                 dry_run=args.dry_run,
+                env=env,
             )
+            sim_seconds = time.time() - sim_start
+            transcript = vsim_dir / "transcript"
+            row = parse_transcript(transcript) if transcript.exists() and not args.dry_run else {}
             run_cmd(
                 [
                     "python3",
@@ -153,12 +227,34 @@ def main():
                     str(args.window_seconds),
                     "--conflict",
                     args.conflict,
-                ],
+                ]
+                + store_args,
                 cwd=repo_root,
                 dry_run=args.dry_run,
+                env=env,
             )
+            if history is not None and not args.dry_run:
+                append_history(args.history, {
+                    "format": point_format(mode), "M": dim, "N": dim, "K": dim,
+                    "rtl_hash": rtl, "result": "pass" if row.get("Result") == "Pass" else "fail",
+                    "seconds": round(time.time() - start, 1), "sim_seconds": round(sim_seconds, 1),
+                    "total_cyc": int(row["Total_Cyc"]) if "Total_Cyc" in row else None,
+                    "source": "run_vsim_dim_sweep",
+                })
 
     print("\nSweep complete.")
+    if args.profile_log and not args.dry_run and Path(args.profile_log).exists():
+        run_cmd(
+            [
+                "python3",
+                str(repo_root / "golden-model" / "common" / "profiling.py"),
+                "summary",
+                args.profile_log,
+                "--by-tag",
+            ],
+            cwd=repo_root,
+            dry_run=False,
+        )
     return 0
 
 
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Wall-time history of simulated (Format, M, N, K) points.
+
+Runners append one JSON line per finished point to a history file: the
+point, the RTL hash (rtl_params.rtl_hash) it was simulated with, the total
+wall time (golden + SW build + simulation), the wall time of the
+simulation alone, the simulated Total_Cyc and the result. Lines are
+written with a single append each, so workers on several hosts can share
+one file on a common filesystem.
+
+RuntimeHistory answers the questions the runners ask before they start:
+how long a point will take (to schedule jobs longest-first) and how many
+simulated cycles per wall second the simulator manages (to turn the cycle
+model's prediction into a timeout). estimate() uses, in this order, the
+point's recent runs on the current RTL, its runs on any RTL, and a
+per-format fit of wall time against M*N*K (simulation time grows roughly
+with the MAC count, with a format-dependent slope and a constant build
+overhead), pooled over all formats when one format has too few sizes.
+
+Usage:
+    python3 scripts/runtime_history.py show target/sim/runtime_history.jsonl
+    python3 scripts/runtime_history.py show --rtl-hash current
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from rtl_params import rtl_hash
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_HISTORY = REPO_ROOT / "target" / "sim" / "runtime_history.jsonl"
+
+# Only the most recent passing runs of a point are averaged, so an RTL or
+# simulator change shows up after a few runs.
+RECENT_RUNS = 5
+
+# Wall-time fits need this many distinct M*N*K values.
+MIN_FIT_SIZES = 3
+POOLED = "ALL"
+
+
+def point_of(fmt, M, N, K):
+    return (fmt.upper(), int(M), int(N), int(K))
+
+
+def load_history(path):
+    """All records of a history file ([] if it does not exist)."""
+    records = []
+    path = Path(path)
+    if not path.exists():
+        return records
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # a line cut short by a crashed writer
+    return records
+
+
+def append_history(path, record):
+    record = dict(record)
+    record.setdefault("host", socket.gethostname())
+    record.setdefault("time", time.strftime("%Y-%m-%dT%H:%M:%S"))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def fit_wall_time(runs):
+    """(overhead_s, s_per_mac) of seconds ~ a + b*M*N*K, or None if underdetermined."""
+    macs = np.array([float(r["M"] * r["N"] * r["K"]) for r in runs])
+    if len(set(macs)) < MIN_FIT_SIZES:
+        return None
+    b, a = np.polyfit(macs, np.array([float(r["seconds"]) for r in runs]), 1)
+    return max(float(a), 0.0), max(float(b), 0.0)
+
+
+class RuntimeHistory:
+    """Per-point wall times, per-format wall-time fits and the simulator's cycle rate."""
+
+    def __init__(self, records, rtl_hash=None):
+        self.rtl_hash = rtl_hash
+        # {point: [passing runs, oldest first]}, over every RTL hash
+        self.by_point = {}
+        for r in records:
+            if r.get("result") != "pass" or r.get("seconds") is None:
+                continue
+            key = point_of(r["format"], r["M"], r["N"], r["K"])
+            self.by_point.setdefault(key, []).append(r)
+        self.fits = self._fit()
+
+    @classmethod
+    def load(cls, path, rtl_hash=None):
+        return cls(load_history(path), rtl_hash)
+
+    def _current(self, runs):
+        """Runs on the current RTL if there are any, else all of them."""
+        same = [r for r in runs if r.get("rtl_hash") == self.rtl_hash]
+        return same or runs
+
+    def _fit(self):
+        groups = {}
+        for key, runs in self.by_point.items():
+            for group in (key[0], POOLED):
+                groups.setdefault(group, []).extend(runs)
+        fits = {}
+        for group, runs in groups.items():
+            fit = fit_wall_time(self._current(runs))
+            if fit is not None:
+                fits[group] = fit
+        return fits
+
+    def estimate(self, fmt, M, N, K):
+        """(wall seconds, source) of the best available estimate, or (None, None).
+
+        source is "rtl" (the point on the current RTL), "point" (the point
+        on another RTL), "fit <FORMAT>" or "fit ALL".
+        """
+        key = point_of(fmt, M, N, K)
+        runs = self.by_point.get(key)
+        if runs:
+            recent = self._current(runs)[-RECENT_RUNS:]
+            source = "rtl" if self.rtl_hash and recent[0].get("rtl_hash") == self.rtl_hash else "point"
+            return statistics.mean(r["seconds"] for r in recent), source
+        for group in (key[0], POOLED):
+            if group in self.fits:
+                a, b = self.fits[group]
+                return a + b * M * N * K, "fit " + group
+        return None, None
+
+    def predict(self, fmt, M, N, K):
+        """Estimated wall seconds of a point, or None without usable history."""
+        return self.estimate(fmt, M, N, K)[0]
+
+    def cycle_rate(self):
+        """Median simulated cycles per second of simulation wall time, or None."""
+        rates = [r["total_cyc"] / r["sim_seconds"]
+                 for runs in self.by_point.values() for r in runs
+                 if r.get("total_cyc") and r.get("sim_seconds")]
+        return statistics.median(rates) if rates else None
+
+    def overhead(self):
+        """Median wall seconds spent outside the simulation (golden, builds), or None."""
+        rest = [r["seconds"] - r["sim_seconds"]
+                for runs in self.by_point.values() for r in runs
+                if r.get("sim_seconds") is not None]
+        return statistics.median(rest) if rest else None
+
+
+def resolve_rtl_hash(value):
+    """--rtl-hash argument: "current" hashes this checkout's rtl/."""
+    return rtl_hash() if value == "current" else value
+
+
+def cmd_show(args):
+    history = RuntimeHistory.load(args.history, resolve_rtl_hash(args.rtl_hash))
+    if not history.by_point:
+        print("No passing runs in", args.history)
+        return 0
+    if history.rtl_hash:
+        print("RTL hash:", history.rtl_hash)
+    print("{:<6} {:>5} {:>5} {:>5} {:>5} {:>5} {:>10} {:>10}  {}".format(
+        "Format", "M", "N", "K", "Runs", "RTL", "Est_s", "Cycles", "Source"))
+    for key in sorted(history.by_point):
+        runs = history.by_point[key]
+        on_rtl = sum(r.get("rtl_hash") == history.rtl_hash for r in runs)
+        cyc = runs[-1].get("total_cyc")
+        est, source = history.estimate(*key)
+        print("{:<6} {:>5} {:>5} {:>5} {:>5} {:>5} {:>10.1f} {:>10}  {}".format(
+            *key, len(runs), on_rtl, est, "--" if cyc is None else cyc, source))
+    for group in sorted(history.fits):
+        a, b = history.fits[group]
+        print("Fit {:<5}: {:.1f} s + {:.3g} s per MAC (64x64x64: {:.1f} s)".format(
+            group, a, b, a + b * 64 ** 3))
+    rate, overhead = history.cycle_rate(), history.overhead()
+    if rate is not None:
+        print("\nSimulation rate: {:.1f} cycles/s".format(rate))
+    if overhead is not None:
+        print("Median build overhead: {:.1f} s".format(overhead))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the recorded wall times of simulated points")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("show", help="Per-point estimates, wall-time fits and the simulation rate")
+    p.add_argument("history", nargs="?", default=str(DEFAULT_HISTORY),
+                   help="History file (default: {})".format(DEFAULT_HISTORY.relative_to(REPO_ROOT)))
+    p.add_argument("--rtl-hash", help="Prefer runs on this RTL hash ('current': this checkout)")
+    p.set_defaults(func=cmd_show)
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
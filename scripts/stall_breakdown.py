@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Per-cycle stall attribution from the testbench cycle traces.
+
+redmule_tb.sv writes two per-cycle CSVs next to the transcript:
+
+    w_path_cycle_trace.csv    every clock while cntrl_flags.mx_enable is set:
+                              scheduler state, stall_engine and its checks,
+                              W buffer load/shift, W/X/Y/Z handshakes
+    engine_compute_trace.csv  every clock with reg_enable=1 (FP16 and MX):
+                              accepted step, in/out handshakes, stall checks
+
+This script aligns both on $time (TCP = 1 ns, timeunit 1 ps), cuts the
+Total_Cyc window reported by `[PERF] total cycles` and assigns every cycle to
+exactly one class. The first matching rule wins:
+
+    input_starved         stall_engine with W not valid or X buffer not full,
+                          or scheduler in PRELOAD with nothing else to do
+    output_backpressured  any other stall_engine (Z buffer not loaded), or
+                          an engine step with out_ready=0
+    compute               engine step accepted (reg_enable & in_valid &
+                          all in_ready)
+    w_load                W buffer load strobe without an engine step
+    w_shift               W buffer shift strobe without an engine step
+    z_hold                remaining LOAD_W/WAIT cycles and engine steps that
+                          did not fire (pipeline drain, Z/Y hand-over)
+    idle                  scheduler IDLE, and cycles the traces do not cover
+
+The window starts at the first non-IDLE scheduler cycle (or first engine
+step when there is no W-path trace, i.e. FP16 runs). Cycles of the window
+beyond the end of the traces (the testbench idle timeout) count as idle, so
+the classes always add up to Total_Cyc. Without a W-path trace the W and
+PRELOAD rules cannot fire and non-step cycles are idle.
+
+Runs are addressed by the suffix scripts/rename_dump.py appended to the dump
+files (engine_compute_trace_<suffix>.csv, transcript_<suffix>, ...).
+
+Usage:
+    # Latest run in target/sim/vsim (unsuffixed files)
+    python3 scripts/stall_breakdown.py
+
+    # Renamed runs, top-10 stall windows, CSV summary
+    python3 scripts/stall_breakdown.py --suffix mx96 mx128 --top 10 --csv stalls.csv
+
+    # Every renamed run in the directory
+    python3 scripts/stall_breakdown.py --all-suffixes
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "golden-model", "common"))
+
+from blob_store import BlobStore, default_store
+from dump_archive import dump_exists, list_bundles, open_dump, read_manifest
+
+
+ENGINE_TRACE = "engine_compute_trace"
+W_PATH_TRACE = "w_path_cycle_trace"
+
+# redmule_scheduler.sv redmule_fsm_state_e
+IDLE, PRELOAD, LOAD_W, WAIT = 0, 1, 2, 3
+STATE_NAMES = {IDLE: "IDLE", PRELOAD: "PRELOAD", LOAD_W: "LOAD_W", WAIT: "WAIT"}
+
+# (class name, summary CSV column), in report order
+CLASSES = [
+    ("compute", "Compute_Cyc"),
+    ("w_load", "W_Load_Cyc"),
+    ("w_shift", "W_Shift_Cyc"),
+    ("z_hold", "Z_Hold_Cyc"),
+    ("input_starved", "Starved_Cyc"),
+    ("output_backpressured", "Backpressure_Cyc"),
+    ("idle", "Idle_Cyc"),
+]
+CLASS_IDX = {name: i for i, (name, _) in enumerate(CLASSES)}
+STALL_CLASSES = [CLASS_IDX[c] for c in ("w_load", "w_shift", "z_hold",
+                                        "input_starved", "output_backpressured")]
+
+W_PATH_COLUMNS = ["time", "state", "stall", "check_w_valid", "check_w_valid_en",
+                  "w_load", "w_shift", "x_full", "z_loaded"]
+ENGINE_COLUMNS = ["time", "accepted", "out_ready", "stall_engine",
+                  "check_w_valid_en", "check_x_full_en", "check_y_loaded_en"]
+
+TOTAL_RE = re.compile(r"\[PERF\] total cycles\s+:\s+(\d+)")
+
+
+def trace_path(root, stem, suffix, ext=".csv"):
+    return root / (stem + ("_" + suffix if suffix else "") + ext)
+
+
+def load_trace(path, columns):
+    """Load the named integer columns of a trace CSV as {name: int64 array}.
+
+    Returns None when the file does not exist. X/Z values from the simulator
+    are read as 0.
+    """
+    if not dump_exists(path):
+        return None
+    with open_dump(path) as f:
+        header = f.readline().strip().split(",")
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError("{}: missing column(s) {}".format(path, ", ".join(missing)))
+    usecols = [header.index(c) for c in columns]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # header-only files
+        try:
+            with open_dump(path) as f:
+                data = np.loadtxt(f, delimiter=",", skiprows=1, usecols=usecols,
+                                  dtype=np.int64, ndmin=2)
+        except ValueError:
+            with open_dump(path) as f:
+                data = np.genfromtxt(f, delimiter=",", skip_header=1, usecols=usecols,
+                                     dtype=np.int64, filling_values=0, invalid_raise=False)
+            data = data.reshape(-1, len(columns))
+    return {c: data[:, i] for i, c in enumerate(columns)}
+
+
+def read_total_cycles(path):
+    if not dump_exists(path):
+        return None
+    total = None
+    with open_dump(path) as f:
+        for line in f:
+            m = TOTAL_RE.search(line)
+            if m:
+                total = int(m.group(1))
+    return total
+
+
+def scatter(cycles, values, length, fill=0):
+    """Place per-row values on a dense per-cycle axis (later rows win)."""
+    out = np.full(length, fill, dtype=np.int64)
+    keep = (cycles >= 0) & (cycles < length)
+    out[cycles[keep]] = values[keep]
+    return out
+
+
+def classify(w_path, engine, total_cycles, clock_period):
+    """Return (per-cycle class array, per-cycle state array, window start time, traced cycles)."""
+    if w_path is None and engine is None:
+        raise ValueError("no trace data")
+    firsts = [t["time"][0] for t in (w_path, engine) if t is not None and len(t["time"])]
+    if not firsts:
+        raise ValueError("traces are empty")
+    t0 = min(firsts)
+
+    if w_path is not None and len(w_path["time"]):
+        w_cyc = (w_path["time"] - t0) // clock_period
+        active = np.flatnonzero(w_path["state"] != IDLE)
+        start = int(w_cyc[active[0]]) if len(active) else int(w_cyc[0])
+    else:
+        w_cyc = None
+        start = int((engine["time"][0] - t0) // clock_period)
+    e_cyc = None
+    if engine is not None and len(engine["time"]):
+        e_cyc = (engine["time"] - t0) // clock_period - start
+
+    if total_cycles is None:
+        ends = []
+        if w_cyc is not None:
+            ends.append(int(w_cyc[-1]) - start + 1)
+        if e_cyc is not None:
+            ends.append(int(e_cyc[-1]) + 1)
+        total_cycles = max(ends)
+    n = total_cycles
+
+    zeros = np.zeros(n, dtype=bool)
+    if w_cyc is not None:
+        wc = w_cyc - start
+        traced = scatter(wc, np.ones_like(wc), n).astype(bool)
+        state = scatter(wc, w_path["state"], n, IDLE)
+        stall = scatter(wc, w_path["stall"], n).astype(bool)
+        w_bad = scatter(wc, w_path["check_w_valid_en"] & (1 - w_path["check_w_valid"]), n).astype(bool)
+        x_not_full = scatter(wc, 1 - w_path["x_full"], n).astype(bool)
+        w_load = scatter(wc, w_path["w_load"], n).astype(bool)
+        w_shift = scatter(wc, w_path["w_shift"], n).astype(bool)
+        starved = stall & (w_bad | x_not_full)
+        backpressured = stall & ~starved
+        preload = state == PRELOAD
+        busy = (state == LOAD_W) | (state == WAIT)
+    else:
+        traced = zeros.copy()
+        state = np.full(n, IDLE, dtype=np.int64)
+        starved = backpressured = w_load = w_shift = preload = busy = zeros
+
+    if e_cyc is not None:
+        step = scatter(e_cyc, np.ones_like(e_cyc), n).astype(bool)
+        accepted = scatter(e_cyc, engine["accepted"], n).astype(bool)
+        out_blocked = step & ~scatter(e_cyc, engine["out_ready"], n, 1).astype(bool)
+        if w_cyc is None:
+            e_stall = scatter(e_cyc, engine["stall_engine"], n).astype(bool)
+            e_in = scatter(e_cyc, engine["check_w_valid_en"] | engine["check_x_full_en"], n).astype(bool)
+            starved = e_stall & e_in
+            backpressured = e_stall & ~e_in
+        traced |= step
+    else:
+        step = accepted = out_blocked = zeros
+
+    conds = [
+        starved,
+        backpressured | out_blocked,
+        accepted,
+        w_load,
+        w_shift,
+        busy | step,
+        preload,
+    ]
+    choices = [CLASS_IDX[c] for c in ("input_starved", "output_backpressured", "compute",
+                                      "w_load", "w_shift", "z_hold", "input_starved")]
+    cls = np.select(conds, choices, default=CLASS_IDX["idle"])
+    return cls, state, t0 + start * clock_period, int(traced.sum())
+
+
+def stall_windows(cls, state, top):
+    """Longest runs of a single stall class: [(start, length, class, state)]."""
+    if not len(cls):
+        return []
+    edges = np.flatnonzero(np.diff(cls)) + 1
+    starts = np.concatenate(([0], edges))
+    lengths = np.diff(np.concatenate((starts, [len(cls)])))
+    kinds = cls[starts]
+    keep = np.isin(kinds, STALL_CLASSES)
+    starts, lengths, kinds = starts[keep], lengths[keep], kinds[keep]
+    order = np.lexsort((starts, -lengths))[:top]
+    return [(int(starts[i]), int(lengths[i]), int(kinds[i]), int(state[starts[i]]))
+            for i in order]
+
+
+def discover_suffixes(root, stems=(ENGINE_TRACE, W_PATH_TRACE)):
+    """Suffixes of every renamed dump of the given trace stems in root."""
+    found = set()
+    for stem in stems:
+        for path in root.glob(stem + "_*.csv"):
+            found.add(path.stem[len(stem) + 1:])
+    # Archived runs (scripts/archive_run.py) and stored runs (scripts/dump_store.py)
+    manifests = [read_manifest(bundle) for bundle in list_bundles(str(root))]
+    store = BlobStore(default_store(str(root)))
+    manifests += [store.read_run(suffix) for suffix in store.runs()]
+    for manifest in manifests:
+        if manifest.get("suffix") and any(s + ".csv" in manifest.get("files", {}) for s in stems):
+            found.add(manifest["suffix"])
+    return sorted(found)
+
+
+def analyze_run(root, suffix, args):
+    label = suffix or "(latest)"
+    w_path = load_trace(trace_path(root, W_PATH_TRACE, suffix), W_PATH_COLUMNS)
+    engine = load_trace(trace_path(root, ENGINE_TRACE, suffix), ENGINE_COLUMNS)
+    if w_path is None and engine is None:
+        print("Error: no cycle traces for run {} in {}".format(label, root), file=sys.stderr)
+        return None
+
+    total = args.total_cycles
+    source = "--total-cycles"
+    if total is None:
+        total = read_total_cycles(trace_path(root, "transcript", suffix, ext=""))
+        source = "transcript"
+    if total is None:
+        source = "trace span (no [PERF] total cycles found)"
+
+    cls, state, t_start, traced = classify(w_path, engine, total, args.clock_period)
+    counts = np.bincount(cls, minlength=len(CLASSES))
+    total = len(cls)
+    assert counts.sum() == total
+
+    mode = "MX" if w_path is not None else "FP16 (engine trace only)"
+    print("Run {}: Total_Cyc={} from {}, {} mode, {} cycles traced, window starts at {} ps".format(
+        label, total, source, mode, traced, t_start))
+    print("  {:<22} {:>10} {:>8}".format("class", "cycles", "%"))
+    for (name, _), cyc in zip(CLASSES, counts):
+        pct = 100.0 * cyc / total if total else 0.0
+        print("  {:<22} {:>10} {:>7.2f}%".format(name, int(cyc), pct))
+    print("  {:<22} {:>10} {:>7.2f}%".format("total", total, 100.0 if total else 0.0))
+
+    windows = stall_windows(cls, state, args.top)
+    if windows:
+        print("  Top {} stall windows:".format(len(windows)))
+        print("    {:>10} {:>14} {:>8}  {:<22} {}".format("cycle", "time_ps", "length", "class", "state"))
+        for start, length, kind, st in windows:
+            print("    {:>10} {:>14} {:>8}  {:<22} {}".format(
+                start, t_start + start * args.clock_period, length,
+                CLASSES[kind][0], STATE_NAMES.get(st, st)))
+    print()
+
+    row = {"Run": label, "Total_Cyc": total}
+    row.update({col: int(c) for (_, col), c in zip(CLASSES, counts)})
+    return row
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Classify every cycle of a RedMulE run from the testbench cycle traces."
+    )
+    parser.add_argument(
+        "--dir",
+        default="target/sim/vsim",
+        help="Directory containing run dump files (default: target/sim/vsim).",
+    )
+    parser.add_argument(
+        "--suffix",
+        nargs="+",
+        default=[""],
+        help="Run suffix(es) as given to rename_dump.py (default: unsuffixed latest run).",
+    )
+    parser.add_argument(
+        "--all-suffixes",
+        action="store_true",
+        help="Analyze every renamed run found in --dir.",
+    )
+    parser.add_argument(
+        "--total-cycles",
+        type=int,
+        help="Window length in cycles (default: [PERF] total cycles from the transcript).",
+    )
+    parser.add_argument(
+        "--clock-period",
+        type=int,
+        default=1000,
+        help="Clock period in trace time units (default: 1000, TCP=1ns at 1ps).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="Number of longest stall windows to list per run (default: 5).",
+    )
+    parser.add_argument(
+        "--csv",
+        help="Write one summary row per run to this CSV.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    root = Path(args.dir)
+    if not root.is_dir():
+        print("Error: directory not found:", root, file=sys.stderr)
+        return 2
+
+    suffixes = discover_suffixes(root) if args.all_suffixes else args.suffix
+    if not suffixes:
+        print("Error: no renamed runs found in", root, file=sys.stderr)
+        return 2
+
+    rows = []
+    failed = 0
+    for suffix in suffixes:
+        try:
+            row = analyze_run(root, suffix, args)
+        except ValueError as exc:
+            print("Error: run {}: {}".format(suffix or "(latest)", exc), file=sys.stderr)
+            row = None
+        if row is None:
+            failed += 1
+        else:
+            rows.append(row)
+
+    if args.csv and rows:
+        fields = ["Run", "Total_Cyc"] + [col for _, col in CLASSES]
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        print("Wrote", args.csv)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Shared reader for the sweep result CSVs (sweep_*.csv, regress_*.csv).
+
+Every sweep runner writes one row per (Format, M, N, K) point with the
+columns listed in SWEEP_FIELDS. Older sweeps lack some columns (no
+Utilization_Pct, no cnt_rd/cnt_wr), and some runs leave fields blank or
+write the raw testbench error word ("00000000", "BLANK"). This module
+normalizes all of that so analysis tools only see ints, floats or None.
+parse_transcript() builds a row from a testbench transcript for runners
+that write sweep CSVs from Python.
+"""
+
+import csv
+import re
+from pathlib import Path
+
+
+KEY_FIELDS = ("Format", "M", "N", "K")
+
+SWEEP_FIELDS = [
+    "Format", "M", "N", "K", "Errors",
+    "Total_Cyc", "Busy_Cyc", "Busy_Pct", "Engine_Cyc", "Engine_Util_Pct",
+    "LoadStore_Cyc", "Ideal_Cyc", "Utilization_Pct",
+    "W_Load_Cyc", "W_Shift_Cyc", "W_Valid_Cyc",
+    "Stall_Events", "Stall_Cyc", "Z_Hold_Cyc", "Engine_Window_Cyc",
+    "cnt_rd", "cnt_wr",
+]
+
+FLOAT_FIELDS = {"Busy_Pct", "Engine_Util_Pct", "Utilization_Pct"}
+
+# redmule_tb.sv end-of-test line -> sweep column
+TRANSCRIPT_PATTERNS = [
+    (re.compile(r"\[PERF\] total cycles\s+:\s+(\d+)"), "Total_Cyc"),
+    (re.compile(r"\[PERF\] busy cycles\s+:\s+(\d+)"), "Busy_Cyc"),
+    (re.compile(r"\[PERF\] busy ratio\s+:\s+([\d.]+)"), "Busy_Pct"),
+    (re.compile(r"\[PERF\] engine cycles\s+:\s+(\d+)"), "Engine_Cyc"),
+    (re.compile(r"\[PERF\] engine util\s+:\s+([\d.]+)"), "Engine_Util_Pct"),
+    (re.compile(r"\[PERF\] load->store cycles\s+:\s+(\d+)"), "LoadStore_Cyc"),
+    (re.compile(r"\[PERF\] ideal cycles\s+:\s+(\d+)"), "Ideal_Cyc"),
+    (re.compile(r"\[PERF\] engine utilization\s+:\s+([\d.]+)"), "Utilization_Pct"),
+    (re.compile(r"\[PERF\] W load cycles\s+:\s+(\d+)"), "W_Load_Cyc"),
+    (re.compile(r"\[PERF\] W shift cycles\s+:\s+(\d+)"), "W_Shift_Cyc"),
+    (re.compile(r"\[PERF\] W valid cycles\s+:\s+(\d+)"), "W_Valid_Cyc"),
+    (re.compile(r"\[PERF\] engine window cycles\s+:\s+(\d+)"), "Engine_Window_Cyc"),
+    (re.compile(r"\[TB\]\[STALL\] events\s+:\s+(\d+)"), "Stall_Events"),
+    (re.compile(r"\[TB\]\[STALL\] cycles\s+:\s+(\d+)"), "Stall_Cyc"),
+    (re.compile(r"\[TB\]\[ZHOLD\] hold cycles\s+:\s+(\d+)"), "Z_Hold_Cyc"),
+    (re.compile(r"\[TB\] - cnt_rd=\s*(\d+)"), "cnt_rd"),
+    (re.compile(r"\[TB\] - cnt_wr=\s*(\d+)"), "cnt_wr"),
+    (re.compile(r"errors=([0-9a-fA-F]+)"), "Errors"),
+]
+
+# Sweep CSVs spell the format in upper case, the Makefile in lower case.
+MX_FORMATS = ("E4M3", "E5M2", "E3M2", "E2M3", "E2M1")
+ALL_FORMATS = ("FP16",) + MX_FORMATS
+
+
+def parse_int(raw, base=10):
+    """Parse an integer field in the column's base; None if absent or malformed.
+
+    A 0x prefix always means hex.
+    """
+    if raw is None:
+        return None
+    text = raw.strip()
+    if not text or text in ("--", "?", "BLANK"):
+        return None
+    if text[:2].lower() == "0x":
+        base = 16
+    try:
+        return int(text, base)
+    except ValueError:
+        return None
+
+
+def parse_errors(raw):
+    """Errors column: the testbench error word (errors=%08x, always 8 hex
+    digits) or, from older shell sweeps, a decimal error count."""
+    text = (raw or "").strip()
+    return parse_int(raw, 16 if len(text) == 8 else 10)
+
+
+def parse_float(raw):
+    if raw is None:
+        return None
+    text = raw.strip().rstrip("%")
+    if not text or text in ("--", "?"):
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def normalize_format(fmt):
+    return fmt.strip().upper()
+
+
+def point_key(row):
+    return (row["Format"], row["M"], row["N"], row["K"])
+
+
+def format_key(key):
+    fmt, m, n, k = key
+    return "{} {}x{}x{}".format(fmt, m, n, k)
+
+
+def parse_row(raw):
+    """Convert one csv.DictReader row into typed values."""
+    row = {}
+    for name, value in raw.items():
+        if name is None:
+            continue
+        if name == "Format":
+            row[name] = normalize_format(value)
+        elif name in FLOAT_FIELDS:
+            row[name] = parse_float(value)
+        elif name == "Errors":
+            row[name] = parse_errors(value)
+        else:
+            row[name] = parse_int(value)
+    return row
+
+
+def load_sweep(path):
+    """Return {(Format, M, N, K): row} for one sweep CSV.
+
+    Duplicate points keep the last occurrence, which is what the sweep
+    runners do when a point is retried within the same file.
+    """
+    points = {}
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        for raw in reader:
+            row = parse_row(raw)
+            if any(row.get(k) is None for k in KEY_FIELDS):
+                continue
+            row["_source"] = str(path)
+            points[point_key(row)] = row
+    return points
+
+
+def load_sweeps(paths):
+    """Merge several sweep CSVs; later files override earlier ones."""
+    merged = {}
+    for path in paths:
+        merged.update(load_sweep(path))
+    return merged
+
+
+def parse_transcript(path, offset=0):
+    """Sweep columns found in a testbench transcript, as raw strings.
+
+    Errors keeps the testbench's hex error word, like the shell runners.
+    "Result" is "Pass"/"Fail" when the testbench got that far. offset is a
+    byte position to start reading at, for logs that also hold build output.
+    """
+    row = {}
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            line = raw.decode(errors="replace")
+            for pattern, name in TRANSCRIPT_PATTERNS:
+                m = pattern.search(line)
+                if m:
+                    row[name] = m.group(1)
+            if "[TB] - Success!" in line:
+                row["Result"] = "Pass"
+            elif "[TB] - Fail!" in line:
+                row["Result"] = "Fail"
+    return row
+
+
+def write_sweep(path, rows, fields=None):
+    """Write rows (dicts) in the standard sweep CSV layout."""
+    fields = list(fields or SWEEP_FIELDS)
+    path = Path(path)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: ("" if row.get(k) is None else row.get(k)) for k in fields})
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Longest-predicted-first scheduling, ETA and efficiency of sweep runs.
+
+The regression queue (regression.py) hands jobs to whichever worker is free
+in the order they were queued, so queueing them longest-predicted-first is
+the LPT list-scheduling rule: its makespan is within 4/3 of the optimum
+for identical workers, and short jobs fill the gaps at the end. This
+module simulates that rule on predicted durations (for the plan and the
+live ETA) and measures a finished run against it:
+
+  * lpt_schedule() assigns durations to workers in LPT order.
+  * makespan_lower_bound() is max(total work / workers, longest job); no
+    schedule can beat it.
+  * estimate_finish() is the live ETA: it scales the remaining predictions
+    by how far off the finished jobs were, lets the running jobs finish
+    and schedules the pending ones on the same workers.
+  * efficiency() reports per-worker busy/idle time over the run's span,
+    the critical path (the job chain of the worker that finished last)
+    and the gap to the lower bound.
+"""
+
+import heapq
+import statistics
+
+
+def lpt_schedule(durations, workers, ready=None):
+    """Assign jobs to workers longest-first.
+
+    durations: {job: seconds}; ready: optional per-worker time at which
+    each worker becomes free (default all 0). Returns (makespan,
+    [[(job, start, end), ...] per worker]).
+    """
+    ready = list(ready) if ready is not None else [0.0] * workers
+    lanes = [[] for _ in ready]
+    heap = [(t, w) for w, t in enumerate(ready)]
+    heapq.heapify(heap)
+    for job, seconds in sorted(durations.items(), key=lambda kv: (-kv[1], str(kv[0]))):
+        t, w = heapq.heappop(heap)
+        lanes[w].append((job, t, t + seconds))
+        heapq.heappush(heap, (t + seconds, w))
+    makespan = max([t for t, _ in heap] + [0.0])
+    return makespan, lanes
+
+
+def makespan_lower_bound(durations, workers):
+    if not durations:
+        return 0.0
+    values = list(durations.values())
+    return max(sum(values) / max(workers, 1), max(values))
+
+
+def prediction_ratio(finished):
+    """Median actual/predicted wall time of passed jobs (1.0 if unknown)."""
+    ratios = [r["seconds"] / r["predicted_s"] for r in finished
+              if r.get("status") == "pass" and r.get("predicted_s") and r.get("seconds")]
+    return statistics.median(ratios) if ratios else 1.0
+
+
+def estimate_finish(finished, running, pending, now, workers=None):
+    """Predicted seconds from now until the last job finishes.
+
+    finished: result records (seconds, predicted_s); running: job records
+    with "started" (epoch); pending: job records with predicted_s.
+    workers defaults to the number of running jobs (at least 1).
+    Returns (eta_seconds, ratio used to correct the predictions).
+    """
+    ratio = prediction_ratio(finished)
+    workers = max(workers or len(running), len(running), 1)
+    # A job running past its corrected prediction is assumed to be nearly done.
+    ready = sorted(max(j["predicted_s"] * ratio - (now - j["started"]), 0.0) for j in running)
+    ready += [0.0] * (workers - len(ready))
+    durations = {j["id"]: j["predicted_s"] * ratio for j in pending}
+    makespan, _ = lpt_schedule(durations, workers, ready)
+    return max(makespan, max(ready)), ratio
+
+
+def efficiency(results):
+    """Efficiency figures of finished results with worker/started/finished.
+
+    Returns a dict with span, per-worker busy/idle/jobs, total idle,
+    utilization, the lower bound on the makespan and the critical path.
+    """
+    timed = [r for r in results if r.get("started") is not None and r.get("finished") is not None]
+    if not timed:
+        return None
+    t0 = min(r["started"] for r in timed)
+    t1 = max(r["finished"] for r in timed)
+    span = t1 - t0
+    per_worker = {}
+    for r in sorted(timed, key=lambda r: r["started"]):
+        per_worker.setdefault(r["worker"], []).append(r)
+    workers = {}
+    for name, jobs in per_worker.items():
+        busy = sum(r["finished"] - r["started"] for r in jobs)
+        workers[name] = {
+            "jobs": len(jobs),
+            "busy": busy,
+            "idle": span - busy,
+            "first_start": jobs[0]["started"] - t0,
+            "last_finish": jobs[-1]["finished"] - t0,
+        }
+    durations = {r["id"]: r["finished"] - r["started"] for r in timed}
+    last_worker = max(per_worker, key=lambda w: per_worker[w][-1]["finished"])
+    total_busy = sum(w["busy"] for w in workers.values())
+    bound = makespan_lower_bound(durations, len(workers))
+    return {
+        "span": span,
+        "workers": workers,
+        "total_busy": total_busy,
+        "total_idle": sum(w["idle"] for w in workers.values()),
+        "utilization": total_busy / (span * len(workers)) if span > 0 else 1.0,
+        "lower_bound": bound,
+        "longest": max(timed, key=lambda r: r["finished"] - r["started"]),
+        "critical_worker": last_worker,
+        "critical_path": [(r["id"], r["started"] - t0, r["finished"] - t0)
+                          for r in per_worker[last_worker]],
+    }
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return "{}h{:02d}m{:02d}s".format(h, m, s) if h else "{}m{:02d}s".format(m, s)
+
+
+def print_efficiency(report):
+    print("Efficiency over {} ({} workers):".format(format_duration(report["span"]), len(report["workers"])))
+    print("  {:<24} {:>5} {:>10} {:>10} {:>10} {:>10}".format(
+        "Worker", "Jobs", "Busy", "Idle", "Start", "Finish"))
+    for name in sorted(report["workers"]):
+        w = report["workers"][name]
+        print("  {:<24} {:>5} {:>10} {:>10} {:>10} {:>10}".format(
+            name, w["jobs"], format_duration(w["busy"]), format_duration(w["idle"]),
+            "+" + format_duration(w["first_start"]), "+" + format_duration(w["last_finish"])))
+    print("  Utilization {:.1f}%, total idle {}".format(
+        100.0 * report["utilization"], format_duration(report["total_idle"])))
+    longest = report["longest"]
+    print("  Makespan {} vs lower bound {} (max(work/workers, longest job {} = {}))".format(
+        format_duration(report["span"]), format_duration(report["lower_bound"]),
+        longest["id"], format_duration(longest["finished"] - longest["started"])))
+    print("  Critical path ({}):".format(report["critical_worker"]))
+    for job, start, end in report["critical_path"]:
+        print("    +{:>9} .. +{:>9}  {}".format(format_duration(start), format_duration(end), job))
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""Transaction-level model of RedMulE's TCDM traffic.
+
+Mirrors the tiler (rtl/redmule_tiler.sv), the memory scheduler
+(rtl/redmule_memory_scheduler.sv) and the streamer address generators to
+produce, for any (Format, M, N, K), the list of stream launches, the TCDM
+beats each one moves and (optionally) the full address trace. No timing is
+simulated, so thousands of configurations run per second.
+
+Streams modelled:
+    X, W, Y          loads (X launched TOT_X_READ times, W cycled once per
+                     M-tile, Y preloaded once per output tile)
+    Z                store (FP16 rows, or packed MX payload at Z_OUT_ADDR)
+    X_EXP, W_EXP     MX shared-exponent loads. They are fetched once into
+                     the exponent buffers; replays for later K-tiles (X) and
+                     M-tiles (W) use the buffers' mark/rewind and do not touch
+                     TCDM. The model reports those replays separately.
+    Z_EXP            MX exponent store
+
+Every stream whose req_start is gated by first_load (Y, X_EXP, W_EXP) is
+relaunched by the memory scheduler if it finishes while the controller is
+still in REDMULE_STARTING. This happens when the whole transfer fits in the
+stream's downstream buffering. The number of launches depends on how long
+STARTING lasts, modelled as STARTING_BASE + STARTING_PER_N_TILE * N-tiles
+cycles, with RELAUNCH_GAP idle cycles between launches. These three
+constants are calibrated on the thorough/pipelined sweeps. They are the only
+non-RTL-derived part of the model. The measured relaunch count itself varies
+by a few beats between RTL revisions of the same point, so `check` accepts a
+relative tolerance instead of requiring exact cnt_rd matches.
+
+The testbench reports cnt_rd/cnt_wr as the sum of the request counters of
+the first TB_COUNTED_PORTS 32-bit TCDM ports (redmule_tb.sv). A wide beat
+requests every port, so one beat counts TB_COUNTED_PORTS times.
+
+Usage:
+    # Counts for a few configurations (cartesian product)
+    python3 scripts/tcdm_model.py run --format e4m3 fp16 -M 64 128 -N 128 -K 128
+
+    # Address trace for one configuration
+    python3 scripts/tcdm_model.py run --format e4m3 -M 64 -N 64 -K 64 --trace trace.csv
+
+    # Compare with measured cnt_rd/cnt_wr in sweep CSVs
+    python3 scripts/tcdm_model.py check --sweep sweep_pipelined_20260502_154401.csv
+"""
+
+import argparse
+import csv
+import sys
+from pathlib import Path
+
+from rtl_params import DEFAULT_PKG, load_pkg_params
+from sweep_csv import ALL_FORMATS, format_key, load_sweeps
+
+
+# Ports summed into cnt_rd/cnt_wr by redmule_tb.sv (i_dummy_dmemory.cnt_rd[0..8]).
+TB_COUNTED_PORTS = 9
+
+# Default operand layout, matching the dummy data memory in redmule_tb.sv.
+DEFAULT_ADDRS = {
+    "x": 0x1C010000,
+    "w": 0x1C014000,
+    "y": 0x1C018000,
+    "z_out": 0x1C01C000,
+    "x_exp": 0x1C020000,
+    "w_exp": 0x1C021000,
+    "z_exp": 0x1C022000,
+}
+
+# Load FIFO depth of the Y source in redmule_streamer.sv (LoadFifoDepths).
+Y_FIFO_DEPTH = 32
+# Exponent stream FIFO (redmule_top.sv) plus exponent buffer rows.
+EXP_FIFO_DEPTH = 4
+EXP_BUFFER_DEPTH = 1024
+
+# STARTING-phase relaunch calibration (cycles).
+STARTING_BASE = 40
+STARTING_PER_N_TILE = 2
+RELAUNCH_GAP = 2
+
+LOAD_STREAMS = ("X", "W", "Y", "X_EXP", "W_EXP")
+STORE_STREAMS = ("Z", "Z_EXP")
+
+
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+def pack_factor(fmt):
+    """Elements per 16-bit memory word as seen by the tiler and scheduler."""
+    if fmt == "FP16":
+        return 1
+    return 4 if fmt == "E2M1" else 2
+
+
+class Geometry:
+    """Constants the tiler and scheduler derive from redmule_pkg.sv."""
+
+    def __init__(self, pkg=DEFAULT_PKG):
+        p = load_pkg_params(pkg)
+        self.W = p["ARRAY_WIDTH"]
+        self.H = p["ARRAY_HEIGHT"]
+        self.tile = p["TOT_DEPTH"]
+        self.beat_bytes = p["DATAW"] // 8
+        self.words_per_beat = p["DATAW"] // 16
+        self.elem_bytes = p["BITW"] // 8
+        # JMP in the memory scheduler: one DATAW beat in bytes
+        self.jmp = p["NumByte"] * (p["DATA_W"] // p["MemDw"] - 1)
+
+
+class Launch:
+    """One req_start of a stream source or sink."""
+
+    __slots__ = ("stream", "tile", "base", "tot_len", "d0_len", "d0_stride",
+                 "d1_len", "d1_stride", "d2_stride", "relaunch")
+
+    def __init__(self, stream, tile, base, tot_len, d0_len=1, d0_stride=0,
+                 d1_len=None, d1_stride=0, d2_stride=0, relaunch=False):
+        self.stream = stream
+        self.tile = tile
+        self.base = base
+        self.tot_len = tot_len
+        self.d0_len = d0_len
+        self.d0_stride = d0_stride
+        self.d1_len = tot_len if d1_len is None else d1_len
+        self.d1_stride = d1_stride
+        self.d2_stride = d2_stride
+        self.relaunch = relaunch
+
+    def addresses(self):
+        """Byte address of every beat, following the hwpe address generator."""
+        d0 = d1 = d2 = 0
+        for _ in range(self.tot_len):
+            yield self.base + d0 * self.d0_stride + d1 * self.d1_stride + d2 * self.d2_stride
+            d0 += 1
+            if d0 == self.d0_len:
+                d0 = 0
+                d1 += 1
+                if d1 == self.d1_len:
+                    d1 = 0
+                    d2 += 1
+
+
+class TcdmModel:
+    def __init__(self, geom=None, addrs=None, gemm=True,
+                 starting_base=STARTING_BASE, starting_per_n_tile=STARTING_PER_N_TILE,
+                 relaunch_gap=RELAUNCH_GAP):
+        self.g = geom or Geometry()
+        self.addrs = dict(DEFAULT_ADDRS, **(addrs or {}))
+        self.gemm = gemm
+        self.starting_base = starting_base
+        self.starting_per_n_tile = starting_per_n_tile
+        self.relaunch_gap = relaunch_gap
+
+    def tiler(self, fmt, M, N, K):
+        """Register values produced by redmule_tiler for this job."""
+        g = self.g
+        pf = pack_factor(fmt)
+        m_cfg, n_cfg = ceil_div(M, pf), ceil_div(N, pf)
+        # Unpacked sizes used by the buffers and the systolic control
+        m_sys, n_sys = m_cfg * pf, n_cfg * pf
+        t = {"pf": pf, "m_cfg": m_cfg, "n_cfg": n_cfg, "M": M, "N": N, "K": K}
+        t["x_rows_iter"] = ceil_div(m_sys, g.W)
+        t["x_rows_lftovr"] = m_sys % g.W
+        t["x_cols_iter"] = ceil_div(n_sys, g.tile)
+        t["w_cols_iter"] = ceil_div(K, g.tile)
+        t["w_rows_iter"] = ceil_div(n_sys, g.H) * g.H
+        t["tot_x_read"] = t["x_rows_iter"] * t["w_cols_iter"] * (1 if pf > 1 else t["x_cols_iter"])
+        t["x_d1_stride"] = g.elem_bytes * n_cfg
+        t["x_rows_offs"] = g.W * t["x_d1_stride"]
+        t["w_d0_stride"] = g.elem_bytes * K
+        t["yz_tot_len"] = g.W * t["x_rows_iter"] * t["w_cols_iter"]
+        t["w_tot_len"] = t["w_rows_iter"] * t["x_rows_iter"] * t["w_cols_iter"]
+        return t
+
+    def starting_cycles(self, t):
+        return self.starting_base + self.starting_per_n_tile * t["x_cols_iter"]
+
+    def _starting_launches(self, beats, capacity, t):
+        """How many times a first_load-gated source runs during STARTING."""
+        if beats > capacity:
+            return 1
+        return max(1, ceil_div(self.starting_cycles(t), beats + self.relaunch_gap))
+
+    def launches(self, fmt, M, N, K):
+        """All stream launches for one job, in scheduler issue order."""
+        g = self.g
+        a = self.addrs
+        t = self.tiler(fmt, M, N, K)
+        mx = t["pf"] > 1
+        out = []
+
+        # first_load phase: W, Y, Z sink and exponent streams start together.
+        if mx:
+            w_beats = ceil_div(K * t["n_cfg"], g.words_per_beat)
+            for m in range(t["x_rows_iter"]):
+                out.append(Launch("W", (m, 0), a["w"], w_beats, d1_stride=g.beat_bytes))
+        else:
+            out.append(Launch("W", (0, 0), a["w"], t["w_tot_len"],
+                              d0_len=t["w_rows_iter"], d0_stride=t["w_d0_stride"],
+                              d1_len=t["w_cols_iter"], d1_stride=g.jmp))
+
+        if self.gemm:
+            y_runs = self._starting_launches(t["yz_tot_len"], Y_FIFO_DEPTH, t)
+            for i in range(y_runs):
+                out.append(Launch("Y", (0, 0), a["y"], t["yz_tot_len"],
+                                  d0_len=g.W, d0_stride=t["w_d0_stride"],
+                                  d1_len=t["w_cols_iter"], d1_stride=g.jmp,
+                                  d2_stride=g.W * t["w_d0_stride"], relaunch=i > 0))
+
+        if mx:
+            x_exp = ceil_div(ceil_div(M * N, 32), g.beat_bytes)
+            w_exp = ceil_div(ceil_div(N * K, 32) * 4, g.beat_bytes)
+            x_cap = EXP_FIFO_DEPTH + EXP_BUFFER_DEPTH // g.beat_bytes
+            w_cap = EXP_FIFO_DEPTH + EXP_BUFFER_DEPTH * 4 // g.beat_bytes
+            for stream, beats, cap in (("X_EXP", x_exp, x_cap), ("W_EXP", w_exp, w_cap)):
+                for i in range(self._starting_launches(beats, cap, t)):
+                    out.append(Launch(stream, (0, 0), a[stream.lower()], beats,
+                                      d1_stride=g.beat_bytes, relaunch=i > 0))
+
+        # X launches: x_cols inner, w_iters (K-tiles) middle, x_rows (M-tiles) outer.
+        for m in range(t["x_rows_iter"]):
+            last_m = m == t["x_rows_iter"] - 1
+            rows = t["x_rows_lftovr"] if (last_m and t["x_rows_lftovr"]) else g.W
+            for k in range(t["w_cols_iter"]):
+                if mx:
+                    words = ceil_div(rows, t["pf"]) * N
+                    beats = ceil_div(words, g.words_per_beat)
+                    out.append(Launch("X", (m, k), a["x"] + m * t["x_rows_offs"], beats,
+                                      d1_stride=g.beat_bytes))
+                else:
+                    for n in range(t["x_cols_iter"]):
+                        out.append(Launch("X", (m, k), a["x"] + m * t["x_rows_offs"] + n * g.jmp,
+                                          rows, d1_len=rows, d1_stride=t["x_d1_stride"]))
+
+        if mx:
+            z_beats = ceil_div(ceil_div(M * K, t["pf"]), g.words_per_beat)
+            out.append(Launch("Z", (0, 0), a["z_out"], z_beats, d1_stride=g.beat_bytes))
+            z_exp = ceil_div(ceil_div(M * K, 32), g.beat_bytes)
+            out.append(Launch("Z_EXP", (0, 0), a["z_exp"], z_exp, d1_stride=g.beat_bytes))
+        else:
+            out.append(Launch("Z", (0, 0), a["y"], t["yz_tot_len"],
+                              d0_len=g.W, d0_stride=t["w_d0_stride"],
+                              d1_len=t["w_cols_iter"], d1_stride=g.jmp,
+                              d2_stride=g.W * t["w_d0_stride"]))
+        return t, out
+
+    def exp_replays(self, t):
+        """Exponent-buffer activity (no TCDM traffic) for an MX job."""
+        if t["pf"] == 1:
+            return {}
+        mt, kt = t["x_rows_iter"], t["w_cols_iter"]
+        return {
+            "x_exp_marks": mt - 1,
+            "x_exp_rewinds": mt * (kt - 1),
+            "w_exp_rewinds": mt - 1,
+            # X: one N-exponent segment per M-tile, replayed for every K-tile
+            "x_exp_consumed": mt * kt * t["N"],
+            # W: every block exponent, replayed for every M-tile
+            "w_exp_consumed": mt * ceil_div(t["N"] * t["K"], 32),
+        }
+
+    def counts(self, fmt, M, N, K):
+        """Per-stream beats plus testbench-equivalent cnt_rd/cnt_wr."""
+        t, launches = self.launches(fmt, M, N, K)
+        beats = {s: 0 for s in LOAD_STREAMS + STORE_STREAMS}
+        relaunch = 0
+        for ln in launches:
+            beats[ln.stream] += ln.tot_len
+            if ln.relaunch:
+                relaunch += ln.tot_len
+        rd = sum(beats[s] for s in LOAD_STREAMS)
+        # The Z exponent sink does not show up in the counted ports.
+        wr = beats["Z"]
+        res = {
+            "Format": fmt, "M": M, "N": N, "K": K,
+            "launches": len(launches),
+            "rd_beats": rd,
+            "wr_beats": wr,
+            "relaunch_beats": relaunch,
+            "cnt_rd": rd * TB_COUNTED_PORTS,
+            "cnt_wr": wr * TB_COUNTED_PORTS,
+        }
+        res.update({s.lower() + "_beats": beats[s] for s in beats})
+        res.update(self.exp_replays(t))
+        return res
+
+    def trace(self, fmt, M, N, K):
+        """Yield (seq, stream, op, m_tile, k_tile, launch, beat, addr) rows."""
+        _, launches = self.launches(fmt, M, N, K)
+        seq = 0
+        for li, ln in enumerate(launches):
+            op = "wr" if ln.stream in STORE_STREAMS else "rd"
+            for bi, addr in enumerate(ln.addresses()):
+                yield (seq, ln.stream, op, ln.tile[0], ln.tile[1], li, bi, addr)
+                seq += 1
+
+
+COUNT_FIELDS = ["Format", "M", "N", "K", "cnt_rd", "cnt_wr", "rd_beats", "wr_beats",
+                "x_beats", "w_beats", "y_beats", "x_exp_beats", "w_exp_beats",
+                "z_beats", "z_exp_beats", "relaunch_beats", "launches",
+                "x_exp_marks", "x_exp_rewinds", "w_exp_rewinds",
+                "x_exp_consumed", "w_exp_consumed"]
+
+
+def model_from_args(args):
+    addrs = {}
+    for name in DEFAULT_ADDRS:
+        value = getattr(args, name + "_addr", None)
+        if value is not None:
+            addrs[name] = int(value, 0)
+    return TcdmModel(
+        geom=Geometry(args.pkg), addrs=addrs, gemm=not args.matmul,
+        starting_base=args.starting_base, starting_per_n_tile=args.starting_per_n_tile,
+        relaunch_gap=args.relaunch_gap,
+    )
+
+
+def cmd_run(args):
+    model = model_from_args(args)
+    formats = [f.upper() for f in args.format]
+    for f in formats:
+        if f not in ALL_FORMATS:
+            print("Error: unknown format '{}' (choose from {})".format(f, ", ".join(ALL_FORMATS)),
+                  file=sys.stderr)
+            return 2
+
+    rows = [model.counts(f, m, n, k)
+            for f in formats for m in args.M for n in args.N for k in args.K]
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=COUNT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        print("Wrote {} configurations to {}".format(len(rows), args.csv))
+    else:
+        for r in rows:
+            parts = ["{}={}".format(s, r[s.lower() + "_beats"]) for s in LOAD_STREAMS + STORE_STREAMS
+                     if r[s.lower() + "_beats"]]
+            print("{:<20} cnt_rd={:<6} cnt_wr={:<6} beats: {}{}".format(
+                format_key((r["Format"], r["M"], r["N"], r["K"])), r["cnt_rd"], r["cnt_wr"],
+                " ".join(parts),
+                "  (STARTING relaunch {})".format(r["relaunch_beats"]) if r["relaunch_beats"] else ""))
+
+    if args.trace:
+        if len(rows) != 1:
+            print("Error: --trace needs exactly one configuration", file=sys.stderr)
+            return 2
+        r = rows[0]
+        n = 0
+        with open(args.trace, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["seq", "stream", "op", "m_tile", "k_tile", "launch", "beat", "addr"])
+            for row in model.trace(r["Format"], r["M"], r["N"], r["K"]):
+                writer.writerow(row[:-1] + ("0x{:08x}".format(row[-1]),))
+                n += 1
+        print("Wrote {} beats to {}".format(n, args.trace))
+    return 0
+
+
+def cmd_check(args):
+    for path in args.sweep:
+        if not Path(path).is_file():
+            print("Error: sweep CSV not found:", path, file=sys.stderr)
+            return 2
+    model = model_from_args(args)
+    points = [(k, r) for k, r in sorted(load_sweeps(args.sweep).items())
+              if r.get("cnt_rd") is not None and r.get("cnt_wr") is not None]
+    if not points:
+        print("Error: no points with cnt_rd/cnt_wr in the given sweeps", file=sys.stderr)
+        return 2
+
+    exact = {"cnt_rd": 0, "cnt_wr": 0}
+    abs_err = {"cnt_rd": [], "cnt_wr": []}
+    bad = 0
+    for key, row in points:
+        pred = model.counts(*key)
+        line = []
+        over = False
+        for field in ("cnt_rd", "cnt_wr"):
+            diff = pred[field] - row[field]
+            abs_err[field].append(abs(diff))
+            if diff == 0:
+                exact[field] += 1
+            pct = 100.0 * abs(diff) / row[field] if row[field] else 0.0
+            if pct > args.tolerance:
+                over = True
+            line.append("{} model={} meas={} ({:+d}, {:.1f}%)".format(field, pred[field], row[field], diff, pct))
+        if over:
+            bad += 1
+        if over or args.verbose:
+            print("  {:<5} {:<20} {}".format("FAIL" if over else "ok", format_key(key), "  ".join(line)))
+
+    n = len(points)
+    print("{} points checked".format(n))
+    for field in ("cnt_rd", "cnt_wr"):
+        errs = abs_err[field]
+        print("  {}: exact {}/{}, mean |err| {:.1f} ({:.1f} beats), max |err| {}".format(
+            field, exact[field], n, sum(errs) / n, sum(errs) / n / TB_COUNTED_PORTS, max(errs)))
+    print("  {} point(s) outside {:.1f}% tolerance".format(bad, args.tolerance))
+    return 1 if bad else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Transaction-level model of RedMulE TCDM traffic")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p):
+        p.add_argument("--pkg", default=str(DEFAULT_PKG), help="Path to redmule_pkg.sv")
+        p.add_argument("--matmul", action="store_true", help="MATMUL job (no Y preload)")
+        p.add_argument("--starting-base", type=int, default=STARTING_BASE,
+                       help="STARTING phase length in cycles (default: %(default)s)")
+        p.add_argument("--starting-per-n-tile", type=int, default=STARTING_PER_N_TILE,
+                       help="Extra STARTING cycles per N-tile (default: %(default)s)")
+        p.add_argument("--relaunch-gap", type=int, default=RELAUNCH_GAP,
+                       help="Idle cycles between relaunches of one stream (default: %(default)s)")
+        for name in DEFAULT_ADDRS:
+            p.add_argument("--{}-addr".format(name.replace("_", "-")), dest=name + "_addr",
+                           help="Base address of {} (default: 0x{:08x})".format(name, DEFAULT_ADDRS[name]))
+
+    p_run = sub.add_parser("run", help="Model one or more configurations")
+    p_run.add_argument("--format", nargs="+", default=["FP16"], help="FP16 and/or MX formats")
+    p_run.add_argument("-M", type=int, nargs="+", required=True)
+    p_run.add_argument("-N", type=int, nargs="+", required=True)
+    p_run.add_argument("-K", type=int, nargs="+", required=True)
+    p_run.add_argument("--csv", help="Write per-configuration counts to this CSV")
+    p_run.add_argument("--trace", help="Write the beat-level address trace (single configuration)")
+    add_common(p_run)
+
+    p_chk = sub.add_parser("check", help="Compare against cnt_rd/cnt_wr in sweep CSVs")
+    p_chk.add_argument("--sweep", nargs="+", required=True, help="Sweep CSV(s) with cnt_rd/cnt_wr")
+    p_chk.add_argument("--tolerance", type=float, default=5.0,
+                       help="Allowed relative error in percent (default: %(default)s)")
+    p_chk.add_argument("--verbose", action="store_true", help="Print every point, not only failures")
+    add_common(p_chk)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "run":
+        return cmd_run(args)
+    return cmd_check(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
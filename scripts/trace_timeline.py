@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Export testbench CSV traces as a Chrome Trace Event / Perfetto timeline.
+
+Reads the dumps redmule_tb.sv writes next to the transcript
+
+    engine_ingress_ctrl_trace.csv  X/W pack, unpack, mux and FIFO handshakes
+                                   and scheduler state, sampled on every
+                                   X/W buffer read (XBUFQ/WBUFQ rows)
+    w_path_cycle_trace.csv         W path handshakes, every cycle (MX only)
+    engine_boundary_trace.csv      Z buffer source fill/ready and Z FSM state
+    z_path_trace.csv               Z data path events (ZSRC, ZSRC_ACC, ZQ,
+                                   ZMUX, ZHS)
+
+and writes one JSON file that chrome://tracing and ui.perfetto.dev open
+directly. Each input file is a process. Each handshake is its own track, and
+every interval where valid=1 and ready=0 is rendered as a slice. Scheduler
+and Z-buffer FSM states are slices on a state track, and z_path events are
+instants on one track per event type.
+
+Traces are event-sampled (except the W-path one), so a slice runs from the
+first sample where valid && !ready holds to the first later sample where it
+does not. Rows are streamed: memory use does not depend on the trace size.
+Output ending in .gz is gzip-compressed (Perfetto reads it as is).
+
+Usage:
+    python3 scripts/trace_timeline.py -o timeline.json
+    python3 scripts/trace_timeline.py --suffix mx96 -o mx96.json.gz --start 200000 --end 900000
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+from pathlib import Path
+
+from stall_breakdown import STATE_NAMES, trace_path
+from dump_archive import dump_exists, open_dump
+
+
+# Per-file track layout. Handshakes are (track, valid column, ready column);
+# levels are (track, column, value names or None, value treated as inactive).
+SOURCES = [
+    {
+        "stem": "engine_ingress_ctrl_trace",
+        "name": "ingress",
+        "handshakes": [
+            ("x_packed", "x_packed_valid", "x_packed_ready"),
+            ("x_mux", "x_mux_valid", "x_mux_ready"),
+            ("x_fifo", "x_fifo_valid", "x_fifo_ready"),
+            ("w_packed", "w_packed_valid", "w_packed_ready"),
+            ("w_mux", "w_mux_valid", "w_mux_ready"),
+            ("w_fifo", "w_fifo_valid", "w_fifo_ready"),
+        ],
+        "levels": [
+            ("scheduler", "state", STATE_NAMES, 0),
+            ("stall_engine", "stall_engine", None, 0),
+        ],
+    },
+    {
+        "stem": "w_path_cycle_trace",
+        "name": "w_path",
+        "handshakes": [
+            ("mx_dec", "mx_dec_v", "mx_dec_r"),
+            ("w_raw", "w_raw_v", "w_raw_r"),
+            ("w_packed", "w_packed_v", "w_packed_r"),
+            ("w_mux", "w_mux_v", "w_mux_r"),
+            ("w_fifo", "w_fifo_v", "w_fifo_r"),
+            ("y", "y_valid", "y_ready"),
+        ],
+        "levels": [
+            ("scheduler", "state", STATE_NAMES, 0),
+            ("stall_engine", "stall", None, 0),
+            ("w_load", "w_load", None, 0),
+            ("w_shift", "w_shift", None, 0),
+        ],
+    },
+    {
+        "stem": "engine_boundary_trace",
+        "name": "boundary",
+        "handshakes": [
+            ("z_src", "fill", "ready"),
+        ],
+        "levels": [
+            ("z_state", "z_state", None, 0),
+            ("stall_engine", "stall_engine", None, 0),
+        ],
+    },
+    {
+        "stem": "z_path_trace",
+        "name": "z_path",
+        "handshakes": [],
+        "levels": [],
+        "events": "event",
+    },
+]
+
+
+class TraceWriter:
+    """Streaming writer for the Chrome Trace Event JSON array format."""
+
+    def __init__(self, path):
+        path = str(path)
+        if path.endswith(".gz"):
+            self.f = gzip.open(path, "wt")
+        else:
+            self.f = open(path, "w")
+        self.f.write('{"displayTimeUnit":"ns","traceEvents":[\n')
+        self.first = True
+        self.count = 0
+
+    def emit(self, event):
+        if not self.first:
+            self.f.write(",\n")
+        self.f.write(json.dumps(event, separators=(",", ":")))
+        self.first = False
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]}\n")
+        self.f.close()
+
+
+def to_us(t_ps):
+    return t_ps / 1e6
+
+
+def bit(value):
+    return value == "1"
+
+
+class Track:
+    """One timeline track: an open slice is (name, start time, samples)."""
+
+    def __init__(self, writer, pid, tid):
+        self.writer = writer
+        self.pid = pid
+        self.tid = tid
+        self.open = None
+
+    def update(self, t, name, args=None):
+        if self.open is not None and self.open[0] == name:
+            self.open[2] += 1
+            return
+        self.flush(t)
+        if name is not None:
+            self.open = [name, t, 1, args]
+
+    def flush(self, t):
+        if self.open is None:
+            return
+        name, start, samples, args = self.open
+        event_args = {"samples": samples}
+        if args:
+            event_args.update(args)
+        self.writer.emit({"name": name, "ph": "X", "pid": self.pid, "tid": self.tid,
+                          "ts": to_us(start), "dur": to_us(max(t - start, 0)),
+                          "args": event_args})
+        self.open = None
+
+
+def export_source(writer, path, source, pid, label, t_start, t_end):
+    """Stream one CSV trace into the writer. Returns the number of rows used."""
+    writer.emit({"name": "process_name", "ph": "M", "pid": pid,
+                 "args": {"name": "{} {}".format(label, source["name"]).strip()}})
+    with open_dump(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        col = {name: i for i, name in enumerate(header)}
+        width = len(header)
+
+        tracks = []
+        tid = 0
+        for track, valid, ready in source["handshakes"]:
+            if valid not in col or ready not in col:
+                print("Warning: {}: no {}/{} columns, skipping {}".format(
+                    path.name, valid, ready, track), file=sys.stderr)
+                continue
+            tid += 1
+            writer.emit({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                         "args": {"name": track + " valid&!ready"}})
+            tracks.append(("hs", Track(writer, pid, tid), col[valid], col[ready], track))
+        for track, column, names, inactive in source["levels"]:
+            if column not in col:
+                continue
+            tid += 1
+            writer.emit({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                         "args": {"name": track}})
+            tracks.append(("lvl", Track(writer, pid, tid), col[column], names, (track, inactive)))
+
+        event_col = col.get(source.get("events"))
+        event_tids = {}
+
+        rows = 0
+        t = None
+        for row in reader:
+            if not row:
+                continue
+            try:
+                t = int(row[0])
+            except ValueError:
+                continue
+            if t_start is not None and t < t_start:
+                continue
+            if t_end is not None and t > t_end:
+                break
+            rows += 1
+
+            if event_col is not None and len(row) > event_col:
+                name = row[event_col]
+                if name not in event_tids:
+                    tid += 1
+                    event_tids[name] = tid
+                    writer.emit({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                                 "args": {"name": name}})
+                writer.emit({"name": name, "ph": "i", "s": "t", "pid": pid,
+                             "tid": event_tids[name], "ts": to_us(t),
+                             "args": {"line": row[2] if len(row) > 2 else ""}})
+
+            if len(row) != width:
+                continue
+            for kind, track, a, b, c in tracks:
+                if kind == "hs":
+                    stalled = bit(row[a]) and not bit(row[b])
+                    track.update(t, c if stalled else None)
+                else:
+                    value = row[a]
+                    name, inactive = c
+                    if value == str(inactive) or not value.isdigit():
+                        track.update(t, None)
+                    else:
+                        shown = b.get(int(value), value) if b else (
+                            name if value == "1" else "{}={}".format(name, value))
+                        track.update(t, shown)
+
+        if t is not None:
+            for _, track, _, _, _ in tracks:
+                track.flush(t)
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Convert RedMulE testbench CSV traces to a Chrome/Perfetto timeline."
+    )
+    parser.add_argument(
+        "--dir",
+        default="target/sim/vsim",
+        help="Directory containing run dump files (default: target/sim/vsim).",
+    )
+    parser.add_argument(
+        "--suffix",
+        nargs="+",
+        default=[""],
+        help="Run suffix(es) as given to rename_dump.py; each run gets its own processes.",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default="timeline.json",
+        help="Output JSON file, gzip-compressed if it ends in .gz (default: timeline.json).",
+    )
+    parser.add_argument(
+        "--start",
+        type=int,
+        help="Drop samples before this time (trace units, ps).",
+    )
+    parser.add_argument(
+        "--end",
+        type=int,
+        help="Stop reading each trace after this time (trace units, ps).",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=[s["name"] for s in SOURCES],
+        help="Export only these traces (default: all present).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    root = Path(args.dir)
+    if not root.is_dir():
+        print("Error: directory not found:", root, file=sys.stderr)
+        return 2
+
+    writer = TraceWriter(args.output)
+    pid = 0
+    found = 0
+    try:
+        for suffix in args.suffix:
+            for source in SOURCES:
+                if args.only and source["name"] not in args.only:
+                    continue
+                path = trace_path(root, source["stem"], suffix)
+                if not dump_exists(path):
+                    continue
+                pid += 1
+                found += 1
+                rows = export_source(writer, path, source, pid, suffix, args.start, args.end)
+                print("{}: {} rows".format(path.name, rows))
+    finally:
+        writer.close()
+
+    if not found:
+        print("Error: no traces found in", root, file=sys.stderr)
+        return 1
+    print("Wrote {} events to {}".format(writer.count, args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,9 @@ import sys, re, os
 import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'MX'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'common'))
 from mx_fp_golden import mxfp8_decode_bits, encode_block_fp16_to_mx
+from dump_archive import open_dump
 
 def parse_c_header_array(fn):
     with open(fn) as f:
@@ -42,14 +44,14 @@ w_q = encode_decode_mx(w_fp16, MX_BLOCK)
 
 # Read engine X inputs: 1024 values per line (32w × 32h)
 x_lines = []
-with open('target/sim/vsim/engine_x_inputs.txt') as f:
+with open_dump('target/sim/vsim/engine_x_inputs.txt') as f:
     for line in f:
         vals = [int(x, 16) for x in line.strip().split()]
         x_lines.append(vals)
 
 # Read engine W inputs: 32 values per line
 w_lines = []
-with open('target/sim/vsim/engine_w_inputs.txt') as f:
+with open_dump('target/sim/vsim/engine_w_inputs.txt') as f:
     for line in f:
         vals = [int(x, 16) for x in line.strip().split()]
         w_lines.append(vals)
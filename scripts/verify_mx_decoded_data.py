@@ -8,7 +8,9 @@ import sys, re, os
 import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'MX'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'common'))
 from mx_fp_golden import mxfp8_decode_bits, encode_block_fp16_to_mx
+from dump_archive import open_dump
 
 def parse_c_header_array(filename):
     with open(filename, 'r') as f:
@@ -64,13 +66,13 @@ dec_fp16_file = 'target/sim/vsim/mx_decoder_fp16_outputs.txt'
 dec_target_file = 'target/sim/vsim/mx_decoder_targets.txt'
 
 dec_fp16_lines = []
-with open(dec_fp16_file) as f:
+with open_dump(dec_fp16_file) as f:
     for line in f:
         vals = [int(x, 16) for x in line.strip().split()]
         dec_fp16_lines.append(vals)
 
 dec_targets = []
-with open(dec_target_file) as f:
+with open_dump(dec_target_file) as f:
     for line in f:
         dec_targets.append(line.strip())
 
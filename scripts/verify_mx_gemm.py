@@ -29,6 +29,8 @@ sys.path.insert(0, os.path.join(GOLDEN_DIR, "common"))
 
 from mx_fp_golden import mxfp8_decode_bits, encode_block_fp16_to_mx
 from redmule_fma import matrix_multiply_with_bittrue_fma
+from dump_archive import open_dump
+import profiling
 
 
 def load_mx_data(data_path, exp_path, lanes_per_block=32, exp_format='compact-32bit'):
@@ -140,7 +142,7 @@ def encode_to_mx(fp16_values, lanes_per_block=32):
 def load_rtl_output(output_path, lanes_per_block=32, num_blocks=None):
     """Load MX encoder output file - packed hex format like inputs."""
     all_lines = []
-    with open(output_path) as f:
+    with open_dump(output_path) as f:
         for line in f:
             line = line.strip()
             if line and not line.startswith('//') and not line.startswith('#'):
@@ -170,7 +172,7 @@ def load_rtl_output(output_path, lanes_per_block=32, num_blocks=None):
 def load_rtl_memory(memory_path, num_words):
     """Load RTL memory dump (32-bit words in hex format)."""
     fp8_values = []
-    with open(memory_path) as f:
+    with open_dump(memory_path) as f:
         for idx, line in enumerate(f):
             if idx >= num_words:
                 break
@@ -193,7 +195,7 @@ def parse_fp16_header(path):
 def load_fp16_dump(path):
     """Parse a plain-text FP16 dump (hex values separated by whitespace)."""
     values = []
-    with open(path) as f:
+    with open_dump(path) as f:
         for line in f:
             for token in line.strip().split():
                 if len(token) >= 1:
@@ -225,11 +227,14 @@ def main():
     parser.add_argument("--w-fp16-header", type=str, default=None, help="Optional FP16 header for W (overrides MX inputs)")
     parser.add_argument("--y-fp16-header", type=str, default="sw/inc/y_input.h",
                         help="FP16 header for Y accumulator (default: sw/inc/y_input.h)")
+    profiling.add_profile_args(parser)
     args = parser.parse_args()
+    prof = profiling.start("verify_mx_gemm", args)
     
     print(f"Verifying MX GEMM: {args.M}×{args.N} @ {args.N}×{args.K}")
     
     # Load MX inputs
+    prof.mark("load_inputs")
     print(f"\n1. Loading inputs...")
     if args.x_fp16_header:
         x_path = args.x_fp16_header if os.path.isabs(args.x_fp16_header) else os.path.join(args.mx_dir, args.x_fp16_header)
@@ -294,6 +299,7 @@ def main():
         y_fp16 = [0] * (args.M * args.K)
 
     # Perform GEMM
+    prof.mark("gemm")
     print(f"\n2. Performing FP16 GEMM...")
     z_fp16_golden = perform_gemm_fp16(x_fp16, w_fp16, y_fp16, args.M, args.N, args.K)
     print(f"   Z: {len(z_fp16_golden)} FP16 values")
@@ -303,11 +309,13 @@ def main():
     z_exp_golden = []
 
     # Encode to MX (for MX comparison fallback)
+    prof.mark("encode")
     print(f"\n3. Encoding result to MX format...")
     z_mx_golden, z_exp_golden = encode_to_mx(z_fp16_golden, args.lanes)
     print(f"   Z_MX: {len(z_mx_golden)} FP8 values ({len(z_exp_golden)} blocks)")
 
     # Load RTL output
+    prof.mark("load_rtl")
     print(f"\n4. Loading RTL output from {args.output_dir}...")
     expected_values = args.M * args.K
 
@@ -334,6 +342,7 @@ def main():
             print(f"   RTL Z: {len(rtl_fp8)} FP8 values ({len(rtl_fp8)//args.lanes} blocks)")
     
     # Load RTL exponents if available
+    prof.mark("compare")
     if rtl_fp16 is not None:
         print(f"\n5. Comparing FP16 outputs...")
         compare_limit = args.limit if args.limit is not None else len(z_fp16_golden)
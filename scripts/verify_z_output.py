@@ -4,7 +4,9 @@ import sys, re, os
 import numpy as np
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'MX'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'golden-model', 'common'))
 from mx_fp_golden import mxfp8_decode_bits, encode_block_fp16_to_mx
+from dump_archive import open_dump
 
 def parse_c_header_array(fn):
     with open(fn) as f:
@@ -60,7 +62,7 @@ Z_ref_fp16 = Z_ref.astype(np.float16)
 # Read encoder FP16 inputs (Z buffer drain output)
 def read_encoder_fp16(fn):
     values = []
-    with open(fn) as f:
+    with open_dump(fn) as f:
         for line in f:
             line = line.strip()
             if not line: continue
@@ -74,7 +76,7 @@ print(f"Encoder FP16 inputs: {len(enc_fp16)} values")
 
 # Read z_buffer_q_stream (drain output, 32 FP16 per line)
 zq_lines = []
-with open('target/sim/vsim/z_buffer_q_stream.txt') as f:
+with open_dump('target/sim/vsim/z_buffer_q_stream.txt') as f:
     for line in f:
         vals = [int(x, 16) for x in line.strip().split()]
         zq_lines.append(vals)